@@ -13,6 +13,7 @@ import time
 import re
 import pandas as pd
 from botocore.exceptions import ClientError, NoCredentialsError, NoRegionError
+from .query_cache import QUERY_CACHE_ENABLED, query_cache
 
 def validate_sql_input(value):
     """Validate input to prevent SQL injection - only allow alphanumeric and safe characters"""
@@ -72,6 +73,12 @@ BENIGN_SIGNIFICANCE = ['Benign', 'Likely_benign', 'Benign/Likely_benign']
 HIGH_IMPACT_CONSEQUENCES = ['stop_gained', 'stop_lost', 'start_lost', 'frameshift_variant', 'splice_donor_variant', 'splice_acceptor_variant']
 MODERATE_IMPACT_CONSEQUENCES = ['missense_variant', 'inframe_deletion', 'inframe_insertion']
 
+# Query result caching
+# Opt-in Athena query result reuse; 0 disables it
+ATHENA_RESULT_REUSE_MINUTES = int(os.environ.get('ATHENA_RESULT_REUSE_MINUTES', '0'))
+# How long a looked-up store version is trusted before asking HealthOmics again
+STORE_VERSION_TTL_SECONDS = int(os.environ.get('STORE_VERSION_TTL_SECONDS', '15'))
+
 # Bedrock configuration
 BEDROCK_CONFIG = Config(connect_timeout=300, read_timeout=300, retries={'max_attempts': 0})
 
@@ -189,9 +196,37 @@ def get_annotation_store_info():
     except Exception as e:
         return {'error': f'Error getting annotation store info: {str(e)}'}
 
+_store_version_memo = {'value': None, 'checked': 0.0}
+
+def get_store_version():
+    """
+    Version token for the variant and annotation stores, derived from their update
+    time and size, so cached query results are invalidated when new data is imported.
+    Returns None when the stores cannot be described.
+    """
+    now = time.time()
+    if now - _store_version_memo['checked'] < STORE_VERSION_TTL_SECONDS:
+        return _store_version_memo['value']
+
+    version = None
+    if omics_client is not None:
+        try:
+            var_store = omics_client.get_variant_store(name=VARIANT_STORE_NAME)
+            ann_store = omics_client.get_annotation_store(name=ANNOTATION_STORE_NAME)
+            version = '|'.join(
+                f"{store['id']}:{store.get('updateTime', '')}:{store.get('storeSizeBytes', 0)}"
+                for store in (var_store, ann_store)
+            )
+        except Exception as e:
+            print(f"Store version lookup failed, bypassing query cache: {e}")
+
+    _store_version_memo.update(value=version, checked=now)
+    return version
+
 def execute_athena_query_on_stores(query, database=None):
     """
-    Execute Athena query on genomics stores using default database
+    Execute Athena query on genomics stores using default database.
+    Results are served from the query cache while the stores are unchanged.
     """
     if athena_client is None:
         raise Exception("Athena client not available. Please configure AWS credentials and region.")
@@ -200,6 +235,17 @@ def execute_athena_query_on_stores(query, database=None):
         if not database:
             database = LAKE_FORMATION_DATABASE
         
+        cache_key = None
+        if QUERY_CACHE_ENABLED:
+            version = get_store_version()
+            if version:
+                cache_key = query_cache.make_key(query, version, database)
+                cached_rows = query_cache.get(cache_key)
+                if cached_rows is not None:
+                    print(f"Serving {len(cached_rows)} cached rows for query on database '{database}'")
+                    # Hand out copies so callers that edit rows never alter the cached result
+                    return [dict(row) for row in cached_rows]
+        
         print(f"Executing query on database '{database}': {query}")
         
         # Print the query execution details in the expected format
@@ -207,14 +253,19 @@ def execute_athena_query_on_stores(query, database=None):
         print(f"Executing query on database '{database}': ")
         print(f"        {query}")
         
-        response = athena_client.start_query_execution(
-            QueryString=query,
-            QueryExecutionContext={'Database': database},
-            WorkGroup='primary',
-            ResultConfiguration={
+        request = {
+            'QueryString': query,
+            'QueryExecutionContext': {'Database': database},
+            'WorkGroup': 'primary',
+            'ResultConfiguration': {
                 'OutputLocation': f's3://aws-athena-query-results-{ACCOUNT_ID}-{REGION}/'
             }
-        )
+        }
+        if ATHENA_RESULT_REUSE_MINUTES > 0:
+            request['ResultReuseConfiguration'] = {
+                'ResultReuseByAgeConfiguration': {'Enabled': True, 'MaxAgeInMinutes': ATHENA_RESULT_REUSE_MINUTES}
+            }
+        response = athena_client.start_query_execution(**request)
         
         query_id = response['QueryExecutionId']
         
@@ -270,6 +321,8 @@ def execute_athena_query_on_stores(query, database=None):
                 break
         
         print(f"Retrieved {len(rows)} total rows from Athena query")
+        if cache_key:
+            query_cache.put(cache_key, [dict(row) for row in rows])
         return rows
         
     except Exception as e:
@@ -0,0 +1,191 @@
+"""Athena query result cache: in-process LRU backed by an on-disk tier.
+
+Entries are keyed by normalized SQL plus a table version token (e.g. the Iceberg
+metadata location), so a new commit to the table naturally misses the cache.
+
+The advanced-strands-agentcore and advanced-v2-s3tables agents carry identical
+copies of this module: each agent image is built from its own directory, so
+neither can import the other's tree. Change both copies together.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_ENABLED = os.environ.get('QUERY_CACHE_ENABLED', 'true').lower() == 'true'
+QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', '256'))
+QUERY_CACHE_MAX_DISK_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_DISK_ENTRIES', '2048'))
+QUERY_CACHE_TTL_SECONDS = int(os.environ.get('QUERY_CACHE_TTL_SECONDS', '86400'))
+QUERY_CACHE_DIR = os.environ.get('QUERY_CACHE_DIR', '/tmp/athena-query-cache')  # nosec B108 — per-container scratch
+# Eviction trims the disk tier to this fraction of max_disk_entries so the next scan is many writes away
+EVICT_TARGET_RATIO = 0.9
+# Writes between directory rescans, so the running count tracks entries written by other processes
+DISK_RESCAN_WRITES = 1000
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and trailing semicolons outside of string literals."""
+    parts = re.split(r"('(?:[^']|'')*')", sql.strip().rstrip(';').strip())
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts))
+
+
+class QueryResultCache:
+    """Two-tier cache of JSON-serializable query results."""
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES, ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+                 cache_dir=QUERY_CACHE_DIR, max_disk_entries=QUERY_CACHE_MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Running count of disk entries; None until the first directory scan
+        self._disk_entries = None
+        self._disk_writes = 0
+
+    @staticmethod
+    def make_key(sql: str, version: str, *extra) -> str:
+        payload = '\n'.join([str(version), normalize_sql(sql)] + [str(e) for e in extra])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+        with self._lock:
+            self._disk_entries = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'memory_entries': len(self._memory),
+            }
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key, now):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - stored['created'] >= self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return stored['created'], stored['value']
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            existed = os.path.exists(path)
+            # A private staging file per writer, so concurrent puts of one key never interleave
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # default=str keeps values such as dates from silently disabling the disk tier
+                json.dump({'created': entry[0], 'value': entry[1]}, f, default=str)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            self._account_disk(0 if existed else 1)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Query cache disk write skipped: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _account_disk(self, delta):
+        """Track the entry count per write and only scan the directory when it is over budget."""
+        with self._lock:
+            self._disk_writes += 1
+            if self._disk_entries is not None and self._disk_writes < DISK_RESCAN_WRITES:
+                self._disk_entries += delta
+                if self._disk_entries <= self.max_disk_entries:
+                    return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Rescan the disk tier and drop the oldest files once it exceeds its entry budget."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        count = len(files)
+        if count > self.max_disk_entries:
+            target = int(self.max_disk_entries * EVICT_TARGET_RATIO)
+            files.sort()
+            for _, path in files[:count - target]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            count = target
+        with self._lock:
+            self._disk_entries = count
+            self._disk_writes = 0
+
+query_cache = QueryResultCache()
@@ -16,7 +16,7 @@ from fastapi import FastAPI
 import uvicorn
 
 from agent.tools.schema_tool import get_table_schema
-from agent.tools.query_tool import execute_query, get_cohort_summary
+from agent.tools.query_tool import execute_query, export_query_results, get_cohort_summary
 from agent.prompts import SYSTEM_PROMPT
 
 runtime_url = os.environ.get("AGENTCORE_RUNTIME_URL", "http://127.0.0.1:9000/")
@@ -34,7 +34,7 @@ model = BedrockModel(
 agent = Agent(
     model=model,
     system_prompt=SYSTEM_PROMPT,
-    tools=[get_table_schema, execute_query, get_cohort_summary],
+    tools=[get_table_schema, execute_query, get_cohort_summary, export_query_results],
     name="variant-interpreter-agent",
     description="Genomics variant interpretation agent that queries VEP-annotated variants in S3 Tables via Athena",
 )
@@ -29,6 +29,8 @@ WORKFLOW (after confirming scope):
 2. Generate targeted SQL with appropriate filters and LIMIT
 3. Execute with execute_query
 4. Interpret results with clinical genomics expertise
+5. If the user asks for a complete list or download (all matching rows), use export_query_results
+   instead of execute_query and report the S3 location and row count
 
 TABLE: variant_db_3.genomic_variants_fixed
 PARTITION KEYS: sample_name, chrom (ALWAYS filter on these for performance)
@@ -64,6 +66,12 @@ Impact distribution (fast aggregation):
   WHERE sample_name = 'X' AND chrom = 'Y' AND genotype != '0|0'
   GROUP BY 1
 
+Typed INFO/FORMAT columns (when get_table_schema lists them):
+  Columns named info_<field> / format_<field> (e.g. info_af, info_dp, format_gq) hold
+  typed copies of info['<FIELD>'] / attributes['<FIELD>']. Filter on them instead of the
+  MAP columns — they avoid string parsing and let Athena skip data using column statistics.
+  Per-allele fields are arrays: WHERE info_af[1] < 0.01 AND format_gq >= 20
+
 Genotype interpretation:
   '0|0' = homozygous reference (no variant)
   '0|1' or '1|0' = heterozygous
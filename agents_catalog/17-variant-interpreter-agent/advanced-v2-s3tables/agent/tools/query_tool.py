@@ -4,52 +4,200 @@ import os
 import json
 import time
 import re
+import uuid
+import asyncio
+import base64
+from typing import AsyncIterator
 import boto3
 import pandas as pd
+import pyarrow as pa
 from strands import tool
 
+from .query_cache import QUERY_CACHE_ENABLED, query_cache
+from .result_reader import (
+    aiter_batches,
+    iter_csv_batches,
+    read_bounded,
+    result_location,
+    result_schema,
+    summarize_parquet
+)
+
 AWS_REGION = os.environ.get('AWS_REGION', 'us-west-2')
 ATHENA_WORKGROUP = os.environ.get('ATHENA_WORKGROUP', 'genomics-variant-analysis')
 ATHENA_CATALOG = os.environ.get('ATHENA_CATALOG', 's3tablescatalog')
 ATHENA_DATABASE = os.environ.get('ATHENA_DATABASE', 'variant_db_3')
 ATHENA_TABLE = os.environ.get('ATHENA_TABLE', 'genomic_variants_fixed')
 VEP_OUTPUT_BUCKET = os.environ.get('VEP_OUTPUT_BUCKET', '')
+S3_TABLE_BUCKET_ARN = os.environ.get('S3_TABLE_BUCKET_ARN', '')
 
 BLOCKED_KEYWORDS = {'DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE', 'GRANT', 'REVOKE'}
 
 
 ATHENA_POLL_MAX_SECONDS = int(os.environ.get('ATHENA_POLL_MAX_SECONDS', '120'))
+ATHENA_EXPORT_MAX_SECONDS = int(os.environ.get('ATHENA_EXPORT_MAX_SECONDS', '900'))
+# Opt-in Athena query result reuse; 0 disables it
+ATHENA_RESULT_REUSE_MINUTES = int(os.environ.get('ATHENA_RESULT_REUSE_MINUTES', '0'))
+# How long a looked-up table version is trusted before asking S3 Tables again
+TABLE_VERSION_TTL_SECONDS = int(os.environ.get('TABLE_VERSION_TTL_SECONDS', '15'))
+
+# (namespace, table) -> (version or None, checked at)
+_table_version_memo = {}
+_table_bucket_arn_memo = []
+
+# Table references after FROM/JOIN: [catalog.][database.]table, optionally double-quoted.
+# Over-matching (e.g. EXTRACT(year FROM col)) only fails the version lookup and bypasses the cache
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+((?:"[^"]+"|[\w$]+)(?:\s*\.\s*(?:"[^"]+"|[\w$]+)){0,2})',
+                        re.IGNORECASE)
+_CTE_NAME = re.compile(r'(?:\bWITH(?:\s+RECURSIVE)?|,)\s*("[^"]+"|\w+)\s+AS\s*\(', re.IGNORECASE)
+
+
+def _table_bucket_arn() -> str:
+    """Return the S3 table bucket ARN, deriving the account from STS when it is not configured."""
+    if S3_TABLE_BUCKET_ARN:
+        return S3_TABLE_BUCKET_ARN
+    if not _table_bucket_arn_memo:
+        account_id = os.environ.get('AWS_ACCOUNT_ID') or \
+            boto3.client('sts', region_name=AWS_REGION).get_caller_identity()['Account']
+        _table_bucket_arn_memo.append(
+            f"arn:aws:s3tables:{AWS_REGION}:{account_id}:bucket/genomics-variant-tables-{account_id}")
+    return _table_bucket_arn_memo[0]
+
+
+def _referenced_tables(query: str) -> set[tuple[str, str]]:
+    """Return the (namespace, table) pairs a query reads, excluding CTE names."""
+    stripped = re.sub(r"'(?:[^']|'')*'", "''", query)
+    ctes = {name.strip('"').lower() for name in _CTE_NAME.findall(stripped)}
+    tables = set()
+    for ref in _TABLE_REF.findall(stripped):
+        parts = [part.strip().strip('"') for part in ref.split('.')]
+        if len(parts) == 1 and parts[0].lower() in ctes:
+            continue
+        namespace = parts[-2] if len(parts) > 1 else ATHENA_DATABASE
+        tables.add((namespace.lower(), parts[-1].lower()))
+    return tables
+
+
+def _table_version(namespace: str = ATHENA_DATABASE, table_name: str = ATHENA_TABLE) -> str | None:
+    """Return a table's current Iceberg metadata location, which changes on every commit.
+
+    Returns None when it cannot be determined, in which case results are not cached.
+    """
+    now = time.time()
+    memo = _table_version_memo.get((namespace, table_name))
+    if memo and now - memo[1] < TABLE_VERSION_TTL_SECONDS:
+        return memo[0]
+
+    try:
+        client = boto3.client('s3tables', region_name=AWS_REGION)
+        table = client.get_table(tableBucketARN=_table_bucket_arn(), namespace=namespace, name=table_name)
+        version = table.get('metadataLocation') or table.get('versionToken')
+    except Exception as e:
+        print(f"Table version lookup for {namespace}.{table_name} failed, bypassing query cache: {e}")
+        version = None
+
+    _table_version_memo[(namespace, table_name)] = (version, now)
+    return version
+
+
+def _query_version(query: str) -> str | None:
+    """Combine the versions of every table a query reads; None if any is unknown."""
+    tables = sorted(_referenced_tables(query))
+    if not tables:
+        return None
+    versions = []
+    for namespace, table_name in tables:
+        version = _table_version(namespace, table_name)
+        if not version:
+            return None
+        versions.append(f"{namespace}.{table_name}={version}")
+    return '|'.join(versions)
 
 
 def _run_athena_query(query: str, max_results: int = 20) -> pd.DataFrame:
-    """Execute Athena query and return DataFrame."""
-    client = boto3.client('athena', region_name=AWS_REGION)
-
-    response = client.start_query_execution(
-        QueryString=query,
-        QueryExecutionContext={'Database': ATHENA_DATABASE, 'Catalog': ATHENA_CATALOG},
-        ResultConfiguration={'OutputLocation': f's3://{VEP_OUTPUT_BUCKET}/athena-results/'},
-        WorkGroup=ATHENA_WORKGROUP
-    )
-    qid = response['QueryExecutionId']
-
+    """Execute Athena query and return DataFrame, serving repeated queries from the result cache."""
+    cache_key = None
+    if QUERY_CACHE_ENABLED:
+        version = _query_version(query)
+        if version:
+            cache_key = query_cache.make_key(query, version, max_results)
+            cached = query_cache.get(cache_key)
+            if cached is not None:
+                return _frame_from_cache(cached)
+
+    df = _execute_athena_query(query, max_results)
+
+    if cache_key and 'error' not in df.columns:
+        try:
+            query_cache.put(cache_key, _frame_to_cache(df))
+        except (pa.ArrowException, ValueError) as e:
+            print(f"Query result not cached: {e}")
+    return df
+
+
+def _frame_to_cache(df: pd.DataFrame) -> dict:
+    """Encode a result frame as a base64 Arrow IPC stream, keeping date, timestamp and nested types."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return {'arrow': base64.b64encode(sink.getvalue().to_pybytes()).decode('ascii')}
+
+
+def _frame_from_cache(cached: dict) -> pd.DataFrame:
+    """Decode a frame stored by ``_frame_to_cache`` with its original column types."""
+    return pa.ipc.open_stream(base64.b64decode(cached['arrow'])).read_all().to_pandas()
+
+
+def _start_query(client, query: str, reuse: bool = True) -> str:
+    """Start an Athena execution and return its QueryExecutionId."""
+    request = {
+        'QueryString': query,
+        'QueryExecutionContext': {'Database': ATHENA_DATABASE, 'Catalog': ATHENA_CATALOG},
+        'ResultConfiguration': {'OutputLocation': f's3://{VEP_OUTPUT_BUCKET}/athena-results/'},
+        'WorkGroup': ATHENA_WORKGROUP
+    }
+    if reuse and ATHENA_RESULT_REUSE_MINUTES > 0:
+        request['ResultReuseConfiguration'] = {
+            'ResultReuseByAgeConfiguration': {'Enabled': True, 'MaxAgeInMinutes': ATHENA_RESULT_REUSE_MINUTES}
+        }
+    return client.start_query_execution(**request)['QueryExecutionId']
+
+
+def _wait_for_query(client, qid: str, max_seconds: int) -> tuple[str, str]:
+    """Poll until the query finishes or ``max_seconds`` pass; return (state, reason)."""
     # Exponential backoff: 0.5s, 1s, 2s, 4s, ... capped at 10s per interval
     elapsed, delay = 0, 0.5
-    while elapsed < ATHENA_POLL_MAX_SECONDS:
+    while True:
         status = client.get_query_execution(QueryExecutionId=qid)
         state = status['QueryExecution']['Status']['State']
-        if state in ('SUCCEEDED', 'FAILED', 'CANCELLED'):
+        if state in ('SUCCEEDED', 'FAILED', 'CANCELLED') or elapsed >= max_seconds:
             break
         time.sleep(delay)
         elapsed += delay
         delay = min(delay * 2, 10)
+    return state, status['QueryExecution']['Status'].get('StateChangeReason', 'Unknown')
 
+
+def _execute_athena_query(query: str, max_results: int = 20) -> pd.DataFrame:
+    """Start an Athena execution, wait for it and return up to ``max_results`` typed rows."""
+    client = boto3.client('athena', region_name=AWS_REGION)
+    qid = _start_query(client, query)
+
+    state, reason = _wait_for_query(client, qid, ATHENA_POLL_MAX_SECONDS)
     if state != 'SUCCEEDED':
-        reason = status['QueryExecution']['Status'].get('StateChangeReason', 'Unknown')
         return pd.DataFrame({'error': [f'Query {state}: {reason}']})
 
-    # NOTE: No NextToken pagination — single page of results only.
-    # Sufficient for agent use (LIMIT-capped queries), but not for bulk export.
+    try:
+        batches = iter_csv_batches(result_location(client, qid), result_schema(client, qid), AWS_REGION)
+        return read_bounded(batches, max_results).to_pandas()
+    except Exception as e:
+        print(f"Reading results from S3 failed, falling back to GetQueryResults: {e}")
+        return _first_result_page(client, qid, max_results)
+
+
+def _first_result_page(client, qid: str, max_results: int) -> pd.DataFrame:
+    """Fetch one page of results through the Athena API (all values as strings)."""
     results = client.get_query_results(QueryExecutionId=qid, MaxResults=max_results + 1)
     rows = results['ResultSet']['Rows']
     if not rows:
@@ -60,6 +208,28 @@ def _run_athena_query(query: str, max_results: int = 20) -> pd.DataFrame:
     return pd.DataFrame(data, columns=columns)
 
 
+async def stream_query_batches(sql_query: str) -> AsyncIterator[pa.RecordBatch]:
+    """Run a SELECT and asynchronously yield the complete result as typed Arrow record batches.
+
+    Intended for bulk export from application code: no LIMIT is added and only one
+    CSV block is held in memory at a time.
+    """
+    error = _validate_query(sql_query)
+    if error:
+        raise ValueError(error)
+
+    client = boto3.client('athena', region_name=AWS_REGION)
+    qid = await asyncio.to_thread(_start_query, client, sql_query)
+    state, reason = await asyncio.to_thread(_wait_for_query, client, qid, ATHENA_EXPORT_MAX_SECONDS)
+    if state != 'SUCCEEDED':
+        raise RuntimeError(f'Query {state}: {reason}')
+
+    schema = await asyncio.to_thread(result_schema, client, qid)
+    location = await asyncio.to_thread(result_location, client, qid)
+    async for batch in aiter_batches(iter_csv_batches(location, schema, AWS_REGION)):
+        yield batch
+
+
 def _validate_query(sql: str) -> str | None:
     """Return error message if query is unsafe, None if OK."""
     tokens = set(re.findall(r'[A-Z]+', sql.upper()))
@@ -109,7 +279,7 @@ def execute_query(sql_query: str) -> str:
         "count": len(df),
         "columns": list(df.columns),
         "results": df.to_dict('records')
-    }, indent=2)
+    }, indent=2, default=str)
 
 
 @tool
@@ -143,4 +313,40 @@ def get_cohort_summary() -> str:
         "status": "success",
         "total_samples": len(df),
         "samples": df.to_dict('records')
-    }, indent=2)
+    }, indent=2, default=str)
+
+
+@tool
+def export_query_results(sql_query: str) -> str:
+    """Export the complete result of a SELECT query to S3 as Parquet.
+
+    Use this instead of execute_query when the user needs every matching row, such as
+    a cohort-wide variant list for download or downstream analysis. No LIMIT is added.
+    Only a bounded summary is returned (row count, column types and a 10-row preview);
+    the full data stays at the returned S3 location.
+
+    Args:
+        sql_query: SQL SELECT query whose full result should be exported.
+
+    Returns:
+        JSON string with the S3 location, row count, columns and preview rows.
+    """
+    error = _validate_query(sql_query)
+    if error:
+        return json.dumps({"status": "error", "message": error})
+
+    location = f's3://{VEP_OUTPUT_BUCKET}/athena-exports/{uuid.uuid4().hex}/'
+    unload = (f"UNLOAD ({sql_query.strip().rstrip(';')}) TO '{location}' "
+              f"WITH (format = 'PARQUET', compression = 'SNAPPY')")
+
+    client = boto3.client('athena', region_name=AWS_REGION)
+    qid = _start_query(client, unload, reuse=False)
+    state, reason = _wait_for_query(client, qid, ATHENA_EXPORT_MAX_SECONDS)
+    if state != 'SUCCEEDED':
+        return json.dumps({"status": "error", "message": f'Query {state}: {reason}'})
+
+    return json.dumps({
+        "status": "success",
+        "location": location,
+        **summarize_parquet(location, AWS_REGION)
+    }, indent=2, default=str)
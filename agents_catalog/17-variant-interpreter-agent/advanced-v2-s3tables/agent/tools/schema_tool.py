@@ -32,6 +32,10 @@ HARDCODED_SCHEMA = {
         {"name": "info", "type": "MAP<STRING,STRING>", "required": False, "notes": "INFO fields including VEP CSQ annotations. Access with info['CSQ']. CSQ is pipe-delimited: Allele|Consequence|IMPACT|SYMBOL|Gene|..."},
         {"name": "attributes", "type": "MAP<STRING,STRING>", "required": False, "notes": "FORMAT/sample fields (GT, DP, GQ, etc.)"},
         {"name": "is_reference_block", "type": "BOOLEAN", "required": False, "notes": "gVCF reference blocks"},
+        {"name": "info_af", "type": "LIST<DOUBLE>", "required": False, "notes": "INFO/AF as typed values, one per alt allele. Present only if promoted; prefer over info['AF']"},
+        {"name": "info_dp", "type": "LONG", "required": False, "notes": "INFO/DP as a typed column. Present only if promoted; prefer over info['DP']"},
+        {"name": "format_dp", "type": "LONG", "required": False, "notes": "FORMAT/DP as a typed column. Present only if promoted; prefer over attributes['DP']"},
+        {"name": "format_gq", "type": "LONG", "required": False, "notes": "FORMAT/GQ as a typed column. Present only if promoted; prefer over attributes['GQ']"},
     ],
     "partition_keys": ["sample_name", "chrom"],
     "source": "hardcoded_fallback"
@@ -9,7 +9,7 @@ import streamlit as st
 from strands import Agent
 from strands.models import BedrockModel
 from agent.tools.schema_tool import get_table_schema
-from agent.tools.query_tool import execute_query, get_cohort_summary
+from agent.tools.query_tool import execute_query, export_query_results, get_cohort_summary
 from agent.prompts import SYSTEM_PROMPT
 
 st.set_page_config(page_title="Genomics Variant Analysis (Local)", page_icon="🧬", layout="wide")
@@ -27,7 +27,7 @@ def get_agent():
     return Agent(
         model=model,
         system_prompt=SYSTEM_PROMPT,
-        tools=[get_table_schema, execute_query, get_cohort_summary]
+        tools=[get_table_schema, execute_query, get_cohort_summary, export_query_results]
     )
 
 
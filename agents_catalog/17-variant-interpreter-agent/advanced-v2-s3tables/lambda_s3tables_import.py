@@ -8,14 +8,21 @@ import boto3
 from datetime import datetime
 
 # Import the existing VCF loading logic
-from load_vcf_schema3 import process_vcf_file, get_table
-from schema_3 import create_schema_tables
+from load_vcf_schema3 import process_vcf_file, get_table, split_field_list
+from schema_3 import create_schema_tables, DEFAULT_PROMOTED_INFO_FIELDS, DEFAULT_PROMOTED_FORMAT_FIELDS
 from utils import load_s3_tables_catalog, create_namespace
 import load_vcf_schema3
 
 DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'genomics-vep-s3tables-dynamotable')
 TABLE_BUCKET_ARN = os.environ.get('TABLE_BUCKET_ARN', '')
 NAMESPACE = 'variant_db_3'
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '1'))
+# Staged writes commit data files in a few large snapshots, so concurrent imports contend less.
+# They buffer rows in memory (a quarter of the function memory), so they are opt-in here.
+IMPORT_STAGED = os.environ.get('IMPORT_STAGED', 'false').lower() == 'true'
+# INFO/FORMAT fields stored as typed columns; set to an empty string to disable
+PROMOTED_INFO_FIELDS = split_field_list(os.environ.get('PROMOTED_INFO_FIELDS', ','.join(DEFAULT_PROMOTED_INFO_FIELDS)))
+PROMOTED_FORMAT_FIELDS = split_field_list(os.environ.get('PROMOTED_FORMAT_FIELDS', ','.join(DEFAULT_PROMOTED_FORMAT_FIELDS)))
 
 
 def update_dynamodb(sample_id, stage, extra_attrs=None):
@@ -129,7 +136,9 @@ def handler(event, context):
         pyarrow_schema = iceberg_table.schema().as_arrow()
 
         # Process VCF and load into S3 Tables
-        process_vcf_file(vep_file, sample_id, iceberg_table, pyarrow_schema)
+        process_vcf_file(vep_file, sample_id, iceberg_table, pyarrow_schema, workers=IMPORT_WORKERS,
+                         staged=IMPORT_STAGED, promote_info=PROMOTED_INFO_FIELDS,
+                         promote_format=PROMOTED_FORMAT_FIELDS)
 
         update_dynamodb(sample_id, 'S3_TABLES_IMPORTED',
                         {'VepOutputFile': vep_file, 'ImportedAt': datetime.now().isoformat()})
@@ -8,17 +8,40 @@ import argparse
 import os
 import sys
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 from pyiceberg.exceptions import NoSuchTableError
+from pyiceberg.io.pyarrow import parquet_files_to_data_files, schema_to_pyarrow
 from utils import load_s3_tables_catalog, retry_operation
 import gzip
 import boto3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from io import TextIOWrapper
+from uuid import uuid4
+from schema_3 import (
+    DEFAULT_PROMOTED_FORMAT_FIELDS,
+    DEFAULT_PROMOTED_INFO_FIELDS,
+    add_promoted_columns,
+    genomic_variants_schema,
+    promoted_column_name
+)
 
 # Configuration
 NAMESPACE = "variant_db_3"
 TABLE_NAME = "genomic_variants_fixed"
 BATCH_SIZE = 100000  # Number of records to process before writing to the table
 MULTI_SAMPLE_BATCH_SIZE = 5000  # Smaller batch for multi-sample VCFs
+COMMIT_BATCH_ROWS = 1000000  # Rows buffered across shards before a single Iceberg commit
+DEFAULT_WORKERS = 1  # Parser processes; 1 parses in-process
+MIN_SHARD_BYTES = 1 << 20  # Lower bound for byte-range shards of plain-text VCFs
+STAGED_COMMIT_FILES = 100  # Staged Parquet files registered per Iceberg commit
+STAGED_FILE_BYTES = 256 << 20  # Target Arrow bytes per staged Parquet file (one sample/chromosome partition)
+# Arrow bytes buffered across shards before the largest partitions are flushed: a quarter
+# of the function memory in Lambda, 2 GiB elsewhere
+STAGED_BUFFER_BYTES = (int(os.environ['AWS_LAMBDA_FUNCTION_MEMORY_SIZE']) << 18
+                       if os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE') else 2 << 30)
 
 
 def parse_s3_uri(s3_uri):
@@ -43,6 +66,11 @@ def parse_s3_uri(s3_uri):
     return s3_parts[0], s3_parts[1]
 
 
+def split_field_list(value):
+    """Split a comma-separated INFO/FORMAT field list, ignoring blanks."""
+    return [field.strip() for field in (value or '').split(',') if field.strip()]
+
+
 def get_table():
     """Get the existing table or fail if it doesn't exist."""
     # Load the catalog using the utility function
@@ -114,6 +142,7 @@ def parse_vcf_header(vcf_file):
             info_id = info_parts[0].split('=')[1]
             info_fields[info_id] = {
                 'id': info_id,
+                'number': info_parts[1].split('=')[1],
                 'type': info_parts[2].split('=')[1]
             }
 
@@ -124,6 +153,7 @@ def parse_vcf_header(vcf_file):
             format_id = format_parts[0].split('=')[1]
             format_fields[format_id] = {
                 'id': format_id,
+                'number': format_parts[1].split('=')[1],
                 'type': format_parts[2].split('=')[1]
             }
 
@@ -161,29 +191,113 @@ def parse_format_field(format_str, sample_str):
     return dict(zip(format_keys, sample_values))
 
 
-def process_vcf_batch_single_sample(batch_records, sample_name, sample_idx):
-    """Process a batch of VCF records for a single sample. Memory-efficient."""
-    n = len(batch_records)
-    sample_name_list = [sample_name] * n
-    variant_name_list = []
-    chrom_list = []
-    pos_list = []
-    ref_list = []
-    alt_list = []
-    qual_list = []
-    filter_list = []
+def select_target_samples(samples, sample_name, vcf_path):
+    """Return the (column_index, sample_name) pairs to load from a VCF."""
+    if sample_name:
+        if sample_name in samples:
+            return [(samples.index(sample_name), sample_name)]
+        print(f"Warning: Sample '{sample_name}' not found. Using first: {samples[0] if samples else 'N/A'}")
+        return [(0, samples[0])] if samples else []
+    if samples:
+        return list(enumerate(samples))
+    name = os.path.basename(vcf_path).split('.')[0]
+    return [(0, name)]
+
+
+def _parse_sample_column(records, format_keys, column):
+    """Build the genotype and FORMAT attribute lists for one sample column."""
     genotype_list = []
-    info_list = []
     attributes_list = []
-    is_reference_block_list = []
+    for fields, keys in zip(records, format_keys):
+        if keys is None or len(fields) <= column or fields[column] == '.':
+            genotype_list.append('./.')
+            attributes_list.append({})
+            continue
+        sample_values = fields[column].split(':')
+        if len(sample_values) < len(keys):
+            sample_values.extend(['.'] * (len(keys) - len(sample_values)))
+        attributes = dict(zip(keys, sample_values))
+        genotype_list.append(attributes.get('GT', './.'))
+        attributes_list.append(attributes)
+    return genotype_list, attributes_list
+
+
+def _parse_typed_value(value, parse):
+    if value is None or value == '.':
+        return None
+    try:
+        return parse(value)
+    except ValueError:
+        return None
+
+
+def _value_parser(arrow_type):
+    if pa.types.is_integer(arrow_type):
+        return int
+    if pa.types.is_floating(arrow_type):
+        return float
+    return str
+
+
+def typed_vcf_array(raw_values, arrow_type):
+    """Convert raw INFO/FORMAT strings (None when absent) into a promoted column's Arrow type.
+
+    Flags become True when present, list types are split on ',' and missing ('.')
+    or unparseable values become nulls.
+    """
+    if pa.types.is_boolean(arrow_type):
+        return pa.array([v is not None for v in raw_values], type=arrow_type)
+    if pa.types.is_list(arrow_type):
+        parse = _value_parser(arrow_type.value_type)
+        return pa.array([None if v is None or v == '.'
+                         else [_parse_typed_value(x, parse) for x in v.split(',')]
+                         for v in raw_values], type=arrow_type)
+    parse = _value_parser(arrow_type)
+    return pa.array([_parse_typed_value(v, parse) for v in raw_values], type=arrow_type)
+
+
+def promoted_fields(arrow_schema, info_fields, format_fields):
+    """Return (column, source, field_id) for every header field with a promoted column in the schema."""
+    names = set(arrow_schema.names)
+    promoted = []
+    for source, definitions in (('info', info_fields), ('format', format_fields)):
+        for field_id in definitions:
+            column = promoted_column_name(source, field_id)
+            if column in names:
+                promoted.append((column, source, field_id))
+    return promoted
+
+
+def _table_from_columns(columns, pyarrow_schema, n):
+    """Assemble a table in schema order, filling columns not produced by the parser with nulls."""
+    return pa.Table.from_arrays([columns[field.name] if field.name in columns else pa.nulls(n, type=field.type)
+                                 for field in pyarrow_schema], schema=pyarrow_schema)
+
+
+def parse_vcf_lines_columnar(lines, target_samples, pyarrow_schema, promoted=()):
+    """Parse a shard of raw VCF lines into one Arrow table covering all target samples.
+
+    Each line is tokenized exactly once. Site-level columns (chrom, pos, ref, alt,
+    qual, filter, info and promoted INFO columns) are converted to Arrow once per
+    shard and shared by every sample; only the genotype and FORMAT columns are
+    built per sample. ``promoted`` lists (column, source, field_id) tuples from
+    ``promoted_fields``.
+    """
+    records = []
+    for line in lines:
+        if not line or line.startswith('#'):
+            continue
+        fields = line.rstrip('\r\n').split('\t')
+        if len(fields) < 8:
+            continue
+        records.append(fields)
 
-    for fields in batch_records:
-        chrom_list.append(fields[0])
-        pos_list.append(int(fields[1]))
-        variant_name_list.append(fields[2])
-        ref_list.append(fields[3])
-        alt_list.append([a if a != '.' else '' for a in fields[4].split(',')])
+    n = len(records)
+    if n == 0 or not target_samples:
+        return pyarrow_schema.empty_table()
 
+    qual_list = []
+    for fields in records:
         qual = None
         if fields[5] != '.':
             try:
@@ -192,128 +306,430 @@ def process_vcf_batch_single_sample(batch_records, sample_name, sample_idx):
                 pass
         qual_list.append(qual)
 
-        filter_val = fields[6] if fields[6] != '.' else None
-        filter_list.append(filter_val)
+    info_list = [parse_info_field(fields[7]) for fields in records]
+    format_keys = [fields[8].split(':') if len(fields) > 9 and fields[8] != '.' else None
+                   for fields in records]
+
+    site_columns = {
+        'variant_name': pa.array([fields[2] for fields in records], type=pa.string()),
+        'chrom': pa.array([fields[0] for fields in records], type=pa.string()),
+        'pos': pa.array([int(fields[1]) for fields in records], type=pa.int64()),
+        'ref': pa.array([fields[3] for fields in records], type=pa.string()),
+        'alt': pa.array([[a if a != '.' else '' for a in fields[4].split(',')] for fields in records],
+                        type=pa.list_(pa.string())),
+        'qual': pa.array(qual_list, type=pa.float64()),
+        'filter': pa.array([fields[6] if fields[6] != '.' else None for fields in records],
+                           type=pa.string()),
+        'info': pa.array(info_list, type=pa.map_(pa.string(), pa.string())),
+        'is_reference_block': pa.array(['END' in d for d in info_list], type=pa.bool_()),
+    }
+    for column, source, field_id in promoted:
+        if source == 'info':
+            site_columns[column] = typed_vcf_array([d.get(field_id) for d in info_list],
+                                                   pyarrow_schema.field(column).type)
+    format_promoted = [(column, field_id) for column, source, field_id in promoted if source == 'format']
 
-        info_dict = parse_info_field(fields[7])
-        info_list.append(info_dict)
-        is_reference_block_list.append('END' in info_dict)
+    sample_tables = []
+    for sample_idx, sname in target_samples:
+        genotype_list, attributes_list = _parse_sample_column(records, format_keys, 9 + sample_idx)
+        columns = dict(site_columns)
+        columns['sample_name'] = pa.repeat(pa.scalar(sname, type=pa.string()), n)
+        columns['genotype'] = pa.array(genotype_list, type=pa.string())
+        columns['attributes'] = pa.array(attributes_list, type=pa.map_(pa.string(), pa.string()))
+        for column, field_id in format_promoted:
+            columns[column] = typed_vcf_array([attrs.get(field_id) for attrs in attributes_list],
+                                              pyarrow_schema.field(column).type)
+        sample_tables.append(_table_from_columns(columns, pyarrow_schema, n))
+
+    return pa.concat_tables(sample_tables)
+
+
+def iter_line_shards(vcf_file, shard_lines):
+    """Yield lists of up to ``shard_lines`` raw data lines from an open VCF stream."""
+    shard = []
+    for line in vcf_file:
+        if line.startswith('#'):
+            continue
+        shard.append(line)
+        if len(shard) >= shard_lines:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
 
-        if len(fields) > 9 + sample_idx:
-            attributes = parse_format_field(fields[8], fields[9 + sample_idx])
-            genotype_list.append(attributes.get('GT', './.'))
-            attributes_list.append(attributes)
-        else:
-            genotype_list.append('./.')
-            attributes_list.append({})
 
-    return {
-        'sample_name': pa.array(sample_name_list, type=pa.string()),
-        'variant_name': pa.array(variant_name_list, type=pa.string()),
-        'chrom': pa.array(chrom_list, type=pa.string()),
-        'pos': pa.array(pos_list, type=pa.int64()),
-        'ref': pa.array(ref_list, type=pa.string()),
-        'alt': pa.array(alt_list, type=pa.list_(pa.string())),
-        'qual': pa.array(qual_list, type=pa.float64()),
-        'filter': pa.array(filter_list, type=pa.string()),
-        'genotype': pa.array(genotype_list, type=pa.string()),
-        'info': pa.array([{str(k): str(v) for k, v in d.items()} for d in info_list],
-                         type=pa.map_(pa.string(), pa.string())),
-        'attributes': pa.array([{str(k): str(v) for k, v in d.items()} for d in attributes_list],
-                               type=pa.map_(pa.string(), pa.string())),
-        'is_reference_block': pa.array(is_reference_block_list, type=pa.bool_()),
-    }
+def _is_byte_splittable(vcf_path):
+    """Plain-text VCFs can be split at arbitrary byte offsets; gzip/BGZF streams cannot."""
+    return not vcf_path.endswith(('.gz', '.bgz'))
 
 
-def process_vcf_file(vcf_path, sample_name=None, table=None, pyarrow_schema=None):
-    """Process a VCF file streaming in chunks, one sample at a time per chunk.
-    
-    Reads VCF lines in small chunks. For each chunk, iterates over samples
-    and writes each sample's data to Iceberg before moving to the next sample.
-    This keeps memory proportional to chunk_size (not chunk_size × num_samples).
+def _open_binary(vcf_path):
+    if vcf_path.startswith('s3://'):
+        import smart_open
+        return smart_open.open(vcf_path, 'rb')
+    return open(vcf_path, 'rb')
+
+
+def _file_size(vcf_path):
+    if vcf_path.startswith('s3://'):
+        bucket, key = parse_s3_uri(vcf_path)
+        return boto3.client('s3').head_object(Bucket=bucket, Key=key)['ContentLength']
+    return os.path.getsize(vcf_path)
+
+
+def _probe_layout(vcf_path, sample_lines=100):
+    """Return the byte offset of the first data line and the average data line length."""
+    data_offset = 0
+    sampled_bytes = 0
+    sampled = 0
+    with _open_binary(vcf_path) as f:
+        for line in f:
+            data_offset += len(line)
+            if line.startswith(b'#CHROM'):
+                break
+        for line in f:
+            sampled_bytes += len(line)
+            sampled += 1
+            if sampled >= sample_lines:
+                break
+    return data_offset, (sampled_bytes // sampled) if sampled else 1
+
+
+def plan_byte_range_shards(vcf_path, shard_lines, min_shard_bytes=MIN_SHARD_BYTES):
+    """Split the data section of a plain-text VCF into [start, end) byte ranges."""
+    data_offset, avg_line_bytes = _probe_layout(vcf_path)
+    size = _file_size(vcf_path)
+    shard_bytes = max(avg_line_bytes * shard_lines, min_shard_bytes)
+    return [(start, min(start + shard_bytes, size))
+            for start in range(data_offset, size, shard_bytes)]
+
+
+def read_byte_range(vcf_path, start, end):
+    """Return the VCF lines whose first byte falls inside [start, end)."""
+    lines = []
+    with _open_binary(vcf_path) as f:
+        if start > 0:
+            # Finish the line straddling the boundary; it belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line.decode('utf-8'))
+            pos += len(line)
+    return lines
+
+
+def _parse_byte_range_task(vcf_path, start, end, target_samples, pyarrow_schema, promoted):
+    """Process-pool entry point for one byte-range shard."""
+    return parse_vcf_lines_columnar(read_byte_range(vcf_path, start, end),
+                                    target_samples, pyarrow_schema, promoted)
+
+
+def _create_executor(workers):
+    """Create a process pool, falling back to in-process parsing where it is unavailable.
+
+    AWS Lambda lacks /dev/shm, so multiprocessing primitives raise OSError there.
+    """
+    if workers <= 1:
+        return None
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"Warning: process pool unavailable ({e}); parsing in a single process")
+        return None
+
+
+def _map_bounded(executor, fn, task_args, max_in_flight):
+    """Yield ``fn(*args)`` for each task in order, keeping at most ``max_in_flight`` queued."""
+    if executor is None:
+        for args in task_args:
+            yield fn(*args)
+        return
+
+    in_flight = deque()
+    for args in task_args:
+        in_flight.append(executor.submit(fn, *args))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def _parse_lines_task(lines, target_samples, arrow_schema, promoted):
+    """Process-pool entry point for one streamed line shard."""
+    return parse_vcf_lines_columnar(lines, target_samples, arrow_schema, promoted)
+
+
+def staged_arrow_schema(table):
+    """Arrow schema for staged Parquet files.
+
+    ``add_files`` only accepts Parquet files without embedded field IDs; columns are
+    resolved through the table's name mapping instead.
+    """
+    return schema_to_pyarrow(table.schema(), include_field_ids=False)
+
+
+def staging_location(table):
+    """Return a unique prefix under the table's data location for one import run."""
+    return f"{table.location().rstrip('/')}/data/staged-{uuid4().hex}"
+
+
+def partition_slices(shard_table):
+    """Split a parsed shard into one table per (sample_name, chrom) partition.
+
+    Each partition is copied out of the shard (rather than sliced), so a buffered
+    partition does not keep the whole shard's buffers alive.
+
+    Returns:
+        list: ((sample_name, chrom), table) pairs
+    """
+    n = shard_table.num_rows
+    if n == 0:
+        return []
+
+    order = pc.sort_indices(shard_table, sort_keys=[('sample_name', 'ascending'), ('chrom', 'ascending')])
+    sample_col = shard_table.column('sample_name').take(order).to_pylist()
+    chrom_col = shard_table.column('chrom').take(order).to_pylist()
+
+    slices = []
+    start = 0
+    for i in range(1, n + 1):
+        if i < n and sample_col[i] == sample_col[start] and chrom_col[i] == chrom_col[start]:
+            continue
+        slices.append(((sample_col[start], chrom_col[start]), shard_table.take(order.slice(start, i - start))))
+        start = i
+    return slices
+
+
+def write_staged_file(partition_table, staging_uri):
+    """Write the rows of one (sample_name, chrom) partition as a single Parquet data file.
+
+    Rows are sorted by position so the file carries tight min/max statistics on ``pos``.
+
+    Returns:
+        str: URI of the written file
+    """
+    filesystem, root = pafs.FileSystem.from_uri(staging_uri)
+    if isinstance(filesystem, pafs.LocalFileSystem):
+        filesystem.create_dir(root, recursive=True)
+    scheme = staging_uri.split('://', 1)[0] + '://' if '://' in staging_uri else ''
+
+    path = f"{root}/{uuid4().hex}.parquet"
+    pq.write_table(partition_table.sort_by([('pos', 'ascending')]), path, filesystem=filesystem)
+    return scheme + path
+
+
+class StagedPartitionWriter:
+    """Buffer parsed rows per (sample_name, chrom) partition across shards.
+
+    A shard of a multi-sample VCF holds only ``BATCH_SIZE / samples`` lines, so writing
+    each shard's partitions directly would create one tiny file per sample per shard.
+    Partitions are instead written once they reach ``file_bytes`` Arrow bytes, once their
+    chromosome is complete (a later shard no longer contains it, as in a sorted VCF),
+    or, largest first, when more than ``buffer_bytes`` are buffered. In that last case
+    the buffer is drained to half, so files hold about ``buffer_bytes / (2 * samples)``
+    bytes at least; size ``buffer_bytes`` to the available memory for large cohorts.
+    """
+
+    def __init__(self, staging_uri, file_bytes=STAGED_FILE_BYTES, buffer_bytes=STAGED_BUFFER_BYTES):
+        self.staging_uri = staging_uri
+        self.file_bytes = file_bytes
+        self.buffer_bytes = buffer_bytes
+        self.partitions = {}  # (sample_name, chrom) -> list of tables
+        self.partition_bytes = {}
+        self.buffered_bytes = 0
+
+    def _flush(self, key):
+        tables = self.partitions.pop(key)
+        self.buffered_bytes -= self.partition_bytes.pop(key)
+        return write_staged_file(pa.concat_tables(tables), self.staging_uri)
+
+    def add(self, shard_table):
+        """Buffer a parsed shard and return the URIs of any files written."""
+        slices = partition_slices(shard_table)
+        shard_chroms = {chrom for (_, chrom), _ in slices}
+        for key, partition_table in slices:
+            self.partitions.setdefault(key, []).append(partition_table)
+            self.partition_bytes[key] = self.partition_bytes.get(key, 0) + partition_table.nbytes
+            self.buffered_bytes += partition_table.nbytes
+
+        ready = [key for key, size in self.partition_bytes.items()
+                 if size >= self.file_bytes or (slices and key[1] not in shard_chroms)]
+        paths = [self._flush(key) for key in ready]
+        if self.buffered_bytes > self.buffer_bytes:
+            while self.partitions and self.buffered_bytes > self.buffer_bytes // 2:
+                paths.append(self._flush(max(self.partition_bytes, key=self.partition_bytes.get)))
+        return paths
+
+    def flush_all(self):
+        """Write every buffered partition and return the file URIs."""
+        return [self._flush(key) for key in list(self.partitions)]
+
+
+def process_vcf_file(vcf_path, sample_name=None, table=None, pyarrow_schema=None,
+                     workers=DEFAULT_WORKERS, staged=False, promote_info=(), promote_format=()):
+    """Process a VCF file in shards and commit the parsed rows to Iceberg in batches.
+
+    Data lines are grouped into shards of about ``BATCH_SIZE`` records (lines × samples).
+    Each shard is parsed once for all target samples into a columnar Arrow table,
+    across a pool of ``workers`` processes when ``workers`` > 1. Plain-text VCFs are
+    split into byte ranges that each worker reads on its own; compressed VCFs are
+    streamed by this process and their shards dispatched to the pool.
+
+    By default shard tables are buffered until ``COMMIT_BATCH_ROWS`` rows are pending
+    and then appended as one Iceberg snapshot. With ``staged=True`` shard rows are
+    buffered per sample/chromosome partition (up to ``STAGED_BUFFER_BYTES``) and written as
+    Parquet data files of up to ``STAGED_FILE_BYTES`` Arrow bytes, and this process acts as the single committer,
+    registering every ``STAGED_COMMIT_FILES`` files with one fast append and merging
+    manifests on the final commit.
+
+    INFO/FORMAT fields listed in ``promote_info``/``promote_format`` are added to the
+    table as typed columns (using the types declared in this file's header) before
+    loading. Every promoted column present in the table schema is populated.
     """
     print(f"Processing VCF file: {vcf_path}")
+    staged = staged and table is not None
 
     with open_vcf_file(vcf_path) as vcf_file:
         samples, info_fields, format_fields = parse_vcf_header(vcf_file)
-
-        if sample_name:
-            if sample_name in samples:
-                target_samples = [(samples.index(sample_name), sample_name)]
-            else:
-                print(f"Warning: Sample '{sample_name}' not found. Using first: {samples[0] if samples else 'N/A'}")
-                target_samples = [(0, samples[0])] if samples else []
-        elif samples:
-            target_samples = list(enumerate(samples))
+        target_samples = select_target_samples(samples, sample_name, vcf_path)
+
+        if table is not None and (promote_info or promote_format):
+            # Concurrent imports may race to add the same columns; after a refresh the
+            # retry sees them in place and becomes a no-op
+            _commit_with_retry(table, lambda: add_promoted_columns(
+                table, info_fields, format_fields, promote_info, promote_format))
+            pyarrow_schema = table.schema().as_arrow()
+
+        if staged:
+            arrow_schema = staged_arrow_schema(table)
+            staging_uri = staging_location(table)
+            print(f"Staging Parquet data files under {staging_uri}")
         else:
-            name = os.path.basename(vcf_path).split('.')[0]
-            target_samples = [(0, name)]
+            arrow_schema = pyarrow_schema or genomic_variants_schema.as_arrow()
+        promoted = promoted_fields(arrow_schema, info_fields, format_fields)
+        if promoted:
+            print(f"Populating promoted columns: {', '.join(column for column, _, _ in promoted)}")
 
         num_samples = len(target_samples)
-        num_columns = len(samples)  # total columns in VCF (drives per-line memory)
-        chunk_size = max(10000, BATCH_SIZE // max(num_columns, 1))
-        print(f"Will process {num_samples} sample(s) from {num_columns}-column VCF, chunk_size={chunk_size}")
-
-        total_lines = 0
-        chunk = []
-
-        for line in vcf_file:
-            if line.startswith('#'):
-                continue
-            fields = line.strip().split('\t')
-            if len(fields) < 8:
-                continue
-            chunk.append(fields)
-
-            if len(chunk) >= chunk_size:
-                _flush_chunk(chunk, target_samples, table, pyarrow_schema)
-                total_lines += len(chunk)
-                print(f"  Lines processed: {total_lines}")
-                chunk = []
-
-        if chunk:
-            _flush_chunk(chunk, target_samples, table, pyarrow_schema)
-            total_lines += len(chunk)
-
-    total_records = total_lines * num_samples
-    print(f"Done: {total_lines} VCF lines × {num_samples} samples = {total_records} records")
+        shard_lines = max(1, BATCH_SIZE // max(num_samples, 1))
+        print(f"Will process {num_samples} sample(s) from {len(samples)}-column VCF, "
+              f"shard_lines={shard_lines}, workers={workers}, staged={staged}")
+
+        executor = _create_executor(workers)
+        try:
+            if executor is not None and _is_byte_splittable(vcf_path):
+                shards = plan_byte_range_shards(vcf_path, shard_lines)
+                print(f"Split into {len(shards)} byte-range shards")
+                parse_fn = _parse_byte_range_task
+                parse_args = ((vcf_path, start, end, target_samples, arrow_schema, promoted)
+                              for start, end in shards)
+            else:
+                parse_fn = _parse_lines_task
+                parse_args = ((lines, target_samples, arrow_schema, promoted)
+                              for lines in iter_line_shards(vcf_file, shard_lines))
+
+            results = _map_bounded(executor, parse_fn, parse_args, workers * 2)
+            if staged:
+                total_records = _commit_staged_results(results, table, StagedPartitionWriter(
+                    staging_uri, file_bytes=STAGED_FILE_BYTES, buffer_bytes=STAGED_BUFFER_BYTES))
+            else:
+                total_records = _commit_shard_results(results, table if pyarrow_schema else None)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    print(f"Done: {total_records} records across {num_samples} sample(s)")
     return None
 
 
-def _flush_chunk(chunk, target_samples, table, pyarrow_schema):
-    """Write one chunk of VCF lines to Iceberg, one sample at a time."""
-    for sample_idx, sname in target_samples:
-        data_arrays = process_vcf_batch_single_sample(chunk, sname, sample_idx)
-        if table and pyarrow_schema:
-            write_to_iceberg(table, data_arrays, pyarrow_schema)
-        del data_arrays
-
-
-def write_to_iceberg(table, data_arrays, pyarrow_schema):
-    """Write data to the Iceberg table, refreshing metadata to avoid stale commits."""
-    arrow_table = pa.Table.from_arrays([
-        data_arrays['sample_name'],
-        data_arrays['variant_name'],
-        data_arrays['chrom'],
-        data_arrays['pos'],
-        data_arrays['ref'],
-        data_arrays['alt'],
-        data_arrays['qual'],
-        data_arrays['filter'],
-        data_arrays['genotype'],
-        data_arrays['info'],
-        data_arrays['attributes'],
-        data_arrays['is_reference_block']
-    ], schema=pyarrow_schema)
+def _commit_shard_results(results, table):
+    """Buffer parsed shard tables and commit them in batches of ``COMMIT_BATCH_ROWS`` rows."""
+    pending = []
+    pending_rows = 0
+    total_records = 0
 
+    for shard_table in results:
+        if shard_table.num_rows == 0:
+            continue
+        pending.append(shard_table)
+        pending_rows += shard_table.num_rows
+        total_records += shard_table.num_rows
+        if pending_rows >= COMMIT_BATCH_ROWS:
+            if table is not None:
+                write_to_iceberg(table, pa.concat_tables(pending))
+            print(f"  Records processed: {total_records}")
+            pending = []
+            pending_rows = 0
+
+    if pending and table is not None:
+        write_to_iceberg(table, pa.concat_tables(pending))
+    return total_records
+
+
+def _commit_staged_results(results, table, writer):
+    """Single committer for staged mode: one fast append per ``STAGED_COMMIT_FILES`` files."""
+    pending = []
+    total_records = 0
+
+    for shard_table in results:
+        pending.extend(writer.add(shard_table))
+        total_records += shard_table.num_rows
+        if len(pending) >= STAGED_COMMIT_FILES:
+            commit_data_files(table, pending)
+            print(f"  Records processed: {total_records}")
+            pending = []
+
+    # The last commit merges manifests so one import leaves a compact manifest list
+    pending.extend(writer.flush_all())
+    if pending:
+        commit_data_files(table, pending, merge_manifests=True)
+    return total_records
+
+
+def commit_data_files(table, file_paths, merge_manifests=False):
+    """Register already-written Parquet files with the table in a single snapshot.
+
+    Uses a fast append (new manifest, no rewrite of existing ones) unless
+    ``merge_manifests`` is set, in which case small manifests are merged into the
+    new snapshot. Data files are immutable, so a conflicting commit is simply
+    retried against the refreshed table head.
+    """
+    def _commit():
+        with table.transaction() as tx:
+            if tx.table_metadata.name_mapping() is None:
+                tx.set_properties(**{
+                    'schema.name-mapping.default': tx.table_metadata.schema().name_mapping.model_dump_json()
+                })
+            update = tx.update_snapshot()
+            with (update.merge_append() if merge_manifests else update.fast_append()) as snapshot:
+                for data_file in parquet_files_to_data_files(io=table.io,
+                                                             table_metadata=tx.table_metadata,
+                                                             file_paths=iter(file_paths)):
+                    snapshot.append_data_file(data_file)
+
+    print(f"Committing {len(file_paths)} staged data files to Iceberg table...")
+    _commit_with_retry(table, _commit)
+    print(f"Successfully committed {len(file_paths)} data files to {NAMESPACE}.{TABLE_NAME}")
+
+
+def write_to_iceberg(table, arrow_table):
+    """Append an Arrow batch as one Iceberg snapshot, refreshing metadata to avoid stale commits."""
     print(f"Writing {len(arrow_table)} rows to Iceberg table...")
+    _commit_with_retry(table, lambda: table.append(arrow_table))
+    print(f"Successfully wrote {len(arrow_table)} rows to {NAMESPACE}.{TABLE_NAME}")
 
+
+def _commit_with_retry(table, commit):
+    """Run ``commit`` against a freshly refreshed table, backing off on commit conflicts."""
     import time
     for attempt in range(10):
         try:
             table.refresh()
-            table.append(arrow_table)
-            print(f"Successfully wrote {len(arrow_table)} rows to {NAMESPACE}.{TABLE_NAME}")
+            commit()
             return
         except Exception as e:
             err_str = str(e).lower()
@@ -327,7 +743,8 @@ def write_to_iceberg(table, data_arrays, pyarrow_schema):
 
 def main():
     """Main function to load VCF/GVCF data into the Iceberg table."""
-    global bucket_arn, NAMESPACE, TABLE_NAME, BATCH_SIZE
+    global bucket_arn, NAMESPACE, TABLE_NAME, BATCH_SIZE, COMMIT_BATCH_ROWS, STAGED_COMMIT_FILES
+    global STAGED_FILE_BYTES, STAGED_BUFFER_BYTES
 
     parser = argparse.ArgumentParser(description='Load VCF/GVCF files into Iceberg table')
     parser.add_argument('vcf_files', nargs='+', help='VCF or GVCF file paths to load')
@@ -336,17 +753,41 @@ def main():
     parser.add_argument('--namespace', default=NAMESPACE, help=f'Iceberg namespace (default: {NAMESPACE})')
     parser.add_argument('--table', default=TABLE_NAME, help=f'Iceberg table name (default: {TABLE_NAME})')
     parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
-                        help=f'Number of records to process from each sample before writing (default: {BATCH_SIZE})')
+                        help=f'Number of records (lines x samples) parsed per shard (default: {BATCH_SIZE})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Number of parser processes (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--commit-rows', type=int, default=COMMIT_BATCH_ROWS,
+                        help=f'Number of records buffered per Iceberg commit (default: {COMMIT_BATCH_ROWS})')
+    parser.add_argument('--staged', action='store_true',
+                        help='Write Parquet data files per sample/chromosome and commit them in batches from one committer')
+    parser.add_argument('--commit-files', type=int, default=STAGED_COMMIT_FILES,
+                        help=f'Staged data files registered per Iceberg commit (default: {STAGED_COMMIT_FILES})')
+    parser.add_argument('--file-mb', type=int, default=STAGED_FILE_BYTES >> 20,
+                        help=f'Target in-memory MB per staged data file (default: {STAGED_FILE_BYTES >> 20})')
+    parser.add_argument('--buffer-mb', type=int, default=STAGED_BUFFER_BYTES >> 20,
+                        help=f'In-memory MB of staged rows buffered across shards (default: {STAGED_BUFFER_BYTES >> 20})')
+    parser.add_argument('--promote-info', default='',
+                        help='Comma-separated INFO fields to add as typed columns, e.g. AF,DP '
+                             f'(suggested: {",".join(DEFAULT_PROMOTED_INFO_FIELDS)})')
+    parser.add_argument('--promote-format', default='',
+                        help='Comma-separated FORMAT fields to add as typed columns, e.g. DP,GQ '
+                             f'(suggested: {",".join(DEFAULT_PROMOTED_FORMAT_FIELDS)})')
 
     args = parser.parse_args()
     bucket_arn = args.bucket_arn
     NAMESPACE = args.namespace
     TABLE_NAME = args.table
     BATCH_SIZE = args.batch_size
+    COMMIT_BATCH_ROWS = args.commit_rows
+    STAGED_COMMIT_FILES = args.commit_files
+    STAGED_FILE_BYTES = args.file_mb << 20
+    STAGED_BUFFER_BYTES = args.buffer_mb << 20
+
+    promote_info = split_field_list(args.promote_info)
+    promote_format = split_field_list(args.promote_format)
 
     print("Getting table...")
     table = get_table()
-    pyarrow_schema = table.schema().as_arrow()
 
     # Process each VCF file
     for vcf_file in args.vcf_files:
@@ -370,7 +811,10 @@ def main():
 
         try:
             # Process the file in batches and write directly to the table
-            process_vcf_file(vcf_file, args.sample, table, pyarrow_schema)
+            # Re-read the schema per file: an earlier file may have promoted new columns
+            pyarrow_schema = table.schema().as_arrow()
+            process_vcf_file(vcf_file, args.sample, table, pyarrow_schema, workers=args.workers,
+                             staged=args.staged, promote_info=promote_info, promote_format=promote_format)
         except Exception as e:
             print(f"Error processing file {vcf_file}: {e}")
             import traceback
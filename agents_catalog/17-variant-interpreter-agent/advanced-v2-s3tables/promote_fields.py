@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Script to promote VCF INFO/FORMAT fields into typed columns of variant_db_3.genomic_variants_fixed.
+The field types are read from a VCF header; with --backfill, rows that were loaded before the
+columns existed are rewritten partition by partition with values taken from the info/attributes maps.
+"""
+
+import argparse
+from pyiceberg.expressions import And, EqualTo
+import load_vcf_schema3
+from load_vcf_schema3 import (
+    _commit_with_retry,
+    get_table,
+    open_vcf_file,
+    parse_vcf_header,
+    promoted_fields,
+    split_field_list,
+    typed_vcf_array
+)
+from schema_3 import DEFAULT_PROMOTED_FORMAT_FIELDS, DEFAULT_PROMOTED_INFO_FIELDS, add_promoted_columns
+
+
+def _map_column(rows, name):
+    """Convert a MAP<STRING,STRING> column to a list of dicts."""
+    return [dict(m) if m else {} for m in rows.column(name).to_pylist()]
+
+
+def backfill_partition(table, sample_name, chrom, promoted):
+    """Fill empty promoted columns for one (sample_name, chrom) partition.
+
+    Returns the number of rows rewritten (0 when the partition is already populated).
+    """
+    row_filter = And(EqualTo('sample_name', sample_name), EqualTo('chrom', chrom))
+    rows = table.scan(row_filter=row_filter).to_arrow()
+    if rows.num_rows == 0:
+        return 0
+
+    missing = [(column, source, field_id) for column, source, field_id in promoted
+               if rows.column(column).null_count == rows.num_rows]
+    if not missing:
+        return 0
+
+    maps = {}
+    for column, source, field_id in missing:
+        map_name = 'info' if source == 'info' else 'attributes'
+        if map_name not in maps:
+            maps[map_name] = _map_column(rows, map_name)
+        values = typed_vcf_array([m.get(field_id) for m in maps[map_name]], rows.schema.field(column).type)
+        rows = rows.set_column(rows.schema.get_field_index(column), rows.schema.field(column), values)
+
+    # Skip the rewrite when none of the fields occur in this partition
+    if all(rows.column(column).null_count == rows.num_rows for column, _, _ in missing):
+        return 0
+
+    _commit_with_retry(table, lambda: table.overwrite(rows, overwrite_filter=row_filter))
+    return rows.num_rows
+
+
+def backfill_promoted_columns(table, promoted):
+    """Backfill promoted columns across every partition of the table.
+
+    Rewrites whole partitions, so run it while no imports are writing to the table.
+    """
+    partitions = table.inspect.partitions().column('partition').to_pylist()
+    print(f"Backfilling {len(promoted)} column(s) across {len(partitions)} partition(s)")
+
+    total_rows = 0
+    for i, partition in enumerate(partitions, 1):
+        sample_name, chrom = partition['sample_bucket'], partition['chrom']
+        rewritten = backfill_partition(table, sample_name, chrom, promoted)
+        total_rows += rewritten
+        if rewritten:
+            print(f"  [{i}/{len(partitions)}] {sample_name}/{chrom}: {rewritten} rows")
+    print(f"Backfill complete: {total_rows} rows rewritten")
+    return total_rows
+
+
+def main():
+    """Add typed columns for INFO/FORMAT fields and optionally backfill existing rows."""
+    parser = argparse.ArgumentParser(description='Promote VCF INFO/FORMAT fields into typed Iceberg columns')
+    parser.add_argument('header_vcf', help='VCF or GVCF (local or s3://) whose header declares the field types')
+    parser.add_argument('--bucket-arn', required=True, help='S3Tables bucket ARN')
+    parser.add_argument('--namespace', default=load_vcf_schema3.NAMESPACE,
+                        help=f'Iceberg namespace (default: {load_vcf_schema3.NAMESPACE})')
+    parser.add_argument('--table', default=load_vcf_schema3.TABLE_NAME,
+                        help=f'Iceberg table name (default: {load_vcf_schema3.TABLE_NAME})')
+    parser.add_argument('--info', default=','.join(DEFAULT_PROMOTED_INFO_FIELDS),
+                        help=f'Comma-separated INFO fields (default: {",".join(DEFAULT_PROMOTED_INFO_FIELDS)})')
+    parser.add_argument('--format', default=','.join(DEFAULT_PROMOTED_FORMAT_FIELDS),
+                        help=f'Comma-separated FORMAT fields (default: {",".join(DEFAULT_PROMOTED_FORMAT_FIELDS)})')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Populate the promoted columns for rows that are already loaded')
+    args = parser.parse_args()
+
+    load_vcf_schema3.bucket_arn = args.bucket_arn
+    load_vcf_schema3.NAMESPACE = args.namespace
+    load_vcf_schema3.TABLE_NAME = args.table
+
+    with open_vcf_file(args.header_vcf) as vcf_file:
+        _, info_fields, format_fields = parse_vcf_header(vcf_file)
+
+    print("Getting table...")
+    table = get_table()
+    add_promoted_columns(table, info_fields, format_fields,
+                         split_field_list(args.info), split_field_list(args.format))
+
+    promoted = promoted_fields(table.schema().as_arrow(), info_fields, format_fields)
+    print(f"Promoted columns: {', '.join(column for column, _, _ in promoted) or 'none'}")
+
+    if args.backfill and promoted:
+        backfill_promoted_columns(table, promoted)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ os.environ["BYPASS_TOOL_CONSENT"] = "true"
 from strands import Agent
 from strands.models import BedrockModel
 from agent.tools.schema_tool import get_table_schema
-from agent.tools.query_tool import execute_query, get_cohort_summary
+from agent.tools.query_tool import execute_query, export_query_results, get_cohort_summary
 from agent.prompts import SYSTEM_PROMPT
 
 
@@ -30,7 +30,7 @@ def main():
     agent = Agent(
         model=model,
         system_prompt=SYSTEM_PROMPT,
-        tools=[get_table_schema, execute_query, get_cohort_summary]
+        tools=[get_table_schema, execute_query, get_cohort_summary, export_query_results]
     )
 
     print("\n🧬 S3 Tables Variant Interpreter Agent (Local)")
@@ -1,4 +1,5 @@
-from typing import Dict
+import re
+from typing import Dict, List
 from pyiceberg.catalog import Catalog
 from pyiceberg.schema import Schema
 from pyiceberg.table import Table
@@ -9,7 +10,8 @@ from pyiceberg.types import (
     DoubleType,
     MapType,
     BooleanType,
-    ListType
+    ListType,
+    IcebergType
 )
 from pyiceberg.partitioning import PartitionSpec, PartitionField
 from pyiceberg.transforms import IdentityTransform, BucketTransform
@@ -83,6 +85,72 @@ genomic_variants_sort_order: SortOrder = SortOrder(
 )
 
 
+# INFO/FORMAT fields promoted out of the info/attributes maps into typed columns.
+# Population frequencies and depth/quality are what cohort filters hit most often.
+DEFAULT_PROMOTED_INFO_FIELDS = ['AF', 'AC', 'AN', 'DP', 'EAS_AF', 'EUR_AF', 'AFR_AF', 'AMR_AF', 'SAS_AF']
+DEFAULT_PROMOTED_FORMAT_FIELDS = ['DP', 'GQ']
+
+_VCF_SCALAR_TYPES = {
+    'Integer': LongType,
+    'Float': DoubleType,
+    'Flag': BooleanType,
+    'Character': StringType,
+    'String': StringType,
+}
+
+
+def promoted_column_name(source: str, field_id: str) -> str:
+    """Column name for a promoted field, e.g. ('info', 'EAS_AF') -> 'info_eas_af'."""
+    return f"{source}_{re.sub(r'[^0-9a-zA-Z_]', '_', field_id).lower()}"
+
+
+def vcf_field_type(definition: dict) -> IcebergType:
+    """Map a parsed ##INFO/##FORMAT header definition to an Iceberg type.
+
+    Flags and Number=1 (or 0) fields become scalars; any other Number
+    (A, R, G, ., or >1) becomes a list of the declared type.
+    """
+    scalar = _VCF_SCALAR_TYPES.get(definition.get('type'), StringType)()
+    if isinstance(scalar, BooleanType) or definition.get('number', '1') in ('0', '1'):
+        return scalar
+    # element_id is a placeholder; update_schema() assigns fresh field IDs
+    return ListType(element_id=1, element_type=scalar, element_required=False)
+
+
+def add_promoted_columns(table: Table,
+                         info_fields: Dict[str, dict],
+                         format_fields: Dict[str, dict],
+                         promote_info: List[str],
+                         promote_format: List[str]) -> List[str]:
+    """Evolve the table schema with typed columns for the requested INFO/FORMAT fields.
+
+    Fields must be declared in the VCF header so their type is known. Columns that
+    already exist are left untouched. Returns the names of the columns added.
+    """
+    existing = {field.name for field in table.schema().fields}
+    additions = []
+    for source, definitions, requested in (('info', info_fields, promote_info),
+                                           ('format', format_fields, promote_format)):
+        for field_id in requested:
+            column = promoted_column_name(source, field_id)
+            if column in existing:
+                continue
+            if field_id not in definitions:
+                print(f"Skipping {source.upper()}/{field_id}: not declared in the VCF header")
+                continue
+            definition = definitions[field_id]
+            additions.append((column, vcf_field_type(definition),
+                              f"{source.upper()}/{field_id} (Number={definition.get('number', '.')}, "
+                              f"Type={definition.get('type', 'String')})"))
+
+    if additions:
+        with table.update_schema() as update:
+            for column, field_type, doc in additions:
+                update.add_column(column, field_type, doc=doc)
+        print(f"Added promoted columns: {', '.join(column for column, _, _ in additions)}")
+    return [column for column, _, _ in additions]
+
+
 def create_schema_tables(catalog: Catalog, namespace: str) -> Dict[str, Table]:
     table_name_genomic_variants: str = "genomic_variants_fixed"
 
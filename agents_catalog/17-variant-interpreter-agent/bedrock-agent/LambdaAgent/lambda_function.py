@@ -6,6 +6,8 @@ from datetime import datetime
 import csv
 import io
 import gzip
+import heapq
+from collections import Counter
 
 # Environment variables
 REGION = os.environ.get('REGION','us-east-1')
@@ -136,175 +138,181 @@ def retrieve_existing_vep_report(patient_id):
         'result': report
     })
 
-def parse_vep_output(vcf_content):
-    variants = []
-    csq_fields = ["Allele", "Consequence", "IMPACT", "SYMBOL", "Gene", "Feature_type", 
-                  "Feature", "BIOTYPE", "EXON", "INTRON", "HGVSc", "HGVSp", 
-                  "cDNA_position", "CDS_position", "Protein_position", "Amino_acids", 
-                  "Codons", "Existing_variation", "DISTANCE", "STRAND", "FLAGS", 
-                  "SYMBOL_SOURCE", "HGNC_ID"]
-    
+# Default VEP CSQ layout, used when the VCF header does not declare one
+CSQ_FIELDS = ["Allele", "Consequence", "IMPACT", "SYMBOL", "Gene", "Feature_type",
+              "Feature", "BIOTYPE", "EXON", "INTRON", "HGVSc", "HGVSp",
+              "cDNA_position", "CDS_position", "Protein_position", "Amino_acids",
+              "Codons", "Existing_variation", "DISTANCE", "STRAND", "FLAGS",
+              "SYMBOL_SOURCE", "HGNC_ID"]
+
+# CSQ sub-fields the analysis reads
+CSQ_USED_FIELDS = ("consequence", "impact", "symbol", "biotype", "hgvsc", "hgvsp")
+
+IMPACT_RANK = {'HIGH': 3, 'MODERATE': 2, 'LOW': 1, 'MODIFIER': 0}
+
+# Limits that keep the analysis size independent of the number of variants
+MAX_STORED_VARIANTS = 1000  # Limit for storing detailed variants
+MAX_GENES = 100             # Limit for number of genes to track
+MAX_VARIANTS_PER_GENE = 50  # Limit variants per gene
+
+
+def parse_csq_header(line):
+    """Return the CSQ sub-field names declared by a ##INFO=<ID=CSQ,...> header line."""
+    marker = 'Format: '
+    start = line.find(marker)
+    if start == -1:
+        return None
+    end = line.find('"', start)
+    return line[start + len(marker):end if end != -1 else None].strip().split('|')
+
+
+def iter_vep_records(lines):
+    """
+    Stream one record per CSQ annotation from the lines of a VEP-annotated VCF.
+    The CSQ layout is read once from the header; only the fields used by the
+    analysis are extracted, so each record is a small fixed-size dict.
+    Args:
+        lines: Iterable of VCF lines (e.g. a text stream)
+    """
+    csq_fields = CSQ_FIELDS
     header_found = False
-    header_columns = None
-    
-    # Process the VCF content in chunks
-    chunk_size = 1000  # Adjust based on your needs
-    current_chunk = []
-    
-    for line in vcf_content.split('\n'):
-        if line.startswith('#CHROM'):
-            header_found = True
-            header_columns = line.strip().split('\t')
+    indexes = None
+
+    for line in lines:
+        if line.startswith('#'):
+            if line.startswith('##INFO=<ID=CSQ,'):
+                csq_fields = parse_csq_header(line) or CSQ_FIELDS
+            elif line.startswith('#CHROM'):
+                header_found = True
+                lowered = [field.lower() for field in csq_fields]
+                indexes = [(name, lowered.index(name)) for name in CSQ_USED_FIELDS if name in lowered]
             continue
-        
-        if not header_found or not line.strip() or line.startswith('#'):
+        if not header_found:
             continue
-            
-        current_chunk.append(line)
-        
-        # Process chunk when it reaches the specified size
-        if len(current_chunk) >= chunk_size:
-            variants.extend(process_variant_chunk(current_chunk, csq_fields))
-            current_chunk = []
-    
-    # Process any remaining variants
-    if current_chunk:
-        variants.extend(process_variant_chunk(current_chunk, csq_fields))
-    
-    return variants
 
-def process_variant_chunk(chunk, csq_fields):
-    chunk_variants = []
-    for line in chunk:
-        fields = line.strip().split('\t')
+        fields = line.rstrip('\r\n').split('\t', 8)
         if len(fields) < 8:
             continue
-            
-        # Extract basic variant information
-        chrom, pos, id_, ref, alt, qual, filter_, info = fields[:8]
-        
-        # Parse INFO field to get CSQ
-        info_dict = {}
-        for info_field in info.split(';'):
-            if '=' in info_field:
-                key, value = info_field.split('=', 1)
-                info_dict[key] = value
-        
-        if 'CSQ' not in info_dict:
-            continue
-            
-        # Process each CSQ annotation
-        for csq in info_dict['CSQ'].split(','):
+        info = fields[7]
+
+        # Locate CSQ without splitting the whole INFO column
+        if info.startswith('CSQ='):
+            start = 4
+        else:
+            start = info.find(';CSQ=')
+            if start == -1:
+                continue
+            start += 5
+        end = info.find(';', start)
+        csq_value = info[start:] if end == -1 else info[start:end]
+
+        for csq in csq_value.split(','):
             csq_values = csq.split('|')
             if len(csq_values) != len(csq_fields):
                 continue
-                
-            variant = {
-                'chr': chrom,
-                'pos': int(pos),
-                'id': id_,
-                'ref': ref,
-                'alt': alt,
-                'qual': qual,
-                'filter': filter_
+            record = {
+                'chr': fields[0],
+                'pos': fields[1],
+                'ref': fields[3],
+                'alt': fields[4]
             }
-            
-            for field, value in zip(csq_fields, csq_values):
-                variant[field.lower()] = value if value else None
-                
-            for key, value in info_dict.items():
-                if key != 'CSQ':
-                    variant[f'info_{key.lower()}'] = value
-                    
-            chunk_variants.append(variant)
-    
-    return chunk_variants
+            for name, index in indexes:
+                record[name] = csq_values[index] or None
+            yield record
 
-def analyze_variants(variants):
+
+def parse_vep_output(vcf_content):
+    """Parse VEP-annotated VCF text into a list of per-annotation records."""
+    return list(iter_vep_records(vcf_content.split('\n')))
+
+
+class TopK:
+    """Keep the k highest-ranked items seen, earliest first among equal ranks."""
+
+    def __init__(self, k):
+        self.k = k
+        self.seen = 0
+        self._heap = []
+
+    def __len__(self):
+        return self.seen
+
+    def add(self, rank, item):
+        self.seen += 1
+        entry = (rank, -self.seen, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class VariantAggregator:
     """
-    Analyze variants with memory optimizations
-    Args:
-        variants: List of variants to analyze
+    Single-pass aggregation of VEP records. Counters are keyed by chromosome,
+    impact, consequence, biotype and gene, so memory depends on those vocabularies
+    and the stored-variant limits, not on the number of variants.
     """
-    # Initialize analysis structure with limits
-    MAX_STORED_VARIANTS = 1000  # Limit for storing detailed variants
-    MAX_GENES = 100            # Limit for number of genes to track
-    
-    analysis = {
-        'total_variants': len(variants),
-        'variants_per_chromosome': {},
-        'impact_summary': {
-            'HIGH': 0,
-            'MODERATE': 0,
-            'LOW': 0,
-            'MODIFIER': 0
-        },
-        'consequence_types': {},
-        'transcript_effects': {
-            'coding_variants': [],
-            'non_coding_variants': [],
-            'splice_variants': [],
-            'regulatory_variants': []
-        },
-        'gene_impacts': {},
-        'biotype_summary': {},
-        'detailed_variants': []
-    }
-    
-    # Track high-impact genes separately for efficient sorting
-    gene_impact_scores = {}
-    
-    for variant in variants:
-        # Basic variant location
-        chrom = variant['chr']
-        analysis['variants_per_chromosome'][chrom] = analysis['variants_per_chromosome'].get(chrom, 0) + 1
-        
-        # Impact analysis
-        impact = variant.get('impact', 'UNKNOWN')
-        analysis['impact_summary'][impact] = analysis['impact_summary'].get(impact, 0) + 1
-        
-        # Process consequences
-        consequences = variant.get('consequence', '').split('&')
+
+    def __init__(self, max_stored=MAX_STORED_VARIANTS, max_genes=MAX_GENES,
+                 max_per_gene=MAX_VARIANTS_PER_GENE):
+        self.max_genes = max_genes
+        self.max_per_gene = max_per_gene
+        self.total_variants = 0
+        self.variants_per_chromosome = Counter()
+        self.impact_summary = Counter({'HIGH': 0, 'MODERATE': 0, 'LOW': 0, 'MODIFIER': 0})
+        self.consequence_types = Counter()
+        self.biotype_summary = Counter()
+        self.transcript_effects = {
+            'coding_variants': TopK(max_stored),
+            'non_coding_variants': TopK(max_stored),
+            'splice_variants': TopK(max_stored),
+            'regulatory_variants': TopK(max_stored)
+        }
+        self.detailed_variants = TopK(max_stored)
+        self.gene_impact_scores = {}
+
+    def add(self, variant):
+        self.total_variants += 1
+        location = f"{variant['chr']}:{variant['pos']}"
+        self.variants_per_chromosome[variant['chr']] += 1
+
+        impact = variant.get('impact') or 'UNKNOWN'
+        rank = IMPACT_RANK.get(impact, -1)
+        self.impact_summary[impact] += 1
+
+        consequences = (variant.get('consequence') or '').split('&')
+        gene = variant.get('symbol')
         for consequence in consequences:
             if not consequence:
                 continue
-                
-            analysis['consequence_types'][consequence] = analysis['consequence_types'].get(consequence, 0) + 1
-            
-            # Create basic variant info (only store essential data)
-            variant_info = {
-                'location': f"{variant['chr']}:{variant['pos']}",
-                'gene': variant.get('symbol')
-            }
-            
-            # Categorize effects with size limits
-            if any(term in consequence.lower() for term in ['missense', 'nonsense', 'frameshift', 'inframe']):
-                if len(analysis['transcript_effects']['coding_variants']) < MAX_STORED_VARIANTS:
-                    variant_info.update({
-                        'consequence': consequence,
-                        'hgvsp': variant.get('hgvsp'),
-                        'impact': impact
-                    })
-                    analysis['transcript_effects']['coding_variants'].append(variant_info)
-                    
-            elif 'splice' in consequence.lower():
-                if len(analysis['transcript_effects']['splice_variants']) < MAX_STORED_VARIANTS:
-                    variant_info['hgvsc'] = variant.get('hgvsc')
-                    analysis['transcript_effects']['splice_variants'].append(variant_info)
-                    
-            elif 'regulatory' in consequence.lower():
-                if len(analysis['transcript_effects']['regulatory_variants']) < MAX_STORED_VARIANTS:
-                    analysis['transcript_effects']['regulatory_variants'].append(variant_info)
-                    
-            elif 'non_coding' in consequence.lower():
-                if len(analysis['transcript_effects']['non_coding_variants']) < MAX_STORED_VARIANTS:
-                    analysis['transcript_effects']['non_coding_variants'].append(variant_info)
-
-        # Track gene impacts efficiently
-        gene = variant.get('symbol')
+            self.consequence_types[consequence] += 1
+
+            # Categorize effects; each category keeps its highest-impact entries
+            term = consequence.lower()
+            variant_info = {'location': location, 'gene': gene}
+            if any(t in term for t in ('missense', 'nonsense', 'frameshift', 'inframe')):
+                variant_info.update({
+                    'consequence': consequence,
+                    'hgvsp': variant.get('hgvsp'),
+                    'impact': impact
+                })
+                self.transcript_effects['coding_variants'].add(rank, variant_info)
+            elif 'splice' in term:
+                variant_info['hgvsc'] = variant.get('hgvsc')
+                self.transcript_effects['splice_variants'].add(rank, variant_info)
+            elif 'regulatory' in term:
+                self.transcript_effects['regulatory_variants'].add(rank, variant_info)
+            elif 'non_coding' in term:
+                self.transcript_effects['non_coding_variants'].add(rank, variant_info)
+
+        first_consequence = consequences[0] or None
         if gene:
-            if gene not in gene_impact_scores:
-                gene_impact_scores[gene] = {
+            scores = self.gene_impact_scores.get(gene)
+            if scores is None:
+                scores = self.gene_impact_scores[gene] = {
                     'high_impact': 0,
                     'moderate_impact': 0,
                     'low_impact': 0,
@@ -312,73 +320,83 @@ def analyze_variants(variants):
                     'total_variants': 0,
                     'variants': []
                 }
-            
             impact_key = f"{impact.lower()}_impact"
-            gene_impact_scores[gene][impact_key] += 1
-            gene_impact_scores[gene]['total_variants'] += 1
-            
-            # Store limited variants per gene
-            if len(gene_impact_scores[gene]['variants']) < 50:  # Limit variants per gene
-                gene_impact_scores[gene]['variants'].append({
-                    'location': f"{variant['chr']}:{variant['pos']}",
-                    'consequence': consequences[0] if consequences else None,
+            scores[impact_key] = scores.get(impact_key, 0) + 1
+            scores['total_variants'] += 1
+            if len(scores['variants']) < self.max_per_gene:
+                scores['variants'].append({
+                    'location': location,
+                    'consequence': first_consequence,
                     'hgvsc': variant.get('hgvsc'),
                     'hgvsp': variant.get('hgvsp')
                 })
 
-        # Biotype summary
         biotype = variant.get('biotype')
         if biotype:
-            analysis['biotype_summary'][biotype] = analysis['biotype_summary'].get(biotype, 0) + 1
+            self.biotype_summary[biotype] += 1
 
-        # Store detailed variants for high and moderate impacts
-        if impact in ['HIGH', 'MODERATE'] and len(analysis['detailed_variants']) < MAX_STORED_VARIANTS:
-            analysis['detailed_variants'].append({
-                'location': f"{variant['chr']}:{variant['pos']}",
+        # Keep detailed records for high and moderate impacts
+        if impact in ('HIGH', 'MODERATE'):
+            self.detailed_variants.add(rank, {
+                'location': location,
                 'ref': variant['ref'],
                 'alt': variant['alt'],
                 'gene': gene,
-                'consequence': consequences[0] if consequences else None,
+                'consequence': first_consequence,
                 'impact': impact,
                 'hgvsc': variant.get('hgvsc'),
                 'hgvsp': variant.get('hgvsp')
             })
 
-    # Process gene impacts and sort for most significant
-    sorted_genes = sorted(
-        gene_impact_scores.items(),
-        key=lambda x: (x[1]['high_impact'], x[1]['moderate_impact'], x[1]['total_variants']),
-        reverse=True
-    )[:MAX_GENES]
-    
-    analysis['gene_impacts'] = {
-        gene: data for gene, data in sorted_genes
-    }
+    def result(self):
+        """Build the analysis dict from the running aggregates."""
+        sorted_genes = heapq.nlargest(
+            self.max_genes,
+            self.gene_impact_scores.items(),
+            key=lambda x: (x[1]['high_impact'], x[1]['moderate_impact'], x[1]['total_variants'])
+        )
+        transcript_effects = {name: top.items() for name, top in self.transcript_effects.items()}
 
-    # Generate summary statistics
-    analysis['summary'] = {
-        'total_variants': analysis['total_variants'],
-        'high_impact_variants': analysis['impact_summary']['HIGH'],
-        'moderate_impact_variants': analysis['impact_summary']['MODERATE'],
-        'coding_variants': len(analysis['transcript_effects']['coding_variants']),
-        'splice_variants': len(analysis['transcript_effects']['splice_variants']),
-        'most_affected_genes': [
-            {
-                'gene': gene,
-                'high_impact': data['high_impact'],
-                'moderate_impact': data['moderate_impact'],
-                'total_variants': data['total_variants']
+        return {
+            'total_variants': self.total_variants,
+            'variants_per_chromosome': dict(self.variants_per_chromosome),
+            'impact_summary': dict(self.impact_summary),
+            'consequence_types': dict(self.consequence_types),
+            'transcript_effects': transcript_effects,
+            'gene_impacts': dict(sorted_genes),
+            'biotype_summary': dict(self.biotype_summary),
+            'detailed_variants': self.detailed_variants.items(),
+            'summary': {
+                'total_variants': self.total_variants,
+                'high_impact_variants': self.impact_summary['HIGH'],
+                'moderate_impact_variants': self.impact_summary['MODERATE'],
+                'coding_variants': len(self.transcript_effects['coding_variants']),
+                'splice_variants': len(self.transcript_effects['splice_variants']),
+                'genes_with_variants': len(self.gene_impact_scores),
+                'most_affected_genes': [
+                    {
+                        'gene': gene,
+                        'high_impact': data['high_impact'],
+                        'moderate_impact': data['moderate_impact'],
+                        'total_variants': data['total_variants']
+                    }
+                    for gene, data in sorted_genes[:10]  # Top 10 genes only
+                ],
+                'top_consequences': self.consequence_types.most_common(5)
             }
-            for gene, data in sorted_genes[:10]  # Top 10 genes only
-        ],
-        'top_consequences': sorted(
-            analysis['consequence_types'].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
-    }
+        }
 
-    return analysis
+
+def analyze_variants(variants):
+    """
+    Analyze variants in a single pass with bounded memory
+    Args:
+        variants: Iterable of VEP records (a list or a generator from iter_vep_records)
+    """
+    aggregator = VariantAggregator()
+    for variant in variants:
+        aggregator.add(variant)
+    return aggregator.result()
 
 def vep_feature_extraction(patient_id):
     if not patient_id:
@@ -387,38 +405,11 @@ def vep_feature_extraction(patient_id):
     key = f"omics-test-out/{patient_id}/pubdir/annotation/null/null.ann.vcf.gz"
     
     try:
-        variants = []
-        # Stream the file in chunks
+        # Decode, parse and aggregate in one streaming pass over the S3 object
         response = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
-        chunk_size = 1024 * 1024  # 1MB chunks
-        
         with gzip.GzipFile(fileobj=response['Body']) as gz:
-            buffer = ""
-            while True:
-                chunk = gz.read(chunk_size)
-                if not chunk:
-                    break
-                
-                try:
-                    buffer += chunk.decode('utf-8')
-                except UnicodeDecodeError:
-                    buffer += chunk.decode('latin-1')
-                
-                lines = buffer.split('\n')
-                # Keep the last incomplete line in the buffer
-                buffer = lines[-1]
-                # Process complete lines
-                if len(lines) > 1:
-                    chunk_variants = parse_vep_output('\n'.join(lines[:-1]))
-                    variants.extend(chunk_variants)
-        
-        # Process any remaining content in the buffer
-        if buffer:
-            chunk_variants = parse_vep_output(buffer)
-            variants.extend(chunk_variants)
-        
-        analysis = analyze_variants(variants)
-        return analysis
+            lines = io.TextIOWrapper(gz, encoding='utf-8', errors='replace')
+            return analyze_variants(iter_vep_records(lines))
         
     except Exception as e:
         return create_response(500, {'error': f'Error processing VCF file: {str(e)}'})
@@ -6,6 +6,8 @@ import logging
 from strands import Agent, tool
 from strands.models import BedrockModel
 
+from .response_cache import response_cache
+
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """You are an expert protein researcher specializing in protein analysis using UniProt database. Help users search for and analyze proteins by retrieving detailed information through the UniProt API tools.
@@ -88,6 +90,26 @@ def create_agent() -> Agent:
 # --- Internal helpers ---
 
 
+def _fetch_json(url: str) -> dict:
+    """GET a UniProt URL through the response cache and decode the JSON body.
+
+    Stale cache entries are revalidated with the ETag/Last-Modified UniProt returns.
+    """
+
+    def send(validators):
+        req = urllib.request.Request(url, headers=validators)
+        req.add_header("User-Agent", "AgentCore-UniProt-Agent/1.0")
+        try:
+            with urllib.request.urlopen(req, timeout=25) as response:
+                return 200, dict(response.headers.items()), response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, {}, b""
+            raise
+
+    return json.loads(response_cache.fetch("GET", url, send).content.decode("utf-8"))
+
+
 def _construct_search_query(query: str, organism: str) -> str:
     organism_lower = organism.lower()
     organism_map = {
@@ -131,10 +153,7 @@ def _search_uniprot_proteins(query: str, limit: int) -> str:
     url = f"{base_url}?{urllib.parse.urlencode(params)}"
 
     try:
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "AgentCore-UniProt-Agent/1.0")
-        with urllib.request.urlopen(req, timeout=25) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        data = _fetch_json(url)
     except Exception as e:
         return f"Error accessing UniProt database: {e}"
 
@@ -190,10 +209,7 @@ def _get_protein_details(
     url = f"https://rest.uniprot.org/uniprotkb/{accession_id}?{urllib.parse.urlencode(params)}"
 
     try:
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "AgentCore-UniProt-Agent/1.0")
-        with urllib.request.urlopen(req, timeout=25) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        data = _fetch_json(url)
     except urllib.error.HTTPError as e:
         if e.code == 404:
             return f"Protein '{accession_id}' not found in UniProt database."
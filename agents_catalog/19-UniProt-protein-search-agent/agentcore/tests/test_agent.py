@@ -1,10 +1,13 @@
 import json
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Every test sees the live (mocked) API unless it installs its own cache
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
 
 from agent.agent_config.agent import (
     search_proteins,
@@ -14,6 +17,7 @@ from agent.agent_config.agent import (
     _get_protein_details,
     create_agent,
 )
+from agent.agent_config.response_cache import ResponseCache
 
 
 class TestConstructSearchQuery(unittest.TestCase):
@@ -146,6 +150,54 @@ class TestGetProteinDetails(unittest.TestCase):
         assert "not found" in result.lower()
 
 
+class TestResponseCaching(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.cache_dir.name, s3_uri="", enabled=True)
+        patcher = patch("agent.agent_config.agent.response_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def _mock_response(self, payload, headers=None):
+        mock_response = MagicMock()
+        mock_response.__enter__ = MagicMock(return_value=mock_response)
+        mock_response.__exit__ = MagicMock(return_value=False)
+        mock_response.read.return_value = json.dumps(payload).encode("utf-8")
+        mock_response.headers.items.return_value = list((headers or {}).items())
+        return mock_response
+
+    @patch("agent.agent_config.agent.urllib.request.urlopen")
+    def test_repeated_lookup_served_from_cache(self, mock_urlopen):
+        mock_urlopen.return_value = self._mock_response(
+            {"proteinDescription": {"recommendedName": {"fullName": {"value": "Insulin"}}}}
+        )
+        first = _get_protein_details("P01308", False, False)
+        second = _get_protein_details("P01308", False, False)
+        assert first == second
+        assert "Insulin" in second
+        mock_urlopen.assert_called_once()
+        assert self.cache.stats()["hit"] == 1
+
+    @patch("agent.agent_config.agent.urllib.request.urlopen")
+    def test_stale_entry_revalidated_with_etag(self, mock_urlopen):
+        from urllib.error import HTTPError
+        self.cache.ttls = {"rest.uniprot.org": 0}
+        mock_urlopen.side_effect = [
+            self._mock_response(
+                {"proteinDescription": {"recommendedName": {"fullName": {"value": "Insulin"}}}},
+                headers={"ETag": '"2024_01"'},
+            ),
+            HTTPError(url="http://test", code=304, msg="Not Modified", hdrs={}, fp=None),
+        ]
+        _get_protein_details("P01308", False, False)
+        result = _get_protein_details("P01308", False, False)
+        assert "Insulin" in result
+        revalidation_request = mock_urlopen.call_args_list[1][0][0]
+        assert revalidation_request.get_header("If-none-match") == '"2024_01"'
+        assert self.cache.stats()["revalidated"] == 1
+
+
 class TestCreateAgent(unittest.TestCase):
     @patch("agent.agent_config.agent.BedrockModel")
     @patch("agent.agent_config.agent.Agent")
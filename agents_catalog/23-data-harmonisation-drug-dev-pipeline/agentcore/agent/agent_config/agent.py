@@ -4,8 +4,11 @@ This agent harmonizes pharmaceutical pipeline data from multiple companies,
 enriches it with biomedical ontologies, and validates the results.
 """
 
+import itertools
 import json
+import os
 import re
+from bisect import bisect_right
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -19,6 +22,14 @@ except ImportError:
 
 MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
 
+# Candidates buffered per Parquet row group when streaming feeds
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Feed and Parquet paths passed to tools are resolved inside this directory
+PIPELINE_DATA_DIR = os.environ.get("PIPELINE_DATA_DIR", "/tmp/pipeline_data")  # nosec B108 - per-container scratch
+
+OBO_SYNONYM_PATTERN = re.compile(r'^synonym: "((?:[^"\\]|\\.)*)" (\w+)')
+
 SYSTEM_PROMPT = """You are a pharmaceutical pipeline data assistant specialized in analyzing drug development data.
 Your primary task is to interpret user queries about drug development pipelines, clinical trials,
 and pharmaceutical research, and provide relevant insights based on the knowledge base.
@@ -114,13 +125,324 @@ def _normalize_therapeutic_area(area: str) -> str:
     return mapping.get(area.lower(), area)
 
 
+class OntologyMatcher:
+    """Aho-Corasick automaton over ontology synonyms.
+
+    Built once from a mapping of synonym -> annotation, it finds every synonym
+    occurring in a text (case-insensitive substring match) in a single pass, so
+    lookup cost depends on the text length rather than on the vocabulary size.
+    Larger vocabularies can be loaded from OBO dumps such as MONDO or ChEBI.
+    """
+
+    def __init__(self, mappings: dict | None = None):
+        self.synonyms = []      # synonym id -> (synonym, annotation)
+        self._lengths = []      # synonym id -> length of the lowercased synonym
+        self._goto = [{}]       # node -> {character: node}
+        self._terminal = [-1]   # node -> id of the synonym ending at the node
+        self._fail = [0]
+        self._output = [0]      # node -> nearest terminal node on its failure chain
+        self._compiled = True
+        self._joined = None
+        for synonym, annotation in (mappings or {}).items():
+            self.add(synonym, annotation)
+
+    def __len__(self) -> int:
+        return len(self.synonyms)
+
+    def add(self, synonym: str, annotation: Any) -> None:
+        """Add a synonym; the first annotation added for a synonym is kept."""
+        key = synonym.lower()
+        if not key:
+            return
+        goto, node = self._goto, 0
+        for char in key:
+            child = goto[node].get(char)
+            if child is None:
+                child = len(goto)
+                goto[node][char] = child
+                goto.append({})
+                self._terminal.append(-1)
+            node = child
+        if self._terminal[node] == -1:
+            self._terminal[node] = len(self.synonyms)
+            self.synonyms.append((synonym, annotation))
+            self._lengths.append(len(key))
+            self._compiled = False
+            self._joined = None
+
+    def add_obo(self, obo_path: str, scopes: tuple = ("EXACT",)) -> "OntologyMatcher":
+        """Add the names and synonyms of every term in an OBO file."""
+        for synonym, annotation in load_obo_synonyms(obo_path, scopes):
+            self.add(synonym, annotation)
+        return self
+
+    def _compile(self) -> None:
+        """Compute failure and output links breadth-first."""
+        goto, terminal = self._goto, self._terminal
+        fail, output = [0] * len(goto), [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = fail[child] if terminal[fail[child]] != -1 else output[fail[child]]
+                queue.append(child)
+        self._fail, self._output = fail, output
+        self._compiled = True
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, synonym id) for every synonym occurrence, overlaps included."""
+        if not self._compiled:
+            self._compile()
+        goto, fail, terminal, output, lengths = self._goto, self._fail, self._terminal, self._output, self._lengths
+        node = 0
+        for end, char in enumerate(text.lower(), 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if terminal[node] != -1 else output[node]
+            while match:
+                synonym_id = terminal[match]
+                yield end - lengths[synonym_id], end, synonym_id
+                match = output[match]
+
+    def find_all(self, text: str) -> list[tuple]:
+        """Return non-overlapping synonym matches, preferring the longest match at each position.
+
+        Returns:
+            List of (synonym, annotation, start, end) tuples in text order.
+        """
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        selected, covered = [], 0
+        for start, end, synonym_id in matches:
+            if start >= covered:
+                synonym, annotation = self.synonyms[synonym_id]
+                selected.append((synonym, annotation, start, end))
+                covered = end
+        return selected
+
+    def longest(self, text: str) -> Any:
+        """Return the annotation of the longest synonym in the text (earliest on ties), or None."""
+        best = max(self.iter_matches(text), key=lambda m: (m[1] - m[0], -m[0]), default=None)
+        return self.synonyms[best[2]][1] if best else None
+
+    def containing(self, text: str) -> Any:
+        """Return the annotation of the first synonym that contains the text, or None."""
+        if self._joined is None:
+            keys = [synonym.lower() for synonym, _ in self.synonyms]
+            self._starts, position = [], 0
+            for key in keys:
+                self._starts.append(position)
+                position += len(key) + 1
+            self._joined = "\x00".join(keys)
+        position = self._joined.find(text.lower())
+        if position == -1 or not self.synonyms:
+            return None
+        return self.synonyms[bisect_right(self._starts, position) - 1][1]
+
+
+def load_obo_synonyms(obo_path: str, scopes: tuple = ("EXACT",)):
+    """Yield (synonym, annotation) pairs for the terms of an OBO ontology file.
+
+    Each non-obsolete [Term] yields its name and its synonyms of the given
+    scopes, all sharing one annotation such as
+    {"mondo_id": "MONDO_0005148", "mondo_label": "type 2 diabetes mellitus"}.
+    """
+    def emit(term):
+        if term.get("id") and term.get("name") and not term.get("obsolete"):
+            prefix, _, local_id = term["id"].partition(":")
+            annotation = {f"{prefix.lower()}_id": f"{prefix}_{local_id}", f"{prefix.lower()}_label": term["name"]}
+            yield term["name"], annotation
+            for synonym in term["synonyms"]:
+                yield synonym, annotation
+
+    term = None
+    with open(obo_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                if term:
+                    yield from emit(term)
+                term = {"synonyms": []} if line == "[Term]" else None
+            elif term is None or not line:
+                continue
+            elif line.startswith("id: "):
+                term["id"] = line[4:]
+            elif line.startswith("name: "):
+                term["name"] = line[6:]
+            elif line.startswith("is_obsolete: true"):
+                term["obsolete"] = True
+            elif line.startswith("synonym: "):
+                match = OBO_SYNONYM_PATTERN.match(line)
+                if match and match.group(2) in scopes:
+                    term["synonyms"].append(match.group(1).replace('\\"', '"'))
+    if term:
+        yield from emit(term)
+
+
+# Compiled once per process; extend with INDICATION_MATCHER.add_obo(path) for full ontologies
+INDICATION_MATCHER = OntologyMatcher(INDICATION_MAPPINGS)
+
+
 def _get_indication_ontology(indication: str) -> dict:
     if indication in INDICATION_MAPPINGS:
         return INDICATION_MAPPINGS[indication]
-    for key, value in INDICATION_MAPPINGS.items():
-        if key.lower() in indication.lower() or indication.lower() in key.lower():
-            return value
-    return {}
+    match = INDICATION_MATCHER.longest(indication)
+    if match is None:
+        match = INDICATION_MATCHER.containing(indication)
+    return match if match is not None else {}
+
+
+def _novo_nordisk_candidate(c: dict, phase_key: str, number: int) -> dict:
+    return {
+        "candidate_id": f"NVO_{number:03d}",
+        "company": "Novo Nordisk", "company_code": "NVO",
+        "compound_name": c.get("name", ""),
+        "indication": c.get("indication", ""),
+        "therapeutic_area": _normalize_therapeutic_area(c.get("therapy_area", "")),
+        "development_phase": _normalize_phase(phase_key),
+        "compound_type": "Biologic" if any(w in c.get("description", "").lower() for w in ["insulin", "peptide", "antibody"]) else "Unknown",
+        "mechanism_of_action": c.get("description", ""),
+        "status": "Current",
+    }
+
+
+def _pfizer_candidate(c: dict, phase_key: str, number: int) -> dict:
+    return {
+        "candidate_id": f"PFE_{number:03d}",
+        "company": "Pfizer", "company_code": "PFE",
+        "compound_name": c.get("name", ""),
+        "indication": c.get("indication", ""),
+        "therapeutic_area": _normalize_therapeutic_area(c.get("area_of_focus", "")),
+        "development_phase": _normalize_phase(phase_key),
+        "compound_type": c.get("compound_type", "Unknown"),
+        "mechanism_of_action": None,
+        "status": c.get("status", "Current"),
+    }
+
+
+def _novartis_candidate(c: dict, phase_key: str, number: int) -> dict:
+    mechanism = c.get("mechanism", "")
+    if "radioligand" in mechanism.lower():
+        ctype = "Radioligand"
+    elif "monoclonal antibody" in mechanism.lower():
+        ctype = "Biologic"
+    else:
+        ctype = "Unknown"
+    return {
+        "candidate_id": f"NVS_{number:03d}",
+        "company": "Novartis", "company_code": "NVS",
+        "compound_name": c.get("compound", ""),
+        "indication": c.get("indication", ""),
+        "therapeutic_area": _normalize_therapeutic_area(c.get("therapeutic_area", "")),
+        "development_phase": _normalize_phase(phase_key),
+        "compound_type": ctype,
+        "mechanism_of_action": mechanism,
+        "status": "Current",
+    }
+
+
+# Per-company adapters mapping one raw candidate to the common data model
+COMPANY_ADAPTERS = {
+    "novo_nordisk": _novo_nordisk_candidate,
+    "pfizer": _pfizer_candidate,
+    "novartis": _novartis_candidate,
+}
+
+CANDIDATE_FIELDS = [
+    "candidate_id", "company", "company_code", "compound_name", "indication",
+    "therapeutic_area", "development_phase", "compound_type", "mechanism_of_action", "status",
+]
+
+
+def _company_records(company_key: str, company_data: dict):
+    """Yield (candidate, phase_key) pairs from one company's raw pipeline export."""
+    if company_key == "novartis":
+        for c in company_data.get("pipeline_candidates", []):
+            yield c, c.get("phase", "")
+    else:
+        key = "sample_pipeline_candidates" if company_key == "pfizer" else "pipeline_candidates"
+        for phase_key, candidates in company_data.get(key, {}).items():
+            for c in candidates:
+                yield c, phase_key
+
+
+def _feed_records(company_key: str, path: str):
+    """Yield (candidate, phase_key) pairs from a feed file without loading NDJSON feeds whole.
+
+    NDJSON/JSON-lines feeds hold one candidate per line with its phase in a "phase" field;
+    a .json file is read as a company export.
+    """
+    if path.endswith(".json"):
+        with open(path) as f:
+            yield from _company_records(company_key, json.load(f))
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                c = json.loads(line)
+                yield c, c.get("phase", "")
+
+
+def _data_path(path: str) -> str:
+    """Resolve a tool-supplied path inside PIPELINE_DATA_DIR, rejecting paths that escape it."""
+    root = os.path.realpath(PIPELINE_DATA_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Path {path!r} is outside the pipeline data directory {root}")
+    return resolved
+
+
+def _write_parquet(rows, schema, output_path: str, on_batch=None) -> int:
+    """Write dict rows to Parquet in row groups via a staging file; return the row group count.
+
+    The staging file is removed if writing fails, so a failed run leaves no partial output.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    row_groups = 0
+    staging_path = f"{output_path}.tmp"
+    try:
+        with pq.ParquetWriter(staging_path, schema, write_statistics=True) as writer:
+            while batch := list(itertools.islice(rows, PARQUET_ROW_GROUP_SIZE)):
+                if on_batch:
+                    on_batch(batch)
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema), row_group_size=PARQUET_ROW_GROUP_SIZE)
+                row_groups += 1
+        os.replace(staging_path, output_path)
+    except BaseException:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        raise
+    return row_groups
+
+
+def _parquet_candidates(path: str):
+    """Yield candidates from a harmonized Parquet file one row group at a time."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for i in range(parquet_file.num_row_groups):
+        yield from parquet_file.read_row_group(i).to_pylist()
+
+
+def _harmonized_input(harmonized_data_json: str, harmonized_path: str):
+    """Return (candidates, document) from harmonized JSON or a harmonized Parquet file."""
+    if harmonized_path:
+        return _parquet_candidates(_data_path(harmonized_path)), {}
+    data = json.loads(harmonized_data_json)
+    return data.get("unified_pipeline", []), data
+
+
+def _summarize(stats: dict, candidates) -> None:
+    for c in candidates:
+        stats["total_candidates"] += 1
+        for key, field in (("by_company", "company"), ("by_phase", "development_phase"), ("by_therapeutic_area", "therapeutic_area")):
+            stats[key][c[field]] = stats[key].get(c[field], 0) + 1
 
 
 @tool
@@ -140,78 +462,19 @@ def harmonize_pipeline_data(data_json: str) -> str:
     """
     raw_data = json.loads(data_json)
     all_candidates = []
-    companies_info = []
     candidate_id_counter = 1
 
     for company_key, company_data in raw_data.items():
-        if company_key == "novo_nordisk":
-            code, name = "NVO", "Novo Nordisk"
-            for phase_key, candidates in company_data.get("pipeline_candidates", {}).items():
-                phase = _normalize_phase(phase_key)
-                for c in candidates:
-                    all_candidates.append({
-                        "candidate_id": f"{code}_{candidate_id_counter:03d}",
-                        "company": name, "company_code": code,
-                        "compound_name": c.get("name", ""),
-                        "indication": c.get("indication", ""),
-                        "therapeutic_area": _normalize_therapeutic_area(c.get("therapy_area", "")),
-                        "development_phase": phase,
-                        "compound_type": "Biologic" if any(w in c.get("description", "").lower() for w in ["insulin", "peptide", "antibody"]) else "Unknown",
-                        "mechanism_of_action": c.get("description", ""),
-                        "status": "Current",
-                    })
-                    candidate_id_counter += 1
-
-        elif company_key == "pfizer":
-            code, name = "PFE", "Pfizer"
-            for phase_key, candidates in company_data.get("sample_pipeline_candidates", {}).items():
-                phase = _normalize_phase(phase_key)
-                for c in candidates:
-                    all_candidates.append({
-                        "candidate_id": f"{code}_{candidate_id_counter:03d}",
-                        "company": name, "company_code": code,
-                        "compound_name": c.get("name", ""),
-                        "indication": c.get("indication", ""),
-                        "therapeutic_area": _normalize_therapeutic_area(c.get("area_of_focus", "")),
-                        "development_phase": phase,
-                        "compound_type": c.get("compound_type", "Unknown"),
-                        "mechanism_of_action": None,
-                        "status": c.get("status", "Current"),
-                    })
-                    candidate_id_counter += 1
-
-        elif company_key == "novartis":
-            code, name = "NVS", "Novartis"
-            for c in company_data.get("pipeline_candidates", []):
-                phase = _normalize_phase(c.get("phase", ""))
-                mechanism = c.get("mechanism", "")
-                if "radioligand" in mechanism.lower():
-                    ctype = "Radioligand"
-                elif "monoclonal antibody" in mechanism.lower():
-                    ctype = "Biologic"
-                else:
-                    ctype = "Unknown"
-                all_candidates.append({
-                    "candidate_id": f"{code}_{candidate_id_counter:03d}",
-                    "company": name, "company_code": code,
-                    "compound_name": c.get("compound", ""),
-                    "indication": c.get("indication", ""),
-                    "therapeutic_area": _normalize_therapeutic_area(c.get("therapeutic_area", "")),
-                    "development_phase": phase,
-                    "compound_type": ctype,
-                    "mechanism_of_action": mechanism,
-                    "status": "Current",
-                })
-                candidate_id_counter += 1
+        adapter = COMPANY_ADAPTERS.get(company_key)
+        if adapter is None:
+            continue
+        for c, phase_key in _company_records(company_key, company_data):
+            all_candidates.append(adapter(c, phase_key, candidate_id_counter))
+            candidate_id_counter += 1
 
     # Build summary
-    by_company: dict[str, int] = {}
-    by_phase: dict[str, int] = {}
-    by_area: dict[str, int] = {}
-    for c in all_candidates:
-        by_company[c["company"]] = by_company.get(c["company"], 0) + 1
-        by_phase[c["development_phase"]] = by_phase.get(c["development_phase"], 0) + 1
-        by_area[c["therapeutic_area"]] = by_area.get(c["therapeutic_area"], 0) + 1
+    stats = {"total_candidates": 0, "by_company": {}, "by_phase": {}, "by_therapeutic_area": {}}
+    _summarize(stats, all_candidates)
 
     result = {
         "metadata": {
@@ -220,18 +483,88 @@ def harmonize_pipeline_data(data_json: str) -> str:
             "total_candidates": len(all_candidates),
         },
         "unified_pipeline": all_candidates,
-        "summary_statistics": {
-            "total_candidates": len(all_candidates),
-            "by_company": by_company,
-            "by_phase": by_phase,
-            "by_therapeutic_area": by_area,
+        "summary_statistics": stats,
+    }
+    return json.dumps(result, indent=2)
+
+
+@tool
+def harmonize_pipeline_feeds(sources_json: str, output_path: str) -> str:
+    """Stream large multi-company pipeline feeds into a harmonized Parquet file.
+
+    Reads each company feed one record at a time, maps records to the common data model
+    with the company's adapter, and writes them to Parquet in row groups with column
+    statistics. Only a small summary is returned, so feeds of any size stay within memory
+    and tool payload limits. Use this instead of harmonize_pipeline_data for feed files.
+    Feed and output paths are resolved inside the pipeline data directory (PIPELINE_DATA_DIR).
+
+    Args:
+        sources_json: JSON object mapping a company key (novo_nordisk, pfizer, novartis) to a
+                      feed file path or a list of paths. NDJSON/JSON-lines feeds (.ndjson, .jsonl)
+                      hold one candidate per line with its phase in a "phase" field; .json files
+                      are read as company exports.
+        output_path: Path of the Parquet file to write.
+
+    Returns:
+        JSON string with output_path, row_groups, skipped_sources, metadata and summary_statistics.
+    """
+    import pyarrow as pa
+
+    sources = json.loads(sources_json)
+    skipped = [key for key in sources if key not in COMPANY_ADAPTERS]
+    sources = {key: [_data_path(p) for p in ([paths] if isinstance(paths, str) else paths)]
+               for key, paths in sources.items() if key not in skipped}
+    output_file = _data_path(output_path)
+
+    def candidates():
+        counter = itertools.count(1)
+        for company_key, paths in sources.items():
+            adapter = COMPANY_ADAPTERS[company_key]
+            for path in paths:
+                for c, phase_key in _feed_records(company_key, path):
+                    yield adapter(c, phase_key, next(counter))
+
+    schema = pa.schema([(name, pa.string()) for name in CANDIDATE_FIELDS])
+    stats = {"total_candidates": 0, "by_company": {}, "by_phase": {}, "by_therapeutic_area": {}}
+    row_groups = _write_parquet(candidates(), schema, output_file, on_batch=lambda batch: _summarize(stats, batch))
+
+    result = {
+        "output_path": output_path,
+        "row_groups": row_groups,
+        "skipped_sources": skipped,
+        "metadata": {
+            "harmonization_date": datetime.now().isoformat(),
+            "version": "1.0",
+            "total_candidates": stats["total_candidates"],
         },
+        "summary_statistics": stats,
     }
     return json.dumps(result, indent=2)
 
 
+def _enrich_candidate(candidate: dict) -> dict:
+    """Return a copy of a candidate with its ontological_annotations."""
+    enriched_c = candidate.copy()
+    annotations: dict[str, Any] = {}
+
+    if candidate.get("therapeutic_area"):
+        annotations["therapeutic_area"] = THERAPEUTIC_AREA_MAPPINGS.get(candidate["therapeutic_area"], {})
+
+    if candidate.get("indication"):
+        annotations["indication"] = _get_indication_ontology(candidate["indication"])
+
+    if candidate.get("compound_type"):
+        annotations["compound_type"] = COMPOUND_TYPE_MAPPINGS.get(candidate["compound_type"], {})
+
+    if candidate.get("development_phase"):
+        annotations["development_phase"] = PHASE_MAPPINGS.get(candidate["development_phase"], {})
+
+    enriched_c["ontological_annotations"] = annotations
+    return enriched_c
+
+
 @tool
-def enrich_with_ontologies(harmonized_data_json: str) -> str:
+def enrich_with_ontologies(harmonized_data_json: str = "", harmonized_path: str = "", output_path: str = "") -> str:
     """Enrich harmonized pipeline data with biomedical ontology annotations.
 
     Adds semantic annotations from MONDO, ChEBI, EFO, NCIT, MeSH, ATC, ICD-10
@@ -240,33 +573,52 @@ def enrich_with_ontologies(harmonized_data_json: str) -> str:
 
     Args:
         harmonized_data_json: JSON string of harmonized pipeline data (output of harmonize_pipeline_data).
+        harmonized_path: Harmonized Parquet file (output of harmonize_pipeline_feeds) to read instead
+                         of harmonized_data_json, one row group at a time.
+        output_path: Parquet file for the enriched candidates; required with harmonized_path.
+                     Annotations are stored as a JSON string column.
 
     Returns:
         JSON string with enriched pipeline data including ontological_annotations per candidate
-        and enrichment_statistics.
+        and enrichment_statistics. With harmonized_path, the enriched candidates are written to
+        output_path and only metadata and summary_statistics are returned.
     """
-    data = json.loads(harmonized_data_json)
-    candidates = data.get("unified_pipeline", [])
-    enriched = []
-
-    for candidate in candidates:
-        enriched_c = candidate.copy()
-        annotations: dict[str, Any] = {}
-
-        if candidate.get("therapeutic_area"):
-            annotations["therapeutic_area"] = THERAPEUTIC_AREA_MAPPINGS.get(candidate["therapeutic_area"], {})
-
-        if candidate.get("indication"):
-            annotations["indication"] = _get_indication_ontology(candidate["indication"])
-
-        if candidate.get("compound_type"):
-            annotations["compound_type"] = COMPOUND_TYPE_MAPPINGS.get(candidate["compound_type"], {})
-
-        if candidate.get("development_phase"):
-            annotations["development_phase"] = PHASE_MAPPINGS.get(candidate["development_phase"], {})
-
-        enriched_c["ontological_annotations"] = annotations
-        enriched.append(enriched_c)
+    candidates, data = _harmonized_input(harmonized_data_json, harmonized_path)
+    ontologies_used = ["MONDO", "ChEBI", "EFO", "NCIT", "MeSH", "ATC", "ICD-10"]
+
+    if harmonized_path:
+        import pyarrow as pa
+
+        if not output_path:
+            raise ValueError("output_path is required when reading harmonized_path")
+        output_file = _data_path(output_path)
+        counts = {"total": 0, "enriched": 0}
+        stats = {"total_candidates": 0, "by_company": {}, "by_phase": {}, "by_therapeutic_area": {}}
+
+        def enriched_rows():
+            for candidate in candidates:
+                enriched_c = _enrich_candidate(candidate)
+                annotations = enriched_c["ontological_annotations"]
+                counts["total"] += 1
+                counts["enriched"] += any(annotations.values())
+                enriched_c["ontological_annotations"] = json.dumps(annotations)
+                yield enriched_c
+
+        schema = pa.schema([(name, pa.string()) for name in CANDIDATE_FIELDS + ["ontological_annotations"]])
+        _write_parquet(enriched_rows(), schema, output_file, on_batch=lambda batch: _summarize(stats, batch))
+        total = counts["total"]
+        return json.dumps({
+            "output_path": output_path,
+            "metadata": {
+                "enrichment_date": datetime.now().isoformat(),
+                "ontologies_used": ontologies_used,
+                "total_candidates": total,
+                "enrichment_coverage_pct": round((counts["enriched"] / total * 100) if total else 0, 1),
+            },
+            "summary_statistics": stats,
+        }, indent=2)
+
+    enriched = [_enrich_candidate(candidate) for candidate in candidates]
 
     # Stats
     enriched_count = sum(1 for c in enriched if any(c.get("ontological_annotations", {}).values()))
@@ -275,7 +627,7 @@ def enrich_with_ontologies(harmonized_data_json: str) -> str:
     result = {
         "metadata": {
             "enrichment_date": datetime.now().isoformat(),
-            "ontologies_used": ["MONDO", "ChEBI", "EFO", "NCIT", "MeSH", "ATC", "ICD-10"],
+            "ontologies_used": ontologies_used,
             "total_candidates": total,
             "enrichment_coverage_pct": round((enriched_count / total * 100) if total else 0, 1),
         },
@@ -286,7 +638,7 @@ def enrich_with_ontologies(harmonized_data_json: str) -> str:
 
 
 @tool
-def validate_harmonized_data(harmonized_data_json: str) -> str:
+def validate_harmonized_data(harmonized_data_json: str = "", harmonized_path: str = "") -> str:
     """Validate harmonized pharmaceutical pipeline data for schema compliance and data quality.
 
     Checks required fields, candidate ID format, controlled vocabulary values,
@@ -294,23 +646,31 @@ def validate_harmonized_data(harmonized_data_json: str) -> str:
 
     Args:
         harmonized_data_json: JSON string of harmonized pipeline data to validate.
+        harmonized_path: Harmonized Parquet file (output of harmonize_pipeline_feeds) to validate
+                         instead, read one row group at a time.
 
     Returns:
         JSON string with validation results including overall_status (PASS/FAIL),
         errors, warnings, and data_quality_score.
     """
-    data = json.loads(harmonized_data_json)
+    candidates, _ = _harmonized_input(harmonized_data_json, harmonized_path)
     errors = []
     warnings = []
 
-    candidates = data.get("unified_pipeline", [])
     valid_companies = {"Novo Nordisk", "Pfizer", "Novartis"}
     valid_codes = {"NVO", "PFE", "NVS"}
     valid_phases = {"Phase 1", "Phase 2", "Phase 3", "Registration/Filed"}
     required_fields = ["candidate_id", "company", "company_code", "compound_name", "indication", "therapeutic_area", "development_phase"]
 
+    critical_fields = ["compound_name", "indication", "therapeutic_area", "development_phase"]
+    filled = dict.fromkeys(critical_fields, 0)
+    total = 0
+
     seen_ids: set[str] = set()
     for i, c in enumerate(candidates):
+        total += 1
+        for field in critical_fields:
+            filled[field] += bool(c.get(field))
         for field in required_fields:
             if not c.get(field):
                 errors.append(f"Record {i+1}: missing or empty '{field}'")
@@ -333,11 +693,9 @@ def validate_harmonized_data(harmonized_data_json: str) -> str:
             errors.append(f"Record {i+1}: invalid phase '{c['development_phase']}'")
 
     # Quality score
-    critical_fields = ["compound_name", "indication", "therapeutic_area", "development_phase"]
     completeness = 0
     for field in critical_fields:
-        filled = sum(1 for c in candidates if c.get(field))
-        completeness += (filled / len(candidates) * 100) if candidates else 0
+        completeness += (filled[field] / total * 100) if total else 0
     completeness /= len(critical_fields)
 
     error_penalty = min(len(errors) * 5, 50)
@@ -346,7 +704,7 @@ def validate_harmonized_data(harmonized_data_json: str) -> str:
 
     result = {
         "overall_status": "PASS" if not errors else "FAIL",
-        "total_candidates": len(candidates),
+        "total_candidates": total,
         "error_count": len(errors),
         "warning_count": len(warnings),
         "errors": errors[:20],
@@ -357,7 +715,7 @@ def validate_harmonized_data(harmonized_data_json: str) -> str:
 
 
 @tool
-def analyze_pipeline_statistics(harmonized_data_json: str) -> str:
+def analyze_pipeline_statistics(harmonized_data_json: str = "", harmonized_path: str = "") -> str:
     """Analyze harmonized pipeline data and produce summary statistics.
 
     Provides distribution analysis by company, development phase, therapeutic area,
@@ -365,12 +723,14 @@ def analyze_pipeline_statistics(harmonized_data_json: str) -> str:
 
     Args:
         harmonized_data_json: JSON string of harmonized pipeline data.
+        harmonized_path: Harmonized Parquet file (output of harmonize_pipeline_feeds) to analyze
+                         instead, read one row group at a time.
 
     Returns:
         JSON string with analysis results including distributions and key insights.
     """
-    data = json.loads(harmonized_data_json)
-    candidates = data.get("unified_pipeline", [])
+    candidates, _ = _harmonized_input(harmonized_data_json, harmonized_path)
+    total = 0
 
     by_company: dict[str, int] = {}
     by_phase: dict[str, int] = {}
@@ -378,19 +738,20 @@ def analyze_pipeline_statistics(harmonized_data_json: str) -> str:
     by_type: dict[str, int] = {}
 
     for c in candidates:
+        total += 1
         by_company[c.get("company", "Unknown")] = by_company.get(c.get("company", "Unknown"), 0) + 1
         by_phase[c.get("development_phase", "Unknown")] = by_phase.get(c.get("development_phase", "Unknown"), 0) + 1
         by_area[c.get("therapeutic_area", "Unknown")] = by_area.get(c.get("therapeutic_area", "Unknown"), 0) + 1
         by_type[c.get("compound_type", "Unknown")] = by_type.get(c.get("compound_type", "Unknown"), 0) + 1
 
     result = {
-        "total_candidates": len(candidates),
+        "total_candidates": total,
         "by_company": by_company,
         "by_development_phase": by_phase,
         "by_therapeutic_area": by_area,
         "by_compound_type": by_type,
         "insights": [
-            f"Total of {len(candidates)} drug candidates across {len(by_company)} companies",
+            f"Total of {total} drug candidates across {len(by_company)} companies",
             f"Most active therapeutic area: {max(by_area, key=by_area.get) if by_area else 'N/A'}",
             f"Most common phase: {max(by_phase, key=by_phase.get) if by_phase else 'N/A'}",
         ],
@@ -422,31 +783,39 @@ def agent_task(task: str) -> str:
                 "inputSchema": {"json": {"type": "object", "properties": {"data_json": {"type": "string", "description": "JSON string with raw pipeline data"}}, "required": ["data_json"]}},
             }
         },
+        {
+            "toolSpec": {
+                "name": "harmonize_pipeline_feeds",
+                "description": harmonize_pipeline_feeds.__doc__,
+                "inputSchema": {"json": {"type": "object", "properties": {"sources_json": {"type": "string", "description": "JSON object mapping company keys to NDJSON/JSON feed file paths"}, "output_path": {"type": "string", "description": "Parquet file to write"}}, "required": ["sources_json", "output_path"]}},
+            }
+        },
         {
             "toolSpec": {
                 "name": "enrich_with_ontologies",
                 "description": enrich_with_ontologies.__doc__,
-                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}}, "required": ["harmonized_data_json"]}},
+                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}, "harmonized_path": {"type": "string", "description": "Harmonized Parquet file to read instead of harmonized_data_json"}, "output_path": {"type": "string", "description": "Parquet file for enriched candidates (with harmonized_path)"}}}},
             }
         },
         {
             "toolSpec": {
                 "name": "validate_harmonized_data",
                 "description": validate_harmonized_data.__doc__,
-                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}}, "required": ["harmonized_data_json"]}},
+                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}, "harmonized_path": {"type": "string", "description": "Harmonized Parquet file to read instead of harmonized_data_json"}}}},
             }
         },
         {
             "toolSpec": {
                 "name": "analyze_pipeline_statistics",
                 "description": analyze_pipeline_statistics.__doc__,
-                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}}, "required": ["harmonized_data_json"]}},
+                "inputSchema": {"json": {"type": "object", "properties": {"harmonized_data_json": {"type": "string", "description": "JSON string of harmonized pipeline data"}, "harmonized_path": {"type": "string", "description": "Harmonized Parquet file to read instead of harmonized_data_json"}}}},
             }
         },
     ]
 
     tool_map = {
         "harmonize_pipeline_data": harmonize_pipeline_data,
+        "harmonize_pipeline_feeds": harmonize_pipeline_feeds,
         "enrich_with_ontologies": enrich_with_ontologies,
         "validate_harmonized_data": validate_harmonized_data,
         "analyze_pipeline_statistics": analyze_pipeline_statistics,
@@ -4,8 +4,10 @@ import json
 import pytest
 from unittest.mock import patch, MagicMock
 
+from agent.agent_config import agent as agent_module
 from agent.agent_config.agent import (
     harmonize_pipeline_data,
+    harmonize_pipeline_feeds,
     enrich_with_ontologies,
     validate_harmonized_data,
     analyze_pipeline_statistics,
@@ -13,6 +15,7 @@ from agent.agent_config.agent import (
     _normalize_phase,
     _normalize_therapeutic_area,
     _get_indication_ontology,
+    OntologyMatcher,
     MODEL_ID,
 )
 
@@ -89,6 +92,33 @@ class TestNormalization:
         result = _get_indication_ontology("Completely unknown disease XYZ")
         assert result == {}
 
+    def test_get_indication_ontology_prefers_longest_match(self):
+        result = _get_indication_ontology("Obesity with type 2 diabetes")
+        assert result["mondo_id"] == "MONDO_0005148"
+
+    def test_get_indication_ontology_contained_in_key(self):
+        assert _get_indication_ontology("arthritis")["mondo_id"] == "MONDO_0008383"
+
+
+class TestOntologyMatcher:
+    def test_find_all_prefers_longest_non_overlapping(self):
+        matcher = OntologyMatcher({"cancer": 1, "breast cancer": 2, "her2": 3, "her2-positive breast cancer": 4})
+        matches = matcher.find_all("HER2-positive breast cancer and HER2 low cancer")
+        assert [(m[0], m[1]) for m in matches] == [("her2-positive breast cancer", 4), ("her2", 3), ("cancer", 1)]
+
+    def test_add_obo_terms_and_exact_synonyms(self, tmp_path):
+        obo_path = tmp_path / "mondo.obo"
+        obo_path.write_text(
+            "format-version: 1.2\n\n"
+            "[Term]\nid: MONDO:0005148\nname: type 2 diabetes mellitus\n"
+            'synonym: "T2DM" EXACT []\nsynonym: "NIDDM" RELATED []\n\n'
+            "[Term]\nid: MONDO:0000001\nname: obsolete disease\nis_obsolete: true\n"
+        )
+        matcher = OntologyMatcher().add_obo(str(obo_path))
+        assert len(matcher) == 2
+        assert matcher.longest("Adults with T2DM") == {"mondo_id": "MONDO_0005148", "mondo_label": "type 2 diabetes mellitus"}
+        assert matcher.longest("NIDDM") is None
+
 
 # --- Tool function tests ---
 
@@ -137,6 +167,65 @@ class TestHarmonizePipelineData:
         assert "by_phase" in stats
 
 
+class TestHarmonizePipelineFeeds:
+    @pytest.fixture
+    def feed_sources(self, raw_pipeline_data, tmp_path):
+        nvo_path = tmp_path / "novo_nordisk.ndjson"
+        with open(nvo_path, "w") as f:
+            for phase, candidates in raw_pipeline_data["novo_nordisk"]["pipeline_candidates"].items():
+                for c in candidates:
+                    f.write(json.dumps({**c, "phase": phase}) + "\n")
+        pfe_path = tmp_path / "pfizer.json"
+        pfe_path.write_text(json.dumps(raw_pipeline_data["pfizer"]))
+        nvs_path = tmp_path / "novartis.jsonl"
+        nvs_path.write_text("\n".join(json.dumps(c) for c in raw_pipeline_data["novartis"]["pipeline_candidates"]))
+        return {"novo_nordisk": str(nvo_path), "pfizer": [str(pfe_path)], "novartis": str(nvs_path), "acme": str(nvs_path)}
+
+    @pytest.fixture(autouse=True)
+    def data_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(agent_module, "PIPELINE_DATA_DIR", str(tmp_path))
+
+    def test_parquet_matches_in_memory_harmonization(self, feed_sources, harmonized_data, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        output_path = str(tmp_path / "pipeline.parquet")
+        result = json.loads(harmonize_pipeline_feeds(json.dumps(feed_sources), output_path))
+        assert result["skipped_sources"] == ["acme"]
+        assert result["summary_statistics"] == harmonized_data["summary_statistics"]
+        assert pq.read_table(output_path).to_pylist() == harmonized_data["unified_pipeline"]
+        assert pq.ParquetFile(output_path).metadata.row_group(0).column(0).statistics.has_min_max
+
+    def test_rejects_paths_outside_data_dir(self, feed_sources, tmp_path):
+        pytest.importorskip("pyarrow.parquet")
+        with pytest.raises(ValueError):
+            harmonize_pipeline_feeds(json.dumps(feed_sources), str(tmp_path.parent / "pipeline.parquet"))
+        with pytest.raises(ValueError):
+            harmonize_pipeline_feeds(json.dumps({"pfizer": "../pfizer.json"}), "pipeline.parquet")
+
+    def test_removes_staging_file_on_error(self, tmp_path):
+        pytest.importorskip("pyarrow.parquet")
+        (tmp_path / "broken.jsonl").write_text("{not json")
+        with pytest.raises(json.JSONDecodeError):
+            harmonize_pipeline_feeds(json.dumps({"novartis": "broken.jsonl"}), "pipeline.parquet")
+        assert not list(tmp_path.glob("pipeline.parquet*"))
+
+    def test_downstream_tools_read_parquet(self, feed_sources, harmonized_data, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        harmonize_pipeline_feeds(json.dumps(feed_sources), "pipeline.parquet")
+        harmonized_json = json.dumps(harmonized_data)
+
+        assert json.loads(validate_harmonized_data(harmonized_path="pipeline.parquet")) == \
+            json.loads(validate_harmonized_data(harmonized_json))
+        assert json.loads(analyze_pipeline_statistics(harmonized_path="pipeline.parquet")) == \
+            json.loads(analyze_pipeline_statistics(harmonized_json))
+
+        summary = json.loads(enrich_with_ontologies(harmonized_path="pipeline.parquet", output_path="enriched.parquet"))
+        enriched = json.loads(enrich_with_ontologies(harmonized_json))
+        assert summary["metadata"]["enrichment_coverage_pct"] == enriched["metadata"]["enrichment_coverage_pct"]
+        rows = pq.read_table(tmp_path / "enriched.parquet").to_pylist()
+        assert [json.loads(r["ontological_annotations"]) for r in rows] == \
+            [c["ontological_annotations"] for c in enriched["enriched_pipeline"]]
+
+
 class TestEnrichWithOntologies:
     def test_returns_valid_json(self, harmonized_data):
         result = enrich_with_ontologies(json.dumps(harmonized_data))
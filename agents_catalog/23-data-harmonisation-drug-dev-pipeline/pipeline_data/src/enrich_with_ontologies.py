@@ -10,6 +10,12 @@ Date: 2025-07-03
 """
 
 import json
+import os
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from ontology_mappings import (
@@ -21,14 +27,83 @@ from ontology_mappings import (
     get_regulatory_ontology
 )
 
+OLS_SEARCH_URL = os.getenv("OLS_SEARCH_URL", "https://www.ebi.ac.uk/ols4/api/search")
+USE_OLS = os.getenv("ONTOLOGY_USE_OLS", "false").lower() == "true"
+TERM_CACHE_SIZE = int(os.getenv("ONTOLOGY_TERM_CACHE_SIZE", "100000"))
+ENRICHMENT_WORKERS = int(os.getenv("ONTOLOGY_ENRICHMENT_WORKERS", "8"))
+
+# Candidate fields annotated with ontology terms, and the annotation key per ontology
+ANNOTATED_FIELDS = ["therapeutic_area", "indication", "compound_type", "development_phase", "mechanism_of_action"]
+ONTOLOGY_KEYS = {
+    "MONDO": "mondo_id", "ChEBI": "chebi_id", "EFO": "efo_id", "NCIT": "ncit_id",
+    "MeSH": "mesh_id", "ATC": "atc_class", "ICD-10": "icd10", "SNOMED_CT": "snomed_ct"
+}
+
+class OntologyTermResolver:
+    """
+    Resolves distinct terms to ontology annotations with an LRU cache
+    
+    Terms missing from the local mappings can optionally be looked up in the
+    EBI Ontology Lookup Service (OLS). Failed OLS requests are not cached, so
+    they are retried on the next run.
+    """
+    
+    RESOLVERS = {
+        "therapeutic_area": get_therapeutic_area_ontology,
+        "indication": get_indication_ontology,
+        "compound_type": get_compound_type_ontology,
+        "development_phase": get_development_phase_ontology,
+        "mechanism_of_action": get_mechanism_ontology,
+        "regulatory_designation": get_regulatory_ontology
+    }
+    # Ontology searched in OLS for terms without a local mapping
+    OLS_ONTOLOGIES = {"indication": "mondo", "mechanism_of_action": "chebi"}
+    
+    def __init__(self, use_ols=USE_OLS, cache_size=TERM_CACHE_SIZE, ols_timeout=10):
+        self.use_ols = use_ols
+        self.ols_timeout = ols_timeout
+        self._cached_resolve = lru_cache(maxsize=cache_size)(self._resolve)
+    
+    def _resolve(self, field, term):
+        annotation = self.RESOLVERS[field](term)
+        if not annotation and self.use_ols and field in self.OLS_ONTOLOGIES:
+            annotation = self.search_ols(term, self.OLS_ONTOLOGIES[field])
+        return annotation
+    
+    def resolve(self, field, term):
+        """Ontology annotation of one term of a candidate field ({} if unknown)"""
+        try:
+            return self._cached_resolve(field, term)
+        except (OSError, ValueError) as e:
+            print(f"✗ OLS lookup failed for {field} '{term}': {e}")
+            return {}
+    
+    def search_ols(self, term, ontology):
+        """Best OLS match of a term in one ontology, as {<prefix>_id, <prefix>_label}"""
+        query = urllib.parse.urlencode({
+            "q": term, "ontology": ontology, "queryFields": "label,synonym",
+            "fieldList": "obo_id,label", "rows": 1
+        })
+        with urllib.request.urlopen(f"{OLS_SEARCH_URL}?{query}", timeout=self.ols_timeout) as response:  # nosec B310 - fixed https endpoint
+            docs = json.load(response).get("response", {}).get("docs", [])
+        if not docs or not docs[0].get("obo_id"):
+            return {}
+        prefix, _, local_id = docs[0]["obo_id"].partition(":")
+        return {f"{prefix.lower()}_id": f"{prefix}_{local_id}", f"{prefix.lower()}_label": docs[0].get("label", "")}
+    
+    def cache_info(self):
+        return self._cached_resolve.cache_info()
+
 class PipelineOntologyEnricher:
     """Class to enrich pipeline data with ontological annotations"""
     
-    def __init__(self, input_file, output_file):
+    def __init__(self, input_file, output_file, resolver=None, max_workers=ENRICHMENT_WORKERS):
         self.input_file = Path(input_file)
         self.output_file = Path(output_file)
         self.input_data = None
         self.enriched_data = None
+        self.resolver = resolver or OntologyTermResolver()
+        self.max_workers = max_workers
         
     def load_harmonized_data(self):
         """Load the harmonized pipeline data"""
@@ -317,6 +392,105 @@ class PipelineOntologyEnricher:
         self.enriched_data["enriched_pipeline"] = enriched_candidates
         print(f"✓ Enriched {len(enriched_candidates)} candidates")
     
+    def enrich_all_candidates_batch(self):
+        """
+        Enrich all candidates by resolving each distinct term once
+        
+        Distinct (field, term) pairs are collected first and resolved across a
+        worker pool. A single pass over the candidates then assembles the
+        annotations and the vocabulary index, and statistics are counted once
+        per distinct combination of terms. Results are the same as
+        enrich_all_candidates, build_vocabulary_index and
+        calculate_enrichment_statistics.
+        """
+        print("Enriching candidates with ontological annotations (batch)...")
+        
+        candidates = self.input_data.get("unified_pipeline", [])
+        
+        # Candidates sharing all annotated terms share one signature and one annotation template
+        signatures = [(tuple(map(candidate.get, ANNOTATED_FIELDS)),
+                       tuple(candidate.get("regulatory_designations") or ()))
+                      for candidate in candidates]
+        occurrences = Counter(signatures)
+        
+        # Distinct terms in first-occurrence order
+        terms = {}
+        for fields, designations in occurrences:
+            for field, term in zip(ANNOTATED_FIELDS, fields):
+                if term:
+                    terms.setdefault((field, term), None)
+            for designation in designations:
+                terms.setdefault(("regulatory_designation", designation), None)
+        
+        keys = list(terms)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            resolved = dict(zip(keys, pool.map(lambda key: self.resolver.resolve(*key), keys)))
+        # Ontology usage contributed by each resolved annotation
+        usage = {key: [name for name, id_key in ONTOLOGY_KEYS.items() if id_key in annotation]
+                 for key, annotation in resolved.items()}
+        
+        vocabulary_names = {
+            "therapeutic_area": "therapeutic_areas", "indication": "indications",
+            "compound_type": "compound_types", "development_phase": "development_phases",
+            "mechanism_of_action": "mechanisms", "regulatory_designation": "regulatory_designations"
+        }
+        vocabularies = {name: {} for name in vocabulary_names.values()}
+        templates = {}
+        enriched_candidates = []
+        
+        for candidate, signature in zip(candidates, signatures):
+            template = templates.get(signature)
+            if template is None:
+                template = {field: {} for field in ANNOTATED_FIELDS}
+                template["regulatory_designations"] = []
+                for field, term in zip(ANNOTATED_FIELDS, signature[0]):
+                    if term:
+                        template[field] = resolved[(field, term)]
+                        if template[field]:
+                            vocabularies[vocabulary_names[field]].setdefault(term, template[field])
+                for designation in signature[1]:
+                    annotation = resolved[("regulatory_designation", designation)]
+                    if annotation:
+                        template["regulatory_designations"].append({
+                            "designation": designation,
+                            "ontology": annotation
+                        })
+                        vocabularies["regulatory_designations"].setdefault(designation, annotation)
+                templates[signature] = template
+            
+            enriched_candidate = candidate.copy()
+            annotations = template.copy()
+            annotations["regulatory_designations"] = list(template["regulatory_designations"])
+            enriched_candidate["ontological_annotations"] = annotations
+            enriched_candidates.append(enriched_candidate)
+        
+        enriched_counts = dict.fromkeys(ANNOTATED_FIELDS, 0)
+        ontology_counts = dict.fromkeys(ONTOLOGY_KEYS, 0)
+        for signature, count in occurrences.items():
+            for field, term in zip(ANNOTATED_FIELDS, signature[0]):
+                if term and resolved[(field, term)]:
+                    enriched_counts[field] += count
+                    for name in usage[(field, term)]:
+                        ontology_counts[name] += count
+        
+        total_candidates = len(candidates)
+        self.enriched_data["enriched_pipeline"] = enriched_candidates
+        self.enriched_data["ontological_vocabularies"] = vocabularies
+        self.enriched_data["metadata"]["enrichment_statistics"] = {
+            "total_candidates": total_candidates,
+            "enrichment_coverage": {
+                field: {
+                    "enriched_count": count,
+                    "total_count": total_candidates,
+                    "coverage_percentage": round((count / total_candidates * 100) if total_candidates > 0 else 0, 1)
+                }
+                for field, count in enriched_counts.items()
+            },
+            "ontology_usage": ontology_counts,
+            "unique_terms": {name: len(vocabulary) for name, vocabulary in vocabularies.items()}
+        }
+        print(f"✓ Enriched {total_candidates} candidates from {len(keys)} distinct terms")
+    
     def run_enrichment(self):
         """Run the complete ontological enrichment process"""
         print("Starting ontological enrichment...")
@@ -329,16 +503,8 @@ class PipelineOntologyEnricher:
         print("Creating enriched data structure...")
         self.create_enriched_structure()
         
-        # Enrich all candidates
-        self.enrich_all_candidates()
-        
-        # Build vocabulary index
-        print("Building ontological vocabulary index...")
-        self.build_vocabulary_index()
-        
-        # Calculate statistics
-        print("Calculating enrichment statistics...")
-        self.calculate_enrichment_statistics()
+        # Enrich all candidates, building the vocabulary index and statistics in the same pass
+        self.enrich_all_candidates_batch()
         
         print("✓ Ontological enrichment complete!")
         return True
@@ -9,11 +9,22 @@ Author: Data Science Team
 Date: 2025-07-03
 """
 
+import itertools
 import json
+import os
 from pathlib import Path
 from datetime import datetime
 import re
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+# Candidates buffered per Parquet row group when streaming feeds
+PARQUET_ROW_GROUP_SIZE = 50000
+
 class PipelineDataHarmonizer:
     """Class to harmonize pharmaceutical pipeline data across companies"""
     
@@ -42,6 +53,12 @@ class PipelineDataHarmonizer:
             "mechanisms_of_action": [],
             "summary_statistics": {}
         }
+        # Per-candidate adapters shared by the batch and streaming paths
+        self.candidate_adapters = {
+            'novo_nordisk': self.harmonize_novo_nordisk_candidate,
+            'pfizer': self.harmonize_pfizer_candidate,
+            'novartis': self.harmonize_novartis_candidate
+        }
         
     def load_raw_data(self):
         """Load raw pipeline data from JSON files"""
@@ -115,6 +132,28 @@ class PipelineDataHarmonizer:
             else:
                 return "Unknown"
     
+    def harmonize_novo_nordisk_candidate(self, candidate, normalized_phase, candidate_id):
+        """Map one Novo Nordisk candidate to the common data model"""
+        return {
+            "candidate_id": f"NVO_{candidate_id:03d}",
+            "company": "Novo Nordisk",
+            "company_code": "NVO",
+            "compound_name": candidate.get("name", ""),
+            "compound_code": candidate.get("code", ""),
+            "brand_name": None,
+            "indication": candidate.get("indication", ""),
+            "therapeutic_area": self.normalize_therapeutic_area(candidate.get("therapy_area", "")),
+            "development_phase": normalized_phase,
+            "compound_type": self.extract_compound_type(candidate, "novo_nordisk"),
+            "mechanism_of_action": candidate.get("description", ""),
+            "submission_type": None,
+            "regulatory_designations": [],
+            "filing_date": None,
+            "lead_indication": False,
+            "status": "Current",
+            "source_data": candidate
+        }
+    
     def harmonize_novo_nordisk_data(self):
         """Harmonize Novo Nordisk pipeline data"""
         data = self.raw_data['novo_nordisk']
@@ -138,31 +177,44 @@ class PipelineDataHarmonizer:
             company_info["phase_distribution"][normalized_phase] = len(phase_candidates)
             
             for candidate in phase_candidates:
-                harmonized_candidate = {
-                    "candidate_id": f"NVO_{candidate_id:03d}",
-                    "company": "Novo Nordisk",
-                    "company_code": "NVO",
-                    "compound_name": candidate.get("name", ""),
-                    "compound_code": candidate.get("code", ""),
-                    "brand_name": None,
-                    "indication": candidate.get("indication", ""),
-                    "therapeutic_area": self.normalize_therapeutic_area(candidate.get("therapy_area", "")),
-                    "development_phase": normalized_phase,
-                    "compound_type": self.extract_compound_type(candidate, "novo_nordisk"),
-                    "mechanism_of_action": candidate.get("description", ""),
-                    "submission_type": None,
-                    "regulatory_designations": [],
-                    "filing_date": None,
-                    "lead_indication": False,
-                    "status": "Current",
-                    "source_data": candidate
-                }
-                candidates.append(harmonized_candidate)
+                candidates.append(self.harmonize_novo_nordisk_candidate(candidate, normalized_phase, candidate_id))
                 candidate_id += 1
         
         company_info["total_candidates"] = len(candidates)
         return company_info, candidates
     
+    def harmonize_pfizer_candidate(self, candidate, normalized_phase, candidate_id):
+        """Map one Pfizer candidate to the common data model"""
+        # Extract regulatory designations from indication
+        indication = candidate.get("indication", "")
+        regulatory_designations = []
+        if "FAST TRACK" in indication:
+            regulatory_designations.append("Fast Track")
+        if "BREAKTHROUGH" in indication:
+            regulatory_designations.append("Breakthrough Designation")
+        if "ORPHAN" in indication:
+            regulatory_designations.append("Orphan Drug")
+        
+        return {
+            "candidate_id": f"PFE_{candidate_id:03d}",
+            "company": "Pfizer",
+            "company_code": "PFE",
+            "compound_name": candidate.get("name", ""),
+            "compound_code": self.extract_compound_code(candidate.get("name", "")),
+            "brand_name": None,
+            "indication": indication,
+            "therapeutic_area": self.normalize_therapeutic_area(candidate.get("area_of_focus", "")),
+            "development_phase": normalized_phase,
+            "compound_type": candidate.get("compound_type", "Unknown"),
+            "mechanism_of_action": None,
+            "submission_type": candidate.get("submission_type", ""),
+            "regulatory_designations": regulatory_designations,
+            "filing_date": None,
+            "lead_indication": False,
+            "status": candidate.get("status", "Current"),
+            "source_data": candidate
+        }
+    
     def harmonize_pfizer_data(self):
         """Harmonize Pfizer pipeline data"""
         data = self.raw_data['pfizer']
@@ -194,40 +246,33 @@ class PipelineDataHarmonizer:
             normalized_phase = self.normalize_phase(phase_key)
             
             for candidate in phase_candidates:
-                # Extract regulatory designations from indication
-                indication = candidate.get("indication", "")
-                regulatory_designations = []
-                if "FAST TRACK" in indication:
-                    regulatory_designations.append("Fast Track")
-                if "BREAKTHROUGH" in indication:
-                    regulatory_designations.append("Breakthrough Designation")
-                if "ORPHAN" in indication:
-                    regulatory_designations.append("Orphan Drug")
-                
-                harmonized_candidate = {
-                    "candidate_id": f"PFE_{candidate_id:03d}",
-                    "company": "Pfizer",
-                    "company_code": "PFE",
-                    "compound_name": candidate.get("name", ""),
-                    "compound_code": self.extract_compound_code(candidate.get("name", "")),
-                    "brand_name": None,
-                    "indication": indication,
-                    "therapeutic_area": self.normalize_therapeutic_area(candidate.get("area_of_focus", "")),
-                    "development_phase": normalized_phase,
-                    "compound_type": candidate.get("compound_type", "Unknown"),
-                    "mechanism_of_action": None,
-                    "submission_type": candidate.get("submission_type", ""),
-                    "regulatory_designations": regulatory_designations,
-                    "filing_date": None,
-                    "lead_indication": False,
-                    "status": candidate.get("status", "Current"),
-                    "source_data": candidate
-                }
-                candidates.append(harmonized_candidate)
+                candidates.append(self.harmonize_pfizer_candidate(candidate, normalized_phase, candidate_id))
                 candidate_id += 1
         
         return company_info, candidates
     
+    def harmonize_novartis_candidate(self, candidate, normalized_phase, candidate_id):
+        """Map one Novartis candidate to the common data model"""
+        return {
+            "candidate_id": f"NVS_{candidate_id:03d}",
+            "company": "Novartis",
+            "company_code": "NVS",
+            "compound_name": candidate.get("compound", ""),
+            "compound_code": candidate.get("compound", ""),
+            "brand_name": candidate.get("brand_name", ""),
+            "indication": candidate.get("indication", ""),
+            "therapeutic_area": self.normalize_therapeutic_area(candidate.get("therapeutic_area", "")),
+            "development_phase": normalized_phase,
+            "compound_type": self.extract_compound_type(candidate, "novartis"),
+            "mechanism_of_action": candidate.get("mechanism", ""),
+            "submission_type": None,
+            "regulatory_designations": [],
+            "filing_date": candidate.get("filing_date", ""),
+            "lead_indication": candidate.get("lead_indication", False),
+            "status": "Current",
+            "source_data": candidate
+        }
+    
     def harmonize_novartis_data(self):
         """Harmonize Novartis pipeline data"""
         data = self.raw_data['novartis']
@@ -251,26 +296,7 @@ class PipelineDataHarmonizer:
             normalized_phase = self.normalize_phase(candidate.get("phase", ""))
             phase_counts[normalized_phase] += 1
             
-            harmonized_candidate = {
-                "candidate_id": f"NVS_{candidate_id:03d}",
-                "company": "Novartis",
-                "company_code": "NVS",
-                "compound_name": candidate.get("compound", ""),
-                "compound_code": candidate.get("compound", ""),
-                "brand_name": candidate.get("brand_name", ""),
-                "indication": candidate.get("indication", ""),
-                "therapeutic_area": self.normalize_therapeutic_area(candidate.get("therapeutic_area", "")),
-                "development_phase": normalized_phase,
-                "compound_type": self.extract_compound_type(candidate, "novartis"),
-                "mechanism_of_action": candidate.get("mechanism", ""),
-                "submission_type": None,
-                "regulatory_designations": [],
-                "filing_date": candidate.get("filing_date", ""),
-                "lead_indication": candidate.get("lead_indication", False),
-                "status": "Current",
-                "source_data": candidate
-            }
-            candidates.append(harmonized_candidate)
+            candidates.append(self.harmonize_novartis_candidate(candidate, normalized_phase, candidate_id))
             candidate_id += 1
         
         company_info["phase_distribution"] = phase_counts
@@ -313,34 +339,133 @@ class PipelineDataHarmonizer:
     def calculate_summary_statistics(self, all_candidates):
         """Calculate summary statistics across all companies"""
         stats = {
-            "total_candidates": len(all_candidates),
+            "total_candidates": 0,
             "by_company": {},
             "by_phase": {},
             "by_therapeutic_area": {},
             "by_compound_type": {}
         }
+        self.update_summary_statistics(stats, all_candidates)
+        return stats
+    
+    def update_summary_statistics(self, stats, candidates):
+        """Add a batch of candidates to running summary statistics"""
+        for candidate in candidates:
+            stats["total_candidates"] += 1
+            for key, field in (("by_company", "company"),
+                               ("by_phase", "development_phase"),
+                               ("by_therapeutic_area", "therapeutic_area"),
+                               ("by_compound_type", "compound_type")):
+                value = candidate[field]
+                stats[key][value] = stats[key].get(value, 0) + 1
+    
+    def iter_feed_records(self, company_key, feed_path):
+        """
+        Yield (candidate, phase) pairs from one company feed file
+        
+        NDJSON/JSON-lines feeds (.ndjson, .jsonl) hold one candidate per line, with
+        its development phase in a "phase" field. A .json file is read as a
+        company export in the layout used by load_raw_data.
+        """
+        feed_path = Path(feed_path)
+        if feed_path.suffix == '.json':
+            with open(feed_path, 'r') as f:
+                data = json.load(f)
+            if company_key == 'novartis':
+                for candidate in data.get("pipeline_candidates", []):
+                    yield candidate, candidate.get("phase", "")
+            else:
+                key = "sample_pipeline_candidates" if company_key == 'pfizer' else "pipeline_candidates"
+                for phase_key, phase_candidates in data.get(key, {}).items():
+                    for candidate in phase_candidates:
+                        yield candidate, phase_key
+            return
         
-        # Count by company
-        for candidate in all_candidates:
-            company = candidate["company"]
-            stats["by_company"][company] = stats["by_company"].get(company, 0) + 1
-        
-        # Count by phase
-        for candidate in all_candidates:
-            phase = candidate["development_phase"]
-            stats["by_phase"][phase] = stats["by_phase"].get(phase, 0) + 1
-        
-        # Count by therapeutic area
-        for candidate in all_candidates:
-            area = candidate["therapeutic_area"]
-            stats["by_therapeutic_area"][area] = stats["by_therapeutic_area"].get(area, 0) + 1
+        with open(feed_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    candidate = json.loads(line)
+                    yield candidate, candidate.get("phase", "")
+    
+    def stream_harmonized_candidates(self, sources):
+        """
+        Lazily harmonize candidates from company feeds
+        
+        Args:
+            sources: Iterable of (company_key, feed_path) pairs; a company may
+                appear more than once and its candidate IDs continue across feeds
+        """
+        counters = {}
+        for company_key, feed_path in sources:
+            adapter = self.candidate_adapters.get(company_key)
+            if adapter is None:
+                print(f"✗ No adapter for {company_key}, skipping {feed_path}")
+                continue
+            for candidate, phase in self.iter_feed_records(company_key, feed_path):
+                counters[company_key] = counters.get(company_key, 0) + 1
+                yield adapter(candidate, self.normalize_phase(phase), counters[company_key])
+    
+    @staticmethod
+    def parquet_schema():
+        """Arrow schema of the unified pipeline table"""
+        string_fields = ["candidate_id", "company", "company_code", "compound_name", "compound_code",
+                         "brand_name", "indication", "therapeutic_area", "development_phase",
+                         "compound_type", "mechanism_of_action", "submission_type"]
+        return pa.schema(
+            [(name, pa.string()) for name in string_fields]
+            + [("regulatory_designations", pa.list_(pa.string())),
+               ("filing_date", pa.string()),
+               ("lead_indication", pa.bool_()),
+               ("status", pa.string()),
+               ("source_data", pa.string())]  # original record as JSON
+        )
+    
+    def save_harmonized_parquet(self, sources, output_filename="harmonized_pipeline_data.parquet",
+                                row_group_size=PARQUET_ROW_GROUP_SIZE):
+        """
+        Stream company feeds into a Parquet file of the unified pipeline
+        
+        Candidates are written one row group at a time with column statistics,
+        so memory use is bounded by row_group_size rather than the feed size.
+        Summary statistics are accumulated on the way and stored in
+        self.harmonized_data.
+        """
+        if pq is None:
+            raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
         
-        # Count by compound type
-        for candidate in all_candidates:
-            comp_type = candidate["compound_type"]
-            stats["by_compound_type"][comp_type] = stats["by_compound_type"].get(comp_type, 0) + 1
+        output_path = self.data_dir / output_filename
+        staging_path = output_path.with_name(output_path.name + '.tmp')
+        schema = self.parquet_schema()
+        stats = self.calculate_summary_statistics([])
+        candidates = self.stream_harmonized_candidates(sources)
+        row_groups = 0
+        
+        try:
+            with pq.ParquetWriter(staging_path, schema, write_statistics=True) as writer:
+                while True:
+                    batch = list(itertools.islice(candidates, row_group_size))
+                    if not batch:
+                        break
+                    self.update_summary_statistics(stats, batch)
+                    for candidate in batch:
+                        candidate["lead_indication"] = bool(candidate["lead_indication"])
+                        candidate["source_data"] = json.dumps(candidate["source_data"], ensure_ascii=False)
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema), row_group_size=row_group_size)
+                    row_groups += 1
+            os.replace(staging_path, output_path)
+        except BaseException:
+            # Don't leave a partial staging file behind
+            staging_path.unlink(missing_ok=True)
+            raise
+        
+        self.harmonized_data["summary_statistics"] = stats
+        self.harmonized_data["metadata"]["total_candidates"] = stats["total_candidates"]
+        
+        print(f"\n✓ Streamed {stats['total_candidates']} candidates to: {output_path}")
+        print(f"  Row groups: {row_groups}")
         
-        return stats
+        return output_path
     
     def harmonize_all_data(self):
         """Harmonize data from all companies"""
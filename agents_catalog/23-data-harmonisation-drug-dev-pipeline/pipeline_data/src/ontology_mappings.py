@@ -17,6 +17,11 @@ Author: Data Science Team
 Date: 2025-07-03
 """
 
+import re
+from bisect import bisect_right
+
+OBO_SYNONYM_PATTERN = re.compile(r'^synonym: "((?:[^"\\]|\\.)*)" (\w+)')
+
 # Therapeutic Area Mappings to EFO (Experimental Factor Ontology)
 THERAPEUTIC_AREA_MAPPINGS = {
     "Cardiovascular/Metabolic": {
@@ -333,6 +338,170 @@ REGULATORY_MAPPINGS = {
     }
 }
 
+class OntologyMatcher:
+    """
+    Aho-Corasick automaton over ontology synonyms
+    
+    Built once from a mapping of synonym -> annotation, it finds every synonym
+    occurring in a text (case-insensitive substring match) in a single pass, so
+    lookup cost depends on the text length rather than on the vocabulary size.
+    Larger vocabularies can be loaded from OBO dumps such as MONDO or ChEBI.
+    """
+    
+    def __init__(self, mappings=None):
+        self.synonyms = []      # synonym id -> (synonym, annotation)
+        self._lengths = []      # synonym id -> length of the lowercased synonym
+        self._goto = [{}]       # node -> {character: node}
+        self._terminal = [-1]   # node -> id of the synonym ending at the node
+        self._fail = [0]
+        self._output = [0]      # node -> nearest terminal node on its failure chain
+        self._compiled = True
+        self._joined = None
+        for synonym, annotation in (mappings or {}).items():
+            self.add(synonym, annotation)
+    
+    def __len__(self):
+        return len(self.synonyms)
+    
+    def add(self, synonym, annotation):
+        """Add a synonym; the first annotation added for a synonym is kept"""
+        key = synonym.lower()
+        if not key:
+            return
+        goto, node = self._goto, 0
+        for char in key:
+            child = goto[node].get(char)
+            if child is None:
+                child = len(goto)
+                goto[node][char] = child
+                goto.append({})
+                self._terminal.append(-1)
+            node = child
+        if self._terminal[node] == -1:
+            self._terminal[node] = len(self.synonyms)
+            self.synonyms.append((synonym, annotation))
+            self._lengths.append(len(key))
+            self._compiled = False
+            self._joined = None
+    
+    def add_obo(self, obo_path, scopes=("EXACT",)):
+        """Add the names and synonyms of every term in an OBO file"""
+        for synonym, annotation in load_obo_synonyms(obo_path, scopes):
+            self.add(synonym, annotation)
+        return self
+    
+    def _compile(self):
+        """Compute failure and output links breadth-first"""
+        goto, terminal = self._goto, self._terminal
+        fail, output = [0] * len(goto), [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = fail[child] if terminal[fail[child]] != -1 else output[fail[child]]
+                queue.append(child)
+        self._fail, self._output = fail, output
+        self._compiled = True
+    
+    def iter_matches(self, text):
+        """Yield (start, end, synonym id) for every synonym occurrence, overlaps included"""
+        if not self._compiled:
+            self._compile()
+        goto, fail, terminal, output, lengths = self._goto, self._fail, self._terminal, self._output, self._lengths
+        node = 0
+        for end, char in enumerate(text.lower(), 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if terminal[node] != -1 else output[node]
+            while match:
+                synonym_id = terminal[match]
+                yield end - lengths[synonym_id], end, synonym_id
+                match = output[match]
+    
+    def find_all(self, text):
+        """
+        Non-overlapping synonym matches in a text, longest match first at each position
+        
+        Returns:
+            List of (synonym, annotation, start, end) tuples in text order
+        """
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        selected, covered = [], 0
+        for start, end, synonym_id in matches:
+            if start >= covered:
+                synonym, annotation = self.synonyms[synonym_id]
+                selected.append((synonym, annotation, start, end))
+                covered = end
+        return selected
+    
+    def longest(self, text):
+        """Annotation of the longest synonym in the text (earliest on ties), or None"""
+        best = max(self.iter_matches(text), key=lambda m: (m[1] - m[0], -m[0]), default=None)
+        return self.synonyms[best[2]][1] if best else None
+    
+    def containing(self, text):
+        """Annotation of the first synonym that contains the text, or None"""
+        if self._joined is None:
+            keys = [synonym.lower() for synonym, _ in self.synonyms]
+            self._starts, position = [], 0
+            for key in keys:
+                self._starts.append(position)
+                position += len(key) + 1
+            self._joined = "\x00".join(keys)
+        position = self._joined.find(text.lower())
+        if position == -1 or not self.synonyms:
+            return None
+        return self.synonyms[bisect_right(self._starts, position) - 1][1]
+
+
+def load_obo_synonyms(obo_path, scopes=("EXACT",)):
+    """
+    Yield (synonym, annotation) pairs for the terms of an OBO ontology file
+    
+    Each non-obsolete [Term] yields its name and its synonyms of the given
+    scopes, all sharing one annotation such as
+    {"mondo_id": "MONDO_0005148", "mondo_label": "type 2 diabetes mellitus"}.
+    """
+    def emit(term):
+        if term.get("id") and term.get("name") and not term.get("obsolete"):
+            prefix, _, local_id = term["id"].partition(":")
+            annotation = {f"{prefix.lower()}_id": f"{prefix}_{local_id}", f"{prefix.lower()}_label": term["name"]}
+            yield term["name"], annotation
+            for synonym in term["synonyms"]:
+                yield synonym, annotation
+    
+    term = None
+    with open(obo_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                if term:
+                    yield from emit(term)
+                term = {"synonyms": []} if line == "[Term]" else None
+            elif term is None or not line:
+                continue
+            elif line.startswith("id: "):
+                term["id"] = line[4:]
+            elif line.startswith("name: "):
+                term["name"] = line[6:]
+            elif line.startswith("is_obsolete: true"):
+                term["obsolete"] = True
+            elif line.startswith("synonym: "):
+                match = OBO_SYNONYM_PATTERN.match(line)
+                if match and match.group(2) in scopes:
+                    term["synonyms"].append(match.group(1).replace('\\"', '"'))
+    if term:
+        yield from emit(term)
+
+
+# Matchers compiled once per process from the mappings above
+INDICATION_MATCHER = OntologyMatcher(INDICATION_MAPPINGS)
+MECHANISM_MATCHER = OntologyMatcher(MECHANISM_MAPPINGS)
+
 def get_therapeutic_area_ontology(area):
     """Get ontological annotations for therapeutic area"""
     return THERAPEUTIC_AREA_MAPPINGS.get(area, {})
@@ -343,12 +512,12 @@ def get_indication_ontology(indication):
     if indication in INDICATION_MAPPINGS:
         return INDICATION_MAPPINGS[indication]
     
-    # Fuzzy matching for partial matches
-    for key, value in INDICATION_MAPPINGS.items():
-        if key.lower() in indication.lower() or indication.lower() in key.lower():
-            return value
+    # Longest known indication mentioned in the text, else one that mentions the text
+    match = INDICATION_MATCHER.longest(indication)
+    if match is None:
+        match = INDICATION_MATCHER.containing(indication)
     
-    return {}
+    return match if match is not None else {}
 
 def get_compound_type_ontology(compound_type):
     """Get ontological annotations for compound type"""
@@ -363,12 +532,8 @@ def get_mechanism_ontology(mechanism_text):
     if not mechanism_text:
         return {}
     
-    mechanism_lower = mechanism_text.lower()
-    for key, value in MECHANISM_MAPPINGS.items():
-        if key in mechanism_lower:
-            return value
-    
-    return {}
+    match = MECHANISM_MATCHER.longest(mechanism_text)
+    return match if match is not None else {}
 
 def get_regulatory_ontology(designation):
     """Get ontological annotations for regulatory designation"""
@@ -1,8 +1,9 @@
 import asyncio
 
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from citation_index import citation_index
 from search_pmc import search_pmc_tool
-from gather_evidence import gather_evidence_tool
+from gather_evidence import gather_evidence_batch_tool, gather_evidence_tool
 from strands import Agent
 from strands.models import BedrockModel
 from strands.types.content import SystemContentBlock
@@ -38,7 +39,7 @@ os.environ["BYPASS_TOOL_CONSENT"] = "true"
 
 agent = Agent(
     model=model,
-    tools=[editor, search_pmc_tool, gather_evidence_tool],
+    tools=[editor, search_pmc_tool, gather_evidence_tool, gather_evidence_batch_tool],
     system_prompt=system_content,
 )
 
@@ -67,6 +68,9 @@ async def strands_agent_bedrock(payload):
                 yield event["data"]
     except Exception as e:
         yield f"Error: {str(e)}"
+    finally:
+        # Persist the citation index at the end of every invocation
+        await asyncio.to_thread(citation_index.sync, force=True)
 
 
 if __name__ == "__main__":
@@ -4,7 +4,8 @@ import logging
 import os
 import re
 import uuid
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
@@ -12,6 +13,9 @@ from paperqa import Settings, ask
 from paperqa.settings import (AgentSettings, AnswerSettings, IndexSettings,
                               ParsingSettings)
 from strands import tool
+
+from paper_store import (PAPER_STORE_DIR, article_lock, download_file_atomic,
+                         restore_article, save_article, stored_article_text)
 import warnings
 warnings.filterwarnings("ignore", module="litellm")
 
@@ -33,6 +37,8 @@ PAPERQA_AGENT_TYPE = os.getenv("PAPERQA_AGENT_TYPE", "fake")
 PAPERQA_EVIDENCE_K = os.getenv("EVIDENCE_K", 5)
 PAPERQA_EVIDENCE_SUMMARY_LENGTH = os.getenv("EVIDENCE_SUMMARY_LENGTH", "25 to 50 words")
 
+GATHER_EVIDENCE_MAX_WORKERS = int(os.getenv("GATHER_EVIDENCE_MAX_WORKERS", 4))
+
 # Configure logging
 logging.basicConfig(
     format="%(levelname)s | %(name)s | %(message)s",
@@ -166,7 +172,7 @@ def _download_from_s3(bucket: str, key: str, local_folder: str = "my_papers") ->
         logger.info(f"Attempting to download {s3_path} to {local_path}")
 
         # Download the file
-        s3_client.download_file(bucket, key, local_path)
+        download_file_atomic(s3_client, bucket, key, local_path)
 
         logger.info(f"Successfully downloaded file to {local_path}")
         return local_path
@@ -227,7 +233,9 @@ def gather_evidence(pmcid: str, question: str, source: Optional[str] = None) ->
     Answer questions about a PMC article using paper-qa for intelligent retrieval.
 
     This function downloads a scientific paper from PubMed Central and uses the paper-qa
-    library to answer specific questions about the paper with sources.
+    library to answer specific questions about the paper with sources. The article text
+    and its paper-qa index are kept in the article store, so follow-up questions about
+    the same paper skip the download, parsing and embedding.
 
     Args:
         pmcid: PMC identifier (e.g., "PMC6033041")
@@ -237,6 +245,13 @@ def gather_evidence(pmcid: str, question: str, source: Optional[str] = None) ->
     Returns:
         dict: ToolResult with status and content containing the answer and sources
     """
+    # Concurrent questions about the same paper wait for one index instead of racing to build it
+    with article_lock(pmcid):
+        return _gather_evidence(pmcid, question, source)
+
+
+def _gather_evidence(pmcid: str, question: str, source: Optional[str] = None) -> dict:
+    """Answer a question about one article; callers hold the article lock"""
     logger.info(f"Starting gather_evidence for PMCID: {pmcid}, question: {question}")
 
     # Configure PaperQA logging to avoid Rich handler errors in Jupyter
@@ -266,62 +281,68 @@ def gather_evidence(pmcid: str, question: str, source: Optional[str] = None) ->
         bucket = "pmc-oa-opendata"
         commercial_key = f"oa_comm/txt/all/{pmcid}.txt"
         noncommercial_key = f"oa_noncomm/txt/all/{pmcid}.txt"
-        local_text_folder = f"my_papers/{pmcid}/txt"
-        local_index_folder = f"my_papers/{pmcid}/index"
-
-        # Step 2: Try to download from commercial bucket first
-        local_file_path = None
-        try:
-            logger.debug(f"Checking commercial bucket for {pmcid}")
-            local_file_path = _download_from_s3(
-                bucket, commercial_key, local_folder=local_text_folder
-            )
-            logger.info(f"Successfully retrieved commercial article {pmcid}")
-
-        except PMCS3Error as e:
-            if "not found" not in str(e).lower():
-                logger.warning(f"S3 error accessing commercial bucket: {str(e)}")
-                raise e
-
-            # Try non-commercial bucket
-            logger.debug(f"Article {pmcid} not found in commercial bucket")
-            if COMMERCIAL_USE_ONLY:
-                logger.warning(
-                    f"Article {pmcid} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
-                )
-                raise PMCS3Error(
-                    f"Article {pmcid} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
-                )
-            logger.info(f"Checking non-commercial bucket for {pmcid}")
-
+        local_text_folder = os.path.join(PAPER_STORE_DIR, pmcid, "txt")
+        local_index_folder = os.path.join(PAPER_STORE_DIR, pmcid, "index")
+
+        # Step 2: Reuse the stored copy of the article (and its index) when there is one,
+        # otherwise try to download from commercial bucket first
+        local_file_path = stored_article_text(local_text_folder)
+        if local_file_path is None and restore_article(pmcid):
+            local_file_path = stored_article_text(local_text_folder)
+        if local_file_path is not None:
+            logger.info(f"Using stored copy of {pmcid} at {local_file_path}")
+        else:
             try:
+                logger.debug(f"Checking commercial bucket for {pmcid}")
                 local_file_path = _download_from_s3(
-                    bucket, noncommercial_key, local_folder=local_text_folder
+                    bucket, commercial_key, local_folder=local_text_folder
                 )
-                logger.warning(
-                    f"Article {pmcid} found in non-commercial bucket - licensing restrictions may apply"
-                )
-
-            except PMCS3Error as nc_error:
-                if "not found" in str(nc_error).lower():
-                    error_msg = f"Article {pmcid} is not available in the PMC Open Access Subset on AWS"
-                    logger.info(error_msg)
-                    return {
-                        "status": "error",
-                        "content": [
-                            {"text": error_msg},
-                            {
-                                "json": {
-                                    "question": question,
-                                    "pmcid": pmcid,
-                                    "source": source
-                                    or f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/",
-                                }
-                            },
-                        ],
-                    }
-                else:
-                    raise nc_error
+                logger.info(f"Successfully retrieved commercial article {pmcid}")
+
+            except PMCS3Error as e:
+                if "not found" not in str(e).lower():
+                    logger.warning(f"S3 error accessing commercial bucket: {str(e)}")
+                    raise e
+
+                # Try non-commercial bucket
+                logger.debug(f"Article {pmcid} not found in commercial bucket")
+                if COMMERCIAL_USE_ONLY:
+                    logger.warning(
+                        f"Article {pmcid} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
+                    )
+                    raise PMCS3Error(
+                        f"Article {pmcid} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
+                    )
+                logger.info(f"Checking non-commercial bucket for {pmcid}")
+
+                try:
+                    local_file_path = _download_from_s3(
+                        bucket, noncommercial_key, local_folder=local_text_folder
+                    )
+                    logger.warning(
+                        f"Article {pmcid} found in non-commercial bucket - licensing restrictions may apply"
+                    )
+
+                except PMCS3Error as nc_error:
+                    if "not found" in str(nc_error).lower():
+                        error_msg = f"Article {pmcid} is not available in the PMC Open Access Subset on AWS"
+                        logger.info(error_msg)
+                        return {
+                            "status": "error",
+                            "content": [
+                                {"text": error_msg},
+                                {
+                                    "json": {
+                                        "question": question,
+                                        "pmcid": pmcid,
+                                        "source": source
+                                        or f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/",
+                                    }
+                                },
+                            ],
+                        }
+                    else:
+                        raise nc_error
 
         # Step 3: Use paper-qa to answer the question
         logger.info(f"Processing paper with paper-qa for question: {question}")
@@ -351,9 +372,14 @@ def gather_evidence(pmcid: str, question: str, source: Optional[str] = None) ->
         )
 
         # Ask the question
+        index_existed = os.path.isdir(local_index_folder) and bool(os.listdir(local_index_folder))
         logger.info("Invoking paper-qa")
         answer = ask(question, settings=settings)
 
+        # Keep the freshly built index for follow-up questions on other instances
+        if not index_existed:
+            save_article(pmcid)
+
         # Format the response using Strands ToolResult format
         answer_text = answer.session.answer
         contexts = [
@@ -459,6 +485,64 @@ def gather_evidence_tool(pmcid: str, question: str) -> dict:
     return gather_evidence(pmcid=pmcid, question=question)
 
 
+def gather_evidence_batch(
+    pmcids: List[str],
+    question: str,
+    max_workers: int = GATHER_EVIDENCE_MAX_WORKERS,
+) -> dict:
+    """
+    Answer the same question about several PMC articles concurrently.
+
+    Articles are processed by a bounded worker pool; duplicate IDs are processed once.
+
+    Args:
+        pmcids: PMC identifiers (e.g., ["PMC6033041", "PMC9438179"])
+        question: The question to answer about each paper
+        max_workers: Maximum number of articles processed at the same time
+
+    Returns:
+        dict: ToolResult whose content holds, for each article, the answer text and
+        its evidence json; status is "success" if at least one article was answered
+    """
+    unique_ids = list(dict.fromkeys(pmcids or []))
+    if not unique_ids:
+        return {"status": "error", "content": [{"text": "No PMC IDs provided"}]}
+
+    logger.info(f"Gathering evidence from {len(unique_ids)} articles with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_ids)))) as executor:
+        results = list(
+            executor.map(lambda pmcid: gather_evidence(pmcid, question), unique_ids)
+        )
+
+    content = []
+    for pmcid, result in zip(unique_ids, results):
+        answer_text, *details = result["content"]
+        content.append({"text": f"[{pmcid}] {answer_text['text']}"})
+        content.extend(details)
+
+    succeeded = sum(result["status"] == "success" for result in results)
+    logger.info(f"Answered {succeeded} of {len(unique_ids)} articles")
+    return {"status": "success" if succeeded else "error", "content": content}
+
+
+@tool
+def gather_evidence_batch_tool(pmcids: List[str], question: str) -> dict:
+    """
+    Answer the same question about several PMC articles at once using paper-qa.
+
+    Use this instead of calling gather_evidence_tool repeatedly when you have a list of
+    relevant papers; the articles are processed concurrently.
+
+    Args:
+        pmcids: List of PMC identifiers (e.g., ["PMC6033041", "PMC9438179"])
+        question: The question to answer about each paper
+
+    Returns:
+        dict: ToolResult with one answer and evidence record per article
+    """
+    return gather_evidence_batch(pmcids=pmcids, question=question)
+
+
 if __name__ == "__main__":
     # Example usage for testing
     result = gather_evidence(
@@ -0,0 +1,111 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Article store for gather_evidence.
+
+The downloaded text and PaperQA index of each article are kept under
+PAPER_STORE_DIR/{pmcid} and, when PAPER_STORE_S3_URI is set, synced to S3 so later
+questions (on any instance) skip the download, parsing and embedding. Work on one
+article is serialized with a striped lock, since its PaperQA index is not safe for
+concurrent writers.
+
+Both research agents ship an identical copy of this module, because each one is
+built from its own directory. Change them together.
+"""
+
+import logging
+import os
+import threading
+import zlib
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError, NoCredentialsError
+
+PAPER_STORE_DIR = os.getenv("PAPER_STORE_DIR", "my_papers")
+PAPER_STORE_S3_URI = os.getenv("PAPER_STORE_S3_URI", "")
+# Fixed pool of article locks; articles hashing to the same stripe share a lock
+ARTICLE_LOCK_STRIPES = 64
+
+logger = logging.getLogger("paper_store")
+logger.level = logging.INFO
+
+_article_locks = [threading.Lock() for _ in range(ARTICLE_LOCK_STRIPES)]
+
+
+def article_lock(pmcid: str) -> threading.Lock:
+    """Lock serializing work on one article, from a fixed pool so it never grows"""
+    return _article_locks[zlib.crc32(pmcid.encode("utf-8")) % ARTICLE_LOCK_STRIPES]
+
+
+def download_file_atomic(s3_client, bucket: str, key: str, local_path: str) -> None:
+    """Download an S3 object next to local_path and move it into place once complete"""
+    partial_path = local_path + ".part"
+    try:
+        s3_client.download_file(bucket, key, partial_path)
+        os.replace(partial_path, local_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+def stored_article_text(text_folder: str) -> Optional[str]:
+    """Return the path of an already downloaded article text, if any"""
+    if os.path.isdir(text_folder):
+        for name in os.listdir(text_folder):
+            if name.endswith(".txt"):
+                return os.path.join(text_folder, name)
+    return None
+
+
+def _store_location(pmcid: str):
+    """Split PAPER_STORE_S3_URI into (bucket, prefix) for an article"""
+    bucket, _, prefix = PAPER_STORE_S3_URI[len("s3://"):].partition("/")
+    return bucket, f"{prefix.strip('/')}/{pmcid}/".lstrip("/")
+
+
+def restore_article(pmcid: str) -> bool:
+    """
+    Download an article's stored text and index from the S3 article store
+
+    Returns:
+        bool: True if the article text was restored
+    """
+    if not PAPER_STORE_S3_URI:
+        return False
+    bucket, prefix = _store_location(pmcid)
+    local_root = os.path.join(PAPER_STORE_DIR, pmcid)
+    try:
+        s3_client = boto3.client("s3")
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                local_path = os.path.join(local_root, obj["Key"][len(prefix):])
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                download_file_atomic(s3_client, bucket, obj["Key"], local_path)
+    except (ClientError, NoCredentialsError, OSError) as e:
+        logger.warning(f"Could not restore {pmcid} from article store: {str(e)}")
+        return False
+    restored = stored_article_text(os.path.join(local_root, "txt")) is not None
+    if restored:
+        logger.info(f"Restored {pmcid} text and index from s3://{bucket}/{prefix}")
+    return restored
+
+
+def save_article(pmcid: str) -> None:
+    """Upload an article's text and index to the S3 article store"""
+    if not PAPER_STORE_S3_URI:
+        return
+    bucket, prefix = _store_location(pmcid)
+    local_root = os.path.join(PAPER_STORE_DIR, pmcid)
+    try:
+        s3_client = boto3.client("s3")
+        for folder, _, files in os.walk(local_root):
+            for name in files:
+                local_path = os.path.join(folder, name)
+                key = prefix + os.path.relpath(local_path, local_root).replace(os.sep, "/")
+                s3_client.upload_file(local_path, bucket, key)
+    except (ClientError, NoCredentialsError, OSError) as e:
+        logger.warning(f"Could not save {pmcid} to article store: {str(e)}")
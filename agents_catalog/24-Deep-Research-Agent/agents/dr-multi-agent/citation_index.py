@@ -0,0 +1,321 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Persistent citation index for PMC search results.
+
+Every fetched article is stored once in a local SQLite file together with the PMIDs
+it references, so the citation graph grows across searches and sessions. Articles
+already in the index are served from it instead of being fetched again, and results
+can be ranked by in-degree or personalized PageRank over the whole known graph
+rather than only the current result set.
+
+Nodes are keyed by integer PMC ID and edges are stored as (citing PMC ID, cited PMID)
+integer pairs in a WITHOUT ROWID table. Articles indexed more than
+CITATION_INDEX_MAX_AGE_DAYS ago are fetched again so their metadata and references
+are refreshed. When CITATION_INDEX_S3_URI is set, the file is restored from S3 on
+first use and uploaded after the first write, then at most every
+CITATION_INDEX_SYNC_SECONDS, at the end of each agent invocation and at interpreter
+exit, so the index outlives the container. Concurrent instances do not merge their
+uploads; the last upload wins.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import boto3
+
+CITATION_INDEX_ENABLED = os.getenv("CITATION_INDEX_ENABLED", "true").lower() == "true"
+CITATION_INDEX_PATH = os.getenv(
+    "CITATION_INDEX_PATH", "/tmp/pmc-citation-index.sqlite"  # nosec B108 - per-container scratch
+)
+# Optional s3://bucket/key of the index file shared across sessions
+CITATION_INDEX_S3_URI = os.getenv("CITATION_INDEX_S3_URI", "")
+CITATION_INDEX_SYNC_SECONDS = int(os.getenv("CITATION_INDEX_SYNC_SECONDS", "300"))
+# Stored articles older than this are treated as missing and fetched again
+CITATION_INDEX_MAX_AGE_DAYS = float(os.getenv("CITATION_INDEX_MAX_AGE_DAYS", "30"))
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITERATIONS = 50
+PAGERANK_TOLERANCE = 1e-8
+# Personalized PageRank runs on the neighbourhood of the result set; mass that
+# restarts at the seeds rarely travels further than a few citation hops.
+PAGERANK_HOPS = 2
+
+# SQLite limits the number of bound parameters per statement
+_SQL_CHUNK = 500
+
+ArticleDict = Dict[str, Any]
+
+logger = logging.getLogger("citation_index")
+logger.setLevel(logging.INFO)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    pmc INTEGER PRIMARY KEY,
+    pmid INTEGER,
+    data TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_pmid ON articles (pmid);
+CREATE TABLE IF NOT EXISTS citations (
+    citing_pmc INTEGER NOT NULL,
+    cited_pmid INTEGER NOT NULL,
+    PRIMARY KEY (citing_pmc, cited_pmid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citations_cited ON citations (cited_pmid);
+"""
+
+
+def _to_int(value: Any):
+    """Return value as an int, or None when it is not a plain numeric ID."""
+    text = str(value or "").replace("PMC", "").strip()
+    return int(text) if text.isdigit() else None
+
+
+def _chunks(values: List[Any], size: int = _SQL_CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+class CitationIndex:
+    """Incrementally updated citation graph with article metadata."""
+
+    def __init__(self, path: str = CITATION_INDEX_PATH, s3_uri: str = CITATION_INDEX_S3_URI):
+        self.path = path
+        self.s3_uri = s3_uri
+        self._conn = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        # None until the first upload, so the first write is synced right away
+        self._last_sync = None
+
+    # --- storage ---
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.s3_uri and not os.path.exists(self.path):
+                self._restore()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _s3_location(self) -> Tuple[str, str]:
+        bucket, _, key = self.s3_uri[len("s3://") :].partition("/")
+        return bucket, key
+
+    def _restore(self) -> None:
+        bucket, key = self._s3_location()
+        try:
+            boto3.client("s3").download_file(bucket, key, self.path)
+            logger.info(f"Restored citation index from {self.s3_uri}")
+        except Exception as e:
+            logger.info(f"No citation index restored from {self.s3_uri}: {e}")
+
+    def sync(self, force: bool = False) -> None:
+        """Upload the index to S3 if it changed and the sync interval has passed."""
+        if not self.s3_uri or not self._dirty:
+            return
+        if (not force and self._last_sync is not None
+                and time.monotonic() - self._last_sync < CITATION_INDEX_SYNC_SECONDS):
+            return
+        bucket, key = self._s3_location()
+        snapshot = self.path + ".snapshot"
+        try:
+            with self._lock:
+                # Copy through the backup API so the upload sees a consistent file
+                target = sqlite3.connect(snapshot)
+                with target:
+                    self._connection().backup(target)
+                target.close()
+                self._dirty = False
+                self._last_sync = time.monotonic()
+            boto3.client("s3").upload_file(snapshot, bucket, key)
+        except Exception as e:
+            logger.warning(f"Citation index upload skipped: {e}")
+        finally:
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+
+    # --- updates and lookups ---
+
+    def add_articles(self, articles: List[ArticleDict]) -> int:
+        """
+        Insert or refresh articles and their outgoing citations.
+
+        Args:
+            articles: Article dictionaries as returned by fetch_pmc
+
+        Returns:
+            Number of articles written
+        """
+        rows, edges, pmcs = [], [], []
+        now = time.time()
+        for article in articles:
+            pmc = _to_int(article.get("id"))
+            if pmc is None:
+                continue
+            data = {k: v for k, v in article.items() if k not in ("references", "referenced_by_count", "citation_score")}
+            rows.append((pmc, _to_int(article.get("pmid")), json.dumps(data), now))
+            pmcs.append(pmc)
+            for ref_pmid in article.get("references", []):
+                cited = _to_int(ref_pmid)
+                if cited is not None:
+                    edges.append((pmc, cited))
+
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for chunk in _chunks(pmcs):
+                    conn.execute(
+                        f"DELETE FROM citations WHERE citing_pmc IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                conn.executemany("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?)", rows)
+                conn.executemany("INSERT OR IGNORE INTO citations VALUES (?, ?)", edges)
+            self._dirty = True
+        self.sync()
+        return len(rows)
+
+    def get_articles(self, pmc_ids: List[str]) -> Dict[str, ArticleDict]:
+        """
+        Return stored articles, with their references, keyed by PMC ID (without prefix).
+
+        Articles indexed more than CITATION_INDEX_MAX_AGE_DAYS ago are left out, so
+        callers fetch and re-index them.
+        """
+        ids = [i for i in (_to_int(p) for p in pmc_ids) if i is not None]
+        fresh_after = time.time() - CITATION_INDEX_MAX_AGE_DAYS * 86400
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for chunk in _chunks(ids):
+                marks = ",".join("?" * len(chunk))
+                for pmc, data in conn.execute(
+                    f"SELECT pmc, data FROM articles WHERE pmc IN ({marks}) AND indexed_at >= ?",
+                    [*chunk, fresh_after],
+                ):
+                    found[pmc] = json.loads(data)
+                for pmc, cited in conn.execute(
+                    f"SELECT citing_pmc, cited_pmid FROM citations WHERE citing_pmc IN ({marks})",
+                    chunk,
+                ):
+                    if pmc in found:
+                        found[pmc].setdefault("references", []).append(str(cited))
+        return {str(pmc): article for pmc, article in found.items()}
+
+    def in_degree(self, pmc_ids: List[str]) -> Dict[str, int]:
+        """Count distinct indexed articles citing each PMC ID, excluding self-citations."""
+        ids = [i for i in (_to_int(p) for p in pmc_ids) if i is not None]
+        counts = {}
+        with self._lock:
+            conn = self._connection()
+            for chunk in _chunks(ids):
+                for pmc, count in conn.execute(
+                    "SELECT a.pmc, COUNT(DISTINCT c.citing_pmc) FROM articles a "
+                    "JOIN citations c ON c.cited_pmid = a.pmid "
+                    f"WHERE a.pmc IN ({','.join('?' * len(chunk))}) AND c.citing_pmc != a.pmc "
+                    "GROUP BY a.pmc",
+                    chunk,
+                ):
+                    counts[str(pmc)] = count
+        return {str(p): counts.get(str(_to_int(p)), 0) for p in pmc_ids}
+
+    def personalized_pagerank(self, pmc_ids: List[str], hops: int = PAGERANK_HOPS) -> Dict[str, float]:
+        """
+        Personalized PageRank restarting at the given articles.
+
+        Scores are computed over the indexed citation graph within ``hops`` citation
+        links of the seeds, so an article cited by influential papers outside the
+        current result set still ranks highly.
+
+        Args:
+            pmc_ids: Seed PMC IDs (the current result set)
+            hops: Neighbourhood radius around the seeds
+
+        Returns:
+            Score per seed PMC ID
+        """
+        seeds = {i for i in (_to_int(p) for p in pmc_ids) if i is not None}
+        if not seeds:
+            return {str(p): 0.0 for p in pmc_ids}
+        edges = self._neighbourhood_edges(seeds, hops)
+
+        nodes = set(seeds)
+        out_links: Dict[int, List[int]] = {}
+        for citing, cited in edges:
+            if citing != cited:
+                out_links.setdefault(citing, []).append(cited)
+                nodes.update((citing, cited))
+
+        restart = {node: 1.0 / len(seeds) for node in seeds}
+        rank = dict(restart)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            next_rank = {node: (1 - PAGERANK_DAMPING) * restart.get(node, 0.0) for node in nodes}
+            dangling = 0.0
+            for node, score in rank.items():
+                targets = out_links.get(node)
+                if targets:
+                    share = PAGERANK_DAMPING * score / len(targets)
+                    for target in targets:
+                        next_rank[target] += share
+                else:
+                    dangling += score
+            # Mass from articles without indexed references returns to the seeds
+            for node, weight in restart.items():
+                next_rank[node] += PAGERANK_DAMPING * dangling * weight
+            delta = sum(abs(next_rank[n] - rank.get(n, 0.0)) for n in nodes)
+            rank = next_rank
+            if delta < PAGERANK_TOLERANCE:
+                break
+
+        return {str(p): rank.get(_to_int(p), 0.0) for p in pmc_ids}
+
+    def _neighbourhood_edges(self, seeds: Set[int], hops: int) -> Set[Tuple[int, int]]:
+        """Collect (citing PMC, cited PMC) edges reachable within ``hops`` of the seeds."""
+        edges: Set[Tuple[int, int]] = set()
+        visited = set(seeds)
+        frontier = list(seeds)
+        with self._lock:
+            conn = self._connection()
+            for _ in range(max(hops, 1)):
+                reached = set()
+                for chunk in _chunks(frontier):
+                    marks = ",".join("?" * len(chunk))
+                    # Articles cited by the frontier, then articles citing the frontier
+                    for query in (
+                        "SELECT c.citing_pmc, a.pmc FROM citations c "
+                        f"JOIN articles a ON a.pmid = c.cited_pmid WHERE c.citing_pmc IN ({marks})",
+                        "SELECT c.citing_pmc, a.pmc FROM articles a "
+                        f"JOIN citations c ON c.cited_pmid = a.pmid WHERE a.pmc IN ({marks})",
+                    ):
+                        for citing, cited in conn.execute(query, chunk):
+                            edges.add((citing, cited))
+                            reached.update((citing, cited))
+                frontier = list(reached - visited)
+                visited.update(reached)
+                if not frontier:
+                    break
+        return edges
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            citations = conn.execute("SELECT COUNT(*) FROM citations").fetchone()[0]
+        return {"articles": articles, "citations": citations}
+
+
+citation_index = CitationIndex()
+# Upload pending changes when the process shuts down
+atexit.register(citation_index.sync, force=True)
@@ -0,0 +1,166 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+"""
+Batched access to the evidence table with an in-process read-through cache.
+
+Evidence records are written once and never updated, so records read or written by
+this process are kept in a bounded LRU cache and repeated report drafts over the same
+evidence skip DynamoDB entirely. Misses are read with BatchGetItem in segments of up
+to 100 keys that run in parallel; writes go through BatchWriteItem. Unprocessed keys
+and items are retried with exponential backoff.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import boto3
+
+# Dynamo DB Configuration
+EVIDENCE_TABLE_NAME = os.getenv("EVIDENCE_TABLE_NAME", "deep-research-evidence")
+EVIDENCE_CACHE_MAX_ENTRIES = int(os.getenv("EVIDENCE_CACHE_MAX_ENTRIES", 2048))
+EVIDENCE_READ_MAX_WORKERS = int(os.getenv("EVIDENCE_READ_MAX_WORKERS", 4))
+
+# DynamoDB limits per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+
+MAX_UNPROCESSED_RETRIES = 8
+RETRY_BASE_DELAY = 0.05
+
+logger = logging.getLogger("evidence_store")
+logger.level = logging.INFO
+
+
+class EvidenceStore:
+    """Read and write evidence records in batches."""
+
+    def __init__(
+        self,
+        table_name: str = EVIDENCE_TABLE_NAME,
+        max_cache_entries: int = EVIDENCE_CACHE_MAX_ENTRIES,
+        max_workers: int = EVIDENCE_READ_MAX_WORKERS,
+    ):
+        self.table_name = table_name
+        self.max_cache_entries = max_cache_entries
+        self.max_workers = max_workers
+        self._dynamodb = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            self._dynamodb = boto3.resource("dynamodb")
+        return self._dynamodb
+
+    def get_many(self, evidence_ids: List[str]) -> List[Optional[dict]]:
+        """
+        Get evidence records by evidence_id.
+
+        Args:
+            evidence_ids: Evidence IDs to read; duplicates are read once
+
+        Returns:
+            Records in the order of evidence_ids, with None for IDs that do not exist
+        """
+        found = {}
+        with self._lock:
+            for evidence_id in evidence_ids:
+                if evidence_id in self._cache:
+                    self._cache.move_to_end(evidence_id)
+                    found[evidence_id] = self._cache[evidence_id]
+
+        missing = [i for i in dict.fromkeys(evidence_ids) if i not in found]
+        if missing:
+            logger.info(
+                f"Reading {len(missing)} of {len(set(evidence_ids))} evidence records from {self.table_name}"
+            )
+            segments = [
+                missing[i : i + BATCH_GET_MAX_KEYS]
+                for i in range(0, len(missing), BATCH_GET_MAX_KEYS)
+            ]
+            if len(segments) == 1:
+                results = [self._batch_get(segments[0])]
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_workers, len(segments))
+                ) as executor:
+                    results = list(executor.map(self._batch_get, segments))
+            for items in results:
+                for item in items:
+                    found[item["evidence_id"]] = item
+                self._remember(items)
+
+        return [found.get(evidence_id) for evidence_id in evidence_ids]
+
+    def get(self, evidence_id: str) -> Optional[dict]:
+        return self.get_many([evidence_id])[0]
+
+    def put_many(self, records: List[dict]) -> int:
+        """
+        Write evidence records with BatchWriteItem and add them to the cache.
+
+        Returns:
+            Number of records written
+        """
+        for start in range(0, len(records), BATCH_WRITE_MAX_ITEMS):
+            chunk = records[start : start + BATCH_WRITE_MAX_ITEMS]
+            request = {
+                self.table_name: [{"PutRequest": {"Item": record}} for record in chunk]
+            }
+            for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+                response = self.dynamodb.batch_write_item(RequestItems=request)
+                request = response.get("UnprocessedItems") or {}
+                if not request:
+                    break
+                self._backoff(attempt)
+            else:
+                raise RuntimeError(
+                    f"{len(request[self.table_name])} evidence records were not written to {self.table_name}"
+                )
+        self._remember(records)
+        logger.info(f"Saved {len(records)} evidence records to {self.table_name}")
+        return len(records)
+
+    def put(self, record: dict) -> int:
+        return self.put_many([record])
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _batch_get(self, evidence_ids: List[str]) -> List[dict]:
+        request = {
+            self.table_name: {"Keys": [{"evidence_id": i} for i in evidence_ids]}
+        }
+        items = []
+        for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+            response = self.dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response.get("Responses", {}).get(self.table_name, []))
+            request = response.get("UnprocessedKeys") or {}
+            if not request:
+                return items
+            self._backoff(attempt)
+        raise RuntimeError(
+            f"{len(request[self.table_name]['Keys'])} evidence records could not be read from {self.table_name}"
+        )
+
+    def _remember(self, records: List[dict]) -> None:
+        with self._lock:
+            for record in records:
+                self._cache[record["evidence_id"]] = record
+                self._cache.move_to_end(record["evidence_id"])
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _backoff(attempt: int) -> None:
+        time.sleep(RETRY_BASE_DELAY * (2**attempt))
+
+
+evidence_store = EvidenceStore()
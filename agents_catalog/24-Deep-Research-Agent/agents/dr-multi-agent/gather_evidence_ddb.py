@@ -4,7 +4,8 @@ import logging
 import os
 import re
 import uuid
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
@@ -16,6 +17,16 @@ from paperqa.settings import (
     ParsingSettings,
 )
 from strands import tool
+
+from evidence_store import EVIDENCE_TABLE_NAME, evidence_store
+from paper_store import (
+    PAPER_STORE_DIR,
+    article_lock,
+    download_file_atomic,
+    restore_article,
+    save_article,
+    stored_article_text,
+)
 import warnings
 warnings.filterwarnings("ignore", module="litellm")
 
@@ -37,8 +48,7 @@ PAPERQA_AGENT_TYPE = os.getenv("PAPERQA_AGENT_TYPE", "fake")
 PAPERQA_EVIDENCE_K = os.getenv("EVIDENCE_K", 5)
 PAPERQA_EVIDENCE_SUMMARY_LENGTH = os.getenv("EVIDENCE_SUMMARY_LENGTH", "25 to 50 words")
 
-# Dynamo DB Configuration
-EVIDENCE_TABLE_NAME = os.getenv("EVIDENCE_TABLE_NAME", "deep-research-evidence")
+GATHER_EVIDENCE_MAX_WORKERS = int(os.getenv("GATHER_EVIDENCE_MAX_WORKERS", 4))
 
 # Configure logging
 logging.basicConfig(
@@ -48,10 +58,6 @@ logging.basicConfig(
 logger = logging.getLogger("gather_evidence")
 logger.level = logging.INFO
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource("dynamodb")
-
-
 # Configure logging - suppress Rich logging errors from PaperQA
 def _configure_paperqa_logging():
     """
@@ -176,7 +182,7 @@ def _download_from_s3(bucket: str, key: str, local_folder: str = "my_papers") ->
         logger.info(f"Attempting to download {s3_path} to {local_path}")
 
         # Download the file
-        s3_client.download_file(bucket, key, local_path)
+        download_file_atomic(s3_client, bucket, key, local_path)
 
         logger.info(f"Successfully downloaded file to {local_path}")
         return local_path
@@ -232,77 +238,106 @@ def _download_from_s3(bucket: str, key: str, local_folder: str = "my_papers") ->
         raise PMCS3Error(f"Failed to download from S3: {str(e)}")
 
 
-def _save_to_db(
+def _evidence_record(
     evidence_id: str,
     question: str,
     answer: str,
     source: str,
     context: list,
 ) -> dict:
-    """Save gathered evidence record to DynamoDb table
+    """Build an evidence table item"""
+    return {
+        "evidence_id": evidence_id,
+        "question": question,
+        "answer": answer,
+        "source": source,
+        "context": context,
+    }
+
+
+def _save_records_to_db(records: List[dict]) -> int:
+    """Save gathered evidence records to DynamoDb table in batches
 
     Args:
-        evidence_id: Unique identifier for the evidence record
-        question: Question asked
-        answer: Answer text
-        source: Reference to source document
-        context: List of context summaries
+        records: Evidence records built by _evidence_record
 
     Returns:
-        dict: DynamoDB response
+        int: Number of records written
 
     Raises:
         ValueError: If table doesn't exist
         ClientError: If DynamoDB operation fails
     """
-    logger.info(f"Saving record to {EVIDENCE_TABLE_NAME}")
-
-    record = {
-        "evidence_id": evidence_id,
-        "question": question,
-        "answer": answer,
-        "source": source,
-        "context": context,
-    }
-    logger.info(record)
+    logger.info(f"Saving {len(records)} record(s) to {EVIDENCE_TABLE_NAME}")
+    logger.debug(records)
 
     try:
-        # Verify table exists
-        table = dynamodb.Table(EVIDENCE_TABLE_NAME)
-        table.load()  # This will raise an exception if table doesn't exist
-
-        # Put record
-        response = table.put_item(Item=record)
-        logger.debug(response)
-        logger.info(f"Successfully saved record with evidence_id: {evidence_id}")
-
-        return response
+        return evidence_store.put_many(records)
 
-    except dynamodb.meta.client.exceptions.ResourceNotFoundException:
-        error_msg = f"DynamoDB table '{EVIDENCE_TABLE_NAME}' does not exist"
-        logger.error(error_msg)
-        raise ValueError(error_msg)
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code", "Unknown")
+        if error_code == "ResourceNotFoundException":
+            error_msg = f"DynamoDB table '{EVIDENCE_TABLE_NAME}' does not exist"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
         error_message = e.response.get("Error", {}).get("Message", str(e))
         logger.error(f"DynamoDB error ({error_code}): {error_message}")
         raise
 
 
-def gather_evidence(pmc_id: str, question: str) -> dict:
+def _save_to_db(
+    evidence_id: str,
+    question: str,
+    answer: str,
+    source: str,
+    context: list,
+) -> int:
+    """Save one gathered evidence record to DynamoDb table
+
+    Args:
+        evidence_id: Unique identifier for the evidence record
+        question: Question asked
+        answer: Answer text
+        source: Reference to source document
+        context: List of context summaries
+
+    Returns:
+        int: Number of records written
+
+    Raises:
+        ValueError: If table doesn't exist
+        ClientError: If DynamoDB operation fails
+    """
+    return _save_records_to_db(
+        [_evidence_record(evidence_id, question, answer, source, context)]
+    )
+
+
+def gather_evidence(pmc_id: str, question: str, save_to_db: bool = True) -> dict:
     """
     Answer questions about a PMC article using paper-qa for intelligent retrieval.
 
     This function downloads a scientific paper from PubMed Central and uses the paper-qa
-    library to answer specific questions about the paper with sources.
+    library to answer specific questions about the paper with sources. The article text
+    and its paper-qa index are kept in the article store, so follow-up questions about
+    the same paper skip the download, parsing and embedding.
 
     Args:
         pmc_id: PMC identifier (e.g., "PMC6033041")
         question: The question to answer about the paper
+        save_to_db: Save the evidence record; batch callers pass False and save all
+            records with one batched write
 
     Returns:
         dict: ToolResult with status and content containing the answer and sources
     """
+    # Concurrent questions about the same paper wait for one index instead of racing to build it
+    with article_lock(pmc_id):
+        return _gather_evidence(pmc_id, question, save_to_db)
+
+
+def _gather_evidence(pmc_id: str, question: str, save_to_db: bool = True) -> dict:
+    """Answer a question about one article; callers hold the article lock"""
     logger.info(f"Starting gather_evidence for PMCID: {pmc_id}, question: {question}")
 
     # Configure PaperQA logging to avoid Rich handler errors in Jupyter
@@ -327,55 +362,61 @@ def gather_evidence(pmc_id: str, question: str) -> dict:
         bucket = "pmc-oa-opendata"
         commercial_key = f"oa_comm/txt/all/{pmc_id}.txt"
         noncommercial_key = f"oa_noncomm/txt/all/{pmc_id}.txt"
-        local_text_folder = f"my_papers/{pmc_id}/txt"
-        local_index_folder = f"my_papers/{pmc_id}/index"
-
-        # Step 2: Try to download from commercial bucket first
-        local_file_path = None
-        try:
-            logger.debug(f"Checking commercial bucket for {pmc_id}")
-            local_file_path = _download_from_s3(
-                bucket, commercial_key, local_folder=local_text_folder
-            )
-            logger.info(f"Successfully retrieved commercial article {pmc_id}")
-
-        except PMCS3Error as e:
-            if "not found" not in str(e).lower():
-                logger.warning(f"S3 error accessing commercial bucket: {str(e)}")
-                raise e
-
-            # Try non-commercial bucket
-            logger.debug(f"Article {pmc_id} not found in commercial bucket")
-            if COMMERCIAL_USE_ONLY:
-                logger.warning(
-                    f"Article {pmc_id} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
-                )
-                raise PMCS3Error(
-                    f"Article {pmc_id} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
-                )
-            logger.info(f"Checking non-commercial bucket for {pmc_id}")
-
+        local_text_folder = os.path.join(PAPER_STORE_DIR, pmc_id, "txt")
+        local_index_folder = os.path.join(PAPER_STORE_DIR, pmc_id, "index")
+
+        # Step 2: Reuse the stored copy of the article (and its index) when there is one,
+        # otherwise try to download from commercial bucket first
+        local_file_path = stored_article_text(local_text_folder)
+        if local_file_path is None and restore_article(pmc_id):
+            local_file_path = stored_article_text(local_text_folder)
+        if local_file_path is not None:
+            logger.info(f"Using stored copy of {pmc_id} at {local_file_path}")
+        else:
             try:
+                logger.debug(f"Checking commercial bucket for {pmc_id}")
                 local_file_path = _download_from_s3(
-                    bucket, noncommercial_key, local_folder=local_text_folder
+                    bucket, commercial_key, local_folder=local_text_folder
                 )
-                logger.warning(
-                    f"Article {pmc_id} found in non-commercial bucket - licensing restrictions may apply"
-                )
-
-            except PMCS3Error as nc_error:
-                if "not found" in str(nc_error).lower():
-                    error_msg = f"Article {pmc_id} is not available in the PMC Open Access Subset on AWS"
-                    logger.info(error_msg)
-                    return {
-                        "status": "error",
-                        "content": [
-                            {"text": error_msg},
-                            {"json": {"question": question, "source": pmc_id}},
-                        ],
-                    }
-                else:
-                    raise nc_error
+                logger.info(f"Successfully retrieved commercial article {pmc_id}")
+
+            except PMCS3Error as e:
+                if "not found" not in str(e).lower():
+                    logger.warning(f"S3 error accessing commercial bucket: {str(e)}")
+                    raise e
+
+                # Try non-commercial bucket
+                logger.debug(f"Article {pmc_id} not found in commercial bucket")
+                if COMMERCIAL_USE_ONLY:
+                    logger.warning(
+                        f"Article {pmc_id} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
+                    )
+                    raise PMCS3Error(
+                        f"Article {pmc_id} not found in commercial bucket and COMMERCIAL_USE_ONLY is set to True"
+                    )
+                logger.info(f"Checking non-commercial bucket for {pmc_id}")
+
+                try:
+                    local_file_path = _download_from_s3(
+                        bucket, noncommercial_key, local_folder=local_text_folder
+                    )
+                    logger.warning(
+                        f"Article {pmc_id} found in non-commercial bucket - licensing restrictions may apply"
+                    )
+
+                except PMCS3Error as nc_error:
+                    if "not found" in str(nc_error).lower():
+                        error_msg = f"Article {pmc_id} is not available in the PMC Open Access Subset on AWS"
+                        logger.info(error_msg)
+                        return {
+                            "status": "error",
+                            "content": [
+                                {"text": error_msg},
+                                {"json": {"question": question, "source": pmc_id}},
+                            ],
+                        }
+                    else:
+                        raise nc_error
 
         # Step 3: Use paper-qa to answer the question
         logger.info(f"Processing paper with paper-qa for question: {question}")
@@ -405,9 +446,14 @@ def gather_evidence(pmc_id: str, question: str) -> dict:
         )
 
         # Ask the question
+        index_existed = os.path.isdir(local_index_folder) and bool(os.listdir(local_index_folder))
         logger.info("Invoking paper-qa")
         answer = ask(question, settings=settings)
 
+        # Keep the freshly built index for follow-up questions on other instances
+        if not index_existed:
+            save_article(pmc_id)
+
         # Format the response using Strands ToolResult format
         answer_text = answer.session.answer
         contexts = [
@@ -423,7 +469,7 @@ def gather_evidence(pmc_id: str, question: str) -> dict:
         # Save evidence record to DynamoDB
         if not evidence_id:
             logger.warning("No toolUseId found in tool_context, skipping DynamoDB save")
-        else:
+        elif save_to_db:
             try:
                 db_response = _save_to_db(
                     evidence_id,
@@ -503,6 +549,89 @@ def gather_evidence_tool(pmc_id: str, question: str) -> dict:
     return gather_evidence(pmc_id=pmc_id, question=question)
 
 
+def gather_evidence_batch(
+    pmc_ids: List[str],
+    question: str,
+    max_workers: int = GATHER_EVIDENCE_MAX_WORKERS,
+) -> dict:
+    """
+    Answer the same question about several PMC articles concurrently.
+
+    Articles are processed by a bounded worker pool; duplicate IDs are processed once.
+    The evidence records of all answered articles are saved with one batched write.
+
+    Args:
+        pmc_ids: PMC identifiers (e.g., ["PMC6033041", "PMC9438179"])
+        question: The question to answer about each paper
+        max_workers: Maximum number of articles processed at the same time
+
+    Returns:
+        dict: ToolResult whose content holds, for each article, the answer text and
+        its evidence json; status is "success" if at least one article was answered
+    """
+    unique_ids = list(dict.fromkeys(pmc_ids or []))
+    if not unique_ids:
+        return {"status": "error", "content": [{"text": "No PMC IDs provided"}]}
+
+    logger.info(f"Gathering evidence from {len(unique_ids)} articles with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_ids)))) as executor:
+        results = list(
+            executor.map(
+                lambda pmc_id: gather_evidence(pmc_id, question, save_to_db=False),
+                unique_ids,
+            )
+        )
+
+    # Save every answered article's evidence with one batched write
+    records = [
+        _evidence_record(
+            details["evidence_id"],
+            details["question"],
+            answer["text"],
+            details["source"],
+            [context.get("summary") for context in details["context"]],
+        )
+        for answer, details in (
+            (result["content"][0], result["content"][1]["json"])
+            for result in results
+            if result["status"] == "success"
+        )
+    ]
+    if records:
+        try:
+            _save_records_to_db(records)
+        except Exception as db_error:
+            logger.error(f"Failed to save to DynamoDB: {str(db_error)}")
+
+    content = []
+    for pmc_id, result in zip(unique_ids, results):
+        answer_text, *details = result["content"]
+        content.append({"text": f"[{pmc_id}] {answer_text['text']}"})
+        content.extend(details)
+
+    succeeded = sum(result["status"] == "success" for result in results)
+    logger.info(f"Answered {succeeded} of {len(unique_ids)} articles")
+    return {"status": "success" if succeeded else "error", "content": content}
+
+
+@tool
+def gather_evidence_batch_tool(pmc_ids: List[str], question: str) -> dict:
+    """
+    Answer the same question about several PMC articles at once using paper-qa.
+
+    Use this instead of calling gather_evidence_tool repeatedly when you have a list of
+    relevant papers; the articles are processed concurrently.
+
+    Args:
+        pmc_ids: List of PMC identifiers (e.g., ["PMC6033041", "PMC9438179"])
+        question: The question to answer about each paper
+
+    Returns:
+        dict: ToolResult with one answer and evidence record per article
+    """
+    return gather_evidence_batch(pmc_ids=pmc_ids, question=question)
+
+
 if __name__ == "__main__":
     # Example usage for testing
     result = gather_evidence(
@@ -1,13 +1,11 @@
 import json
 import logging
-import os
 
 import boto3
 import botocore
 from strands import tool
 
-# Dynamo DB Configuration
-EVIDENCE_TABLE_NAME = os.getenv("EVIDENCE_TABLE_NAME", "deep-research-evidence")
+from evidence_store import evidence_store
 
 # Configure logging
 logging.basicConfig(
@@ -17,9 +15,6 @@ logging.basicConfig(
 logger = logging.getLogger("generate_report")
 logger.level = logging.INFO
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource("dynamodb")
-
 # Initialize Bedrock client with increased timeout
 bedrock_client = boto3.client(
     "bedrock-runtime",
@@ -114,15 +109,18 @@ Review the report to ensure it meets quality standards.
 """
 
 
-def _get_evidence_record(evidence_id: str) -> dict:
-    """Get an evidence record from DynamobDB table by evidence_id value"""
-
-    # Check if table exists
-    table = dynamodb.Table(EVIDENCE_TABLE_NAME)
+def _get_evidence_records(evidence_ids: list) -> list:
+    """Get evidence records from DynamobDB table by evidence_id value
 
-    response = table.get_item(Key={"evidence_id": evidence_id})
-
-    return response.get("Item")
+    Records are read with batched, parallel requests and cached in-process, so
+    repeated drafts over the same evidence do not read the table again. IDs that
+    are not found are logged and skipped.
+    """
+    records = evidence_store.get_many(evidence_ids)
+    missing = [i for i, record in zip(evidence_ids, records) if record is None]
+    if missing:
+        logger.warning(f"Evidence records not found: {missing}")
+    return [record for record in records if record is not None]
 
 
 def parse_db_records(records):
@@ -174,9 +172,7 @@ def generate_report(prompt: str, evidence_ids: list = []) -> str:
 
     if evidence_ids:
         logger.info("Getting evidence records")
-        evidence = []
-        for evidence_id in evidence_ids:
-            evidence.append(_get_evidence_record(evidence_id))
+        evidence = _get_evidence_records(evidence_ids)
         logger.info("Parsing evidence records")
         content = parse_db_records(evidence)
 
@@ -8,6 +8,7 @@ from strands.types.content import SystemContentBlock
 
 from strands_tools import editor
 
+from citation_index import citation_index
 from generate_report import generate_report_tool
 from lead_config import MODEL_ID, SYSTEM_PROMPT
 from pmc_research_agent import pmc_research_agent
@@ -84,6 +85,9 @@ async def strands_agent_bedrock(payload):
                 yield event["data"]
     except Exception as e:
         yield f"Error: {str(e)}"
+    finally:
+        # Persist the citation index at the end of every invocation
+        await asyncio.to_thread(citation_index.sync, force=True)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,8 @@ from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
 from strands.models import BedrockModel
 
-from gather_evidence_ddb import gather_evidence_tool
+from citation_index import citation_index
+from gather_evidence_ddb import gather_evidence_batch_tool, gather_evidence_tool
 from search_pmc import search_pmc_tool
 
 # Configure logging
@@ -49,7 +50,8 @@ Identify the PMC IDs of the most relevant papers and gather evidence from each o
 
 **Constraints:**
 - You MUST identify the PMC IDs of the most relevant papers from your search results
-- You MUST submit each PMC ID and the original query to the gather_evidence_tool
+- You MUST submit the PMC IDs and the original query to the gather_evidence_batch_tool, which processes the papers concurrently
+- You SHOULD use the gather_evidence_tool only for a follow-up question about a single paper
 - You MUST process multiple papers to ensure comprehensive coverage of the topic
 - You SHOULD prioritize papers with higher citation counts and more recent publication dates
 
@@ -74,7 +76,7 @@ model = BedrockModel(
 )
 pmc_research_agent = Agent(
     model=model,
-    tools=[search_pmc_tool, gather_evidence_tool],
+    tools=[search_pmc_tool, gather_evidence_tool, gather_evidence_batch_tool],
     system_prompt=SYSTEM_PROMPT,
 )
 
@@ -103,6 +105,9 @@ async def strands_agent_bedrock(payload):
                 yield event["data"]
     except Exception as e:
         yield f"Error: {str(e)}"
+    finally:
+        # Persist the citation index at the end of every invocation
+        await asyncio.to_thread(citation_index.sync, force=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+"""HTTP response cache for public biomedical REST APIs.
+
+Responses are kept in a size-bounded local disk store, optionally backed by an S3
+prefix shared across instances, with a TTL per source host. Once an entry is stale
+it is revalidated with If-None-Match / If-Modified-Since when the server supplied an
+ETag or Last-Modified header, so an unchanged record costs a 304 instead of a full
+download.
+
+The cache is client-agnostic: callers pass a ``send(extra_headers)`` callable that
+performs the request with their HTTP library (requests, httpx, urllib) and returns
+``(status_code, headers, body_bytes)``.
+
+Every agent that uses the cache ships an identical copy of this module, because
+each one is built and deployed from its own directory. Change them together.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR", "/tmp/response-cache")  # nosec B108 - per-container scratch
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(256 << 20)))
+# Eviction trims the store to this fraction of max_bytes so the next scan is many writes away
+EVICT_TARGET_RATIO = 0.9
+# Writes between directory rescans, so the running size tracks entries written by other processes
+DISK_RESCAN_WRITES = 1000
+RESPONSE_CACHE_DEFAULT_TTL = int(os.environ.get("RESPONSE_CACHE_DEFAULT_TTL", "3600"))
+# Optional s3://bucket/prefix shared by every instance
+RESPONSE_CACHE_S3_URI = os.environ.get("RESPONSE_CACHE_S3_URI", "")
+
+# TTL in seconds per source host; RESPONSE_CACHE_TTLS_JSON overrides or extends it
+DEFAULT_SOURCE_TTLS = {
+    "rest.uniprot.org": 7 * 86400,  # UniProtKB is released every 8 weeks
+    "alphafold.ebi.ac.uk": 7 * 86400,
+    "data.rcsb.org": 7 * 86400,
+    "www.ebi.ac.uk": 86400,
+    "rest.ensembl.org": 86400,
+    "clinicaltrials.gov": 86400,  # study records are updated daily
+    "eutils.ncbi.nlm.nih.gov": 3600,  # history server WebEnv keys expire after a few hours
+}
+SOURCE_TTLS = {**DEFAULT_SOURCE_TTLS, **json.loads(os.environ.get("RESPONSE_CACHE_TTLS_JSON") or "{}")}
+
+# Parameters that authenticate the caller but do not change the response
+IGNORED_PARAMS = ("api_key", "email", "tool")
+# Response headers kept with a cached body: validators plus the ones clients read
+# (pagination links, result counts, release versions)
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "link", "x-total-results", "x-uniprot-release")
+
+
+class CachedResponse:
+    """Minimal response object returned by ``ResponseCache.fetch``."""
+
+    def __init__(self, status_code, headers, content, cache_status):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.cache_status = cache_status  # "hit", "revalidated", "miss" or "bypass"
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """Disk (and optional S3) cache of HTTP responses with per-source TTLs."""
+
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR, max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                 s3_uri=RESPONSE_CACHE_S3_URI, ttls=None, default_ttl=RESPONSE_CACHE_DEFAULT_TTL,
+                 enabled=RESPONSE_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = SOURCE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.s3_bucket, _, self.s3_prefix = s3_uri[5:].partition("/") if s3_uri.startswith("s3://") else ("", "", "")
+        self._s3 = None
+        self._lock = threading.Lock()
+        self.counts = {"hit": 0, "revalidated": 0, "miss": 0, "bypass": 0}
+        # Running size of the disk store; None until the first directory scan
+        self._disk_bytes = None
+        self._disk_writes = 0
+
+    def ttl_for(self, url):
+        return self.ttls.get((urlparse(url).hostname or "").lower(), self.default_ttl)
+
+    @staticmethod
+    def make_key(method, url, params=None, data=None, vary=None):
+        """Stable key from the request line, parameters and body, ignoring credentials."""
+        def canonical(value):
+            if isinstance(value, dict):
+                value = {k: v for k, v in value.items() if k not in IGNORED_PARAMS}
+            if isinstance(value, bytes):
+                value = value.decode("utf-8", errors="replace")
+            return json.dumps(value, sort_keys=True, default=str)
+
+        payload = "\n".join([method.upper(), url, canonical(params), canonical(data), str(vary or "")])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def fetch(self, method, url, send, params=None, data=None, vary=None, ttl=None):
+        """Return a fresh cached response, revalidate a stale one, or call ``send``.
+
+        Only 200 responses are stored; anything else is passed through uncached.
+        """
+        if not self.enabled:
+            return self._record(CachedResponse(*send({}), cache_status="bypass"))
+
+        key = self.make_key(method, url, params, data, vary)
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None and now - entry["stored_at"] < ttl:
+            body = entry.pop("body")
+            return self._record(CachedResponse(entry["status"], entry["headers"], body, "hit"))
+
+        validators = {}
+        if entry is not None:
+            if entry["headers"].get("etag"):
+                validators["If-None-Match"] = entry["headers"]["etag"]
+            if entry["headers"].get("last-modified"):
+                validators["If-Modified-Since"] = entry["headers"]["last-modified"]
+
+        status, headers, body = send(validators)
+        if status == 304 and entry is not None:
+            body = entry.pop("body")
+            entry["stored_at"] = now
+            self._store(key, entry, body)
+            return self._record(CachedResponse(entry["status"], entry["headers"], body, "revalidated"))
+
+        headers = {k.lower(): v for k, v in dict(headers or {}).items() if k.lower() in KEPT_HEADERS}
+        if status == 200:
+            self._store(key, {"status": status, "headers": headers, "stored_at": now}, body)
+        return self._record(CachedResponse(status, headers, body, "miss"))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        served = counts["hit"] + counts["revalidated"]
+        total = served + counts["miss"]
+        counts["hit_rate"] = round(served / total, 3) if total else 0.0
+        return counts
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+        with self._lock:
+            self._disk_bytes = 0
+
+    def _record(self, response):
+        with self._lock:
+            self.counts[response.cache_status] += 1
+        return response
+
+    # --- storage tiers ---
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _lookup(self, key):
+        entry = self._read_disk(key)
+        if entry is None:
+            entry = self._read_s3(key)
+            if entry is not None:
+                body = entry.pop("body")
+                self._write_disk(key, entry, body)
+                entry["body"] = body
+        return entry
+
+    def _store(self, key, meta, body):
+        self._write_disk(key, meta, body)
+        self._write_s3(key, meta, body)
+
+    def _read_disk(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                meta["body"] = f.read()
+            os.utime(meta_path)  # keep recently used entries through eviction
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, meta, body):
+        if not self.cache_dir:
+            return
+        meta_path, body_path = self._paths(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            previous_size = self._entry_size(meta_path, body_path)
+            for path, mode, payload in ((body_path, "wb", body), (meta_path, "w", json.dumps(meta))):
+                # A private staging file per writer, so concurrent stores of one key never interleave
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, mode) as f:
+                        f.write(payload)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+            self._account_disk(self._entry_size(meta_path, body_path) - previous_size)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Response cache disk write skipped: {e}")
+
+    @staticmethod
+    def _entry_size(meta_path, body_path):
+        try:
+            return os.path.getsize(meta_path) + os.path.getsize(body_path)
+        except OSError:
+            return 0
+
+    def _account_disk(self, delta):
+        """Track the store size per write and only scan the directory when it is over budget."""
+        with self._lock:
+            self._disk_writes += 1
+            if self._disk_bytes is not None and self._disk_writes < DISK_RESCAN_WRITES:
+                self._disk_bytes += delta
+                if self._disk_bytes <= self.max_bytes:
+                    return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Rescan the store and drop least recently used entries once it exceeds max_bytes."""
+        entries, total = [], 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            body_path = meta_path[:-5] + ".body"
+            try:
+                size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+                entries.append((os.path.getmtime(meta_path), size, meta_path, body_path))
+            except OSError:
+                continue
+            total += size
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, size, meta_path, body_path in sorted(entries):
+                for path in (meta_path, body_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                if total <= target:
+                    break
+        with self._lock:
+            self._disk_bytes = total
+            self._disk_writes = 0
+
+    def _s3_client(self):
+        if not self.s3_bucket or boto3 is None:
+            return None
+        if self._s3 is None:
+            self._s3 = boto3.client("s3")
+        return self._s3
+
+    def _read_s3(self, key):
+        client = self._s3_client()
+        if client is None:
+            return None
+        try:
+            obj = client.get_object(Bucket=self.s3_bucket, Key=f"{self.s3_prefix.rstrip('/')}/{key}")
+            meta = json.loads(obj["Metadata"]["cache-meta"])
+            meta["body"] = obj["Body"].read()
+            return meta
+        except Exception:
+            return None
+
+    def _write_s3(self, key, meta, body):
+        client = self._s3_client()
+        if client is None:
+            return
+        try:
+            client.put_object(
+                Bucket=self.s3_bucket,
+                Key=f"{self.s3_prefix.rstrip('/')}/{key}",
+                Body=body,
+                Metadata={"cache-meta": json.dumps(meta)},
+            )
+        except Exception as e:
+            print(f"Response cache S3 write skipped: {e}")
+
+
+response_cache = ResponseCache()
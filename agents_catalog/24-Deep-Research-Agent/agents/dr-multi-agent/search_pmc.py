@@ -1,10 +1,14 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import io
 import logging
 import os
 import re
-from typing import Any, Dict, List, Literal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Literal, Tuple
 
 # Element only used for type check
 # nosemgrep: use-defused-xml
@@ -14,9 +18,19 @@ import httpx
 from defusedxml import ElementTree as ET
 from strands import tool
 
+from citation_index import CITATION_INDEX_ENABLED, citation_index
+from response_cache import response_cache
+
 # Global configuration for commercial use filtering
 COMMERCIAL_USE_ONLY = os.getenv("COMMERCIAL_USE_ONLY", True)
 
+# efetch batching: IDs per request and concurrent requests
+EFETCH_BATCH_SIZE = int(os.getenv("PMC_EFETCH_BATCH_SIZE", "50"))
+EFETCH_MAX_WORKERS = int(os.getenv("PMC_EFETCH_MAX_WORKERS", "3"))
+
+# Article sections that are never read and are dropped while parsing
+_DISCARDED_SECTIONS = {"body", "floats-group"}
+
 # Configure logging
 logging.basicConfig(
     format="%(levelname)s | %(name)s | %(message)s",
@@ -36,20 +50,22 @@ def search_pmc(
     query: str,
     max_search_result_count: int = 100,
     max_filtered_result_count: int = 10,
-    rerank_by: Literal["references", None] = "references",
+    rerank_by: Literal["references", "pagerank", None] = "references",
 ) -> dict:
     """
     Search PMC for articles matching the query with ToolResult format.
 
     This function performs a comprehensive search of PMC literature with optional
     citation analysis and ranking capabilities. Results can be ranked by citation count
-    within the result set to surface the most influential papers. The function follows
+    or personalized PageRank over the persistent citation index, which accumulates every
+    article fetched so far, to surface the most influential papers. The function follows
     the Strands Agents framework ToolResult format for consistent response handling.
 
     Args:
         - query (required): The search query for PMC using standard PMC search syntax
         - max_search_result_count (optional): Maximum number of results to fetch from initial search (default: 100, range: 1-1000)
         - max_filtered_result_count (optional): Maximum number of articles to return in final, filtered results (range: 1-100)
+        - rerank_by (optional): "references" (indexed in-degree), "pagerank" (personalized PageRank) or None
 
     Returns:
         Dictionary with the following structure:
@@ -134,10 +150,7 @@ def search_pmc(
 
         try:
             # Search for article IDs
-            search_response = httpx.post(
-                search_url, data=_get_api_key_params(search_params)
-            )
-            search_response.raise_for_status()
+            search_response = _cached_post(search_url, search_params)
         except httpx.HTTPStatusError as http_error:
             logger.error(f"HTTP error during PMC search: {http_error}")
             return {
@@ -207,9 +220,9 @@ def search_pmc(
                 "content": [{"text": "No articles found for the given query."}],
             }
 
-        # Fetch article details using the batch function
+        # Fetch article details, reusing articles already in the citation index
         try:
-            articles = fetch_pmc(id_list)
+            articles = _load_articles(id_list)
         except Exception as fetch_error:
             logger.error(f"Error fetching article details: {fetch_error}")
             return {
@@ -220,10 +233,10 @@ def search_pmc(
             }
 
         # Apply reranking if requested
-        if rerank_by == "references":
+        if rerank_by in ("references", "pagerank"):
             try:
                 logger.info("Calculating citation relationships and ranking articles")
-                enhanced_articles = _calculate_referenced_by_counts(articles)
+                enhanced_articles, ranking_description = _score_articles(articles, rerank_by)
                 ranked_articles = _rank_by_citations(enhanced_articles)
                 logger.info("Citation ranking completed successfully")
 
@@ -246,6 +259,7 @@ def search_pmc(
                         final_results,
                         include_ranking=True,
                         total_found=total_before_limit,
+                        ranking_description=ranking_description,
                     )
                 except Exception as format_error:
                     logger.error(f"Error formatting article results: {format_error}")
@@ -322,74 +336,157 @@ def fetch_pmc(pmc_ids: List[str]) -> List[ArticleDict]:
     """
     Get detailed information about one or more PMC articles.
 
+    IDs are fetched in batches of EFETCH_BATCH_SIZE, issued concurrently within the
+    NCBI request rate, and each response is parsed incrementally so only one article
+    element is held in memory at a time per batch.
+
     Args:
         pmc_ids: List of PMC IDs to fetch
 
     Returns:
-        List of article dictionaries with detailed information including keywords and references.
-        Empty articles are filtered out. Returns empty list if no articles found or on error.
+        List of article dictionaries with detailed information including keywords and references,
+        in the order of pmc_ids. Empty articles are filtered out. Returns empty list if no articles found.
+        Raises if every batch fails; failed batches are logged and skipped otherwise.
     """
     if not pmc_ids:
         return []
 
-    logger.info(f"Fetching {len(pmc_ids)} PM articles")
+    batches = [
+        pmc_ids[i : i + EFETCH_BATCH_SIZE]
+        for i in range(0, len(pmc_ids), EFETCH_BATCH_SIZE)
+    ]
+    logger.info(f"Fetching {len(pmc_ids)} PM articles in {len(batches)} batch(es)")
+
+    if len(batches) == 1:
+        results = [_fetch_pmc_batch_safely(batches[0])]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(EFETCH_MAX_WORKERS, len(batches))
+        ) as executor:
+            results = list(executor.map(_fetch_pmc_batch_safely, batches))
+
+    errors = [error for _, error in results if error is not None]
+    if errors and len(errors) == len(results):
+        logger.warning(f"Error fetching article details: {errors[0]}")
+        # Re-raise the exception so search_pmc can handle it properly
+        raise errors[0]
+    for error in errors:
+        logger.warning(f"Skipping failed fetch batch: {error}")
+
+    articles = [article for batch_articles, _ in results for article in batch_articles]
+    logger.info(f"Successfully fetched {len(articles)} articles")
+    return articles
 
+
+def _fetch_pmc_batch_safely(pmc_ids: List[str]):
+    """Run _fetch_pmc_batch and return (articles, error) instead of raising."""
+    try:
+        return _fetch_pmc_batch(pmc_ids), None
+    except Exception as e:
+        return [], e
+
+
+def _fetch_pmc_batch(pmc_ids: List[str]) -> List[ArticleDict]:
+    """Fetch one efetch batch and parse it incrementally."""
     base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
     fetch_url = f"{base_url}/efetch.fcgi"
 
     fetch_params = {"db": "pmc", "id": ",".join(pmc_ids)}
 
     try:
-        try:
-            fetch_response = httpx.post(
-                fetch_url, data=_get_api_key_params(fetch_params)
-            )
-            fetch_response.raise_for_status()
-        except httpx.HTTPStatusError as http_error:
-            logger.warning(f"HTTP error during article fetch: {http_error}")
-            raise Exception(
-                f"HTTP error during article fetch: {http_error.response.status_code} - {str(http_error)}"
-            )
-        except httpx.TimeoutException as timeout_error:
-            logger.warning(f"Timeout error during article fetch: {timeout_error}")
-            raise Exception(
-                f"Request timeout during article fetch: {str(timeout_error)}"
-            )
-        except httpx.NetworkError as network_error:
-            logger.warning(f"Network error during article fetch: {network_error}")
-            raise Exception(f"Network error during article fetch: {str(network_error)}")
-        except httpx.RequestError as request_error:
-            logger.warning(f"Request error during article fetch: {request_error}")
-            raise Exception(f"Request error during article fetch: {str(request_error)}")
+        fetch_response = _cached_post(fetch_url, fetch_params)
+    except httpx.HTTPStatusError as http_error:
+        logger.warning(f"HTTP error during article fetch: {http_error}")
+        raise Exception(
+            f"HTTP error during article fetch: {http_error.response.status_code} - {str(http_error)}"
+        )
+    except httpx.TimeoutException as timeout_error:
+        logger.warning(f"Timeout error during article fetch: {timeout_error}")
+        raise Exception(f"Request timeout during article fetch: {str(timeout_error)}")
+    except httpx.NetworkError as network_error:
+        logger.warning(f"Network error during article fetch: {network_error}")
+        raise Exception(f"Network error during article fetch: {str(network_error)}")
+    except httpx.RequestError as request_error:
+        logger.warning(f"Request error during article fetch: {request_error}")
+        raise Exception(f"Request error during article fetch: {str(request_error)}")
 
-        # Parse XML response
-        try:
-            root = ET.fromstring(fetch_response.text)
-        except ET.ParseError as xml_error:
-            logger.warning(f"XML parsing error in fetch response: {xml_error}")
-            raise Exception(f"Error parsing XML response from PM: {str(xml_error)}")
-        except Exception as parse_error:
-            logger.warning(f"Unexpected parsing error in fetch response: {parse_error}")
-            raise Exception(f"Error parsing response from PM: {str(parse_error)}")
+    try:
+        return list(_iter_articles(io.BytesIO(fetch_response.content)))
+    except ET.ParseError as xml_error:
+        logger.warning(f"XML parsing error in fetch response: {xml_error}")
+        raise Exception(f"Error parsing XML response from PM: {str(xml_error)}")
 
-        articles = []
 
-        for article_element in root.findall(".//article"):
+def _iter_articles(source) -> Iterator[ArticleDict]:
+    """
+    Stream article dictionaries from an efetch XML response with iterparse.
+
+    Article bodies and floats are discarded as soon as they are closed, and each
+    article is cleared from the tree once its fields have been extracted.
+    """
+    root = None
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        if element.tag in _DISCARDED_SECTIONS:
+            element.clear()
+        elif element.tag == "article":
             try:
-                article = _extract_article_data(article_element)
+                article = _extract_article_data(element)
                 if article:  # Only add non-empty articles
-                    articles.append(article)
+                    yield article
             except Exception as e:
                 logger.warning(f"Error parsing individual article: {e}")
-                continue
+            element.clear()
+            if root is not None and root is not element:
+                root.clear()
 
-        logger.info(f"Successfully fetched {len(articles)} articles")
-        return articles
 
-    except Exception as e:
-        logger.warning(f"Error fetching article details: {e}")
-        # Re-raise the exception so search_pmc can handle it properly
-        raise
+class _RequestPacer:
+    """Space out requests shared by all threads to stay under a requests-per-second limit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        # 10 requests/second with an API key, 3 without
+        interval = 1.0 / (10 if os.getenv("NCBI_API_KEY", "").strip() else 3)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_ncbi_pacer = _RequestPacer()
+
+
+def _cached_post(url: str, params: Dict[str, Any]):
+    """
+    POST an E-utilities request through the shared response cache.
+
+    Identical searches and fetches within the cache TTL are served locally. Errors
+    are raised as the same httpx exceptions a direct httpx.post would raise.
+
+    Args:
+        url: E-utilities endpoint URL
+        params: Request parameters without the API key
+
+    Returns:
+        Response object with .text and .json()
+    """
+
+    def send(validators: Dict[str, str]):
+        _ncbi_pacer.wait()
+        response = httpx.post(url, data=_get_api_key_params(params), headers=validators)
+        response.raise_for_status()
+        return response.status_code, response.headers, response.content
+
+    return response_cache.fetch("POST", url, send, data=params)
 
 
 def _get_api_key_params(base_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -549,6 +646,70 @@ def _extract_article_data(article_element: Element) -> ArticleDict:
     return article
 
 
+def _load_articles(pmc_ids: List[str]) -> List[ArticleDict]:
+    """
+    Return articles for the given PMC IDs in search order, fetching only those not yet indexed.
+
+    Newly fetched articles are added to the citation index so later searches can reuse
+    them. Index errors fall back to fetching every article.
+    """
+    if not CITATION_INDEX_ENABLED:
+        return fetch_pmc(pmc_ids)
+
+    try:
+        known = citation_index.get_articles(pmc_ids)
+    except Exception as e:
+        logger.warning(f"Citation index lookup failed: {e}")
+        return fetch_pmc(pmc_ids)
+
+    missing = [pmc_id for pmc_id in pmc_ids if pmc_id not in known]
+    logger.info(f"{len(known)} of {len(pmc_ids)} articles found in the citation index")
+    fetched = fetch_pmc(missing) if missing else []
+    try:
+        citation_index.add_articles(fetched)
+    except Exception as e:
+        logger.warning(f"Citation index update failed: {e}")
+
+    by_id = {**known, **{article["id"]: article for article in fetched if article.get("id")}}
+    return [by_id[pmc_id] for pmc_id in pmc_ids if pmc_id in by_id]
+
+
+def _score_articles(articles: List[ArticleDict], rerank_by: str) -> Tuple[List[ArticleDict], str]:
+    """
+    Add citation scores to articles using the citation index.
+
+    "references" sets referenced_by_count to the number of indexed articles citing each
+    article; "pagerank" also sets citation_score from personalized PageRank seeded with
+    the result set. Falls back to counting citations within the result set when the
+    index is disabled or unavailable.
+
+    Returns:
+        Tuple of (scored articles, description of the ranking for the result header)
+    """
+    if CITATION_INDEX_ENABLED:
+        try:
+            pmc_ids = [article.get("id", "") for article in articles]
+            counts = citation_index.in_degree(pmc_ids)
+            scores = citation_index.personalized_pagerank(pmc_ids) if rerank_by == "pagerank" else {}
+            enhanced_articles = []
+            for article in articles:
+                enhanced_article = article.copy()
+                enhanced_article["referenced_by_count"] = counts.get(article.get("id", ""), 0)
+                if rerank_by == "pagerank":
+                    enhanced_article["citation_score"] = scores.get(article.get("id", ""), 0.0)
+                enhanced_articles.append(enhanced_article)
+            if rerank_by == "pagerank":
+                return enhanced_articles, "Results ranked by personalized PageRank over the citation index"
+            return enhanced_articles, "Results ranked by citation count across the citation index"
+        except Exception as e:
+            logger.warning(f"Citation index ranking failed, using the result set only: {e}")
+
+    return (
+        _calculate_referenced_by_counts(articles),
+        "Results ranked by citation count within this result set",
+    )
+
+
 def _calculate_referenced_by_counts(articles: List[ArticleDict]) -> List[ArticleDict]:
     """
     Calculate how many times each article is referenced by others in the result set.
@@ -627,19 +788,20 @@ def _calculate_referenced_by_counts(articles: List[ArticleDict]) -> List[Article
 
 def _rank_by_citations(articles: List[ArticleDict]) -> List[ArticleDict]:
     """
-    Re-rank articles by referenced_by_count in descending order.
+    Re-rank articles by citation_score (when present) or referenced_by_count in descending order.
 
     Args:
-        articles: List of articles with referenced_by_count
+        articles: List of articles with referenced_by_count and optionally citation_score
 
     Returns:
         Re-ordered list with highest cited articles first
     """
-    # Sort articles by referenced_by_count (descending), then by PMID (descending) for tie-breaking
+    # Sort articles by score and referenced_by_count (descending), then by PMID (descending) for tie-breaking
     ranked_articles = sorted(
         articles,
         key=lambda article: (
-            article.get("referenced_by_count", 0),  # Primary sort: citation count
+            article.get("citation_score", 0.0),  # Primary sort: PageRank score, if computed
+            article.get("referenced_by_count", 0),  # Then citation count
             (
                 int(article.get("id", "0")) if article.get("id", "").isdigit() else 0
             ),  # Secondary sort: PMID
@@ -706,13 +868,18 @@ def _format_individual_article(
         ref_count = len(article.get("references", []))
         referenced_by_count = article.get("referenced_by_count", 0)
         lines.append(f"References: {ref_count} articles")
-        lines.append(f"Cited by: {referenced_by_count} articles in this result set")
+        lines.append(f"Cited by: {referenced_by_count} known articles")
+        if "citation_score" in article:
+            lines.append(f"Citation score: {article['citation_score']:.4f}")
 
     return "\n".join(lines)
 
 
 def _format_article_list(
-    articles: List[ArticleDict], include_ranking: bool = False, total_found: int = None
+    articles: List[ArticleDict],
+    include_ranking: bool = False,
+    total_found: int = None,
+    ranking_description: str = "Results ranked by citation count within this result set",
 ) -> str:
     """
     Format a list of articles with numbering and summary information.
@@ -721,6 +888,7 @@ def _format_article_list(
         articles: List of article dictionaries
         include_ranking: Whether to include citation ranking information
         total_found: Total number of articles found in search (before max_filtered_result_count limit)
+        ranking_description: Header line describing the ranking when include_ranking is set
 
     Returns:
         Formatted string representation of the article list
@@ -738,7 +906,7 @@ def _format_article_list(
         lines.append(f"Found {result_count} articles")
 
     if include_ranking:
-        lines.append("Results ranked by citation count within this result set")
+        lines.append(ranking_description)
 
     lines.append("")  # Empty line for spacing
 
@@ -786,13 +954,14 @@ def _print_fetch_results(articles: list, n: int = 3) -> None:
 @tool
 def search_pmc_tool(
     query: str,
-    rerank_by: Literal["references", None] = "references",
+    rerank_by: Literal["references", "pagerank", None] = "references",
 ) -> dict:
     """Search PubMed Central (PMC) for scientific articles with citation analysis and reranking.
 
     This tool performs comprehensive literature searches across PMC with optional citation
-    analysis. Results can be ranked by how frequently they are cited within the result set,
-    helping surface the most influential papers. Perfect for research, literature reviews,
+    analysis. Results can be ranked by how frequently they are cited by every article seen
+    in earlier searches, or by personalized PageRank over that citation graph, helping
+    surface the most influential papers. Perfect for research, literature reviews,
     and finding authoritative sources on scientific topics.
 
     Args:
@@ -805,6 +974,7 @@ def search_pmc_tool(
             - Date filters (see examples below for date search syntax)
         rerank_by: Reranking method for search results. Options are:
             - (default) "references": Rerank results in decreasing order of incoming references. Use to identify the most influenctial articles.
+            - "pagerank": Rerank results by personalized PageRank over the citation index, which also credits citations from influential papers outside this result set.
             - None. Returns articles in the same order as the PMC search API. Use to identify newer articles or those tha capture a wider range of perspective.
 
     Date Search Syntax:
@@ -43,7 +43,8 @@ def search_clinical_trials(
     intervention: Optional[str] = None, 
     status: Optional[str] = None,
     phase: Optional[str] = None,
-    sponsor: Optional[str] = None
+    sponsor: Optional[str] = None,
+    query: Optional[str] = None
 ) -> Dict:
     """
     Search clinical trials based on specific criteria.
@@ -54,6 +55,8 @@ def search_clinical_trials(
         status: Trial status (e.g., "RECRUITING", "COMPLETED")
         phase: Trial phase (e.g., "PHASE2", "PHASE1")
         sponsor: Sponsor name or type (e.g., "Pfizer", "University")
+        query: Free-text relevance query; when given, only trials matching its terms
+            are returned, most relevant first (e.g., "HER2 antibody drug conjugate")
     
     Returns:
         Search results including:
@@ -65,7 +68,7 @@ def search_clinical_trials(
     based on your criteria of interest.
     """
     processor = get_clinical_trials_processor()
-    return processor.search_trials(condition, intervention, status, phase, sponsor)
+    return processor.search_trials(condition, intervention, status, phase, sponsor, query)
 
 @tool
 def get_trial_details(nct_number: str) -> Dict:
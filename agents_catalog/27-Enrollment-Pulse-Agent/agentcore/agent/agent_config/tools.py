@@ -3,6 +3,7 @@ Custom tools for the Enrollment Pulse agent
 """
 from typing import Dict, List, Optional
 from strands import tool
+import threading
 
 # Add src to path for imports
 
@@ -12,14 +13,67 @@ from agent.analysis.enrollment_metrics import EnrollmentAnalyzer
 
 # Global data cache to avoid reprocessing
 _data_cache = {}
+# Memoizing analyzer for the cached data, keyed by data version
+_analyzer_cache = {}
+_data_version = 0
+_cache_lock = threading.RLock()
 
 
 def _get_processed_data():
     """Get processed CTMS data, using cache if available"""
-    if not _data_cache:
-        processor = CTMSDataProcessor()
-        _data_cache.update(processor.process_all())
-    return _data_cache
+    global _data_cache
+    with _cache_lock:
+        if not _data_cache:
+            _data_cache = CTMSDataProcessor().process_all()
+        return _data_cache
+
+
+def _build_analyzer(data: Dict, data_version: int) -> EnrollmentAnalyzer:
+    analyzer = EnrollmentAnalyzer(
+        summaries=data.get('enrollment_summaries', []),
+        subjects=data.get('subjects', []),
+        sites=data.get('sites', []),
+        metrics=data.get('enrollment_metrics', []),
+        store=data.get('columnar'),
+        data_version=data_version
+    )
+    analyzer.precompute()
+    return analyzer
+
+
+def _get_analyzer() -> EnrollmentAnalyzer:
+    """Get the analyzer for the current data version; its results are memoized"""
+    global _analyzer_cache
+    with _cache_lock:
+        data = _get_processed_data()
+        if _data_version not in _analyzer_cache:
+            _analyzer_cache = {_data_version: _build_analyzer(data, _data_version)}
+        return _analyzer_cache[_data_version]
+
+
+def get_cached_analytics():
+    """Get the processed data and memoized analyzer shared by the tools and the API"""
+    with _cache_lock:
+        return _get_processed_data(), _get_analyzer()
+
+
+def refresh_processed_data() -> int:
+    """Reload the CTMS data and drop every memoized result; returns the new data version
+
+    The new data and analyzer are built first and then swapped in together, so
+    concurrent readers keep seeing the previous data until the reload completes.
+    """
+    global _data_cache, _analyzer_cache, _data_version
+    data = CTMSDataProcessor().process_all()
+    with _cache_lock:
+        version = _data_version + 1
+    analyzer = _build_analyzer(data, version)
+    with _cache_lock:
+        if version <= _data_version:
+            # A concurrent refresh already published newer data
+            return _data_version
+        _data_cache, _analyzer_cache, _data_version = data, {version: analyzer}, version
+        return _data_version
 
 
 @tool
@@ -35,12 +89,7 @@ def get_overall_enrollment_status() -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.get_overall_enrollment_status()
 
@@ -58,12 +107,7 @@ def get_site_performance_ranking() -> List[Dict]:
     if not data.get('enrollment_summaries'):
         return []
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.get_site_performance_ranking()
 
@@ -84,12 +128,7 @@ def get_underperforming_sites_detailed(threshold: float = 60.0) -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     # Get comprehensive analysis for all sites
     comprehensive_analysis = get_comprehensive_site_analysis()
@@ -124,12 +163,7 @@ def identify_underperforming_sites(threshold: float = 60.0) -> List[Dict]:
     if not data.get('enrollment_summaries'):
         return []
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.identify_underperforming_sites(threshold)
 
@@ -147,12 +181,7 @@ def analyze_cra_performance() -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.analyze_cra_performance()
 
@@ -170,12 +199,7 @@ def get_monthly_enrollment_trends() -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.get_monthly_enrollment_trends()
 
@@ -193,12 +217,7 @@ def calculate_screening_efficiency() -> List[Dict]:
     if not data.get('enrollment_summaries'):
         return []
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.calculate_screening_efficiency()
 
@@ -216,12 +235,7 @@ def project_enrollment_timeline() -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.project_enrollment_timeline()
 
@@ -239,12 +253,7 @@ def get_historical_performance() -> List[Dict]:
     if not data.get('enrollment_summaries'):
         return []
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.get_historical_performance()
 
@@ -265,12 +274,7 @@ def get_alternative_site_recommendations(underperforming_site_number: str) -> Li
     if not data.get('enrollment_summaries'):
         return []
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
+    analyzer = _get_analyzer()
     
     return analyzer.get_alternative_site_recommendations(underperforming_site_number)
 
@@ -291,140 +295,9 @@ def get_comprehensive_site_analysis(site_number: Optional[str] = None) -> Dict:
     if not data.get('enrollment_summaries'):
         return {"error": "No enrollment data available"}
     
-    analyzer = EnrollmentAnalyzer(
-        summaries=data['enrollment_summaries'],
-        subjects=data['subjects'],
-        sites=data['sites'],
-        metrics=data.get('enrollment_metrics', [])
-    )
-    
-    # Get all supporting data
-    site_rankings = analyzer.get_site_performance_ranking()
-    underperforming = analyzer.identify_underperforming_sites()
-    historical_data = analyzer.get_historical_performance()
-    cra_analysis = analyzer.analyze_cra_performance()
-    projections = analyzer.project_enrollment_timeline()
+    analyzer = _get_analyzer()
     
-    comprehensive_analysis = {}
-    
-    # Filter sites if specific site requested
-    if site_number:
-        target_sites = [s for s in site_rankings if s['site_number'] == site_number]
-    else:
-        target_sites = site_rankings
-    
-    for site in target_sites:
-        site_num = site['site_number']
-        site_name = site['site_name']
-        
-        # Get site-specific historical data
-        site_historical = [h for h in historical_data if h['site_number'] == site_num]
-        
-        # Get site-specific projections
-        site_projection = projections.get(site_num, {})
-        
-        # Determine if site is underperforming
-        is_underperforming = any(u['site_number'] == site_num for u in underperforming)
-        underperforming_details = next((u for u in underperforming if u['site_number'] == site_num), None)
-        
-        # Get CRA assignment
-        cra_assignment = "Unknown"
-        if site_num in ['1', '2']:
-            cra_assignment = "Thomas Nguyen"
-        elif site_num in ['3', '4', '5']:
-            cra_assignment = "Amanda Garcia"
-        
-        # Calculate performance trends
-        if site_historical:
-            recent_trend = site_historical[-1]['performance_trend'] if site_historical else "Unknown"
-            avg_monthly_rate = sum(h['enrollment_rate'] for h in site_historical) / len(site_historical)
-            improving_months = len([h for h in site_historical if h['performance_trend'] == 'Improving'])
-            total_months = len(site_historical)
-            consistency_score = improving_months / total_months if total_months > 0 else 0
-        else:
-            recent_trend = "No data"
-            avg_monthly_rate = 0
-            consistency_score = 0
-        
-        # Generate site-specific recommendations
-        recommendations = []
-        
-        if is_underperforming and underperforming_details:
-            # High-priority interventions for underperforming sites
-            recommendations.extend([
-                f"URGENT: Implement immediate intervention plan - site is {underperforming_details['shortfall']} subjects behind target",
-                f"Schedule emergency site visit within 7 days to assess recruitment barriers",
-                f"Deploy dedicated enrollment specialist for 30-day intensive support period"
-            ])
-            
-            # Historical trend-based recommendations
-            if site_historical:
-                declining_months = len([h for h in site_historical if h['performance_trend'] == 'Declining'])
-                if declining_months > total_months * 0.3:
-                    recommendations.append("Address declining enrollment trend - review protocol adherence and staff training")
-                
-                latest_screen_failure = site_historical[-1]['screen_failure_rate'] if site_historical else 0
-                if latest_screen_failure > 20:
-                    recommendations.append(f"Optimize screening process - current {latest_screen_failure}% failure rate is above optimal range")
-            
-            # CRA-specific recommendations
-            if cra_assignment == "Amanda Garcia":
-                recommendations.append("Consider CRA workload rebalancing - Amanda Garcia manages 3 sites vs Thomas Nguyen's 2 sites")
-        
-        else:
-            # Recommendations for performing sites
-            if site['enrollment_percentage'] > 90:
-                recommendations.extend([
-                    "Excellent performance - consider increasing enrollment target if capacity allows",
-                    "Document best practices for knowledge sharing with underperforming sites",
-                    "Maintain current recruitment strategies and monitor for capacity constraints"
-                ])
-            elif site['enrollment_percentage'] > 75:
-                recommendations.extend([
-                    "Good performance - implement minor optimizations to reach 90%+ target",
-                    "Review monthly enrollment patterns for potential acceleration opportunities"
-                ])
-        
-        # Alternative sites (for underperforming sites only)
-        alternative_sites = []
-        if is_underperforming:
-            alternatives = analyzer.get_alternative_site_recommendations(site_num)
-            alternative_sites = alternatives[:2]  # Top 2 alternatives
-        
-        # Compile comprehensive site analysis
-        comprehensive_analysis[site_num] = {
-            'site_info': {
-                'site_number': site_num,
-                'site_name': site_name,
-                'cra_assignment': cra_assignment,
-                'risk_level': site['risk_level']
-            },
-            'current_performance': {
-                'enrollment_percentage': site['enrollment_percentage'],
-                'current_enrollment': site['current_enrollment'],
-                'target_enrollment': site['target_enrollment'],
-                'avg_monthly_enrollment': site['avg_monthly_enrollment'],
-                'screen_failure_rate': next((s.screen_failure_rate for s in data['enrollment_summaries'] if s.site_number == site_num), 0)
-            },
-            'historical_performance': {
-                'total_months_active': len(site_historical),
-                'recent_trend': recent_trend,
-                'avg_monthly_rate': round(avg_monthly_rate, 1),
-                'consistency_score': round(consistency_score * 100, 1),
-                'monthly_data': site_historical[-6:] if site_historical else []  # Last 6 months
-            },
-            'projections': {
-                'projected_final_enrollment': site_projection.get('projected_final', 0),
-                'projected_percentage': site_projection.get('projected_percentage', 0),
-                'will_meet_target': site_projection.get('will_meet_target', False),
-                'shortfall': site_projection.get('shortfall', 0)
-            },
-            'underperformance_details': underperforming_details if is_underperforming else None,
-            'recommendations': recommendations,
-            'alternative_sites': alternative_sites
-        }
-    
-    return comprehensive_analysis
+    return analyzer.get_comprehensive_site_analysis(site_number)
 
 
 @tool
@@ -9,6 +9,8 @@ import re
 import logging
 from datetime import datetime, timedelta
 
+from .trial_index import TrialIndex
+
 logger = logging.getLogger(__name__)
 
 class ClinicalTrialsProcessor:
@@ -19,6 +21,8 @@ class ClinicalTrialsProcessor:
             data_path = str(Path(__file__).resolve().parent / "clinical_trials_gov.csv")
         self.data_path = Path(data_path)
         self.data = None
+        self.long_tables = {}
+        self.index = None
         self.processed_data = None
         
     def load_data(self) -> pd.DataFrame:
@@ -40,6 +44,7 @@ class ClinicalTrialsProcessor:
         self._clean_data()
         self._extract_features()
         self._categorize_trials()
+        self._build_index()
         
         self.processed_data = {
             'trials': self.data.to_dict('records'),
@@ -74,28 +79,35 @@ class ClinicalTrialsProcessor:
     
     def _extract_features(self):
         """Extract additional features from the data"""
-        # Extract number of locations
-        if 'Locations' in self.data.columns:
-            self.data['location_count'] = self.data['Locations'].apply(
-                lambda x: len(str(x).split('|')) if pd.notna(x) else 0
-            )
+        # Long tables with one row per (trial, value), indexed by trial row;
+        # the per-trial flags and every distribution are derived from them
+        self.long_tables = {}
         
-        # Extract countries from locations
+        # Extract number of locations and the countries of each trial
         if 'Locations' in self.data.columns:
-            self.data['countries'] = self.data['Locations'].apply(self._extract_countries)
-            self.data['is_international'] = self.data['countries'].apply(
-                lambda x: len(x) > 1 if isinstance(x, list) else False
+            locations = self.data['Locations'].dropna().astype(str)
+            self.data['location_count'] = self._per_trial(locations.str.count(r'\|') + 1, 0)
+            countries = self._per_trial(locations.map(self._extract_countries), None)
+            self.data['countries'] = [x if isinstance(x, list) else [] for x in countries]
+            self.long_tables['countries'] = self._explode_lists(countries)
+            self.data['is_international'] = self._per_trial(
+                self.long_tables['countries'].groupby(level=0).size() > 1, False
             )
         
         # Extract phase information
         if 'Phases' in self.data.columns:
-            self.data['phase_list'] = self.data['Phases'].apply(
-                lambda x: str(x).split('|') if pd.notna(x) else []
-            )
-            self.data['is_early_phase'] = self.data['phase_list'].apply(
-                lambda x: any(phase in ['PHASE1', 'PHASE1|PHASE2'] for phase in x)
+            phase_lists = self.data['Phases'].dropna().astype(str).str.split('|')
+            self.data['phase_list'] = [x if isinstance(x, list) else [] for x in self._per_trial(phase_lists, None)]
+            self.long_tables['phases'] = self._explode_lists(phase_lists)
+            self.data['is_early_phase'] = self._per_trial(
+                self.long_tables['phases'].eq('PHASE1').groupby(level=0).any(), False
             )
         
+        if 'Conditions' in self.data.columns:
+            self.long_tables['conditions'] = self._explode_lists(
+                self.data['Conditions'].dropna().astype(str).str.split('|')
+            ).str.strip()
+        
         # Calculate study duration
         if 'Start Date' in self.data.columns and 'Primary Completion Date' in self.data.columns:
             self.data['planned_duration_months'] = (
@@ -104,41 +116,49 @@ class ClinicalTrialsProcessor:
         
         # Extract intervention types
         if 'Interventions' in self.data.columns:
-            self.data['intervention_types'] = self.data['Interventions'].apply(self._extract_intervention_types)
-            self.data['has_drug_intervention'] = self.data['intervention_types'].apply(
-                lambda x: 'DRUG' in x if isinstance(x, list) else False
+            types = self._per_trial(
+                self.data['Interventions'].dropna().astype(str).map(self._extract_intervention_types), None
+            )
+            self.data['intervention_types'] = [x if isinstance(x, list) else [] for x in types]
+            self.long_tables['intervention_types'] = self._explode_lists(types)
+            self.data['has_drug_intervention'] = self._per_trial(
+                self.long_tables['intervention_types'].eq('DRUG').groupby(level=0).any(), False
             )
     
-    def _extract_countries(self, locations_str: str) -> List[str]:
-        """Extract unique countries from locations string"""
-        if pd.isna(locations_str):
-            return []
-        
-        countries = set()
-        locations = str(locations_str).split('|')
-        for location in locations:
-            # Extract country (usually the last part after the last comma)
-            parts = location.strip().split(',')
-            if parts:
-                country = parts[-1].strip()
-                countries.add(country)
-        
-        return list(countries)
+    def _per_trial(self, values: pd.Series, fill_value) -> pd.Series:
+        """Align per-trial values with the data, filling trials without values"""
+        return values.reindex(self.data.index, fill_value=fill_value)
+    
+    @staticmethod
+    def _explode_lists(lists: pd.Series) -> pd.Series:
+        """Long Series with one row per list element, indexed by trial row"""
+        return lists.explode().dropna()
     
-    def _extract_intervention_types(self, interventions_str: str) -> List[str]:
-        """Extract intervention types from interventions string"""
-        if pd.isna(interventions_str):
-            return []
-        
-        types = set()
-        interventions = str(interventions_str).split('|')
-        for intervention in interventions:
-            # Extract type (usually before the colon)
-            if ':' in intervention:
-                intervention_type = intervention.split(':')[0].strip()
-                types.add(intervention_type)
-        
-        return list(types)
+    @staticmethod
+    def _extract_countries(locations_str: str) -> List[str]:
+        """Extract unique countries (the part after the last comma) from a locations string"""
+        return list(dict.fromkeys(
+            location.rpartition(',')[2].strip() for location in locations_str.split('|')
+        ))
+    
+    @staticmethod
+    def _extract_intervention_types(interventions_str: str) -> List[str]:
+        """Extract unique intervention types (the part before the colon) from an interventions string"""
+        return list(dict.fromkeys(
+            intervention.partition(':')[0].strip()
+            for intervention in interventions_str.split('|') if ':' in intervention
+        ))
+    
+    @staticmethod
+    def _count(values: pd.Series) -> Dict[str, int]:
+        """Counts per value in order of first appearance"""
+        return {k: int(v) for k, v in values.value_counts(sort=False).items()}
+    
+    @classmethod
+    def _count_by_frequency(cls, values: pd.Series) -> Dict[str, int]:
+        """Counts per value, most frequent first and ties in order of appearance"""
+        counts = cls._count(values)
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
     
     def _categorize_trials(self):
         """Categorize trials based on various criteria"""
@@ -204,12 +224,7 @@ class ClinicalTrialsProcessor:
             return {}
         
         # Count phase occurrences
-        phase_counts = {}
-        for phases_str in self.data['Phases'].dropna():
-            phases = str(phases_str).split('|')
-            for phase in phases:
-                phase = phase.strip()
-                phase_counts[phase] = phase_counts.get(phase, 0) + 1
+        phase_counts = self._count(self.long_tables['phases'].str.strip())
         
         early_phase_count = int(self.data['is_early_phase'].sum()) if 'is_early_phase' in self.data.columns else 0
         
@@ -224,21 +239,13 @@ class ClinicalTrialsProcessor:
         if 'Conditions' not in self.data.columns:
             return {}
         
-        # Extract individual conditions
-        condition_counts = {}
-        for conditions_str in self.data['Conditions'].dropna():
-            conditions = str(conditions_str).split('|')
-            for condition in conditions:
-                condition = condition.strip()
-                condition_counts[condition] = condition_counts.get(condition, 0) + 1
-        
-        # Sort by frequency
-        sorted_conditions = dict(sorted(condition_counts.items(), key=lambda x: x[1], reverse=True))
+        # Count individual conditions
+        sorted_conditions = self._count_by_frequency(self.long_tables['conditions'])
         
         return {
             'condition_distribution': sorted_conditions,
             'top_conditions': dict(list(sorted_conditions.items())[:10]),
-            'unique_conditions_count': len(condition_counts)
+            'unique_conditions_count': len(sorted_conditions)
         }
     
     def _analyze_interventions(self) -> Dict:
@@ -247,11 +254,7 @@ class ClinicalTrialsProcessor:
             return {}
         
         # Count intervention types
-        intervention_counts = {}
-        for types_list in self.data['intervention_types'].dropna():
-            if isinstance(types_list, list):
-                for intervention_type in types_list:
-                    intervention_counts[intervention_type] = intervention_counts.get(intervention_type, 0) + 1
+        intervention_counts = self._count(self.long_tables['intervention_types'])
         
         drug_trials = int(self.data['has_drug_intervention'].sum()) if 'has_drug_intervention' in self.data.columns else 0
         
@@ -267,14 +270,7 @@ class ClinicalTrialsProcessor:
             return {}
         
         # Count countries
-        country_counts = {}
-        for countries_list in self.data['countries'].dropna():
-            if isinstance(countries_list, list):
-                for country in countries_list:
-                    country_counts[country] = country_counts.get(country, 0) + 1
-        
-        # Sort by frequency
-        sorted_countries = dict(sorted(country_counts.items(), key=lambda x: x[1], reverse=True))
+        sorted_countries = self._count_by_frequency(self.long_tables['countries'])
         
         international_count = int(self.data['is_international'].sum()) if 'is_international' in self.data.columns else 0
         
@@ -283,7 +279,7 @@ class ClinicalTrialsProcessor:
             'top_countries': dict(list(sorted_countries.items())[:10]),
             'international_trials': international_count,
             'international_percentage': round(international_count / len(self.data) * 100, 1),
-            'unique_countries': len(country_counts)
+            'unique_countries': len(sorted_countries)
         }
     
     def _analyze_enrollment(self) -> Dict:
@@ -341,16 +337,14 @@ class ClinicalTrialsProcessor:
         industry_keywords = ['Inc', 'Ltd', 'Corp', 'Company', 'Pharmaceutical', 'Pharma', 'Therapeutics']
         academic_keywords = ['University', 'Hospital', 'Medical Center', 'Institute', 'Foundation']
         
-        sponsor_types = {'Industry': 0, 'Academic': 0, 'Other': 0}
-        
-        for sponsor in self.data['Sponsor'].dropna():
-            sponsor_str = str(sponsor)
-            if any(keyword in sponsor_str for keyword in industry_keywords):
-                sponsor_types['Industry'] += 1
-            elif any(keyword in sponsor_str for keyword in academic_keywords):
-                sponsor_types['Academic'] += 1
-            else:
-                sponsor_types['Other'] += 1
+        sponsors = self.data['Sponsor'].dropna().astype(str)
+        is_industry = sponsors.str.contains('|'.join(map(re.escape, industry_keywords)))
+        is_academic = ~is_industry & sponsors.str.contains('|'.join(map(re.escape, academic_keywords)))
+        sponsor_types = {
+            'Industry': int(is_industry.sum()),
+            'Academic': int(is_academic.sum()),
+            'Other': int((~is_industry & ~is_academic).sum())
+        }
         
         return {
             'top_sponsors': sponsor_counts.head(10).to_dict(),
@@ -358,43 +352,68 @@ class ClinicalTrialsProcessor:
             'unique_sponsors': len(sponsor_counts)
         }
     
+    def _build_index(self):
+        """Load or build the search index for the current data"""
+        if self.data_path.exists():
+            self.index = TrialIndex.for_file(self.data_path, self.data)
+        else:
+            self.index = TrialIndex.build(self.data)
+    
+    def _text_filter(self, mask: np.ndarray, field: str, column: str, text: str) -> np.ndarray:
+        """Narrow the mask to trials whose column contains the text (case-insensitive)"""
+        if column not in self.data.columns:
+            raise KeyError(column)
+        candidates = self.index.text_candidates(field, text)
+        if candidates is not None:
+            mask = mask & candidates
+        positions = np.flatnonzero(mask)
+        mask = np.zeros(len(self.data), dtype=bool)
+        mask[positions] = self.data[column].iloc[positions].str.contains(text, case=False, na=False).to_numpy()
+        return mask
+    
+    def _value_filter(self, mask: np.ndarray, field: str, column: str, text: str) -> np.ndarray:
+        """Narrow the mask to trials whose value contains the text, testing each distinct value once"""
+        values = self.index.value_mask(field, lambda uniques: uniques.str.contains(text, case=False, na=False))
+        if values is None:
+            values = self.data[column].str.contains(text, case=False, na=False).to_numpy()
+        return mask & values
+    
     def search_trials(self, 
                      condition: Optional[str] = None,
                      intervention: Optional[str] = None,
                      status: Optional[str] = None,
                      phase: Optional[str] = None,
-                     sponsor: Optional[str] = None) -> Dict:
-        """Search trials based on criteria"""
+                     sponsor: Optional[str] = None,
+                     query: Optional[str] = None) -> Dict:
+        """Search trials based on criteria, ranked by relevance to the free-text query if given"""
         if self.processed_data is None:
             self.process_data()
         
-        filtered_data = self.data.copy()
-        
-        # Apply filters
-        if condition:
-            filtered_data = filtered_data[
-                filtered_data['Conditions'].str.contains(condition, case=False, na=False)
-            ]
-        
-        if intervention:
-            filtered_data = filtered_data[
-                filtered_data['Interventions'].str.contains(intervention, case=False, na=False)
-            ]
+        mask = np.ones(len(self.data), dtype=bool)
         
+        # Apply the distinct-value filters first so substring checks run on fewer trials
         if status:
-            filtered_data = filtered_data[
-                filtered_data['Study Status'].str.contains(status, case=False, na=False)
-            ]
+            mask = self._value_filter(mask, 'status', 'Study Status', status)
         
         if phase:
-            filtered_data = filtered_data[
-                filtered_data['Phases'].str.contains(phase, case=False, na=False)
-            ]
+            mask = self._value_filter(mask, 'phase', 'Phases', phase)
         
         if sponsor:
-            filtered_data = filtered_data[
-                filtered_data['Sponsor'].str.contains(sponsor, case=False, na=False)
-            ]
+            mask = self._value_filter(mask, 'sponsor', 'Sponsor', sponsor)
+        
+        if condition:
+            mask = self._text_filter(mask, 'conditions', 'Conditions', condition)
+        
+        if intervention:
+            mask = self._text_filter(mask, 'interventions', 'Interventions', intervention)
+        
+        positions = np.flatnonzero(mask)
+        if query:
+            scores = self.index.rank(query)[positions]
+            order = np.argsort(-scores, kind='stable')
+            positions = positions[order][scores[order] > 0]
+        
+        filtered_data = self.data.iloc[positions]
         
         return {
             'matching_trials': len(filtered_data),
@@ -409,12 +428,12 @@ class ClinicalTrialsProcessor:
         if self.processed_data is None:
             self.process_data()
         
-        trial_data = self.data[self.data['NCT Number'] == nct_number]
+        position = self.index.position(nct_number)
         
-        if trial_data.empty:
+        if position is None:
             return {"error": f"Trial {nct_number} not found"}
         
-        trial = trial_data.iloc[0]
+        trial = self.data.iloc[position]
         
         return {
             'nct_number': trial['NCT Number'],
@@ -8,6 +8,13 @@ import logging
 import time
 from datetime import datetime, timedelta
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .response_cache import response_cache
+from .study_store import study_store
+
+# Page cap for one search (pages hold up to 1000 studies)
+MAX_SEARCH_PAGES = 50
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +28,21 @@ class ClinicalTrialsAPIClient:
             'User-Agent': 'EnrollmentPulse/1.0 (Clinical Trial Analysis Tool)',
             'Accept': 'application/json'
         })
+
+    def _get_json(self, url: str, params: Optional[Dict] = None, ttl: Optional[int] = None) -> Dict:
+        """
+        GET a JSON resource through the shared response cache
+        
+        Fresh cached studies are returned without a request; stale ones are
+        revalidated with If-None-Match/If-Modified-Since when the API sent validators.
+        """
+        def send(validators):
+            response = self.session.get(url, params=params, headers=validators, timeout=30)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response.status_code, response.headers, response.content
+        
+        return response_cache.fetch('GET', url, send, params=params, ttl=ttl).json()
         
     def search_studies(self, 
                       query: Optional[str] = None,
@@ -34,7 +56,8 @@ class ClinicalTrialsAPIClient:
                       max_age: Optional[str] = None,
                       gender: Optional[str] = None,
                       page_size: int = 100,
-                      page_token: Optional[str] = None) -> Dict:
+                      page_token: Optional[str] = None,
+                      updated_since: Optional[str] = None) -> Dict:
         """
         Search studies using ClinicalTrials.gov API v2
         
@@ -51,6 +74,7 @@ class ClinicalTrialsAPIClient:
             gender: 'ALL', 'FEMALE', 'MALE'
             page_size: Number of results per page (max 1000)
             page_token: Token for pagination
+            updated_since: Only studies last updated on or after this date (YYYY-MM-DD)
             
         Returns:
             API response with studies data
@@ -85,11 +109,12 @@ class ClinicalTrialsAPIClient:
             params['filter.sex'] = gender
         if page_token:
             params['pageToken'] = page_token
+        if updated_since:
+            params['filter.advanced'] = f'AREA[LastUpdatePostDate]RANGE[{updated_since},MAX]'
             
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            # Delta queries are always revalidated so same-day updates are not missed
+            return self._get_json(url, params, ttl=0 if updated_since else None)
         except requests.exceptions.RequestException as e:
             logger.warning(f"Error searching studies: {e}")
             raise
@@ -107,9 +132,7 @@ class ClinicalTrialsAPIClient:
         url = f"{self.base_url}/studies/{nct_id}"
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(url)
         except requests.exceptions.RequestException as e:
             logger.warning(f"Error getting study details for {nct_id}: {e}")
             raise
@@ -131,13 +154,43 @@ class ClinicalTrialsAPIClient:
         }
         
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(url, params)
         except requests.exceptions.RequestException as e:
             logger.warning(f"Error getting multiple studies: {e}")
             raise
     
+    def iter_pages(self, **search_params):
+        """
+        Yield the studies of each result page, fetching the next page while the
+        caller processes the current one
+        
+        Args:
+            **search_params: Parameters to pass to search_studies
+            
+        Yields:
+            List of studies per page
+            
+        Raises:
+            requests.exceptions.RequestException: If a page cannot be fetched
+        """
+        search_params.pop('page_token', None)
+        page_count = 0
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(self.search_studies, **search_params)
+            while pending is not None:
+                response = pending.result()
+                page_count += 1
+                
+                # Request the next page before handing this one to the caller
+                page_token = response.get('nextPageToken')
+                pending = None
+                if page_token and page_count < MAX_SEARCH_PAGES:
+                    pending = prefetcher.submit(self.search_studies, page_token=page_token, **search_params)
+                
+                yield response.get('studies', [])
+        
+        logger.info(f"Retrieved {page_count} pages")
+    
     def search_all_pages(self, **search_params) -> List[Dict]:
         """
         Search all pages of results for a query
@@ -149,32 +202,39 @@ class ClinicalTrialsAPIClient:
             List of all studies from all pages
         """
         all_studies = []
-        page_token = None
-        max_pages = 50  # Safety limit
-        page_count = 0
-        
-        while page_count < max_pages:
-            try:
-                response = self.search_studies(page_token=page_token, **search_params)
-                
-                studies = response.get('studies', [])
+        try:
+            for studies in self.iter_pages(**search_params):
                 all_studies.extend(studies)
-                
-                # Check if there are more pages
-                page_token = response.get('nextPageToken')
-                if not page_token:
-                    break
-                    
-                page_count += 1
-                # Rate limiting handled by API server
-                
-            except Exception as e:
-                logger.warning(f"Error on page {page_count}: {e}")
-                break
+        except Exception as e:
+            logger.warning(f"Error after {len(all_studies)} studies: {e}")
         
-        logger.info(f"Retrieved {len(all_studies)} studies across {page_count + 1} pages")
+        logger.info(f"Retrieved {len(all_studies)} studies")
         return all_studies
     
+    def search_stored_studies(self, max_studies: Optional[int] = None, **search_params) -> List[Dict]:
+        """
+        Search all pages of results through the local study store
+        
+        The first call for a search downloads every page; later calls only fetch
+        studies updated since the previous sync (see study_store). The stored result
+        set is always complete so the incremental sync stays correct; max_studies
+        limits what is returned.
+        
+        Args:
+            max_studies: Return at most this many of the most recently updated studies
+            **search_params: Parameters to pass to search_studies
+            
+        Returns:
+            List of matching studies
+        """
+        try:
+            key = study_store.sync(self.iter_pages, search_params, max_pages=MAX_SEARCH_PAGES)
+        except Exception as e:
+            # Serve the last synced result set, if any, when the API is unavailable
+            logger.warning(f"Study store sync failed, using stored studies: {e}")
+            key = study_store.result_key(search_params)
+        return study_store.studies(key, status=search_params.get('status'), limit=max_studies)
+    
     def search_oncology_trials(self, 
                               cancer_type: Optional[str] = None,
                               include_recruiting: bool = True) -> List[Dict]:
@@ -196,7 +256,7 @@ class ClinicalTrialsAPIClient:
         if include_recruiting:
             search_params['status'] = ['RECRUITING', 'ACTIVE_NOT_RECRUITING']
         
-        return self.search_all_pages(**search_params)
+        return self.search_stored_studies(**search_params)
     
     def search_breast_cancer_trials(self, 
                                    subtype: Optional[str] = None,
@@ -224,7 +284,7 @@ class ClinicalTrialsAPIClient:
         if phase:
             search_params['phase'] = phase
         
-        return self.search_all_pages(**search_params)
+        return self.search_stored_studies(**search_params)
     
     def get_enrollment_data(self, studies: List[Dict]) -> pd.DataFrame:
         """
@@ -293,7 +353,7 @@ class ClinicalTrialsAPIClient:
         Returns:
             Competitive landscape analysis
         """
-        studies = self.search_all_pages(condition=condition, page_size=1000)
+        studies = self.search_stored_studies(condition=condition, page_size=1000)
         df = self.get_enrollment_data(studies)
         
         # Analyze sponsors
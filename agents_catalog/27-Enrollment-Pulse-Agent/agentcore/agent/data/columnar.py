@@ -0,0 +1,139 @@
+"""
+Columnar CTMS data store backed by pandas DataFrames
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ENROLLED_STATUSES = ['Randomized', 'Active']
+SCREEN_FAILED_STATUS = 'Screen Failed'
+
+SITE_COLUMNS = ['site_number', 'site_name', 'study_number', 'target_enrollment',
+                'site_activated_date', 'status', 'region', 'country']
+SUBJECT_COLUMNS = ['subject_id', 'site_number', 'study_number', 'screen_date',
+                   'enrollment_date', 'randomization_date', 'status', 'screen_failure_reason']
+METRIC_COLUMNS = ['site_number', 'study_number', 'month', 'enrolled_count',
+                  'screened_count', 'screen_failed_count', 'randomized_count']
+
+
+class CTMSColumnarStore:
+    """Sites, subjects and monthly metrics as DataFrames with per-site group-by indexes.
+
+    Every aggregate is computed with one vectorized group-by over the whole table and
+    cached, so per-site lookups are dictionary reads instead of scans of the subject
+    and metric lists.
+    """
+
+    def __init__(self, sites: pd.DataFrame, subjects: pd.DataFrame, metrics: pd.DataFrame):
+        self.sites = sites.reindex(columns=SITE_COLUMNS).reset_index(drop=True)
+        self.subjects = subjects.reindex(columns=SUBJECT_COLUMNS).reset_index(drop=True)
+        # Metrics ordered by site then month; the sort is stable within a month
+        self.metrics = (metrics.reindex(columns=METRIC_COLUMNS)
+                        .sort_values(['site_number', 'month'], kind='stable')
+                        .reset_index(drop=True))
+        self._cache = {}
+
+    @classmethod
+    def from_models(cls, sites: List, subjects: List, metrics: List) -> 'CTMSColumnarStore':
+        """Build the store from lists of pydantic models"""
+        def frame(models, columns):
+            return pd.DataFrame([m.model_dump() for m in models], columns=columns)
+
+        return cls(frame(sites, SITE_COLUMNS), frame(subjects, SUBJECT_COLUMNS),
+                   frame(metrics, METRIC_COLUMNS))
+
+    def _cached(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def status_counts(self) -> pd.DataFrame:
+        """Subject counts indexed by site_number with one column per status"""
+        return self._cached('status_counts', lambda: pd.crosstab(
+            self.subjects['site_number'], self.subjects['status']))
+
+    def status_totals(self) -> Dict[str, int]:
+        """Subject counts per status across all sites"""
+        return self._cached('status_totals', lambda: {
+            status: int(count) for status, count in self.subjects['status'].value_counts().items()})
+
+    def site_counts(self) -> pd.DataFrame:
+        """Screened, enrolled and screen-failed subject counts indexed by site_number"""
+        def build():
+            counts = self.status_counts()
+            enrolled_columns = [s for s in ENROLLED_STATUSES if s in counts.columns]
+            return pd.DataFrame({
+                # Counted from the rows, since the crosstab leaves out subjects without a status
+                'total_screened': self.subjects.groupby('site_number').size(),
+                'current_enrollment': counts[enrolled_columns].sum(axis=1),
+                'screen_failed': counts[SCREEN_FAILED_STATUS] if SCREEN_FAILED_STATUS in counts.columns else 0,
+            }).fillna(0).astype(int)
+
+        return self._cached('site_counts', build)
+
+    def enrollment_summaries(self, now: Optional[datetime] = None) -> pd.DataFrame:
+        """Enrollment summary columns for every site, in site order"""
+        now = pd.Timestamp(now or datetime.now())
+        counts = self.site_counts().reindex(self.sites['site_number']).fillna(0).astype(int)
+
+        current = counts['current_enrollment'].to_numpy()
+        screened = counts['total_screened'].to_numpy()
+        failed = counts['screen_failed'].to_numpy()
+        target = self.sites['target_enrollment'].to_numpy()
+        days = (now - pd.to_datetime(self.sites['site_activated_date'])).dt.days.to_numpy()
+
+        avg_monthly = current / np.maximum(1, days / 30)
+        percentage = current / target * 100
+        failure_rate = np.divide(failed, screened, out=np.zeros(len(failed), dtype=float), where=screened > 0)
+        risk_level = np.select(
+            [(percentage < 50) | (avg_monthly < 2), (percentage < 75) | (avg_monthly < 4)],
+            ['High', 'Medium'], 'Low')
+
+        return pd.DataFrame({
+            'site_number': self.sites['site_number'],
+            'site_name': self.sites['site_name'],
+            'target_enrollment': target,
+            'current_enrollment': current,
+            'enrollment_percentage': percentage,
+            'screen_failure_rate': failure_rate * 100,
+            'avg_monthly_enrollment': avg_monthly,
+            'days_since_activation': days,
+            'risk_level': risk_level,
+        })
+
+    def screening_days(self) -> Dict[str, float]:
+        """Average screening-to-randomization days per site_number"""
+        def build():
+            screened = self.subjects.dropna(subset=['randomization_date', 'screen_date'])
+            days = (pd.to_datetime(screened['randomization_date'])
+                    - pd.to_datetime(screened['screen_date'])).dt.days
+            return {site: float(value) for site, value in days.groupby(screened['site_number']).mean().items()}
+
+        return self._cached('screening_days', build)
+
+    def monthly_history(self) -> Dict[str, List[Dict]]:
+        """Monthly enrollment history per site_number with cumulative counts and trends"""
+        def build():
+            metrics = self.metrics
+            enrolled = metrics['enrolled_count']
+            previous = enrolled.groupby(metrics['site_number']).shift()
+            total_screened = metrics['screened_count'] + enrolled
+            failure_rate = (metrics['screen_failed_count'] / total_screened.where(total_screened > 0) * 100)
+
+            history = pd.DataFrame({
+                'site_number': metrics['site_number'],
+                'month': metrics['month'],
+                'enrollment_count': enrolled,
+                'cumulative_enrollment': enrolled.groupby(metrics['site_number']).cumsum(),
+                'enrollment_rate': enrolled,
+                'screen_failure_rate': failure_rate.fillna(0).round(1),
+                'performance_trend': np.select(
+                    [previous.isna(), enrolled > previous * 1.1, enrolled < previous * 0.9],
+                    ['Baseline', 'Improving', 'Declining'], 'Stable'),
+            })
+            return {site: rows.drop(columns='site_number').to_dict('records')
+                    for site, rows in history.groupby('site_number', sort=False)}
+
+        return self._cached('monthly_history', build)
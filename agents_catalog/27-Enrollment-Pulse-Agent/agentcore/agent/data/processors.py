@@ -2,7 +2,6 @@
 Data processors for CTMS CSV files
 """
 import pandas as pd
-from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
@@ -10,6 +9,7 @@ from agent.data.models import (
     Study, Site, Subject, StudyTeamMember, SiteTeamMember, 
     Milestone, EnrollmentMetric, EnrollmentSummary
 )
+from agent.data.columnar import CTMSColumnarStore, METRIC_COLUMNS, SITE_COLUMNS, SUBJECT_COLUMNS
 
 
 class CTMSDataProcessor:
@@ -21,6 +21,7 @@ class CTMSDataProcessor:
         self.data_dir = Path(data_dir)
         self._raw_data = {}
         self._processed_data = {}
+        self._frames = {}
     
     def load_csv_files(self) -> None:
         """Load all CSV files into pandas DataFrames"""
@@ -40,19 +41,18 @@ class CTMSDataProcessor:
         if 'study' not in self._raw_data:
             return []
         
-        studies = []
-        for _, row in self._raw_data['study'].iterrows():
-            study = Study(
-                study_number=row['study_number'],
-                study_name=row['study_name'],
-                phase=row['phase'],
-                indication=row['indication'],
-                target_enrollment=row['total_planned_subjects'],
-                enrollment_start_date=pd.to_datetime(row['enrollment_start_date']),
-                enrollment_end_date=pd.to_datetime(row['enrollment_end_date']),
-                status=row['status']
-            )
-            studies.append(study)
+        raw = self._raw_data['study']
+        frame = pd.DataFrame({
+            'study_number': raw['study_number'],
+            'study_name': raw['study_name'],
+            'phase': raw['phase'],
+            'indication': raw['indication'],
+            'target_enrollment': raw['total_planned_subjects'],
+            'enrollment_start_date': pd.to_datetime(raw['enrollment_start_date']),
+            'enrollment_end_date': pd.to_datetime(raw['enrollment_end_date']),
+            'status': raw['status']
+        })
+        studies = [Study(**record) for record in self._records(frame)]
         
         self._processed_data['studies'] = studies
         return studies
@@ -62,22 +62,19 @@ class CTMSDataProcessor:
         if 'site' not in self._raw_data:
             return []
         
-        sites = []
-        for _, row in self._raw_data['site'].iterrows():
-            # Extract study number from site data
-            study_number = "ONCO-2025-117"  # From the data pattern
-            
-            site = Site(
-                site_number=str(row['site_number']),
-                site_name=row['site_name'],
-                study_number=study_number,
-                target_enrollment=row['enrollment_target'],
-                site_activated_date=pd.to_datetime(row['site_activated_date']),
-                status=row['status'],
-                region=self._get_region_from_state(row['state_province']),
-                country=row['country']
-            )
-            sites.append(site)
+        raw = self._raw_data['site']
+        frame = pd.DataFrame({
+            'site_number': raw['site_number'].astype(str),
+            'site_name': raw['site_name'],
+            'study_number': "ONCO-2025-117",  # From the data pattern
+            'target_enrollment': raw['enrollment_target'],
+            'site_activated_date': pd.to_datetime(raw['site_activated_date']),
+            'status': raw['status'],
+            'region': raw['state_province'].map(self._get_region_from_state),
+            'country': raw['country']
+        })
+        self._frames['sites'] = frame
+        sites = [Site(**record) for record in self._records(frame)]
         
         self._processed_data['sites'] = sites
         return sites
@@ -87,22 +84,22 @@ class CTMSDataProcessor:
         if 'subject' not in self._raw_data:
             return []
         
-        subjects = []
-        for _, row in self._raw_data['subject'].iterrows():
-            # Extract site number from subject_id (e.g., "001-001" -> site "1")
-            site_number = row['subject_id'].split('-')[0].lstrip('0') or '1'
-            
-            subject = Subject(
-                subject_id=row['subject_id'],
-                site_number=site_number,
-                study_number="ONCO-2025-117",
-                screen_date=pd.to_datetime(row['screen_date']),
-                enrollment_date=pd.to_datetime(row['enrollment_date']) if pd.notna(row['enrollment_date']) else None,
-                randomization_date=pd.to_datetime(row['randomization_date']) if pd.notna(row['randomization_date']) else None,
-                status=row['status'],
-                screen_failure_reason=row['screen_failure_reason'] if pd.notna(row['screen_failure_reason']) else None
-            )
-            subjects.append(subject)
+        raw = self._raw_data['subject']
+        # Extract site number from subject_id (e.g., "001-001" -> site "1")
+        site_number = raw['subject_id'].str.split('-').str[0].str.lstrip('0').replace('', '1')
+        
+        frame = pd.DataFrame({
+            'subject_id': raw['subject_id'],
+            'site_number': site_number,
+            'study_number': "ONCO-2025-117",
+            'screen_date': pd.to_datetime(raw['screen_date']),
+            'enrollment_date': pd.to_datetime(raw['enrollment_date']),
+            'randomization_date': pd.to_datetime(raw['randomization_date']),
+            'status': raw['status'],
+            'screen_failure_reason': raw['screen_failure_reason']
+        })
+        self._frames['subjects'] = frame
+        subjects = [Subject(**record) for record in self._records(frame)]
         
         self._processed_data['subjects'] = subjects
         return subjects
@@ -112,36 +109,41 @@ class CTMSDataProcessor:
         if 'enrollment_metric' not in self._raw_data:
             return []
         
-        metrics = []
-        for _, row in self._raw_data['enrollment_metric'].iterrows():
-            # Extract month from metric_date
-            metric_date = pd.to_datetime(row['metric_date'])
-            month = metric_date.strftime('%Y-%m')
-            
-            # Map site ID to site number (simplified mapping)
-            site_mapping = {
-                'a0C5f000000JtS9EAK': '1',
-                'a0C5f000000JtSAEA0': '2', 
-                'a0C5f000000JtSBEA0': '3',
-                'a0C5f000000JtSCEA0': '4',
-                'a0C5f000000JtSDEA0': '5'
-            }
-            site_number = site_mapping.get(row['site'], '1')
-            
-            metric = EnrollmentMetric(
-                site_number=site_number,
-                study_number="ONCO-2025-117",
-                month=month,
-                enrolled_count=row['enrolled_count'],
-                screened_count=row['screened_count'],
-                screen_failed_count=row['screen_failure_count'],
-                randomized_count=row['randomized_count']
-            )
-            metrics.append(metric)
+        raw = self._raw_data['enrollment_metric']
+        # Map site ID to site number (simplified mapping)
+        site_mapping = {
+            'a0C5f000000JtS9EAK': '1',
+            'a0C5f000000JtSAEA0': '2', 
+            'a0C5f000000JtSBEA0': '3',
+            'a0C5f000000JtSCEA0': '4',
+            'a0C5f000000JtSDEA0': '5'
+        }
+        
+        frame = pd.DataFrame({
+            'site_number': raw['site'].map(site_mapping).fillna('1'),
+            'study_number': "ONCO-2025-117",
+            'month': pd.to_datetime(raw['metric_date']).dt.strftime('%Y-%m'),
+            'enrolled_count': raw['enrolled_count'],
+            'screened_count': raw['screened_count'],
+            'screen_failed_count': raw['screen_failure_count'],
+            'randomized_count': raw['randomized_count']
+        })
+        self._frames['enrollment_metrics'] = frame
+        metrics = [EnrollmentMetric(**record) for record in self._records(frame)]
         
         self._processed_data['enrollment_metrics'] = metrics
         return metrics
     
+    def build_columnar_store(self) -> CTMSColumnarStore:
+        """Build the columnar store from the processed site, subject and metric frames"""
+        store = CTMSColumnarStore(
+            self._frames.get('sites', pd.DataFrame(columns=SITE_COLUMNS)),
+            self._frames.get('subjects', pd.DataFrame(columns=SUBJECT_COLUMNS)),
+            self._frames.get('enrollment_metrics', pd.DataFrame(columns=METRIC_COLUMNS))
+        )
+        self._processed_data['columnar'] = store
+        return store
+    
     def calculate_enrollment_summaries(self) -> List[EnrollmentSummary]:
         """Calculate enrollment summaries for each site"""
         sites = self._processed_data.get('sites', [])
@@ -150,47 +152,21 @@ class CTMSDataProcessor:
         if not sites or not subjects:
             return []
         
-        summaries = []
-        
-        for site in sites:
-            # Get subjects for this site
-            site_subjects = [s for s in subjects if s.site_number == site.site_number]
-            
-            # Calculate metrics
-            enrolled_subjects = [s for s in site_subjects if s.status in ['Randomized', 'Active']]
-            screen_failed = [s for s in site_subjects if s.status == 'Screen Failed']
-            
-            current_enrollment = len(enrolled_subjects)
-            total_screened = len(site_subjects)
-            screen_failure_rate = len(screen_failed) / total_screened if total_screened > 0 else 0
-            
-            # Calculate days since activation
-            days_since_activation = (datetime.now() - site.site_activated_date).days
-            
-            # Calculate average monthly enrollment
-            months_active = max(1, days_since_activation / 30)
-            avg_monthly_enrollment = current_enrollment / months_active
-            
-            # Determine risk level
-            enrollment_percentage = (current_enrollment / site.target_enrollment) * 100
-            risk_level = self._calculate_risk_level(enrollment_percentage, avg_monthly_enrollment)
-            
-            summary = EnrollmentSummary(
-                site_number=site.site_number,
-                site_name=site.site_name,
-                target_enrollment=site.target_enrollment,
-                current_enrollment=current_enrollment,
-                enrollment_percentage=enrollment_percentage,
-                screen_failure_rate=screen_failure_rate * 100,
-                avg_monthly_enrollment=avg_monthly_enrollment,
-                days_since_activation=days_since_activation,
-                risk_level=risk_level
-            )
-            summaries.append(summary)
+        # One vectorized group-by over all subjects instead of a scan per site
+        store = self._processed_data.get('columnar') or self.build_columnar_store()
+        summaries = [
+            EnrollmentSummary(**record)
+            for record in store.enrollment_summaries().to_dict('records')
+        ]
         
         self._processed_data['enrollment_summaries'] = summaries
         return summaries
     
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> List[Dict]:
+        """DataFrame rows as dicts, with missing values (NaN/NaT) as None"""
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+    
     def _get_region_from_state(self, state: str) -> str:
         """Map state to region"""
         east_coast = ['NY', 'MA', 'FL', 'NC', 'VA']
@@ -203,15 +179,6 @@ class CTMSDataProcessor:
         else:
             return 'Midwest/South'
     
-    def _calculate_risk_level(self, enrollment_percentage: float, avg_monthly_enrollment: float) -> str:
-        """Calculate risk level based on enrollment metrics"""
-        if enrollment_percentage < 50 or avg_monthly_enrollment < 2:
-            return 'High'
-        elif enrollment_percentage < 75 or avg_monthly_enrollment < 4:
-            return 'Medium'
-        else:
-            return 'Low'
-    
     def get_processed_data(self) -> Dict:
         """Get all processed data"""
         return self._processed_data
@@ -223,6 +190,7 @@ class CTMSDataProcessor:
         self.process_sites()
         self.process_subjects()
         self.process_enrollment_metrics()
+        self.build_columnar_store()
         self.calculate_enrollment_summaries()
         
         return self.get_processed_data()
\ No newline at end of file
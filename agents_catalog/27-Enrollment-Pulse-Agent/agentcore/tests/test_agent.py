@@ -26,6 +26,65 @@ class TestDataProcessors:
         sites = processor.process_sites()
         assert len(sites) >= 5  # 5 cancer centers
 
+    def test_enrollment_summaries_match_subject_counts(self):
+        from agent.data.processors import CTMSDataProcessor
+        data = CTMSDataProcessor().process_all()
+        assert data['columnar'] is not None
+        for summary in data['enrollment_summaries']:
+            site_subjects = [s for s in data['subjects'] if s.site_number == summary.site_number]
+            enrolled = [s for s in site_subjects if s.status in ['Randomized', 'Active']]
+            assert summary.current_enrollment == len(enrolled)
+
+    def test_analyzer_store_matches_model_lists(self):
+        from agent.data.processors import CTMSDataProcessor
+        from agent.analysis.enrollment_metrics import EnrollmentAnalyzer
+        data = CTMSDataProcessor().process_all()
+        args = dict(summaries=data['enrollment_summaries'], subjects=data['subjects'],
+                    sites=data['sites'], metrics=data['enrollment_metrics'])
+        from_store = EnrollmentAnalyzer(store=data['columnar'], **args)
+        from_lists = EnrollmentAnalyzer(**args)
+        assert from_store.get_historical_performance() == from_lists.get_historical_performance()
+        assert from_store.calculate_screening_efficiency() == from_lists.calculate_screening_efficiency()
+        history = from_store.get_historical_performance()
+        assert history and history[0]['performance_trend'] == 'Baseline'
+
+    def test_site_counts_include_subjects_without_status(self):
+        import pandas as pd
+        from agent.data.columnar import CTMSColumnarStore
+        subjects = pd.DataFrame({'site_number': ['1', '1', '1', '2'],
+                                 'status': ['Randomized', 'Screen Failed', None, None]})
+        store = CTMSColumnarStore(pd.DataFrame(), subjects, pd.DataFrame())
+        counts = store.site_counts()
+        assert counts.loc['1'].tolist() == [3, 1, 1]
+        assert counts.loc['2'].tolist() == [1, 0, 0]
+
+    def test_analyzer_results_are_memoized_copies(self):
+        from agent.data.processors import CTMSDataProcessor
+        from agent.analysis.enrollment_metrics import EnrollmentAnalyzer
+        data = CTMSDataProcessor().process_all()
+        analyzer = EnrollmentAnalyzer(summaries=data['enrollment_summaries'], subjects=data['subjects'],
+                                      sites=data['sites'], metrics=data['enrollment_metrics'],
+                                      store=data['columnar'])
+        first = analyzer.get_site_performance_ranking()
+        first.clear()
+        assert analyzer.get_site_performance_ranking() != first
+        assert analyzer.identify_underperforming_sites(50.0) != analyzer.identify_underperforming_sites(100.0)
+
+    def test_comprehensive_site_analysis_is_memoized(self):
+        from agent.data.processors import CTMSDataProcessor
+        from agent.analysis.enrollment_metrics import EnrollmentAnalyzer
+        data = CTMSDataProcessor().process_all()
+        analyzer = EnrollmentAnalyzer(summaries=data['enrollment_summaries'], subjects=data['subjects'],
+                                      sites=data['sites'], metrics=data['enrollment_metrics'],
+                                      store=data['columnar'])
+        analysis = analyzer.get_comprehensive_site_analysis()
+        assert set(analysis) == {s.site_number for s in data['enrollment_summaries']}
+        site = next(iter(analysis))
+        analysis[site]['historical_performance']['monthly_data'].clear()
+        assert analyzer.get_comprehensive_site_analysis()[site]['historical_performance']['monthly_data']
+        assert analyzer.get_historical_performance()
+        assert list(analyzer.get_comprehensive_site_analysis(site)) == [site]
+
     def test_epidemiology_processor_loads(self):
         from agent.data.epidemiology_processor import EpidemiologyProcessor
         processor = EpidemiologyProcessor()
@@ -38,6 +97,116 @@ class TestDataProcessors:
         df = processor.load_data()
         assert len(df) > 0
 
+    def test_clinical_trials_distributions_match_trial_features(self):
+        from agent.data.clinical_trials_processor import ClinicalTrialsProcessor
+        processor = ClinicalTrialsProcessor()
+        data = processor.process_data()
+        trials = processor.data
+        countries = data['geographic_analysis']['country_distribution']
+        assert sum(countries.values()) == sum(len(c) for c in trials['countries'])
+        assert data['geographic_analysis']['international_trials'] == sum(len(c) > 1 for c in trials['countries'])
+        assert data['intervention_analysis']['drug_intervention_trials'] == sum(
+            'DRUG' in t for t in trials['intervention_types'])
+        assert list(countries.values()) == sorted(countries.values(), reverse=True)
+
+    def test_indexed_trial_search_matches_full_scan(self, tmp_path, monkeypatch):
+        from agent.data import trial_index
+        from agent.data.clinical_trials_processor import ClinicalTrialsProcessor
+        monkeypatch.setattr(trial_index, 'TRIAL_INDEX_DIR', str(tmp_path))
+        processor = ClinicalTrialsProcessor()
+        processor.process_data()
+        trials = processor.data
+        expected = trials[trials['Conditions'].str.contains('breast cancer', case=False, na=False)
+                          & trials['Interventions'].str.contains('pembro', case=False, na=False)
+                          & trials['Study Status'].str.contains('recruiting', case=False, na=False)]
+        result = processor.search_trials(condition='breast cancer', intervention='pembro', status='recruiting')
+        assert [t['NCT Number'] for t in result['trials']] == expected['NCT Number'].tolist()
+
+        nct = trials['NCT Number'].iloc[-1]
+        assert processor.get_trial_details(nct)['nct_number'] == nct
+        assert 'error' in processor.get_trial_details('NCT00000000')
+
+        ranked = processor.search_trials(query='breast cancer')
+        assert 0 < ranked['matching_trials'] <= len(trials)
+
+
+class TestStudyStore:
+    """Test incremental sync of ClinicalTrials.gov studies."""
+
+    @staticmethod
+    def _study(nct_id, status, updated):
+        return {'protocolSection': {
+            'identificationModule': {'nctId': nct_id},
+            'statusModule': {'overallStatus': status, 'lastUpdatePostDateStruct': {'date': updated}},
+        }}
+
+    def test_sync_fetches_only_updates_after_first_sync(self, tmp_path, monkeypatch):
+        from agent.data import study_store as module
+        store = module.StudyStore(str(tmp_path / 'studies.sqlite'))
+        calls = []
+
+        def pages(**params):
+            calls.append(params)
+            if 'updated_since' in params:
+                yield [self._study('NCT2', 'COMPLETED', '2025-02-01')]
+            else:
+                yield [self._study('NCT1', 'RECRUITING', '2025-01-01')]
+                yield [self._study('NCT2', 'RECRUITING', '2025-01-01')]
+
+        search = {'condition': 'breast cancer', 'status': ['RECRUITING'], 'page_size': 1000}
+        key = store.sync(pages, search)
+        assert len(store.studies(key, status=['RECRUITING'])) == 2
+        assert 'status' not in calls[0]
+
+        store.sync(pages, search)
+        assert len(calls) == 1  # fresh result sets are served without a request
+
+        monkeypatch.setattr(module, 'CT_STUDY_STORE_FRESH_SECONDS', -1)
+        key = store.sync(pages, {'condition': 'breast cancer', 'page_size': 500})
+        assert 'updated_since' in calls[1]
+        assert [s['protocolSection']['identificationModule']['nctId']
+                for s in store.studies(key, status=['RECRUITING'])] == ['NCT1']
+        assert len(store.studies(key)) == 2
+
+    def test_truncated_unfiltered_sync_keeps_status_filter_server_side(self, tmp_path):
+        from agent.data import study_store as module
+        store = module.StudyStore(str(tmp_path / 'studies.sqlite'))
+        calls = []
+
+        def pages(**params):
+            calls.append(params)
+            if 'status' in params:
+                yield [self._study('NCT9', 'RECRUITING', '2025-01-01')]
+            else:
+                # The unfiltered search fills the page cap with completed studies
+                yield [self._study('NCT1', 'COMPLETED', '2025-01-01')]
+                yield [self._study('NCT2', 'COMPLETED', '2025-01-01')]
+
+        search = {'condition': 'cancer', 'status': ['RECRUITING']}
+        key = store.sync(pages, search, max_pages=2)
+        assert calls[1]['status'] == ['RECRUITING']
+        assert [s['protocolSection']['identificationModule']['nctId']
+                for s in store.studies(key, status=['RECRUITING'])] == ['NCT9']
+        assert store.result_key(search) == key
+
+        # Once known to be truncated, the unfiltered sync is skipped
+        store.sync(pages, search, max_pages=2)
+        assert len(calls) == 2
+
+    def test_studies_limit_returns_most_recently_updated(self, tmp_path):
+        from agent.data import study_store as module
+        store = module.StudyStore(str(tmp_path / 'studies.sqlite'))
+
+        def pages(**params):
+            yield [self._study('NCT1', 'RECRUITING', '2025-03-01'),
+                   self._study('NCT2', 'RECRUITING', '2025-01-01'),
+                   self._study('NCT3', 'COMPLETED', '2025-02-01')]
+
+        key = store.sync(pages, {'condition': 'breast cancer'})
+        assert [s['protocolSection']['identificationModule']['nctId']
+                for s in store.studies(key, limit=2)] == ['NCT1', 'NCT3']
+        assert len(store.studies(key)) == 3
+
 
 class TestTools:
     """Test agent tools return valid enrollment data."""
@@ -15,8 +15,7 @@ import logging
 sys.path.append(str(Path(__file__).parent / 'src'))
 
 from src.agent.enrollment_agent import query_agent
-from src.data.processors import CTMSDataProcessor
-from src.analysis.enrollment_metrics import EnrollmentAnalyzer
+from src.agent.tools import get_cached_analytics, refresh_processed_data
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -47,29 +46,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global data cache
-_data_cache = {}
-_analyzer_cache = None
-
 def get_data():
-    """Get processed CTMS data, using cache if available"""
-    global _data_cache, _analyzer_cache
-    
-    if not _data_cache:
-        logger.info("Loading CTMS data...")
-        processor = CTMSDataProcessor()
-        _data_cache = processor.process_all()
-        
-        # Create analyzer
-        _analyzer_cache = EnrollmentAnalyzer(
-            summaries=_data_cache['enrollment_summaries'],
-            subjects=_data_cache['subjects'],
-            sites=_data_cache['sites'],
-            metrics=_data_cache.get('enrollment_metrics', [])
-        )
-        logger.info("Data loaded successfully")
-    
-    return _data_cache, _analyzer_cache
+    """Get processed CTMS data and the memoizing analyzer.
+
+    The cache is shared with the agent tools, so endpoints and tool calls reuse the same
+    analysis results until /data/refresh loads a new data version.
+    """
+    return get_cached_analytics()
 
 # Pydantic models for API requests/responses
 class QueryRequest(BaseModel):
@@ -123,90 +106,118 @@ async def root():
     """Health check endpoint"""
     return {"message": "Enrollment Pulse API is running", "status": "healthy"}
 
-import uuid
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import json
+from fastapi.responses import StreamingResponse
+
+from job_store import (COMPLETED, FAILED, FINISHED_STATUSES, JOB_POLL_SECONDS,
+                       JobWorkerPool, create_job_store)
+
+# Jobs are persisted in the store selected by JOB_BACKEND so any replica can serve
+# their status; every replica runs one poller that claims queued jobs for its JOB_WORKERS workers.
+job_store = create_job_store()
+job_workers = JobWorkerPool(job_store, query_agent)
 
-# Job storage (in production, use Redis/DynamoDB)
-job_results = {}
-executor = ThreadPoolExecutor(max_workers=3)
+# How long POST /query waits for its job before answering with the job ID
+SYNC_QUERY_TIMEOUT_SECONDS = float(os.getenv('SYNC_QUERY_TIMEOUT_SECONDS', '120'))
 
 class AsyncQueryResponse(BaseModel):
     job_id: str
-    status: str  # "processing", "completed", "failed"
+    status: str  # "queued", "processing", "completed", "failed"
     answer: Optional[str] = None
     error: Optional[str] = None
 
-def process_query_sync(job_id: str, question: str):
-    """Process query synchronously in background"""
-    try:
-        logger.info(f"Processing query {job_id}: {question}")
-        response = query_agent(question)
-        job_results[job_id] = {
-            "status": "completed",
-            "answer": str(response),
-            "error": None
-        }
-    except Exception as e:
-        logger.warning(f"Error processing query {job_id}: {str(e)}")
-        job_results[job_id] = {
-            "status": "failed",
-            "answer": None,
-            "error": str(e)
-        }
+def _job_response(job: Dict) -> AsyncQueryResponse:
+    return AsyncQueryResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        answer=job["answer"],
+        error=job["error"]
+    )
+
+async def _get_job(job_id: str) -> Optional[Dict]:
+    return await asyncio.to_thread(job_store.get, job_id)
+
+async def _wait_for_job(job_id: str, timeout: float) -> Optional[Dict]:
+    """Poll the job store until the job finishes or the timeout passes"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await _get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        if asyncio.get_running_loop().time() >= deadline:
+            return job
+        await asyncio.sleep(min(JOB_POLL_SECONDS, 0.5))
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    job_workers.stop()
 
 @app.post("/query/async", response_model=AsyncQueryResponse)
 async def query_agent_async(request: QueryRequest):
     """Start async query processing"""
-    job_id = str(uuid.uuid4())
-    job_results[job_id] = {"status": "processing", "answer": None, "error": None}
-    
-    # Start background processing
-    executor.submit(process_query_sync, job_id, request.question)
-    
-    return AsyncQueryResponse(
-        job_id=job_id,
-        status="processing"
-    )
+    job = await asyncio.to_thread(job_workers.submit, request.question)
+    return _job_response(job)
 
 @app.get("/query/{job_id}", response_model=AsyncQueryResponse)
 async def get_query_result(job_id: str):
     """Get query result by job ID"""
-    if job_id not in job_results:
+    job = await _get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.get("/query/{job_id}/stream")
+async def stream_query_result(job_id: str):
+    """Stream job status changes and the final result as server-sent events"""
+    if await _get_job(job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    result = job_results[job_id]
-    return AsyncQueryResponse(
-        job_id=job_id,
-        status=result["status"],
-        answer=result["answer"],
-        error=result["error"]
-    )
+
+    async def events():
+        last_status = None
+        while True:
+            job = await _get_job(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'job_id': job_id, 'error': 'Job expired'})}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                event = "result" if last_status in FINISHED_STATUSES else "status"
+                yield f"event: {event}\ndata: {_job_response(job).model_dump_json()}\n\n"
+                if event == "result":
+                    return
+            else:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(JOB_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/query", response_model=QueryResponse)
 async def query_agent_endpoint(request: QueryRequest):
     """Quick sync query with timeout handling"""
     try:
-        # Try with 120-second timeout (Lambda has 15-minute max)
-        response = await asyncio.wait_for(
-            asyncio.get_event_loop().run_in_executor(
-                executor, query_agent, request.question
-            ),
-            timeout=120.0
-        )
-        return QueryResponse(answer=str(response), success=True)
-    
-    except asyncio.TimeoutError:
-        # Start async job for complex queries
-        job_id = str(uuid.uuid4())
-        job_results[job_id] = {"status": "processing", "answer": None, "error": None}
-        executor.submit(process_query_sync, job_id, request.question)
-        
+        # Run as a job so a slow query keeps running (once) after the wait times out
+        job = await asyncio.to_thread(job_workers.submit, request.question)
+        job_id = job["job_id"]
+        job = await _wait_for_job(job_id, SYNC_QUERY_TIMEOUT_SECONDS)
+
+        if job is not None and job["status"] == COMPLETED:
+            return QueryResponse(answer=job["answer"], success=True)
+        if job is not None and job["status"] == FAILED:
+            logger.warning(f"Error processing query: {job['error']}")
+            return QueryResponse(answer="", success=False, error=job["error"])
+
         return QueryResponse(
             answer=f"Query is taking longer than expected. Check status at /query/{job_id}",
             success=True
         )
-    
+
     except Exception as e:
         logger.warning(f"Error processing query: {str(e)}")
         return QueryResponse(answer="", success=False, error=str(e))
@@ -406,14 +417,11 @@ async def refresh_data():
     Refresh the cached CTMS data
     """
     try:
-        global _data_cache, _analyzer_cache
-        _data_cache = {}
-        _analyzer_cache = None
-        
-        # Reload data
-        get_data()
+        # Reload data and invalidate every memoized analysis
+        data_version = refresh_processed_data()
+        logger.info(f"Data refreshed, version {data_version}")
         
-        return {"message": "Data refreshed successfully", "success": True}
+        return {"message": "Data refreshed successfully", "success": True, "data_version": data_version}
     
     except Exception as e:
         logger.warning(f"Error refreshing data: {str(e)}")
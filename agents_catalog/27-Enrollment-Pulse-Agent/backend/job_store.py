@@ -0,0 +1,424 @@
+"""
+Durable job queue for asynchronous agent queries
+
+Jobs are persisted in a JobStore so any API replica can report their status, and
+queued jobs survive restarts. One poller per replica claims queued jobs with an
+atomic status transition and a lease whenever one of its workers is free; a job whose worker died is claimed again
+once its lease expires, up to JOB_MAX_ATTEMPTS times. Finished jobs expire after
+JOB_RESULT_TTL_SECONDS.
+
+Backends:
+- SQLiteJobStore: a local file, for development and single-host deployments
+- DynamoDBJobStore: a table with a status/created_at index, for multiple replicas
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv('JOB_BACKEND', 'sqlite')  # "sqlite" or "dynamodb"
+JOB_SQLITE_PATH = os.getenv('JOB_SQLITE_PATH', '/tmp/enrollment-pulse-jobs.sqlite')  # nosec B108 - local stand-in
+JOB_TABLE_NAME = os.getenv('JOB_TABLE_NAME', 'enrollment-pulse-jobs')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))
+JOB_RESULT_TTL_SECONDS = int(os.getenv('JOB_RESULT_TTL_SECONDS', '3600'))
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '900'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '2'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '1.0'))
+# Idle polls back off up to this interval; submitting a job wakes the poller at once
+JOB_POLL_MAX_SECONDS = float(os.getenv('JOB_POLL_MAX_SECONDS', '30.0'))
+JOB_PURGE_SECONDS = 60
+
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+LEASE_EXPIRED_ERROR = 'Job did not finish within its lease'
+
+JOB_FIELDS = ('job_id', 'question', 'status', 'answer', 'error', 'attempts',
+              'created_at', 'updated_at', 'lease_until', 'expires_at', 'worker_id')
+
+
+class JobStore(ABC):
+    """Persistence interface for query jobs"""
+
+    @abstractmethod
+    def create(self, question: str) -> Dict:
+        """Persist a new queued job and return it"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job that has not expired, or None"""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically move the oldest claimable job to processing and return it"""
+
+    @abstractmethod
+    def finish(self, job_id: str, worker_id: str, status: str,
+               answer: Optional[str] = None, error: Optional[str] = None) -> bool:
+        """Record the outcome of a claimed job; False if another worker owns it now"""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Fail jobs whose every attempt timed out and drop expired jobs; return how many changed"""
+
+    @staticmethod
+    def new_job(question: str) -> Dict:
+        now = time.time()
+        return {
+            'job_id': str(uuid.uuid4()),
+            'question': question,
+            'status': QUEUED,
+            'answer': None,
+            'error': None,
+            'attempts': 0,
+            'created_at': now,
+            'updated_at': now,
+            'lease_until': 0,
+            'expires_at': now + JOB_RESULT_TTL_SECONDS + JOB_LEASE_SECONDS * JOB_MAX_ATTEMPTS,
+            'worker_id': None,
+        }
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a local SQLite file, shared by the processes on one host"""
+
+    def __init__(self, path: str = JOB_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    answer TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    lease_until REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    worker_id TEXT
+                )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def create(self, question: str) -> Dict:
+        job = self.new_job(question)
+        self._connect().execute(
+            f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})",
+            [job[field] for field in JOB_FIELDS])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            'SELECT * FROM jobs WHERE job_id = ? AND expires_at > ?', (job_id, time.time())).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('''
+                SELECT job_id FROM jobs
+                WHERE (status = ? OR (status = ? AND lease_until < ?)) AND attempts < ? AND expires_at > ?
+                ORDER BY created_at LIMIT 1''',
+                (QUEUED, PROCESSING, now, JOB_MAX_ATTEMPTS, now)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute('''
+                UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?,
+                                lease_until = ?, updated_at = ?
+                WHERE job_id = ?''',
+                (PROCESSING, worker_id, now + JOB_LEASE_SECONDS, now, row['job_id']))
+            job = dict(conn.execute('SELECT * FROM jobs WHERE job_id = ?', (row['job_id'],)).fetchone())
+            conn.execute('COMMIT')
+            return job
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def finish(self, job_id: str, worker_id: str, status: str,
+               answer: Optional[str] = None, error: Optional[str] = None) -> bool:
+        now = time.time()
+        cursor = self._connect().execute('''
+            UPDATE jobs SET status = ?, answer = ?, error = ?, updated_at = ?, expires_at = ?
+            WHERE job_id = ? AND worker_id = ? AND status = ?''',
+            (status, answer, error, now, now + JOB_RESULT_TTL_SECONDS, job_id, worker_id, PROCESSING))
+        return cursor.rowcount == 1
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        conn = self._connect()
+        # Jobs whose every attempt timed out are reported as failed until they expire
+        failed = conn.execute('''
+            UPDATE jobs SET status = ?, error = ?, updated_at = ?
+            WHERE status = ? AND lease_until < ? AND attempts >= ?''',
+            (FAILED, LEASE_EXPIRED_ERROR, now, PROCESSING, now, JOB_MAX_ATTEMPTS)).rowcount
+        return failed + conn.execute('DELETE FROM jobs WHERE expires_at <= ?', (now,)).rowcount
+
+
+class DynamoDBJobStore(JobStore):
+    """Job store in a DynamoDB table shared by every replica
+
+    The table is keyed by job_id, has a status-created_at global secondary index
+    (status hash key, created_at range key, projecting lease_until, attempts and
+    expires_at) used to find claimable jobs, and uses expires_at as its TTL attribute.
+    """
+
+    STATUS_INDEX = 'status-created_at-index'
+
+    def __init__(self, table_name: str = JOB_TABLE_NAME):
+        import boto3
+        from boto3.dynamodb.conditions import Attr, Key
+        self._attr = Attr
+        self._key = Key
+        self.table = boto3.resource('dynamodb').Table(table_name)
+
+    @staticmethod
+    def _to_item(job: Dict) -> Dict:
+        return {k: Decimal(str(v)) if isinstance(v, float) else v
+                for k, v in job.items() if v is not None}
+
+    @staticmethod
+    def _from_item(item: Dict) -> Dict:
+        job = {field: None for field in JOB_FIELDS}
+        job.update({k: float(v) if isinstance(v, Decimal) else v for k, v in item.items()})
+        job['attempts'] = int(job.get('attempts') or 0)
+        return job
+
+    def create(self, question: str) -> Dict:
+        job = self.new_job(question)
+        self.table.put_item(Item=self._to_item(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        item = self.table.get_item(Key={'job_id': job_id}, ConsistentRead=True).get('Item')
+        if not item:
+            return None
+        job = self._from_item(item)
+        # TTL deletion is lazy, so hide expired jobs explicitly
+        return job if job['expires_at'] > time.time() else None
+
+    def _query_status(self, status: str, filter_expression=None, page_size: int = 25) -> Iterator[Dict]:
+        """Yield jobs with a status, oldest first, following every result page"""
+        request = dict(IndexName=self.STATUS_INDEX,
+                       KeyConditionExpression=self._key('status').eq(status),
+                       Limit=page_size)
+        if filter_expression is not None:
+            request['FilterExpression'] = filter_expression
+        while True:
+            response = self.table.query(**request)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _expired_leases(self, now: Decimal, exhausted: bool) -> Iterator[Dict]:
+        """Processing jobs whose lease ran out, with attempts left (or exhausted)"""
+        attempts = self._attr('attempts')
+        return self._query_status(PROCESSING, self._attr('lease_until').lt(now) & (
+            attempts.gte(JOB_MAX_ATTEMPTS) if exhausted else attempts.lt(JOB_MAX_ATTEMPTS)))
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        from itertools import chain, islice
+        from botocore.exceptions import ClientError
+        now = Decimal(str(time.time()))
+        # Filters apply after Limit, so stale leases are found by paging, not just the oldest page
+        candidates = chain(islice(self._query_status(QUEUED), 10), self._expired_leases(now, exhausted=False))
+        for item in candidates:
+            condition = (
+                (self._attr('status').eq(QUEUED)
+                 | (self._attr('status').eq(PROCESSING) & self._attr('lease_until').lt(now)))
+                & self._attr('attempts').lt(JOB_MAX_ATTEMPTS)
+                & self._attr('expires_at').gt(now)
+            )
+            try:
+                response = self.table.update_item(
+                    Key={'job_id': item['job_id']},
+                    UpdateExpression='SET #s = :processing, attempts = attempts + :one, '
+                                     'worker_id = :worker, lease_until = :lease, updated_at = :now',
+                    ConditionExpression=condition,
+                    ExpressionAttributeNames={'#s': 'status'},
+                    ExpressionAttributeValues={
+                        ':processing': PROCESSING, ':one': 1, ':worker': worker_id,
+                        ':lease': now + JOB_LEASE_SECONDS, ':now': now,
+                    },
+                    ReturnValues='ALL_NEW',
+                )
+                return self._from_item(response['Attributes'])
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                # Another replica claimed it, or its lease is still valid
+        return None
+
+    def finish(self, job_id: str, worker_id: str, status: str,
+               answer: Optional[str] = None, error: Optional[str] = None) -> bool:
+        from botocore.exceptions import ClientError
+        now = time.time()
+        values = {':status': status, ':now': Decimal(str(now)),
+                  ':expires': Decimal(str(now + JOB_RESULT_TTL_SECONDS)),
+                  ':worker': worker_id, ':processing': PROCESSING}
+        update = 'SET #s = :status, updated_at = :now, expires_at = :expires'
+        for name, value in (('answer', answer), ('error', error)):
+            if value is not None:
+                update += f', {name} = :{name}'
+                values[f':{name}'] = value
+        try:
+            self.table.update_item(
+                Key={'job_id': job_id},
+                UpdateExpression=update,
+                ConditionExpression='worker_id = :worker AND #s = :processing',
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues=values,
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def purge_expired(self) -> int:
+        # Expired jobs are deleted by the table's TTL; only exhausted leases need failing
+        from botocore.exceptions import ClientError
+        now = Decimal(str(time.time()))
+        failed = 0
+        for item in self._expired_leases(now, exhausted=True):
+            try:
+                self.table.update_item(
+                    Key={'job_id': item['job_id']},
+                    UpdateExpression='SET #s = :failed, #e = :error, updated_at = :now',
+                    ConditionExpression=(self._attr('status').eq(PROCESSING)
+                                         & self._attr('lease_until').lt(now)
+                                         & self._attr('attempts').gte(JOB_MAX_ATTEMPTS)),
+                    ExpressionAttributeNames={'#s': 'status', '#e': 'error'},
+                    ExpressionAttributeValues={':failed': FAILED, ':error': LEASE_EXPIRED_ERROR, ':now': now},
+                )
+                failed += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                # The worker finished it after all
+        return failed
+
+
+class JobWorkerPool:
+    """A poller that claims jobs from the store and runs them on worker threads
+
+    Only the poller queries the store, and only while a worker is free, so each
+    replica issues one claim at a time however many workers it runs. Polls that find
+    nothing back off from JOB_POLL_SECONDS to JOB_POLL_MAX_SECONDS.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[str], str], concurrency: int = JOB_WORKERS):
+        self.store = store
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.worker_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._free_workers = threading.Semaphore(self.concurrency)
+        self._executor = None
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._poller:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker')
+            self._poller = threading.Thread(target=self._poll, name='job-poller', daemon=True)
+            self._poller.start()
+            logger.info(f"Started job poller with {self.concurrency} workers ({type(self.store).__name__})")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def submit(self, question: str) -> Dict:
+        """Persist a new job and wake the poller"""
+        self.start()
+        job = self.store.create(question)
+        self._wake.set()
+        return job
+
+    def _poll(self) -> None:
+        last_purge = 0.0
+        idle_seconds = JOB_POLL_SECONDS
+        while not self._stop.is_set():
+            if not self._free_workers.acquire(timeout=JOB_POLL_SECONDS):
+                continue
+            # Every claim gets its own worker id, so a reclaimed job cannot be finished twice
+            worker_id = f"{self.worker_prefix}-{uuid.uuid4().hex[:8]}"
+            try:
+                if time.time() - last_purge > JOB_PURGE_SECONDS:
+                    last_purge = time.time()
+                    self.store.purge_expired()
+                job = self.store.claim(worker_id)
+            except Exception as e:
+                logger.warning(f"Job store unavailable: {str(e)}")
+                job = None
+            if job is None:
+                self._free_workers.release()
+                if self._wake.wait(idle_seconds):
+                    idle_seconds = JOB_POLL_SECONDS
+                else:
+                    idle_seconds = min(idle_seconds * 2, JOB_POLL_MAX_SECONDS)
+                self._wake.clear()
+                continue
+            idle_seconds = JOB_POLL_SECONDS
+            self._executor.submit(self._execute, job, worker_id)
+
+    def _execute(self, job: Dict, worker_id: str) -> None:
+        try:
+            self._run_job(job, worker_id)
+        finally:
+            self._free_workers.release()
+            # A worker is free again: look for more work right away
+            self._wake.set()
+
+    def _run_job(self, job: Dict, worker_id: str) -> None:
+        logger.info(f"Processing query {job['job_id']} (attempt {job['attempts']}): {job['question']}")
+        try:
+            answer = str(self.handler(job['question']))
+            outcome = dict(status=COMPLETED, answer=answer)
+        except Exception as e:
+            logger.warning(f"Error processing query {job['job_id']}: {str(e)}")
+            outcome = dict(status=FAILED, error=str(e))
+        try:
+            if not self.store.finish(job['job_id'], worker_id, **outcome):
+                logger.warning(f"Job {job['job_id']} was reclaimed before {worker_id} finished it")
+        except Exception as e:
+            logger.warning(f"Could not record result of job {job['job_id']}: {str(e)}")
+
+
+def create_job_store(backend: str = JOB_BACKEND) -> JobStore:
+    """Create the job store selected by JOB_BACKEND"""
+    if backend == 'dynamodb':
+        return DynamoDBJobStore()
+    if backend == 'sqlite':
+        return SQLiteJobStore()
+    raise ValueError(f"Unknown JOB_BACKEND '{backend}' (expected 'sqlite' or 'dynamodb')")
@@ -243,7 +243,7 @@ def analyze_live_competitive_landscape(condition: str, max_studies: int = 500) -
     
     Args:
         condition: Medical condition to analyze (e.g., "breast cancer", "oncology")
-        max_studies: Maximum number of studies to analyze
+        max_studies: Maximum number of studies to analyze (the most recently updated ones)
     
     Returns:
         Comprehensive competitive analysis including:
@@ -261,9 +261,10 @@ def analyze_live_competitive_landscape(condition: str, max_studies: int = 500) -
         client = get_api_client()
         
         # Get comprehensive data
-        studies = client.search_all_pages(
+        studies = client.search_stored_studies(
             condition=condition,
-            page_size=min(max_studies, 1000)
+            page_size=min(max_studies, 1000),
+            max_studies=max_studies
         )
         
         if not studies:
@@ -370,7 +371,7 @@ def find_recruiting_trials_by_location(
         client = get_api_client()
         
         # Search for recruiting trials
-        studies = client.search_all_pages(
+        studies = client.search_stored_studies(
             condition=condition,
             status=['RECRUITING'],
             location_country=country,
@@ -463,7 +464,7 @@ def track_enrollment_trends(condition: str, months_back: int = 12) -> Dict:
         client = get_api_client()
         
         # Get all studies for the condition
-        studies = client.search_all_pages(
+        studies = client.search_stored_studies(
             condition=condition,
             page_size=1000
         )
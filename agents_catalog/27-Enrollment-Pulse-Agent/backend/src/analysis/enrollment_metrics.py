@@ -1,8 +1,12 @@
 """
 Enrollment metrics and calculations
 """
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+import copy
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 import sys
 from pathlib import Path
@@ -11,18 +15,71 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from data.models import EnrollmentSummary, Subject, Site, EnrollmentMetric
+from data.columnar import CTMSColumnarStore
+
+# Memoized results kept per analyzer (arguments such as thresholds vary per request)
+MAX_MEMOIZED_RESULTS = 256
+# Nesting depth of memoized calls on this thread; only the outermost call copies its result
+_memo_calls = threading.local()
+_MISSING = object()
+
+
+def memoized(method):
+    """Cache a method's result on the analyzer, keyed by arguments and the current day.
+
+    An analyzer wraps one immutable version of the data, so results only change when
+    the data is reloaded (which builds a new analyzer) or, for projections based on
+    today's date, when the day changes. Callers receive a copy they are free to modify;
+    memoized methods called from another one share the cached result, so a composite
+    analysis is copied once, when it is returned.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())), date.today())
+        depth = getattr(_memo_calls, 'depth', 0)
+        with self._memo_lock:
+            result = self._memo.get(key, _MISSING)
+            if result is not _MISSING:
+                self._memo.move_to_end(key)
+        if result is _MISSING:
+            _memo_calls.depth = depth + 1
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                _memo_calls.depth = depth
+            with self._memo_lock:
+                self._memo[key] = result
+                while len(self._memo) > MAX_MEMOIZED_RESULTS:
+                    self._memo.popitem(last=False)
+        return result if depth else copy.deepcopy(result)
+    return wrapper
 
 
 class EnrollmentAnalyzer:
     """Analyze enrollment performance and trends"""
     
     def __init__(self, summaries: List[EnrollmentSummary], subjects: List[Subject], 
-                 sites: List[Site], metrics: List[EnrollmentMetric]):
+                 sites: List[Site], metrics: List[EnrollmentMetric],
+                 store: Optional[CTMSColumnarStore] = None, data_version: int = 0):
         self.summaries = summaries
         self.subjects = subjects
         self.sites = sites
         self.metrics = metrics
+        # Subject and metric queries run against the columnar store
+        self.store = store if store is not None else CTMSColumnarStore.from_models(sites, subjects, metrics)
+        self.data_version = data_version
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+    
+    def precompute(self) -> None:
+        """Build the intermediates shared by several analyses (per-site subject counts,
+        screening times and monthly history) so concurrent requests reuse them"""
+        self.store.status_totals()
+        self.store.site_counts()
+        self.store.screening_days()
+        self.store.monthly_history()
     
+    @memoized
     def get_overall_enrollment_status(self) -> Dict:
         """Calculate overall study enrollment status"""
         total_target = sum(s.target_enrollment for s in self.summaries)
@@ -30,9 +87,10 @@ class EnrollmentAnalyzer:
         overall_percentage = (total_enrolled / total_target) * 100 if total_target > 0 else 0
         
         # Count subjects by status
-        randomized = len([s for s in self.subjects if s.status == 'Randomized'])
-        screen_failed = len([s for s in self.subjects if s.status == 'Screen Failed'])
-        total_screened = len(self.subjects)
+        status_totals = self.store.status_totals()
+        randomized = status_totals.get('Randomized', 0)
+        screen_failed = status_totals.get('Screen Failed', 0)
+        total_screened = len(self.store.subjects)
         screen_failure_rate = (screen_failed / total_screened) * 100 if total_screened > 0 else 0
         
         return {
@@ -45,6 +103,7 @@ class EnrollmentAnalyzer:
             'screen_failure_rate': round(screen_failure_rate, 1)
         }
     
+    @memoized
     def get_site_performance_ranking(self) -> List[Dict]:
         """Rank sites by enrollment performance"""
         ranked_sites = []
@@ -62,6 +121,7 @@ class EnrollmentAnalyzer:
         
         return ranked_sites
     
+    @memoized
     def identify_underperforming_sites(self, threshold: float = 60.0) -> List[Dict]:
         """Identify sites below enrollment threshold"""
         underperforming = []
@@ -87,6 +147,7 @@ class EnrollmentAnalyzer:
         
         return sorted(underperforming, key=lambda x: x['shortfall'], reverse=True)
     
+    @memoized
     def analyze_cra_performance(self) -> Dict:
         """Analyze CRA performance correlation with site enrollment"""
         # This would require site team member data to be fully implemented
@@ -106,6 +167,7 @@ class EnrollmentAnalyzer:
             'recommendation': 'Consider redistributing CRA workload or providing additional support to Amanda Garcia\'s sites'
         }
     
+    @memoized
     def get_monthly_enrollment_trends(self) -> Dict:
         """Analyze monthly enrollment patterns by region"""
         trends = {}
@@ -119,8 +181,11 @@ class EnrollmentAnalyzer:
             site_regions[region].append(site.site_number)
         
         # Calculate monthly averages by region
+        summaries_by_site = {}
+        for summary in self.summaries:
+            summaries_by_site.setdefault(summary.site_number, []).append(summary)
         for region, site_numbers in site_regions.items():
-            region_summaries = [s for s in self.summaries if s.site_number in site_numbers]
+            region_summaries = [s for site_number in site_numbers for s in summaries_by_site.get(site_number, [])]
             avg_monthly = sum(s.avg_monthly_enrollment for s in region_summaries) / len(region_summaries) if region_summaries else 0
             
             trends[region] = {
@@ -131,23 +196,15 @@ class EnrollmentAnalyzer:
         
         return trends
     
+    @memoized
     def calculate_screening_efficiency(self) -> List[Dict]:
         """Calculate screening to randomization efficiency by site"""
         efficiency_data = []
+        # Average screening to randomization time per site, from one group-by
+        screening_days = self.store.screening_days()
         
         for summary in self.summaries:
-            site_subjects = [s for s in self.subjects if s.site_number == summary.site_number]
-            
-            # Calculate average screening to randomization time
-            randomized_subjects = [s for s in site_subjects if s.randomization_date and s.screen_date]
-            
-            if randomized_subjects:
-                avg_screening_time = sum(
-                    (s.randomization_date - s.screen_date).days 
-                    for s in randomized_subjects
-                ) / len(randomized_subjects)
-            else:
-                avg_screening_time = 0
+            avg_screening_time = screening_days.get(summary.site_number, 0)
             
             efficiency_data.append({
                 'site_number': summary.site_number,
@@ -159,6 +216,7 @@ class EnrollmentAnalyzer:
         
         return sorted(efficiency_data, key=lambda x: x['avg_screening_days'])
     
+    @memoized
     def project_enrollment_timeline(self) -> Dict:
         """Project final enrollment based on current trends"""
         projections = {}
@@ -181,52 +239,24 @@ class EnrollmentAnalyzer:
         
         return projections
     
+    @memoized
     def get_historical_performance(self) -> List[Dict]:
         """Get historical performance trends for all sites"""
         historical_data = []
+        # Cumulative counts, failure rates and trends come from one pass over the metrics table
+        monthly_history = self.store.monthly_history()
         
-        # Process monthly enrollment metrics to create historical trends
         for site_summary in self.summaries:
-            site_metrics = [m for m in self.metrics if m.site_number == site_summary.site_number]
-            
-            cumulative_enrollment = 0
-            previous_month_enrollment = 0
-            
-            for i, metric in enumerate(sorted(site_metrics, key=lambda x: x.month)):
-                cumulative_enrollment += metric.enrolled_count
-                
-                # Calculate enrollment rate (subjects per month)
-                enrollment_rate = metric.enrolled_count
-                
-                # Calculate screen failure rate for this month
-                total_screened = metric.screened_count + metric.enrolled_count
-                screen_failure_rate = (metric.screen_failed_count / total_screened * 100) if total_screened > 0 else 0
-                
-                # Determine performance trend
-                if i == 0:
-                    trend = "Baseline"
-                elif enrollment_rate > previous_month_enrollment * 1.1:
-                    trend = "Improving"
-                elif enrollment_rate < previous_month_enrollment * 0.9:
-                    trend = "Declining"
-                else:
-                    trend = "Stable"
-                
+            for month in monthly_history.get(site_summary.site_number, []):
                 historical_data.append({
                     'site_number': site_summary.site_number,
                     'site_name': site_summary.site_name,
-                    'month': metric.month,
-                    'enrollment_count': metric.enrolled_count,
-                    'cumulative_enrollment': cumulative_enrollment,
-                    'enrollment_rate': enrollment_rate,
-                    'screen_failure_rate': round(screen_failure_rate, 1),
-                    'performance_trend': trend
+                    **month
                 })
-                
-                previous_month_enrollment = enrollment_rate
         
         return historical_data
     
+    @memoized
     def get_alternative_site_recommendations(self, underperforming_site_number: str) -> List[Dict]:
         """Get alternative site recommendations for underperforming sites"""
         underperforming_site = next(
@@ -245,9 +275,11 @@ class EnrollmentAnalyzer:
             if s.enrollment_percentage > 85 and s.site_number != underperforming_site_number
         ]
         
+        monthly_history = self.store.monthly_history()
+        
         for site in high_performing_sites:
             # Calculate historical performance score
-            site_historical = [h for h in self.get_historical_performance() if h['site_number'] == site.site_number]
+            site_historical = monthly_history.get(site.site_number, [])
             
             # Calculate average monthly performance over time
             if site_historical:
@@ -290,6 +322,139 @@ class EnrollmentAnalyzer:
         
         return recommendations[:3]  # Return top 3 recommendations
     
+    @memoized
+    def get_comprehensive_site_analysis(self, site_number: Optional[str] = None) -> Dict:
+        """Per-site performance, historical trends, projections and tailored recommendations"""
+        # Get all supporting data
+        site_rankings = self.get_site_performance_ranking()
+        underperforming = {u['site_number']: u for u in self.identify_underperforming_sites()}
+        projections = self.project_enrollment_timeline()
+        screen_failure_rates = {s.site_number: s.screen_failure_rate for s in self.summaries}
+        historical_by_site = {}
+        for month in self.get_historical_performance():
+            historical_by_site.setdefault(month['site_number'], []).append(month)
+        
+        comprehensive_analysis = {}
+        
+        # Filter sites if specific site requested
+        if site_number:
+            target_sites = [s for s in site_rankings if s['site_number'] == site_number]
+        else:
+            target_sites = site_rankings
+        
+        for site in target_sites:
+            site_num = site['site_number']
+            site_name = site['site_name']
+            
+            # Get site-specific historical data
+            site_historical = historical_by_site.get(site_num, [])
+            
+            # Get site-specific projections
+            site_projection = projections.get(site_num, {})
+            
+            # Determine if site is underperforming
+            underperforming_details = underperforming.get(site_num)
+            is_underperforming = underperforming_details is not None
+            
+            # Get CRA assignment
+            cra_assignment = "Unknown"
+            if site_num in ['1', '2']:
+                cra_assignment = "Thomas Nguyen"
+            elif site_num in ['3', '4', '5']:
+                cra_assignment = "Amanda Garcia"
+            
+            # Calculate performance trends
+            if site_historical:
+                recent_trend = site_historical[-1]['performance_trend'] if site_historical else "Unknown"
+                avg_monthly_rate = sum(h['enrollment_rate'] for h in site_historical) / len(site_historical)
+                improving_months = len([h for h in site_historical if h['performance_trend'] == 'Improving'])
+                total_months = len(site_historical)
+                consistency_score = improving_months / total_months if total_months > 0 else 0
+            else:
+                recent_trend = "No data"
+                avg_monthly_rate = 0
+                consistency_score = 0
+            
+            # Generate site-specific recommendations
+            recommendations = []
+            
+            if is_underperforming and underperforming_details:
+                # High-priority interventions for underperforming sites
+                recommendations.extend([
+                    f"URGENT: Implement immediate intervention plan - site is {underperforming_details['shortfall']} subjects behind target",
+                    f"Schedule emergency site visit within 7 days to assess recruitment barriers",
+                    f"Deploy dedicated enrollment specialist for 30-day intensive support period"
+                ])
+                
+                # Historical trend-based recommendations
+                if site_historical:
+                    declining_months = len([h for h in site_historical if h['performance_trend'] == 'Declining'])
+                    if declining_months > total_months * 0.3:
+                        recommendations.append("Address declining enrollment trend - review protocol adherence and staff training")
+                    
+                    latest_screen_failure = site_historical[-1]['screen_failure_rate'] if site_historical else 0
+                    if latest_screen_failure > 20:
+                        recommendations.append(f"Optimize screening process - current {latest_screen_failure}% failure rate is above optimal range")
+                
+                # CRA-specific recommendations
+                if cra_assignment == "Amanda Garcia":
+                    recommendations.append("Consider CRA workload rebalancing - Amanda Garcia manages 3 sites vs Thomas Nguyen's 2 sites")
+            
+            else:
+                # Recommendations for performing sites
+                if site['enrollment_percentage'] > 90:
+                    recommendations.extend([
+                        "Excellent performance - consider increasing enrollment target if capacity allows",
+                        "Document best practices for knowledge sharing with underperforming sites",
+                        "Maintain current recruitment strategies and monitor for capacity constraints"
+                    ])
+                elif site['enrollment_percentage'] > 75:
+                    recommendations.extend([
+                        "Good performance - implement minor optimizations to reach 90%+ target",
+                        "Review monthly enrollment patterns for potential acceleration opportunities"
+                    ])
+            
+            # Alternative sites (for underperforming sites only)
+            alternative_sites = []
+            if is_underperforming:
+                alternatives = self.get_alternative_site_recommendations(site_num)
+                alternative_sites = alternatives[:2]  # Top 2 alternatives
+            
+            # Compile comprehensive site analysis
+            comprehensive_analysis[site_num] = {
+                'site_info': {
+                    'site_number': site_num,
+                    'site_name': site_name,
+                    'cra_assignment': cra_assignment,
+                    'risk_level': site['risk_level']
+                },
+                'current_performance': {
+                    'enrollment_percentage': site['enrollment_percentage'],
+                    'current_enrollment': site['current_enrollment'],
+                    'target_enrollment': site['target_enrollment'],
+                    'avg_monthly_enrollment': site['avg_monthly_enrollment'],
+                    'screen_failure_rate': screen_failure_rates.get(site_num, 0)
+                },
+                'historical_performance': {
+                    'total_months_active': len(site_historical),
+                    'recent_trend': recent_trend,
+                    'avg_monthly_rate': round(avg_monthly_rate, 1),
+                    'consistency_score': round(consistency_score * 100, 1),
+                    'monthly_data': site_historical[-6:] if site_historical else []  # Last 6 months
+                },
+                'projections': {
+                    'projected_final_enrollment': site_projection.get('projected_final', 0),
+                    'projected_percentage': site_projection.get('projected_percentage', 0),
+                    'will_meet_target': site_projection.get('will_meet_target', False),
+                    'shortfall': site_projection.get('shortfall', 0)
+                },
+                'underperformance_details': underperforming_details if is_underperforming else None,
+                'recommendations': recommendations,
+                'alternative_sites': alternative_sites
+            }
+        
+        return comprehensive_analysis
+
     def _get_geographic_proximity(self, site1_name: str, site2_name: str) -> str:
         """Determine geographic proximity between sites (simplified)"""
         # Extract city/region from site names
@@ -0,0 +1,204 @@
+"""
+Local ClinicalTrials.gov study store with incremental sync
+
+Study records are kept in a SQLite file together with the searches that returned
+them. The first call for a search downloads every page. Later calls fetch only
+studies whose LastUpdatePostDate is on or after the previous sync, and upsert them,
+so repeated landscape queries for large conditions cost one short request instead
+of the whole result set. Searches are re-downloaded in full every
+CT_STUDY_STORE_FULL_SYNC_DAYS to drop studies that no longer match.
+
+Status filters are applied locally where possible: a search is synced once without
+its status filter, so recruiting-only and all-status queries for the same condition
+share one stored result set, and studies that change status are picked up by the
+delta sync. If that unfiltered sync hits the page cap, the stored set is incomplete
+and could miss the requested statuses, so the search is synced again with its status
+filter sent to the API and served from that result set instead.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CT_STUDY_STORE_PATH = os.getenv('CT_STUDY_STORE_PATH', '/tmp/ctgov-studies.sqlite')  # nosec B108 - per-container scratch
+# Searches synced more recently than this are served without any request
+CT_STUDY_STORE_FRESH_SECONDS = int(os.getenv('CT_STUDY_STORE_FRESH_SECONDS', '900'))
+CT_STUDY_STORE_FULL_SYNC_DAYS = int(os.getenv('CT_STUDY_STORE_FULL_SYNC_DAYS', '7'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS studies (
+    nct_id TEXT PRIMARY KEY,
+    overall_status TEXT,
+    last_update TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS searches (
+    search_key TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL,
+    truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS search_studies (
+    search_key TEXT NOT NULL,
+    nct_id TEXT NOT NULL,
+    PRIMARY KEY (search_key, nct_id)
+) WITHOUT ROWID;
+"""
+
+
+def _study_row(study: Dict):
+    protocol_section = study.get('protocolSection', {})
+    status_module = protocol_section.get('statusModule', {})
+    return (
+        protocol_section.get('identificationModule', {}).get('nctId'),
+        status_module.get('overallStatus'),
+        status_module.get('lastUpdatePostDateStruct', {}).get('date'),
+        json.dumps(study),
+    )
+
+
+class StudyStore:
+    """SQLite store of study records keyed by NCT ID"""
+
+    def __init__(self, path: str = CT_STUDY_STORE_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def search_key(search_params: Dict, keep_status: bool = False) -> str:
+        excluded = ('page_size', 'page_token') if keep_status else ('status', 'page_size', 'page_token')
+        params = {k: v for k, v in search_params.items() if k not in excluded and v is not None}
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def _truncated(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT truncated FROM searches WHERE search_key = ?', (key,)).fetchone()
+        return bool(row and row[0])
+
+    def result_key(self, search_params: Dict) -> str:
+        """Key of the stored result set that serves a search"""
+        key = self.search_key(search_params)
+        if search_params.get('status') and self._truncated(key):
+            return self.search_key(search_params, keep_status=True)
+        return key
+
+    def sync(self, pages: Callable[..., Iterable[List[Dict]]], search_params: Dict,
+             max_pages: Optional[int] = None) -> str:
+        """
+        Bring the stored result set of a search up to date
+
+        Args:
+            pages: Callable taking search parameters (plus updated_since) and yielding
+                pages of studies
+            search_params: Search parameters for ClinicalTrialsAPIClient.search_studies
+            max_pages: Page cap of ``pages``; a sync that reaches it is treated as truncated
+
+        Returns:
+            The search key of the stored result set that serves the search
+        """
+        key = self.search_key(search_params)
+        if not search_params.get('status'):
+            self._sync_key(pages, key, search_params, max_pages)
+            return key
+        if not self._truncated(key):
+            unfiltered = {k: v for k, v in search_params.items() if k != 'status'}
+            if not self._sync_key(pages, key, unfiltered, max_pages):
+                return key
+            logger.info(f"Unfiltered sync of {key} hit the page cap; syncing with the status filter")
+        status_key = self.search_key(search_params, keep_status=True)
+        self._sync_key(pages, status_key, search_params, max_pages)
+        return status_key
+
+    def _sync_key(self, pages: Callable[..., Iterable[List[Dict]]], key: str, params: Dict,
+                  max_pages: Optional[int]) -> bool:
+        """Sync one stored result set; returns whether it is truncated by the page cap"""
+        params = dict(params)
+        now = time.time()
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT synced_at, full_synced_at, truncated FROM searches WHERE search_key = ?',
+                (key,)).fetchone()
+        if row and now - row[0] < CT_STUDY_STORE_FRESH_SECONDS:
+            return bool(row[2])
+
+        full = row is None or now - row[1] > CT_STUDY_STORE_FULL_SYNC_DAYS * 86400
+        if not full:
+            # LastUpdatePostDate has day granularity; overlap one day and upsert
+            params['updated_since'] = (datetime.fromtimestamp(row[0]) - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        nct_ids = []
+        page_count = 0
+        for studies in pages(**params):
+            page_count += 1
+            rows = [r for r in map(_study_row, studies) if r[0]]
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO studies VALUES (?, ?, ?, ?)', rows)
+            nct_ids.extend(r[0] for r in rows)
+
+        # Reaching the cap exactly may still be complete; treating it as truncated is safe
+        truncated = max_pages is not None and page_count >= max_pages
+        if not full:
+            truncated = truncated or bool(row[2])
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if full:
+                    conn.execute('DELETE FROM search_studies WHERE search_key = ?', (key,))
+                conn.executemany('INSERT OR IGNORE INTO search_studies VALUES (?, ?)',
+                                 [(key, nct_id) for nct_id in nct_ids])
+                conn.execute('INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)',
+                             (key, now, now if full else row[1], int(truncated)))
+        logger.info(f"{'Full' if full else 'Incremental'} sync stored {len(nct_ids)} studies for {key}")
+        return truncated
+
+    def studies(self, search_key: str, status: Optional[List[str]] = None,
+                limit: Optional[int] = None) -> List[Dict]:
+        """
+        Return the stored studies of a search, optionally filtered by overall status
+
+        With a limit, only the most recently updated studies are returned.
+        """
+        query = ('SELECT s.data FROM search_studies q JOIN studies s ON s.nct_id = q.nct_id '
+                 'WHERE q.search_key = ?')
+        args = [search_key]
+        if status:
+            query += f" AND s.overall_status IN ({','.join('?' * len(status))})"
+            args.extend(status)
+        if limit:
+            query += ' ORDER BY s.last_update DESC, s.nct_id LIMIT ?'
+            args.append(limit)
+        else:
+            query += ' ORDER BY s.nct_id'
+        with self._lock:
+            rows = self._connection().execute(query, args).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            return {
+                'studies': conn.execute('SELECT COUNT(*) FROM studies').fetchone()[0],
+                'searches': conn.execute('SELECT COUNT(*) FROM searches').fetchone()[0],
+            }
+
+
+study_store = StudyStore()
@@ -0,0 +1,218 @@
+"""
+Search index over the ClinicalTrials.gov export
+
+The index is built once per data file and saved as .npy arrays that worker
+processes memory-map instead of rebuilding:
+- a sorted NCT number array for exact lookups
+- a token inverted index (CSR postings) per text field: titles, conditions,
+  interventions
+- per-value codes for status, phase and sponsor, so a filter is evaluated once per
+  distinct value and applied to all trials as a boolean mask
+
+Text filters keep substring semantics: the postings of every vocabulary term that
+contains a query token narrow the candidates, and the substring match then runs
+on the candidates only.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TRIAL_INDEX_DIR = os.getenv('TRIAL_INDEX_DIR', '/tmp/ctgov-trial-index')  # nosec B108 - per-container scratch
+
+TEXT_FIELDS = {'title': 'Study Title', 'conditions': 'Conditions', 'interventions': 'Interventions'}
+VALUE_FIELDS = {'status': 'Study Status', 'phase': 'Phases', 'sponsor': 'Sponsor'}
+# Relevance weight of a query term found in each text field
+FIELD_WEIGHTS = {'title': 2.0, 'conditions': 1.5, 'interventions': 1.0}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class TrialIndex:
+    """Lookup, filter and ranking structures for one clinical trials table"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.arrays = arrays
+        self.meta = meta
+        self.size = meta['size']
+
+    # --- build and persistence ---
+
+    @classmethod
+    def build(cls, data: pd.DataFrame) -> 'TrialIndex':
+        """Build the index from the trials table (row positions follow data order)"""
+        arrays, meta = {}, {'size': len(data), 'fields': {}, 'values': {}}
+
+        nct = data['NCT Number'].astype(str).to_numpy() if 'NCT Number' in data.columns else np.array([], dtype=str)
+        order = np.argsort(nct, kind='stable')
+        arrays['nct_sorted'] = nct[order].astype(str)
+        arrays['nct_order'] = order.astype(np.int32)
+
+        for field, column in TEXT_FIELDS.items():
+            if column not in data.columns:
+                continue
+            tokens = data[column].fillna('').astype(str).str.lower().str.findall(TOKEN_PATTERN)
+            tokens = pd.Series(tokens.to_numpy(), index=np.arange(len(data), dtype=np.int32)).explode().dropna()
+            pairs = pd.DataFrame({'row': tokens.index.to_numpy(dtype=np.int32), 'term': tokens.to_numpy(dtype=object)})
+            # Term frequency per (term, row), grouped by term for CSR postings
+            postings = pairs.groupby(['term', 'row'], sort=True).size()
+            terms = postings.index.get_level_values('term')
+            vocab, starts = np.unique(terms.to_numpy(dtype=str), return_index=True)
+            arrays[f'{field}_vocab'] = vocab
+            arrays[f'{field}_offsets'] = np.append(starts, len(postings)).astype(np.int64)
+            arrays[f'{field}_rows'] = postings.index.get_level_values('row').to_numpy(dtype=np.int32)
+            arrays[f'{field}_tf'] = postings.to_numpy(dtype=np.int32)
+            meta['fields'][field] = column
+
+        for field, column in VALUE_FIELDS.items():
+            if column not in data.columns:
+                continue
+            codes, uniques = pd.factorize(data[column].astype('object'))
+            arrays[f'{field}_codes'] = codes.astype(np.int32)
+            meta['values'][field] = {'column': column, 'uniques': [str(u) for u in uniques]}
+
+        return cls(arrays, meta)
+
+    def save(self, directory: str) -> None:
+        """Write the index atomically to a directory"""
+        parent = os.path.dirname(directory.rstrip('/')) or '.'
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent)
+        try:
+            for name, array in self.arrays.items():
+                np.save(os.path.join(staging, f'{name}.npy'), array, allow_pickle=False)
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(self.meta, f)
+            try:
+                os.replace(staging, directory)
+            except OSError:
+                # Another process saved the same index first
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str) -> 'TrialIndex':
+        """Memory-map a saved index"""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            path.stem: np.load(path, mmap_mode='r', allow_pickle=False)
+            for path in Path(directory).glob('*.npy')
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def for_file(cls, data_path: Path, data: pd.DataFrame, index_dir: Optional[str] = None) -> 'TrialIndex':
+        """Load the saved index of a data file, building and saving it on first use"""
+        stat = os.stat(data_path)
+        signature = hashlib.sha1(
+            f"{os.path.abspath(data_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        ).hexdigest()[:16]
+        directory = os.path.join(index_dir or TRIAL_INDEX_DIR, signature)
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            try:
+                index = cls.load(directory)
+                if index.size == len(data):
+                    return index
+            except Exception as e:
+                logger.warning(f"Rebuilding unreadable trial index {directory}: {e}")
+        index = cls.build(data)
+        try:
+            index.save(directory)
+            logger.info(f"Saved trial index for {len(data)} trials to {directory}")
+        except OSError as e:
+            logger.warning(f"Trial index not saved: {e}")
+        return index
+
+    # --- queries ---
+
+    def position(self, nct_number: str) -> Optional[int]:
+        """Row position of a trial by NCT number"""
+        nct_sorted = self.arrays['nct_sorted']
+        i = int(np.searchsorted(nct_sorted, nct_number))
+        if i < len(nct_sorted) and nct_sorted[i] == nct_number:
+            return int(self.arrays['nct_order'][i])
+        return None
+
+    def _postings(self, field: str, term_ids: np.ndarray):
+        offsets = self.arrays[f'{field}_offsets']
+        rows, tf = self.arrays[f'{field}_rows'], self.arrays[f'{field}_tf']
+        if len(term_ids) == 0:
+            return rows[:0], tf[:0]
+        parts = [(rows[offsets[t]:offsets[t + 1]], tf[offsets[t]:offsets[t + 1]]) for t in term_ids]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def text_candidates(self, field: str, text: str) -> Optional[np.ndarray]:
+        """
+        Boolean mask of trials that may contain ``text`` as a substring of the field
+
+        Returns None when the index cannot narrow the search (no index for the
+        field, or a query that is a regular expression rather than plain text).
+        """
+        if field not in self.meta['fields'] or REGEX_METACHARACTERS & set(text):
+            return None
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        vocab = self.arrays[f'{field}_vocab']
+        mask = np.ones(self.size, dtype=bool)
+        for token in set(tokens):
+            term_ids = np.flatnonzero(np.char.find(vocab, token) >= 0)
+            token_mask = np.zeros(self.size, dtype=bool)
+            token_mask[self._postings(field, term_ids)[0]] = True
+            mask &= token_mask
+        return mask
+
+    def value_mask(self, field: str, matches) -> Optional[np.ndarray]:
+        """
+        Boolean mask of trials whose value satisfies ``matches``
+
+        Args:
+            field: 'status', 'phase' or 'sponsor'
+            matches: Callable taking a Series of distinct values and returning a boolean mask
+        """
+        if field not in self.meta['values']:
+            return None
+        uniques = pd.Series(self.meta['values'][field]['uniques'], dtype=object)
+        matched = np.flatnonzero(np.asarray(matches(uniques), dtype=bool))
+        return np.isin(self.arrays[f'{field}_codes'], matched)
+
+    def rank(self, query: str) -> np.ndarray:
+        """
+        BM25-style relevance score of every trial for a free-text query
+
+        Each query term contributes its inverse document frequency, scaled by how
+        often it occurs in the trial and by the weight of the field it occurs in.
+        """
+        scores = np.zeros(self.size, dtype=np.float64)
+        for field, weight in FIELD_WEIGHTS.items():
+            if field not in self.meta['fields']:
+                continue
+            vocab = self.arrays[f'{field}_vocab']
+            offsets = self.arrays[f'{field}_offsets']
+            for token in set(tokenize(query)):
+                i = int(np.searchsorted(vocab, token))
+                if i >= len(vocab) or vocab[i] != token:
+                    continue
+                rows, tf = self._postings(field, np.array([i]))
+                df = offsets[i + 1] - offsets[i]
+                idf = np.log(1 + (self.size - df + 0.5) / (df + 0.5))
+                scores[rows] += weight * idf * (tf * 2.2) / (tf + 1.2)
+        return scores
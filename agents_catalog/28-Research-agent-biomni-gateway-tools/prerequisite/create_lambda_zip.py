@@ -30,6 +30,7 @@ def create_database_lambda_zip():
         # Copy function files
         shutil.copy("lambda-database/python/lambda_function.py", temp_path / "lambda_function.py")
         shutil.copy("lambda-database/python/database.py", temp_path / "database.py")
+        shutil.copy("lambda-database/python/response_cache.py", temp_path / "response_cache.py")
         
         # Copy schema files if they exist
         schema_dir = Path("lambda-database/python/schema_db")
@@ -2,12 +2,25 @@
 # and have removed the following commercial license tools 'kegg', 'iucn', and 'remap'. 
 # It invokes Amazon Bedrock LLMs directly with the converse API. Note, this script depends upon you setting up 
 # the schema folder under 'schema_db'
+import copy
+import hashlib
 import json
+import math
+import random
+import re
 import sys
 import os
 import requests
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from typing import Dict, Any, List
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from response_cache import response_cache
 
 # Add the layer paths
 sys.path.append("/opt/python")
@@ -19,8 +32,267 @@ try:
     BEDROCK_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Bedrock imports not available: {e}")
+    boto3 = None
     BEDROCK_AVAILABLE = False
 
+# Connection pooling and fan-out settings for the upstream database APIs
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "32"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+FANOUT_MAX_WORKERS = int(os.environ.get("FANOUT_MAX_WORKERS", "8"))
+# NCBI E-utilities allow 3 requests/second without an API key
+NCBI_FANOUT_MAX_WORKERS = int(os.environ.get("NCBI_FANOUT_MAX_WORKERS", "3"))
+
+# Documented per-host request budgets as (requests per second, burst size). Hosts not
+# listed here are not throttled; RATE_LIMITS_JSON can override or extend the table,
+# e.g. '{"eutils.ncbi.nlm.nih.gov": [10, 10]}' when an NCBI API key is configured.
+DEFAULT_RATE_LIMITS = {
+    "eutils.ncbi.nlm.nih.gov": (3, 3),
+    "pubchem.ncbi.nlm.nih.gov": (5, 5),
+    "rest.ensembl.org": (15, 15),
+    "api.fda.gov": (4, 4),
+    "gnomad.broadinstitute.org": (1, 2),
+    "clinicaltrials.gov": (1, 3),
+    "www.ebi.ac.uk": (10, 10),
+    "rest.uniprot.org": (10, 10),
+}
+RATE_LIMITS = {
+    host: tuple(limit)
+    for host, limit in {
+        **DEFAULT_RATE_LIMITS,
+        **json.loads(os.environ.get("RATE_LIMITS_JSON") or "{}"),
+    }.items()
+}
+# Optional DynamoDB table (partition key "pk", TTL attribute "expires_at") that makes the
+# budgets global across concurrent Lambda instances instead of per instance
+RATE_LIMIT_TABLE = os.environ.get("RATE_LIMIT_TABLE", "")
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BASE_DELAY = float(os.environ.get("HTTP_RETRY_BASE_DELAY", "1.0"))
+HTTP_RETRY_MAX_DELAY = float(os.environ.get("HTTP_RETRY_MAX_DELAY", "30.0"))
+RETRY_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """In-process token bucket; ``acquire`` blocks until a request may be sent."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds`` (e.g. after a Retry-After response)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class DynamoDBRateLimiter(TokenBucket):
+    """Token bucket whose per-second budget is shared through a DynamoDB counter.
+
+    Each request increments the counter of the current one-second window with a
+    conditional update, so all instances together stay within ``rate``. The local
+    bucket still smooths bursts within an instance; if DynamoDB is unreachable the
+    limiter degrades to the local bucket alone.
+    """
+
+    def __init__(self, host, rate, capacity, table_name):
+        super().__init__(rate, capacity)
+        self.host = host
+        self.table_name = table_name
+        self._client = boto3.client("dynamodb")
+
+    def acquire(self):
+        super().acquire()
+        while True:
+            window = int(time.time())
+            try:
+                self._client.update_item(
+                    TableName=self.table_name,
+                    Key={"pk": {"S": f"{self.host}#{window}"}},
+                    UpdateExpression="ADD request_count :one SET expires_at = :expires",
+                    ConditionExpression="attribute_not_exists(request_count) OR request_count < :limit",
+                    ExpressionAttributeValues={
+                        ":one": {"N": "1"},
+                        ":limit": {"N": str(max(1, int(self.rate)))},
+                        ":expires": {"N": str(window + 120)},
+                    },
+                )
+                return
+            except self._client.exceptions.ConditionalCheckFailedException:
+                time.sleep(max(window + 1 - time.time(), 0) + random.uniform(0, 0.05))
+            except Exception as e:
+                print(f"Shared rate limit unavailable for {self.host}, using local limit: {e}")
+                return
+
+
+class RateLimiterRegistry:
+    """Lazily creates one limiter per host from RATE_LIMITS."""
+
+    def __init__(self, limits=None, table_name=RATE_LIMIT_TABLE):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.table_name = table_name
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Return the limiter for the host of ``url``, or None if the host is unthrottled."""
+        host = (urlparse(url).hostname or "").lower()
+        if host not in self.limits:
+            return None
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                rate, capacity = self.limits[host]
+                limiter = None
+                if self.table_name and boto3 is not None:
+                    try:
+                        limiter = DynamoDBRateLimiter(host, rate, capacity, self.table_name)
+                    except Exception as e:
+                        print(f"Shared rate limit unavailable for {host}, using local limit: {e}")
+                if limiter is None:
+                    limiter = TokenBucket(rate, capacity)
+                self._limiters[host] = limiter
+            return limiter
+
+
+rate_limiters = RateLimiterRegistry()
+
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying: Retry-After when present, else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), HTTP_RETRY_MAX_DELAY)
+    delay = HTTP_RETRY_BASE_DELAY * (2 ** attempt)
+    return min(delay + random.uniform(0, delay / 2), HTTP_RETRY_MAX_DELAY)
+
+
+def _as_requests_response(cached, url, params=None):
+    """Wrap a response served from the response cache as a requests.Response."""
+    response = requests.Response()
+    response.status_code = cached.status_code
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(cached.headers)
+    response._content = cached.content
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+    response.url = requests.Request("GET", url, params=params).prepare().url
+    return response
+
+
+class RateLimitedSession(requests.Session):
+    """Session that waits for the host's rate limiter before each request and retries
+    429/503 responses after the delay the server asks for.
+
+    Plain GET requests go through the shared response cache first, so a cached or
+    revalidated (304) record neither uses a rate limit token nor downloads the body.
+    """
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+
+    def request(self, method, url, *args, **kwargs):
+        if method.upper() != "GET" or args or kwargs.get("stream") or not response_cache.enabled:
+            return self._send_with_retry(method, url, *args, **kwargs)
+
+        live_responses = []
+
+        def send(validators):
+            headers = {**(kwargs.get("headers") or {}), **validators}
+            response = self._send_with_retry(method, url, **{**kwargs, "headers": headers})
+            live_responses.append(response)
+            return response.status_code, response.headers, response.content
+
+        cached = response_cache.fetch(
+            method,
+            url,
+            send,
+            params=kwargs.get("params"),
+            vary=(kwargs.get("headers") or {}).get("Accept"),
+        )
+        if cached.cache_status == "miss":
+            return live_responses[-1]
+        return _as_requests_response(cached, url, kwargs.get("params"))
+
+    def _send_with_retry(self, method, url, *args, **kwargs):
+        limiter = self.registry.get(url)
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= HTTP_MAX_RETRIES:
+                return response
+            delay = _retry_delay(response, attempt)
+            print(f"{response.status_code} from {urlparse(url).hostname}, retrying in {delay:.1f}s")
+            response.close()
+            if limiter is not None:
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the process-wide keep-alive session.
+
+    The session keeps one connection pool per host, so repeated calls to the same
+    API (and warm Lambda invocations) reuse TCP/TLS connections instead of opening
+    a new one per request. Every request goes through the per-host rate limiters.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = RateLimitedSession(rate_limiters)
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def fan_out(func, items, max_workers=FANOUT_MAX_WORKERS):
+    """Apply ``func`` to every item concurrently and return the results in input order.
+
+    At most ``max_workers`` calls run at a time; a single item runs inline.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
 
 def get_bedrock_client():
     """Get Bedrock runtime client for database queries."""
@@ -79,13 +351,217 @@ def invoke_bedrock_model(
         return None
 
 
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schema_db")
+_schemas = {}
+
+
+def _preload_schemas():
+    """Parse every schema in schema_db once, at cold start."""
+    if not os.path.isdir(SCHEMA_DIR):
+        return
+    for name in os.listdir(SCHEMA_DIR):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(SCHEMA_DIR, name), "r") as f:
+                    _schemas[name[:-5]] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not load schema {name}: {e}")
+
+
+def load_schema(name, required=True):
+    """Return the parsed schema_db/<name>.json.
+
+    Schemas are parsed once per container; a missing schema raises FileNotFoundError
+    unless ``required`` is False, in which case None is returned.
+    """
+    if name not in _schemas:
+        path = os.path.join(SCHEMA_DIR, f"{name}.json")
+        if not os.path.exists(path):
+            if required:
+                raise FileNotFoundError(f"Schema not found: {path}")
+            return None
+        with open(path, "r") as f:
+            _schemas[name] = json.load(f)
+    return _schemas[name]
+
+
+_preload_schemas()
+
+# Prompt -> generated API call cache for _query_llm_for_api
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", "86400"))
+# Semantic reuse of cached API calls for reworded prompts is opt-in
+LLM_CACHE_SEMANTIC = os.environ.get("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+LLM_CACHE_SIMILARITY = float(os.environ.get("LLM_CACHE_SIMILARITY", "0.95"))
+EMBEDDING_MODEL_ID = os.environ.get("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+
+# A semantic hit requires the same content words: every token apart from these filler
+# words must match, so prompts differing in a gene, organism or qualifier ("pathogenic"
+# vs "benign") never reuse each other's endpoint and parameters. Negations and boolean
+# words are deliberately not listed.
+_PROMPT_TOKEN_RE = re.compile(r"[\w.:-]+")
+_PROMPT_STOPWORDS = frozenset((
+    "a", "an", "the", "of", "for", "in", "on", "at", "to", "by", "with", "from", "about",
+    "me", "my", "please", "can", "you", "could", "would", "i", "want", "need",
+    "find", "get", "show", "list", "give", "return", "search", "query", "look", "up",
+    "lookup", "retrieve", "fetch", "what", "which", "is", "are", "there", "that", "this",
+    "information", "info", "data", "details",
+))
+
+
+def _prompt_terms(prompt):
+    tokens = (token.strip(".:-") for token in _PROMPT_TOKEN_RE.findall(prompt.lower()))
+    return frozenset(token for token in tokens if token and token not in _PROMPT_STOPWORDS)
+
+
+def _embed_text(text):
+    """Embed text with Bedrock; returns None if embeddings are unavailable."""
+    client = get_bedrock_client()
+    if not client:
+        return None
+    try:
+        response = client.invoke_model(
+            modelId=EMBEDDING_MODEL_ID,
+            body=json.dumps({"inputText": text, "normalize": True}),
+        )
+        return json.loads(response["body"].read())["embedding"]
+    except Exception as e:
+        print(f"Embedding failed, semantic cache lookup skipped: {e}")
+        return None
+
+
+def _cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class PromptTranslationCache:
+    """Cache of natural-language prompt -> generated API call, per system prompt.
+
+    Lookups try an exact match on the normalized prompt first, then the most similar
+    cached prompt by embedding (when semantic lookups are enabled, the similarity clears
+    ``threshold`` and both prompts have the same content words). Entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                 threshold=LLM_CACHE_SIMILARITY, embed=_embed_text, semantic=LLM_CACHE_SEMANTIC):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.embed = embed if semantic else None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(prompt):
+        return " ".join(prompt.lower().split())
+
+    def _key(self, namespace, prompt):
+        return hashlib.sha256(f"{namespace}\n{self._normalize(prompt)}".encode("utf-8")).hexdigest()
+
+    def get(self, namespace, prompt):
+        """Return ``(value, kind, embedding)``; kind is "exact", "semantic" or None on a miss.
+
+        The prompt embedding computed for a semantic lookup is returned so ``put`` can reuse it.
+        """
+        now = time.time()
+        key = self._key(namespace, prompt)
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["value"], "exact", entry["embedding"]
+            has_candidates = any(e["namespace"] == namespace for e in self._entries.values())
+
+        embedding = self.embed(self._normalize(prompt)) if self.embed and has_candidates else None
+        if embedding is not None:
+            terms = _prompt_terms(prompt)
+            with self._lock:
+                best_key, best_score = None, self.threshold
+                for candidate_key, entry in self._entries.items():
+                    if (entry["namespace"] != namespace or entry["embedding"] is None
+                            or entry["terms"] != terms):
+                        continue
+                    score = _cosine_similarity(embedding, entry["embedding"])
+                    if score >= best_score:
+                        best_key, best_score = candidate_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return self._entries[best_key]["value"], "semantic", embedding
+
+        with self._lock:
+            self.misses += 1
+        return None, None, embedding
+
+    def put(self, namespace, prompt, value, embedding=None):
+        if embedding is None and self.embed:
+            embedding = self.embed(self._normalize(prompt))
+        with self._lock:
+            self._entries[self._key(namespace, prompt)] = {
+                "namespace": namespace,
+                "terms": _prompt_terms(prompt),
+                "embedding": embedding,
+                "value": value,
+                "created": time.time(),
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _expire(self, now):
+        expired = [k for k, e in self._entries.items() if now - e["created"] >= self.ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+
+
+llm_translation_cache = PromptTranslationCache()
+
+
 def _query_llm_for_api(
     prompt,
     schema,
     system_template,
     model="global.anthropic.claude-sonnet-4-6",
 ):
-    """Query Bedrock for generating API calls using direct Converse API."""
+    """Query Bedrock for generating API calls using direct Converse API.
+
+    Successful translations are cached per (model, system prompt), so repeated or
+    near-identical prompts skip the model call.
+    """
+    # Format the system prompt with the schema
+    if schema is not None:
+        schema_json = json.dumps(schema, indent=2)
+        system_prompt = system_template.replace("{schema}", schema_json)
+    else:
+        system_prompt = system_template
+
+    namespace = hashlib.sha256(f"{model}\n{system_prompt}".encode("utf-8")).hexdigest()
+    embedding = None
+    if LLM_CACHE_ENABLED:
+        cached, kind, embedding = llm_translation_cache.get(namespace, prompt)
+        print(f"LLM translation cache: {kind or 'miss'} {llm_translation_cache.stats()}")
+        if cached is not None:
+            return {**copy.deepcopy(cached), "cache": kind}
+
     client = get_bedrock_client()
     if not client:
         return {"success": False, "error": "Bedrock client not available"}
@@ -94,12 +570,6 @@ def _query_llm_for_api(
     print(schema)
 
     try:
-        # Format the system prompt with the schema
-        if schema is not None:
-            schema_json = json.dumps(schema, indent=2)
-            system_prompt = system_template.replace("{schema}", schema_json)
-        else:
-            system_prompt = system_template
 
         # Create full prompt
         full_prompt = f"{system_prompt}\n\nUser: {prompt}\n\nAssistant:"
@@ -137,7 +607,10 @@ def _query_llm_for_api(
             result = json.loads(claude_text)
         print("result is ")
         print(result)
-        return {"success": True, "data": result, "raw_response": claude_text}
+        response = {"success": True, "data": result, "raw_response": claude_text}
+        if LLM_CACHE_ENABLED:
+            llm_translation_cache.put(namespace, prompt, response, embedding)
+        return response
 
     except Exception as e:
         print("error")
@@ -154,6 +627,9 @@ def _query_rest_api(
 ):
     """General helper function to query REST APIs with consistent error handling.
 
+    Requests are throttled by the per-host rate limiters, and 429/503 responses are
+    retried after the server's Retry-After delay (see RateLimitedSession).
+
     Parameters
     ----------
     endpoint (str): Full URL endpoint to query
@@ -181,9 +657,9 @@ def _query_rest_api(
     try:
         # Make the API request
         if method.upper() == "GET":
-            response = requests.get(endpoint, params=params, headers=headers, timeout=30)
+            response = get_http_session().get(endpoint, params=params, headers=headers, timeout=30)
         elif method.upper() == "POST":
-            response = requests.post(endpoint, params=params, headers=headers, json=json_data, timeout=30)
+            response = get_http_session().post(endpoint, params=params, headers=headers, json=json_data, timeout=30)
         else:
             return {"error": f"Unsupported HTTP method: {method}"}
         print("response text")
@@ -371,6 +847,24 @@ def _query_ncbi_database(
         }
 
 
+def _query_ncbi_database_batch(database, search_terms, max_results=3):
+    """Run several direct search terms against one NCBI database concurrently.
+
+    Parallelism is capped at NCBI_FANOUT_MAX_WORKERS to stay within the E-utilities rate limit.
+    """
+    def query_one(search_term):
+        return _query_ncbi_database(
+            database=database,
+            search_term=search_term,
+            max_results=max_results,
+        )
+
+    return {
+        "database": database,
+        "results": fan_out(query_one, search_terms, max_workers=NCBI_FANOUT_MAX_WORKERS),
+    }
+
+
 def _format_query_results(result, options=None):
     """A general-purpose formatter for query function results to reduce output size.
 
@@ -545,11 +1039,7 @@ def query_uniprot(
     # If using prompt, parse with Claude
     if prompt:
         # Load UniProt schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "uniprot.json"
-        )
-        with open(schema_path, "r") as f:
-            uniprot_schema = json.load(f)
+        uniprot_schema = load_schema("uniprot")
 
         # Create system prompt template
         system_template = """
@@ -623,6 +1113,7 @@ def query_alphafold(
     file_format="pdb",
     model_version="v4",
     model_number=1,
+    uniprot_ids=None,
 ):
     """Query the AlphaFold Database API for protein structure predictions.
 
@@ -637,21 +1128,39 @@ def query_alphafold(
     file_format (str): Format of the structure file to download - "pdb" or "cif"
     model_version (str): AlphaFold model version - "v4" (latest) or "v3", "v2", "v1"
     model_number (int): Model number (1-5, with 1 being the highest confidence model)
+    uniprot_ids (list, optional): Several UniProt accession IDs to query concurrently instead of uniprot_id
 
     Returns
     -------
     dict: Dictionary containing both the query information and the AlphaFold results
+          (with uniprot_ids, a "results" list holding one such dictionary per accession)
 
     Examples
     --------
     - Basic query: query_alphafold(uniprot_id="P53_HUMAN")
     - Download structure: query_alphafold(uniprot_id="P53_HUMAN", download=True, output_dir="./structures")
     - Get annotations: query_alphafold(uniprot_id="P53_HUMAN", endpoint="annotations")
+    - Gene panel: query_alphafold(uniprot_ids=["P04637", "P38398", "P51587"], endpoint="summary")
 
     """
     # Base URL for AlphaFold API
     base_url = "https://alphafold.ebi.ac.uk/api"
 
+    if uniprot_ids:
+        def query_one(accession):
+            return query_alphafold(
+                accession,
+                endpoint=endpoint,
+                residue_range=residue_range,
+                download=download,
+                output_dir=output_dir,
+                file_format=file_format,
+                model_version=model_version,
+                model_number=model_number,
+            )
+
+        return {"results": fan_out(query_one, uniprot_ids)}
+
     # Ensure we have a UniProt ID
     if not uniprot_id:
         return {"error": "UniProt ID is required"}
@@ -676,7 +1185,7 @@ def query_alphafold(
 
     try:
         # Make the API request
-        response = requests.get(url, timeout=30)
+        response = get_http_session().get(url, timeout=30)
         response.raise_for_status()
 
         # Parse the response as JSON
@@ -701,7 +1210,7 @@ def query_alphafold(
             download_url = f"https://alphafold.ebi.ac.uk/files/{filename}"
 
             # Download the file
-            download_response = requests.get(download_url, timeout=30)
+            download_response = get_http_session().get(download_url, timeout=30)
             if download_response.status_code == 200:
                 with open(file_path, "wb") as f:
                     f.write(download_response.content)
@@ -804,11 +1313,7 @@ def query_interpro(
     # If using prompt, parse with Claude
     if prompt:
         # Load InterPro schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "interpro.json"
-        )
-        with open(schema_path, "r") as f:
-            interpro_schema = json.load(f)
+        interpro_schema = load_schema("interpro")
 
         # Create system prompt template
         system_template = """
@@ -911,10 +1416,7 @@ def query_pdb(
     # Generate search query from natural language if prompt is provided and query is not
     if prompt and not query:
         # Load schema from JSON file
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "pdb.json")
-
-        with open(schema_path, "r") as f:
-            schema = json.load(f)
+        schema = load_schema("pdb")
 
         # Create system prompt template
         system_template = """
@@ -1022,97 +1524,94 @@ def query_pdb_identifiers(
     if not identifiers:
         return {"error": "No identifiers provided"}
 
-    try:
-        # Fetch detailed data using Data API
-        detailed_results = []
-        for identifier in identifiers:
-            try:
-                # Determine the appropriate endpoint based on return_type and identifier format
-                if return_type == "entry":
-                    data_url = f"https://data.rcsb.org/rest/v1/core/entry/{identifier}"
-                elif return_type == "polymer_entity":
-                    entry_id, entity_id = identifier.split("_")
-                    data_url = f"https://data.rcsb.org/rest/v1/core/polymer_entity/{entry_id}/{entity_id}"
-                elif return_type == "nonpolymer_entity":
-                    entry_id, entity_id = identifier.split("_")
-                    data_url = f"https://data.rcsb.org/rest/v1/core/nonpolymer_entity/{entry_id}/{entity_id}"
-                elif return_type == "polymer_instance":
-                    entry_id, asym_id = identifier.split(".")
-                    data_url = f"https://data.rcsb.org/rest/v1/core/polymer_entity_instance/{entry_id}/{asym_id}"
-                elif return_type == "assembly":
-                    entry_id, assembly_id = identifier.split("-")
-                    data_url = f"https://data.rcsb.org/rest/v1/core/assembly/{entry_id}/{assembly_id}"
-                elif return_type == "mol_definition":
-                    data_url = (
-                        f"https://data.rcsb.org/rest/v1/core/chem_comp/{identifier}"
-                    )
+    def fetch_details(identifier):
+        try:
+            # Determine the appropriate endpoint based on return_type and identifier format
+            if return_type == "entry":
+                data_url = f"https://data.rcsb.org/rest/v1/core/entry/{identifier}"
+            elif return_type == "polymer_entity":
+                entry_id, entity_id = identifier.split("_")
+                data_url = f"https://data.rcsb.org/rest/v1/core/polymer_entity/{entry_id}/{entity_id}"
+            elif return_type == "nonpolymer_entity":
+                entry_id, entity_id = identifier.split("_")
+                data_url = f"https://data.rcsb.org/rest/v1/core/nonpolymer_entity/{entry_id}/{entity_id}"
+            elif return_type == "polymer_instance":
+                entry_id, asym_id = identifier.split(".")
+                data_url = f"https://data.rcsb.org/rest/v1/core/polymer_entity_instance/{entry_id}/{asym_id}"
+            elif return_type == "assembly":
+                entry_id, assembly_id = identifier.split("-")
+                data_url = f"https://data.rcsb.org/rest/v1/core/assembly/{entry_id}/{assembly_id}"
+            elif return_type == "mol_definition":
+                data_url = (
+                    f"https://data.rcsb.org/rest/v1/core/chem_comp/{identifier}"
+                )
 
-                # Fetch data
-                data_response = requests.get(data_url, timeout=30)
-                data_response.raise_for_status()
-                entity_data = data_response.json()
-
-                # Filter attributes if specified
-                if attributes:
-                    filtered_data = {}
-                    for attr in attributes:
-                        parts = attr.split(".")
-                        current = entity_data
-                        try:
-                            for part in parts[:-1]:
-                                current = current[part]
-                            filtered_data[attr] = current[parts[-1]]
-                        except (KeyError, TypeError):
-                            filtered_data[attr] = None
-                    entity_data = filtered_data
-
-                detailed_results.append({"identifier": identifier, "data": entity_data})
-            except Exception as e:
-                detailed_results.append({"identifier": identifier, "error": str(e)})
+            # Fetch data
+            data_response = get_http_session().get(data_url, timeout=30)
+            data_response.raise_for_status()
+            entity_data = data_response.json()
+
+            # Filter attributes if specified
+            if attributes:
+                filtered_data = {}
+                for attr in attributes:
+                    parts = attr.split(".")
+                    current = entity_data
+                    try:
+                        for part in parts[:-1]:
+                            current = current[part]
+                        filtered_data[attr] = current[parts[-1]]
+                    except (KeyError, TypeError):
+                        filtered_data[attr] = None
+                entity_data = filtered_data
+
+            return {"identifier": identifier, "data": entity_data}
+        except Exception as e:
+            return {"identifier": identifier, "error": str(e)}
+
+    def download_structure(pdb_id):
+        try:
+            # Download PDB file
+            pdb_url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
+            pdb_response = get_http_session().get(pdb_url, timeout=30)
+
+            if pdb_response.status_code != 200:
+                return {}
+
+            # Create data directory if it doesn't exist
+            data_dir = os.path.join(os.path.dirname(__file__), "data", "pdb")
+            os.makedirs(data_dir, exist_ok=True)
+
+            # Save PDB file
+            pdb_file_path = os.path.join(data_dir, f"{pdb_id}.pdb")
+            with open(pdb_file_path, "wb") as pdb_file:
+                pdb_file.write(pdb_response.content)
+            return {"pdb_file_path": pdb_file_path}
+        except Exception as e:
+            return {"download_error": str(e)}
+
+    try:
+        # Fetch detailed data using Data API, several identifiers at a time
+        detailed_results = fan_out(fetch_details, identifiers)
 
         # Download structure files if requested
         if download:
+            pdb_ids = []
             for identifier in identifiers:
-                if "_" in identifier or "." in identifier or "-" in identifier:
-                    # For non-entry identifiers, extract the PDB ID
-                    if "_" in identifier:
-                        pdb_id = identifier.split("_")[0]
-                    elif "." in identifier:
-                        pdb_id = identifier.split(".")[0]
-                    elif "-" in identifier:
-                        pdb_id = identifier.split("-")[0]
-                else:
-                    pdb_id = identifier
-
-                try:
-                    # Download PDB file
-                    pdb_url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
-                    pdb_response = requests.get(pdb_url, timeout=30)
-
-                    if pdb_response.status_code == 200:
-                        # Create data directory if it doesn't exist
-                        data_dir = os.path.join(
-                            os.path.dirname(__file__), "data", "pdb"
-                        )
-                        os.makedirs(data_dir, exist_ok=True)
-
-                        # Save PDB file
-                        pdb_file_path = os.path.join(data_dir, f"{pdb_id}.pdb")
-                        with open(pdb_file_path, "wb") as pdb_file:
-                            pdb_file.write(pdb_response.content)
-
-                        # Add download information to results
-                        for result in detailed_results:
-                            if result["identifier"] == identifier or result[
-                                "identifier"
-                            ].startswith(pdb_id):
-                                result["pdb_file_path"] = pdb_file_path
-                except Exception as e:
-                    for result in detailed_results:
-                        if result["identifier"] == identifier or result[
-                            "identifier"
-                        ].startswith(pdb_id):
-                            result["download_error"] = str(e)
+                # For non-entry identifiers, extract the PDB ID
+                pdb_id = identifier
+                for separator in ("_", ".", "-"):
+                    if separator in identifier:
+                        pdb_id = identifier.split(separator)[0]
+                        break
+                if pdb_id not in pdb_ids:
+                    pdb_ids.append(pdb_id)
+
+            # Each PDB file is downloaded once, even when several entities share it
+            for pdb_id, download_info in zip(pdb_ids, fan_out(download_structure, pdb_ids)):
+                for result in detailed_results:
+                    if result["identifier"].startswith(pdb_id):
+                        result.update(download_info)
 
         return {"detailed_results": detailed_results}
 
@@ -1156,11 +1655,7 @@ def query_stringdb(
     # If using prompt, parse with Claude
     if prompt:
         # Load STRING schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "stringdb.json"
-        )
-        with open(schema_path, "r") as f:
-            stringdb_schema = json.load(f)
+        stringdb_schema = load_schema("stringdb")
 
         # Create system prompt template
         system_template = """
@@ -1226,7 +1721,7 @@ def query_stringdb(
         if download_image:
             # For images, we need to handle the download manually
             try:
-                response = requests.get(endpoint, stream=True, timeout=30)
+                response = get_http_session().get(endpoint, stream=True, timeout=30)
                 response.raise_for_status()
 
                 # Create output directory if needed
@@ -1331,9 +1826,7 @@ def query_paleobiology(
     # If using prompt, parse with Claude
     if prompt:
         # Load PBDB schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "pbdb.json")
-        with open(schema_path, "r") as f:
-            pbdb_schema = json.load(f)
+        pbdb_schema = load_schema("pbdb")
 
         # Create system prompt template
         system_template = """
@@ -1397,7 +1890,7 @@ def query_paleobiology(
     if is_image:
         # For image queries, we need special handling
         try:
-            response = requests.get(endpoint, timeout=30)
+            response = get_http_session().get(endpoint, timeout=30)
             response.raise_for_status()
 
             # Return image metadata without the binary data
@@ -1470,9 +1963,7 @@ def query_jaspar(
     # If using prompt, parse with Claude
     if prompt:
         # Load JASPAR schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "jaspar.json")
-        with open(schema_path, "r") as f:
-            jaspar_schema = json.load(f)
+        jaspar_schema = load_schema("jaspar")
 
         # Create system prompt template
         system_template = """
@@ -1581,9 +2072,7 @@ def query_worms(
     # If using prompt, parse with Claude
     if prompt:
         # Load WoRMS schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "worms.json")
-        with open(schema_path, "r") as f:
-            worms_schema = json.load(f)
+        worms_schema = load_schema("worms")
 
         # Create system prompt template
         system_template = """
@@ -1689,11 +2178,7 @@ def query_cbioportal(
     # If using prompt, parse with Claude
     if prompt:
         # Load cBioPortal schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "cbioportal.json"
-        )
-        with open(schema_path, "r") as f:
-            cbioportal_schema = json.load(f)
+        cbioportal_schema = load_schema("cbioportal")
 
         # Create system prompt template
         system_template = """
@@ -1771,6 +2256,7 @@ def query_clinvar(
     prompt=None,
     search_term=None,
     max_results=3,
+    search_terms=None,
 ):
     """Take a natural language prompt and convert it to a structured ClinVar query.
 
@@ -1779,22 +2265,22 @@ def query_clinvar(
     prompt (str): Natural language query about genetic variants (e.g., "Find pathogenic BRCA1 variants")
     search_term (str): Direct search term in ClinVar syntax
     max_results (int): Maximum number of results to return
+    search_terms (list, optional): Several direct search terms (e.g. rsIDs) to run concurrently
 
     Returns
     -------
     dict: Dictionary containing both the structured query and the ClinVar results
 
     """
+    if search_terms:
+        return _query_ncbi_database_batch("clinvar", search_terms, max_results=max_results)
+
     if not prompt and not search_term:
         return {"error": "Either a prompt or an endpoint must be provided"}
 
     if prompt:
         # Load ClinVar schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "clinvar.json"
-        )
-        with open(schema_path, "r") as f:
-            clinvar_schema = json.load(f)
+        clinvar_schema = load_schema("clinvar")
 
         # ClinVar system prompt template
         system_prompt_template = """
@@ -1882,9 +2368,7 @@ def query_geo(
 
     if prompt:
         # Load GEO schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "geo.json")
-        with open(schema_path, "r") as f:
-            geo_schema = json.load(f)
+        geo_schema = load_schema("geo")
 
         # Create system prompt template
         system_template = """
@@ -1954,14 +2438,16 @@ def query_dbsnp(
     prompt=None,
     search_term=None,
     max_results=3,
+    search_terms=None,
 ):
     """Query the NCBI dbSNP database using natural language or a direct search term.
 
     Parameters
     ----------
-    prompt (str, required): Natural language query about genetic variants/SNPs
+    prompt (str, optional): Natural language query about genetic variants/SNPs
     search_term (str, optional): Direct search term in dbSNP syntax
     max_results (int): Maximum number of results to return
+    search_terms (list, optional): Several direct search terms (e.g. rsIDs) to run concurrently
 
     Returns
     -------
@@ -1971,16 +2457,18 @@ def query_dbsnp(
     --------
     - Natural language: query_dbsnp("Find pathogenic variants in BRCA1")
     - Direct search: query_dbsnp(search_term="BRCA1[Gene Name] AND pathogenic[Clinical Significance]")
+    - Several variants: query_dbsnp(search_terms=["rs6025[rs]", "rs1799963[rs]"])
 
     """
+    if search_terms:
+        return _query_ncbi_database_batch("snp", search_terms, max_results=max_results)
+
     if not prompt and not search_term:
         return {"error": "Either a prompt or a search term must be provided"}
 
     if prompt:
         # Load dbSNP schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "dbsnp.json")
-        with open(schema_path, "r") as f:
-            dbsnp_schema = json.load(f)
+        dbsnp_schema = load_schema("dbsnp")
 
         # Create system prompt template
         system_template = """
@@ -2071,9 +2559,7 @@ def query_ucsc(
     # If using prompt, parse with Claude
     if prompt:
         # Load UCSC schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "ucsc.json")
-        with open(schema_path, "r") as f:
-            ucsc_schema = json.load(f)
+        ucsc_schema = load_schema("ucsc")
 
         # Create system prompt template
         system_template = """
@@ -2180,11 +2666,7 @@ def query_ensembl(
     # If using prompt, parse with Claude
     if prompt:
         # Load Ensembl schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "ensembl.json"
-        )
-        with open(schema_path, "r") as f:
-            ensembl_schema = json.load(f)
+        ensembl_schema = load_schema("ensembl")
 
         # Create system prompt template
         system_template = """
@@ -2310,11 +2792,7 @@ def query_opentarget(
     # If using prompt, parse with Claude
     if prompt:
         # Load OpenTargets schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "opentarget.json"
-        )
-        with open(schema_path, "r") as f:
-            opentarget_schema = json.load(f)
+        opentarget_schema = load_schema("opentarget")
 
         # Create system prompt template
         system_template = """
@@ -2414,14 +2892,7 @@ def query_monarch(
 
     # If using prompt, use Claude to generate the endpoint
     if prompt:
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "monarch.json"
-        )
-        if os.path.exists(schema_path):
-            with open(schema_path, "r") as f:
-                monarch_schema = json.load(f)
-        else:
-            monarch_schema = None
+        monarch_schema = load_schema("monarch", required=False)
 
         system_template = """
         You are an expert in translating natural language requests into REST API calls for the Monarch Initiative Platform API.
@@ -2547,12 +3018,7 @@ def query_openfda(
 
     # If using prompt, use LLM to generate the endpoint
     if prompt:
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "openfda.json")
-        if os.path.exists(schema_path):
-            with open(schema_path, "r") as f:
-                openfda_schema = json.load(f)
-        else:
-            openfda_schema = None
+        openfda_schema = load_schema("openfda", required=False)
 
         system_template = """
         You are a biomedical informatics expert specialized in using the OpenFDA API.
@@ -2661,11 +3127,7 @@ def query_gwas_catalog(
     # If using prompt, parse with Claude
     if prompt:
         # Load GWAS Catalog schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "gwas_catalog.json"
-        )
-        with open(schema_path, "r") as f:
-            gwas_schema = json.load(f)
+        gwas_schema = load_schema("gwas_catalog")
 
         # Create system prompt template
         system_template = """
@@ -2766,9 +3228,7 @@ def query_gnomad(
     # If using prompt, parse with Claude
     if prompt and not gene_symbol:
         # Load gnomAD schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "gnomad.json")
-        with open(schema_path, "r") as f:
-            gnomad_schema = json.load(f)
+        gnomad_schema = load_schema("gnomad")
 
         # Create system prompt template
         system_template = """
@@ -2879,11 +3339,7 @@ def query_reactome(
     # If using prompt, parse with Claude
     if prompt:
         # Load Reactome schema
-        schema_path = os.path.join(
-            os.path.dirname(__file__), "schema_db", "reactome.json"
-        )
-        with open(schema_path, "r") as f:
-            reactome_schema = json.load(f)
+        reactome_schema = load_schema("reactome")
 
         # Create system prompt template
         system_template = """
@@ -2991,7 +3447,7 @@ def query_reactome(
         if pathway_id and output_dir:
             diagram_url = f"{content_base_url}/data/pathway/{pathway_id}/diagram"
             try:
-                diagram_response = requests.get(diagram_url, timeout=30)
+                diagram_response = get_http_session().get(diagram_url, timeout=30)
                 diagram_response.raise_for_status()
 
                 # Save diagram file
@@ -3144,9 +3600,7 @@ def query_pride(
     # If using prompt, parse with Claude
     if prompt:
         # Load PRIDE schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "pride.json")
-        with open(schema_path, "r") as f:
-            pride_schema = json.load(f)
+        pride_schema = load_schema("pride")
 
         # Create system prompt template
         system_template = """
@@ -3245,9 +3699,7 @@ def query_gtopdb(
     # If using prompt, parse with Claude
     if prompt:
         # Load GtoPdb schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "gtopdb.json")
-        with open(schema_path, "r") as f:
-            gtopdb_schema = json.load(f)
+        gtopdb_schema = load_schema("gtopdb")
 
         # Create system prompt template
         system_template = r"""
@@ -3355,7 +3807,7 @@ def region_to_ccre_screen(
         steps.append(str(data))
 
         # Make the request
-        response = requests.post(url, json=data, timeout=30)
+        response = get_http_session().post(url, json=data, timeout=30)
 
         # Check if the response is successful
         if not response.ok:
@@ -3464,7 +3916,7 @@ def get_genes_near_ccre(
     data = {"accession": accession, "assembly": assembly, "coord_chrom": chromosome}
 
     steps_log += "Sending POST request to API with given data.\n"
-    response = requests.post(url, json=data, timeout=30)
+    response = get_http_session().post(url, json=data, timeout=30)
 
     if not response.ok:
         steps_log += f"API request failed with response: {response.text}\n"
@@ -3532,9 +3984,7 @@ def query_mpd(
     # If using prompt, parse with Claude
     if prompt:
         # Load MPD schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "mpd.json")
-        with open(schema_path, "r") as f:
-            mpd_schema = json.load(f)
+        mpd_schema = load_schema("mpd")
 
         # Create system prompt template
         system_template = """
@@ -3640,9 +4090,7 @@ def query_emdb(
     # If using prompt, parse with Claude
     if prompt:
         # Load EMDB schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "emdb.json")
-        with open(schema_path, "r") as f:
-            emdb_schema = json.load(f)
+        emdb_schema = load_schema("emdb")
 
         # Create system prompt template
         system_template = """
@@ -3902,9 +4350,7 @@ def query_pubchem(
     # If using prompt, parse with Claude
     if prompt:
         # Load PubChem schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "pubchem.json")
-        with open(schema_path, "r") as f:
-            pubchem_schema = json.load(f)
+        pubchem_schema = load_schema("pubchem")
 
         # Create system prompt template
         system_template = """
@@ -3954,17 +4400,8 @@ def query_pubchem(
                 endpoint = f"{base_url}/{endpoint.lstrip('/')}"
         description = "Direct query to provided endpoint"
 
-    # Rate limiting: allow user to configure or disable; only sleep if last request was too recent
-    if not hasattr(query_pubchem, "_last_request_time"):
-        query_pubchem._last_request_time = 0
-    min_interval = 1.0 / 5  # 5 requests per second by default
-    now = time.time()
-    elapsed = now - query_pubchem._last_request_time
-    if elapsed < min_interval:
-        time.sleep(min_interval - elapsed)
-    query_pubchem._last_request_time = time.time()
-
-    # Use the common REST API helper function
+    # Use the common REST API helper function (PubChem's 5 requests/second budget is
+    # enforced by the shared rate limiter registry)
     api_result = _query_rest_api(endpoint=endpoint, method="GET", description=description)
 
     if not verbose and "success" in api_result and api_result["success"] and "result" in api_result:
@@ -4020,9 +4457,7 @@ def query_chembl(
         # Try LLM-based parsing with fallback
         try:
             # Load ChEMBL schema
-            schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "chembl.json")
-            with open(schema_path, "r") as f:
-                chembl_schema = json.load(f)
+            chembl_schema = load_schema("chembl")
 
             # Create system prompt template
             system_template = """
@@ -4245,9 +4680,7 @@ def query_unichem(
     # If using prompt, parse with Claude
     if prompt:
         # Load UniChem schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "unichem.json")
-        with open(schema_path, "r") as f:
-            unichem_schema = json.load(f)
+        unichem_schema = load_schema("unichem")
 
         # Create system prompt template
         system_template = """
@@ -4356,9 +4789,7 @@ def query_clinicaltrials(
     # If using prompt, parse with Claude
     if prompt:
         # Load ClinicalTrials.gov schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "clinicaltrials.json")
-        with open(schema_path, "r") as f:
-            clinicaltrials_schema = json.load(f)
+        clinicaltrials_schema = load_schema("clinicaltrials")
 
         # Create system prompt template
         system_template = """
@@ -4478,9 +4909,7 @@ def query_dailymed(
     # If using prompt, parse with Claude
     if prompt:
         # Load DailyMed schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "dailymed.json")
-        with open(schema_path, "r") as f:
-            dailymed_schema = json.load(f)
+        dailymed_schema = load_schema("dailymed")
 
         # Create system prompt template
         system_template = """
@@ -4586,9 +5015,7 @@ def query_quickgo(
     # If using prompt, parse with Claude
     if prompt:
         # Load QuickGO schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "quickgo.json")
-        with open(schema_path, "r") as f:
-            quickgo_schema = json.load(f)
+        quickgo_schema = load_schema("quickgo")
 
         # Create system prompt template
         system_template = """
@@ -4697,9 +5124,7 @@ def query_encode(
     # If using prompt, parse with Claude
     if prompt:
         # Load ENCODE schema
-        schema_path = os.path.join(os.path.dirname(__file__), "schema_db", "encode.json")
-        with open(schema_path, "r") as f:
-            encode_schema = json.load(f)
+        encode_schema = load_schema("encode")
 
         # Create system prompt template
         system_template = """
@@ -73,7 +73,8 @@ def lambda_handler(event, context):
                 output_dir=event.get('output_dir'),
                 file_format=event.get('file_format', 'pdb'),
                 model_version=event.get('model_version', 'v4'),
-                model_number=event.get('model_number', 1)
+                model_number=event.get('model_number', 1),
+                uniprot_ids=event.get('uniprot_ids')
             )
         elif tool_name == 'query_interpro':
             result = query_interpro(
@@ -120,7 +121,8 @@ def lambda_handler(event, context):
         elif tool_name == 'query_clinvar':
             result = query_clinvar(
                 prompt=event.get('prompt'),
-                search_term=event.get('search_term')
+                search_term=event.get('search_term'),
+                search_terms=event.get('search_terms')
             )
         elif tool_name == 'query_geo':
             result = query_geo(
@@ -130,7 +132,8 @@ def lambda_handler(event, context):
         elif tool_name == 'query_dbsnp':
             result = query_dbsnp(
                 prompt=event.get('prompt'),
-                search_term=event.get('search_term')
+                search_term=event.get('search_term'),
+                search_terms=event.get('search_terms')
             )
         elif tool_name == 'query_ucsc':
             result = query_ucsc(
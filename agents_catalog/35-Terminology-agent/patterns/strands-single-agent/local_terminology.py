@@ -0,0 +1,553 @@
+"""
+Local Terminology Service.
+
+An on-disk mirror of OLS ontologies (MONDO, HPO, EFO, ChEBI, ...) built from their
+OBO exports, with label, synonym and hierarchy lookups. Terms are stored in SQLite:
+- exact label/synonym lookups use a B-tree index on the normalized name
+- free-text search uses an FTS5 full-text index ranked by BM25
+- parent/child lookups use an indexed is_a edge table
+
+Lookups take well under a millisecond, so the agent can resolve terms locally and
+only call the remote OLS MCP server when the local mirror has no answer.
+
+The same lookups are exposed as Strands tools (`local_*`) for the agent and as a
+standalone MCP server:
+
+    # Build the index from OBO downloads (e.g. https://purl.obolibrary.org/obo/mondo.obo)
+    python local_terminology.py build --db terminology.sqlite mondo.obo hp.obo
+
+    # Serve the index over MCP (stdio)
+    python local_terminology.py serve --db terminology.sqlite
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Lookup results cached per process; the index is read-only while serving
+LOOKUP_CACHE_SIZE = int(os.environ.get("LOCAL_TERMINOLOGY_CACHE_SIZE", "10000"))
+# Guard against cycles in malformed hierarchies
+MAX_HIERARCHY_DEPTH = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    term_id TEXT PRIMARY KEY,
+    ontology TEXT NOT NULL,
+    label TEXT NOT NULL,
+    definition TEXT
+);
+CREATE TABLE IF NOT EXISTS names (
+    term_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    name_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS names_normalized ON names (normalized);
+CREATE INDEX IF NOT EXISTS names_term ON names (term_id);
+CREATE TABLE IF NOT EXISTS edges (
+    child_id TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    PRIMARY KEY (child_id, parent_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_parent ON edges (parent_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS names_fts USING fts5 (
+    name, content='names', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+_OBO_QUOTED_PATTERN = re.compile(r'^"((?:[^"\\]|\\.)*)"\s*(\S*)')
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a term name for exact matching.
+
+    Args:
+        text (str): Label or synonym
+
+    Returns:
+        str: Lowercased text with whitespace collapsed
+    """
+    return " ".join(text.lower().split())
+
+
+def parse_obo_terms(obo_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parse the [Term] stanzas of an OBO file.
+
+    Obsolete terms and terms without a name are skipped.
+
+    Args:
+        obo_path (str): Path to the OBO file
+
+    Returns:
+        Iterator[Dict[str, Any]]: Terms with keys id, name, definition,
+            synonyms (list of (text, scope) tuples) and parents (list of ids)
+    """
+    term: Optional[Dict[str, Any]] = None
+    with open(obo_path, encoding="utf-8") as obo_file:
+        for line in obo_file:
+            line = line.strip()
+            if line.startswith("["):
+                if term and term.get("name") and not term["obsolete"]:
+                    yield term
+                # Only [Term] stanzas are kept; [Typedef] and others are skipped
+                term = None
+                if line == "[Term]":
+                    term = {
+                        "id": None,
+                        "name": None,
+                        "definition": None,
+                        "synonyms": [],
+                        "parents": [],
+                        "obsolete": False,
+                    }
+                continue
+            if term is None or not line:
+                continue
+            tag, _, value = line.partition(": ")
+            if tag == "id":
+                term["id"] = value
+            elif tag == "name":
+                term["name"] = value
+            elif tag == "def":
+                match = _OBO_QUOTED_PATTERN.match(value)
+                if match:
+                    term["definition"] = match.group(1).replace('\\"', '"')
+            elif tag == "synonym":
+                # synonym: "text" SCOPE [TYPE] [xrefs]
+                match = _OBO_QUOTED_PATTERN.match(value)
+                if match:
+                    term["synonyms"].append(
+                        (match.group(1).replace('\\"', '"'), match.group(2) or "RELATED")
+                    )
+            elif tag == "is_a":
+                # is_a: MONDO:0005015 ! diabetes mellitus
+                term["parents"].append(value.split(" ", 1)[0])
+            elif tag == "is_obsolete":
+                term["obsolete"] = value == "true"
+    if term and term.get("name") and not term["obsolete"]:
+        yield term
+
+
+class LocalTerminologyIndex:
+    """SQLite index of ontology terms with label, synonym and hierarchy lookups."""
+
+    def __init__(self, db_path: str, read_only: bool = True):
+        """
+        Open a terminology index.
+
+        Args:
+            db_path (str): Path to the SQLite index file
+            read_only (bool): Open the index read-only (fails if it does not exist)
+        """
+        self.db_path = db_path
+        if read_only:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"Local terminology index not found: {db_path}")
+            self._conn = sqlite3.connect(
+                f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        # One connection is shared by the agent's tool threads
+        self._lock = threading.Lock()
+        self.search_terms = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._search_terms)
+        self.get_term_info = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._get_term_info)
+
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        """
+        Run a read query under the connection lock.
+
+        Args:
+            sql (str): SQL statement
+            parameters (Tuple): Statement parameters
+
+        Returns:
+            List[Tuple]: Result rows
+        """
+        with self._lock:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def load_obo(self, obo_path: str, ontology: Optional[str] = None) -> int:
+        """
+        Load (or reload) the terms of an OBO file into the index.
+
+        Args:
+            obo_path (str): Path to the OBO file
+            ontology (Optional[str]): Only load terms with this ID prefix
+                (e.g. "MONDO"); all terms are loaded when omitted
+
+        Returns:
+            int: Number of terms loaded
+        """
+        prefix = ontology.upper() if ontology else None
+        terms, names, edges = [], [], []
+        for term in parse_obo_terms(obo_path=obo_path):
+            term_prefix = term["id"].split(":", 1)[0]
+            if prefix and term_prefix.upper() != prefix:
+                continue
+            terms.append(
+                (term["id"], term_prefix.lower(), term["name"], term["definition"])
+            )
+            names.append((term["id"], term["name"], normalize_name(term["name"]), "label"))
+            for synonym, scope in term["synonyms"]:
+                names.append((term["id"], synonym, normalize_name(synonym), scope))
+            edges.extend((term["id"], parent) for parent in term["parents"])
+
+        with self._lock, self._conn:
+            # Replace earlier versions of the same terms
+            self._conn.executemany(
+                "DELETE FROM names WHERE term_id = ?", [(t[0],) for t in terms]
+            )
+            self._conn.executemany(
+                "DELETE FROM edges WHERE child_id = ?", [(t[0],) for t in terms]
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO terms VALUES (?, ?, ?, ?)", terms)
+            self._conn.executemany("INSERT INTO names VALUES (?, ?, ?, ?)", names)
+            self._conn.executemany("INSERT OR IGNORE INTO edges VALUES (?, ?)", edges)
+            # Re-index the external-content full-text table from the names table
+            self._conn.execute("INSERT INTO names_fts (names_fts) VALUES ('rebuild')")
+        self.search_terms.cache_clear()
+        self.get_term_info.cache_clear()
+        return len(terms)
+
+    def _search_terms(
+        self, query: str, ontology: Optional[str] = None, exact: bool = False, rows: int = 10
+    ) -> Tuple[Dict[str, Any], ...]:
+        """
+        Search terms by label and synonym.
+
+        Exact name matches come first, followed by full-text matches ranked by
+        BM25. Each term appears once, with the best-ranked name that matched.
+
+        Args:
+            query (str): Term text to search for
+            ontology (Optional[str]): Restrict results to one ontology (e.g. "mondo")
+            exact (bool): Only return exact label/synonym matches
+            rows (int): Maximum number of results
+
+        Returns:
+            Tuple[Dict[str, Any], ...]: Matches with term_id, ontology, label,
+                matched_name, match_type and score
+        """
+        ontology_filter = " AND t.ontology = ?" if ontology else ""
+        ontology_parameters = (ontology.lower(),) if ontology else ()
+
+        # Exact label or synonym matches (labels before synonyms)
+        matches = self._query(
+            "SELECT n.term_id, t.ontology, t.label, n.name, n.name_type, 'exact', 0.0 "
+            "FROM names n JOIN terms t ON t.term_id = n.term_id "
+            f"WHERE n.normalized = ?{ontology_filter} "
+            "ORDER BY n.name_type != 'label', n.term_id LIMIT ?",
+            (normalize_name(query), *ontology_parameters, rows),
+        )
+        tokens = _TOKEN_PATTERN.findall(query)
+        if not exact and tokens and len(matches) < rows:
+            # Every token must match; the last one may be a prefix (type-ahead)
+            fts_query = " ".join(f'"{token}"' for token in tokens) + "*"
+            matches += self._query(
+                "SELECT n.term_id, t.ontology, t.label, n.name, n.name_type, "
+                "'full_text', -bm25(names_fts) FROM names_fts "
+                "JOIN names n ON n.rowid = names_fts.rowid "
+                "JOIN terms t ON t.term_id = n.term_id "
+                f"WHERE names_fts MATCH ?{ontology_filter} "
+                "ORDER BY bm25(names_fts) LIMIT ?",
+                (fts_query, *ontology_parameters, rows * 5),
+            )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for term_id, term_ontology, label, name, name_type, match_type, score in matches:
+            if term_id not in results:
+                results[term_id] = {
+                    "term_id": term_id,
+                    "ontology": term_ontology,
+                    "label": label,
+                    "matched_name": name,
+                    "match_type": match_type,
+                    "name_type": name_type,
+                    "score": round(score, 4),
+                }
+        return tuple(results.values())[:rows]
+
+    def _get_term_info(self, term_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a term with its synonyms and direct parents and children.
+
+        Args:
+            term_id (str): Term CURIE (e.g. "MONDO:0005148")
+
+        Returns:
+            Optional[Dict[str, Any]]: Term details, or None if the term is unknown
+        """
+        rows = self._query(
+            "SELECT term_id, ontology, label, definition FROM terms WHERE term_id = ?",
+            (term_id,),
+        )
+        if not rows:
+            return None
+        term_id, ontology, label, definition = rows[0]
+        synonyms = self._query(
+            "SELECT name, name_type FROM names WHERE term_id = ? AND name_type != 'label'",
+            (term_id,),
+        )
+        return {
+            "term_id": term_id,
+            "ontology": ontology,
+            "label": label,
+            "definition": definition,
+            "synonyms": [{"name": name, "scope": scope} for name, scope in synonyms],
+            "parents": self.get_term_parents(term_id=term_id),
+            "children": self.get_term_children(term_id=term_id),
+        }
+
+    def get_term_parents(self, term_id: str) -> List[Dict[str, str]]:
+        """
+        Get the direct is_a parents of a term.
+
+        Args:
+            term_id (str): Term CURIE
+
+        Returns:
+            List[Dict[str, str]]: Parents with term_id and label
+        """
+        rows = self._query(
+            "SELECT e.parent_id, t.label FROM edges e "
+            "LEFT JOIN terms t ON t.term_id = e.parent_id "
+            "WHERE e.child_id = ? ORDER BY e.parent_id",
+            (term_id,),
+        )
+        return [{"term_id": parent_id, "label": label} for parent_id, label in rows]
+
+    def get_term_children(self, term_id: str) -> List[Dict[str, str]]:
+        """
+        Get the direct is_a children of a term.
+
+        Args:
+            term_id (str): Term CURIE
+
+        Returns:
+            List[Dict[str, str]]: Children with term_id and label
+        """
+        rows = self._query(
+            "SELECT e.child_id, t.label FROM edges e "
+            "JOIN terms t ON t.term_id = e.child_id "
+            "WHERE e.parent_id = ? ORDER BY e.child_id",
+            (term_id,),
+        )
+        return [{"term_id": child_id, "label": label} for child_id, label in rows]
+
+    def get_term_ancestors(self, term_id: str) -> List[Dict[str, Any]]:
+        """
+        Get all is_a ancestors of a term, nearest first.
+
+        Args:
+            term_id (str): Term CURIE
+
+        Returns:
+            List[Dict[str, Any]]: Ancestors with term_id, label and distance
+        """
+        rows = self._query(
+            "WITH RECURSIVE ancestors (term_id, depth) AS ("
+            "  SELECT parent_id, 1 FROM edges WHERE child_id = ?"
+            "  UNION"
+            "  SELECT e.parent_id, a.depth + 1 FROM edges e"
+            "  JOIN ancestors a ON e.child_id = a.term_id WHERE a.depth < ?"
+            ") "
+            "SELECT a.term_id, t.label, MIN(a.depth) AS distance FROM ancestors a "
+            "LEFT JOIN terms t ON t.term_id = a.term_id "
+            "GROUP BY a.term_id ORDER BY distance, a.term_id",
+            (term_id, MAX_HIERARCHY_DEPTH),
+        )
+        return [
+            {"term_id": ancestor_id, "label": label, "distance": distance}
+            for ancestor_id, label, distance in rows
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count the terms per ontology in the index.
+
+        Returns:
+            Dict[str, int]: Number of terms keyed by ontology
+        """
+        rows = self._query("SELECT ontology, COUNT(*) FROM terms GROUP BY ontology")
+        return dict(rows)
+
+
+def create_local_terminology_tools(index: LocalTerminologyIndex) -> List[Callable]:
+    """
+    Create Strands tools backed by a local terminology index.
+
+    The tools mirror the OLS MCP tools (`ols_search_terms`, `ols_get_term_info`,
+    `ols_get_term_children`, `ols_get_term_ancestors`) so the agent can try them
+    first and fall back to OLS when they return nothing.
+
+    Args:
+        index (LocalTerminologyIndex): Opened terminology index
+
+    Returns:
+        List[Callable]: Strands tool functions
+    """
+    from strands.tools import tool
+
+    source = f"Local OLS mirror ({os.path.basename(index.db_path)})"
+
+    @tool
+    def local_search_terms(
+        query: str, ontology: Optional[str] = None, exact: bool = False, rows: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Search the local ontology mirror for terms by label or synonym (sub-millisecond).
+
+        Use this before ols_search_terms. If it returns no results, search OLS.
+
+        Args:
+            query: Term text to search for (e.g. "heart attack")
+            ontology: Optional ontology ID to restrict results (e.g. "mondo", "hp", "efo", "chebi")
+            exact: Only return exact label/synonym matches
+            rows: Maximum number of results
+
+        Returns:
+            Dictionary with the query, source, available ontologies and matching terms
+            (term_id, ontology, label, matched_name, match_type, score)
+        """
+        return {
+            "query": query,
+            "source": source,
+            "ontologies": sorted(index.stats()),
+            "results": [
+                dict(match)
+                for match in index.search_terms(query, ontology, exact, rows)
+            ],
+        }
+
+    @tool
+    def local_get_term_info(term_id: str) -> Dict[str, Any]:
+        """
+        Get a term from the local ontology mirror with definition, synonyms, parents and children.
+
+        Args:
+            term_id: Term CURIE (e.g. "MONDO:0005068")
+
+        Returns:
+            Dictionary with the term details, or an error if the term is not in the mirror
+        """
+        info = index.get_term_info(term_id)
+        if info is None:
+            return {"term_id": term_id, "source": source, "error": "Term not in local mirror"}
+        return {**info, "source": source}
+
+    @tool
+    def local_get_term_children(term_id: str) -> Dict[str, Any]:
+        """
+        Get the direct child terms of a term from the local ontology mirror.
+
+        Args:
+            term_id: Term CURIE (e.g. "MONDO:0005068")
+
+        Returns:
+            Dictionary with the term ID, source and children (term_id, label)
+        """
+        return {
+            "term_id": term_id,
+            "source": source,
+            "children": index.get_term_children(term_id=term_id),
+        }
+
+    @tool
+    def local_get_term_ancestors(term_id: str) -> Dict[str, Any]:
+        """
+        Get all ancestor terms of a term from the local ontology mirror, nearest first.
+
+        Args:
+            term_id: Term CURIE (e.g. "MONDO:0005068")
+
+        Returns:
+            Dictionary with the term ID, source and ancestors (term_id, label, distance)
+        """
+        return {
+            "term_id": term_id,
+            "source": source,
+            "ancestors": index.get_term_ancestors(term_id=term_id),
+        }
+
+    return [
+        local_search_terms,
+        local_get_term_info,
+        local_get_term_children,
+        local_get_term_ancestors,
+    ]
+
+
+def create_mcp_server(index: LocalTerminologyIndex):
+    """
+    Create an MCP server exposing the local terminology lookups.
+
+    Args:
+        index (LocalTerminologyIndex): Opened terminology index
+
+    Returns:
+        FastMCP: MCP server with the search_terms, get_term_info,
+            get_term_children and get_term_ancestors tools
+    """
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("local-terminology")
+
+    @server.tool()
+    def search_terms(
+        query: str, ontology: Optional[str] = None, exact: bool = False, rows: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Search ontology terms by label or synonym."""
+        return [dict(match) for match in index.search_terms(query, ontology, exact, rows)]
+
+    @server.tool()
+    def get_term_info(term_id: str) -> Optional[Dict[str, Any]]:
+        """Get a term with its definition, synonyms, parents and children."""
+        return index.get_term_info(term_id)
+
+    @server.tool()
+    def get_term_children(term_id: str) -> List[Dict[str, str]]:
+        """Get the direct child terms of a term."""
+        return index.get_term_children(term_id=term_id)
+
+    @server.tool()
+    def get_term_ancestors(term_id: str) -> List[Dict[str, Any]]:
+        """Get all ancestor terms of a term, nearest first."""
+        return index.get_term_ancestors(term_id=term_id)
+
+    return server
+
+
+def main() -> None:
+    """Build a local terminology index from OBO files, or serve one over MCP."""
+    parser = argparse.ArgumentParser(description="Local terminology service")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Load OBO files into the index")
+    build_parser.add_argument("--db", required=True, help="SQLite index path")
+    build_parser.add_argument("obo_files", nargs="+", help="OBO files to load")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the index over MCP (stdio)")
+    serve_parser.add_argument("--db", required=True, help="SQLite index path")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        index = LocalTerminologyIndex(db_path=args.db, read_only=False)
+        for obo_file in args.obo_files:
+            count = index.load_obo(obo_path=obo_file)
+            print(f"Loaded {count} terms from {obo_file}")
+        print(f"Index terms per ontology: {index.stats()}")
+    else:
+        create_mcp_server(index=LocalTerminologyIndex(db_path=args.db)).run()
+
+
+if __name__ == "__main__":
+    main()
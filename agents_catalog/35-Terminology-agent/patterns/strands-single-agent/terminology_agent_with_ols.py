@@ -4,12 +4,15 @@ Terminology Agent with OLS MCP Server Integration.
 This agent combines:
 - AgentCore Gateway tools (Lambda-based tools)
 - OLS MCP Server tools (Ontology Lookup Service)
+- Local OLS mirror tools (optional, indexed OBO downloads)
 - Code Interpreter tools
 - AgentCore Memory for conversation history
 """
 
 import json
 import os
+import sqlite3
+import threading
 import traceback
 
 import boto3
@@ -33,7 +36,11 @@ from terminology_tools import (
     classify_entity_type,
     generate_standardized_query,
     suggest_ontology_codes,
+    extract_entities_batch,
+    classify_entity_types_batch,
+    suggest_ontology_codes_batch,
 )
+from local_terminology import LocalTerminologyIndex, create_local_terminology_tools
 
 app = BedrockAgentCoreApp()
 
@@ -190,6 +197,13 @@ For terminology standardization queries, follow this prioritized workflow:
      * OLS lookup returned no results AND user needs alternative suggestion
      * Pre-filtering to narrow down search space
 
+### Bulk Inputs
+
+For many queries or terms at once (e.g. a list of eligibility criteria or adverse-event
+verbatims), use the batch tools instead of calling the single-item tools in a loop:
+`extract_entities_batch`, `classify_entity_types_batch` and `suggest_ontology_codes_batch`.
+They return one result per input, in input order, and follow the same source rules.
+
 ### Priority 3: Downstream Processing
 
 6. **Generate standardized output** (if downstream agent query): Use `generate_standardized_query`
@@ -267,6 +281,23 @@ Downstream applications depend on your accuracy and consistency.
 ALWAYS prioritize OLS over LLM knowledge. ALWAYS be transparent about sources.
 """
 
+# Appended to the system prompt when a local OLS mirror is configured
+LOCAL_TERMINOLOGY_PROMPT = """
+## Local OLS Mirror (TRY BEFORE REMOTE OLS)
+
+A local, indexed copy of selected OLS ontologies is available through the `local_*` tools:
+
+- **local_search_terms**: Exact and full-text label/synonym search (sub-millisecond)
+- **local_get_term_info**: Definition, synonyms, parents and children of a term
+- **local_get_term_children**: Direct child terms
+- **local_get_term_ancestors**: All ancestor terms, nearest first
+
+Use the `local_*` tools first for ontologies listed in their `ontologies` field.
+Fall back to the matching `ols_*` tool when the local mirror returns no results or
+the ontology is not mirrored. Local results come from the same OLS ontology releases,
+so they are authoritative: state "From local OLS mirror (authoritative)".
+"""
+
 
 def create_gateway_mcp_client(access_token: str) -> MCPClient:
     """
@@ -324,6 +355,41 @@ def create_ols_mcp_client(access_token: str) -> MCPClient:
     return ols_client
 
 
+# Local OLS mirror tools, created once per process so the SQLite connection and
+# lookup caches are shared across requests (None until first use)
+_local_terminology_tools = None
+_local_terminology_lock = threading.Lock()
+
+
+def get_local_terminology_tools() -> list:
+    """
+    Get the local OLS mirror tools if LOCAL_TERMINOLOGY_DB is set.
+
+    The index is built from OBO downloads with `python local_terminology.py build`.
+    It is opened on first use and reused for the lifetime of the process. A missing
+    or unreadable index is logged and the agent continues with the remote OLS tools.
+
+    Returns:
+        list: Local terminology tools, or an empty list if no usable mirror is configured
+    """
+    global _local_terminology_tools
+    with _local_terminology_lock:
+        if _local_terminology_tools is None:
+            _local_terminology_tools = []
+            db_path = os.environ.get("LOCAL_TERMINOLOGY_DB")
+            if db_path:
+                try:
+                    index = LocalTerminologyIndex(db_path=db_path)
+                    print(f"[AGENT] Local terminology index loaded: {index.stats()}")
+                    _local_terminology_tools = create_local_terminology_tools(index=index)
+                except (OSError, sqlite3.Error) as local_error:
+                    print(
+                        f"[AGENT WARNING] Could not open local terminology index {db_path}: {local_error}"
+                    )
+                    print("[AGENT] Continuing without local OLS mirror tools...")
+        return _local_terminology_tools
+
+
 def create_terminology_agent(user_id: str, session_id: str) -> Agent:
     """
     Create terminology agent with Gateway tools, OLS tools, Code Interpreter, and memory.
@@ -331,10 +397,12 @@ def create_terminology_agent(user_id: str, session_id: str) -> Agent:
     This agent combines multiple tool sources:
     1. Gateway MCP tools - Custom Lambda-based tools
     2. OLS MCP tools - Ontology Lookup Service (200+ ontologies)
-    3. Code Interpreter - For data processing
-    4. AgentCore Memory - For conversation history
+    3. Local OLS mirror tools - Indexed ontology lookups (if LOCAL_TERMINOLOGY_DB is set)
+    4. Code Interpreter - For data processing
+    5. AgentCore Memory - For conversation history
 
-    If OLS MCP server is not deployed, it falls back to Gateway tools only.
+    If OLS MCP server is not deployed, it falls back to the local mirror (if any)
+    and Gateway tools.
     """
     bedrock_model = BedrockModel(
         model_id="us.anthropic.claude-sonnet-4-5-20250929-v1:0", temperature=0.1
@@ -381,6 +449,8 @@ def create_terminology_agent(user_id: str, session_id: str) -> Agent:
             print(f"[AGENT WARNING] Could not create OLS MCP client: {ols_error}")
             print("[AGENT] Continuing without OLS tools...")
 
+        local_tools = get_local_terminology_tools()
+
         # Assemble tool list
         tools = [
             gateway_client,
@@ -389,6 +459,10 @@ def create_terminology_agent(user_id: str, session_id: str) -> Agent:
             classify_entity_type,
             generate_standardized_query,
             suggest_ontology_codes,
+            extract_entities_batch,
+            classify_entity_types_batch,
+            suggest_ontology_codes_batch,
+            *local_tools,
         ]
         if ols_client:
             tools.insert(1, ols_client)  # Add OLS client between Gateway and Code Interpreter
@@ -396,10 +470,19 @@ def create_terminology_agent(user_id: str, session_id: str) -> Agent:
             print(
                 "[AGENT] Agent configured with Gateway + OLS + Code Interpreter + Entity Extraction"
             )
+        elif local_tools:
+            system_prompt = (
+                TERMINOLOGY_AGENT_SYSTEM_PROMPT
+                + "\nNote: Remote OLS tools (`ols_*`) are not currently available; "
+                "use the local mirror only.\n"
+            )
+            print("[AGENT] Agent configured with Gateway + local OLS mirror only")
         else:
             system_prompt = """You are a helpful assistant with access to Gateway tools and Code Interpreter.
             Note: OLS (Ontology Lookup Service) tools are not currently available."""
             print("[AGENT] Agent configured with Gateway + Code Interpreter only")
+        if local_tools:
+            system_prompt += LOCAL_TERMINOLOGY_PROMPT
 
         # Create Agent
         print("[AGENT] Creating Agent instance...")
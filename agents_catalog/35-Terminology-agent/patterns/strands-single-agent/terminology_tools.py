@@ -6,12 +6,16 @@ Uses Amazon Bedrock Converse API for LLM-based extraction and classification.
 """
 
 from strands.tools import tool
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from enum import Enum
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
 import json
 import boto3
 import re
 import os
+import threading
 
 
 class EntityType(str, Enum):
@@ -148,26 +152,7 @@ Extract all medical/scientific entities. Return JSON array only."""
         else:
             entities_raw = []
 
-        # Enrich with position information
-        entities = []
-        for entity in entities_raw:
-            text = entity.get("text", "")
-            # Find position in query (case-insensitive)
-            start_pos = query.lower().find(text.lower())
-            if start_pos != -1:
-                end_pos = start_pos + len(text)
-                entities.append(
-                    {
-                        "text": query[start_pos:end_pos],  # Use exact case from query
-                        "entity_type": entity.get("entity_type", "UNKNOWN"),
-                        "start_pos": start_pos,
-                        "end_pos": end_pos,
-                        "confidence": entity.get("confidence", 0.7),
-                        "context": query,
-                    }
-                )
-
-        return entities
+        return _locate_entities(query, entities_raw)
 
     except Exception as e:
         # Fallback: return empty list on error
@@ -175,6 +160,39 @@ Extract all medical/scientific entities. Return JSON array only."""
         return []
 
 
+def _locate_entities(
+    query: str, entities_raw: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Enrich extracted entities with their position in the query."""
+    entities = []
+    for entity in entities_raw:
+        text = entity.get("text", "")
+        # Find position in query (case-insensitive)
+        start_pos = query.lower().find(text.lower())
+        if start_pos != -1:
+            end_pos = start_pos + len(text)
+            entities.append(
+                {
+                    "text": query[start_pos:end_pos],  # Use exact case from query
+                    "entity_type": entity.get("entity_type", "UNKNOWN"),
+                    "start_pos": start_pos,
+                    "end_pos": end_pos,
+                    "confidence": entity.get("confidence", 0.7),
+                    "context": query,
+                }
+            )
+    return entities
+
+
+def _match_entity_type(response: str) -> str:
+    """Match a model response to a valid entity type."""
+    response_upper = response.strip().upper()
+    for entity_type in EntityType:
+        if entity_type.value in response_upper:
+            return entity_type.value
+    return EntityType.UNKNOWN.value
+
+
 @tool
 def classify_entity_type(entity_text: str, context: str) -> str:
     """
@@ -223,15 +241,7 @@ What type is this entity? Return only the type."""
 
     try:
         response = _call_bedrock_converse(prompt, system_prompt)
-        # Extract the type from response
-        response_upper = response.strip().upper()
-
-        # Match to valid entity types
-        for entity_type in EntityType:
-            if entity_type.value in response_upper:
-                return entity_type.value
-
-        return EntityType.UNKNOWN.value
+        return _match_entity_type(response)
 
     except Exception as e:
         print(f"[TOOL ERROR] classify_entity_type failed: {e}")
@@ -430,6 +440,25 @@ def _generate_warnings(entities: List[Dict[str, Any]]) -> List[str]:
     return warnings
 
 
+def _suggestion_result(
+    term: str, entity_type: str, suggested_codes: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Build a suggest_ontology_codes result with its overall confidence."""
+    if suggested_codes:
+        confidences = [code.get("confidence", 0.5) for code in suggested_codes]
+        overall_confidence = sum(confidences) / len(confidences)
+    else:
+        overall_confidence = 0.0
+
+    return {
+        "term": term,
+        "entity_type": entity_type,
+        "suggested_codes": suggested_codes,
+        "confidence": overall_confidence,
+        "note": "LLM-based suggestions from training data. Verify with authoritative sources (OLS, official APIs) for production use.",
+    }
+
+
 @tool
 def suggest_ontology_codes(
     term: str, entity_type: str, ontologies: List[str] = None
@@ -544,20 +573,7 @@ Suggest ontology codes from your training data knowledge. Return JSON only."""
         else:
             suggested_codes = []
 
-        # Calculate overall confidence
-        if suggested_codes:
-            confidences = [code.get("confidence", 0.5) for code in suggested_codes]
-            overall_confidence = sum(confidences) / len(confidences)
-        else:
-            overall_confidence = 0.0
-
-        return {
-            "term": term,
-            "entity_type": entity_type,
-            "suggested_codes": suggested_codes,
-            "confidence": overall_confidence,
-            "note": "LLM-based suggestions from training data. Verify with authoritative sources (OLS, official APIs) for production use.",
-        }
+        return _suggestion_result(term, entity_type, suggested_codes)
 
     except Exception as e:
         print(f"[TOOL ERROR] suggest_ontology_codes failed: {e}")
@@ -568,3 +584,480 @@ Suggest ontology codes from your training data knowledge. Return JSON only."""
             "confidence": 0.0,
             "note": f"Error generating suggestions: {str(e)}",
         }
+
+
+# --- Batch mode ---
+#
+# Standardizing thousands of eligibility criteria or adverse-event verbatims one
+# item per Converse call is dominated by round trips. The batch tools pack many
+# items into one structured-output request (forced tool use, so the response is
+# JSON matching a schema), split the items into chunks that fit a token budget,
+# run the chunks concurrently, and cache results by normalized text.
+
+# Approximate input/output token budgets per batch request
+BATCH_INPUT_TOKEN_BUDGET = int(os.environ.get("TERMINOLOGY_BATCH_INPUT_TOKENS", "6000"))
+BATCH_OUTPUT_TOKEN_BUDGET = int(os.environ.get("TERMINOLOGY_BATCH_OUTPUT_TOKENS", "8000"))
+# Share of the output budget chunks are sized to fill; the rest is headroom for
+# items that need more than the typical response tokens
+BATCH_OUTPUT_FILL_RATIO = 0.5
+# Concurrent batch requests
+BATCH_MAX_WORKERS = int(os.environ.get("TERMINOLOGY_BATCH_WORKERS", "4"))
+# Results kept per cache (extraction, classification, code suggestions)
+BATCH_CACHE_SIZE = int(os.environ.get("TERMINOLOGY_BATCH_CACHE_SIZE", "50000"))
+# Typical response tokens per item, used to size chunks
+_OUTPUT_TOKENS_PER_ITEM = {"extract": 150, "classify": 20, "suggest": 300}
+
+_ENTITY_TYPE_DESCRIPTIONS = """Entity types:
+- DISEASE: Diseases, conditions, syndromes
+- DRUG: Medications, drugs, treatments
+- GENE: Genes, gene symbols (e.g., IL-23, TNF, BDNF)
+- PROTEIN: Proteins, protein names
+- ANATOMY: Anatomical structures, tissues, organs
+- LAB_TEST: Laboratory tests, measurements, assays
+- PROCEDURE: Medical procedures, surgeries
+- PHENOTYPE: Observable characteristics, symptoms
+- ORGANISM: Species, organisms
+- CHEMICAL: Chemical compounds
+- UNKNOWN: Unclear medical terms"""
+
+_BATCH_EXTRACTION_PROMPT = f"""You are a medical entity extraction expert. You receive a JSON list of queries, each with an id. For EVERY query, extract ALL medical and scientific entities.
+
+{_ENTITY_TYPE_DESCRIPTIONS}
+
+Rules:
+- Return one result per query id, with an empty entities list if it has no entities
+- Use exact text from the query
+- Confidence: 0.9-1.0 (certain), 0.7-0.9 (likely), 0.5-0.7 (possible)"""
+
+_BATCH_CLASSIFICATION_PROMPT = f"""You are a medical terminology classification expert. You receive a JSON list of entities, each with an id and the context it appeared in. Classify EVERY entity.
+
+{_ENTITY_TYPE_DESCRIPTIONS}
+
+Return one result per entity id."""
+
+_BATCH_SUGGESTION_PROMPT = """You are a medical terminology expert with extensive knowledge of medical ontologies. You receive a JSON list of terms, each with an id and entity type. For EVERY term, suggest likely ontology codes in the target ontologies based on your training data knowledge.
+
+Ontologies in your knowledge:
+- MedDRA (Medical Dictionary for Regulatory Activities): Adverse events, medical history
+- SNOMED CT: Clinical terminology for electronic health records
+- ICD-10/11: Disease classification for mortality and morbidity
+- RxNorm: Normalized drug names
+- LOINC: Laboratory observations
+- CPT: Procedures and services
+- Others as relevant
+
+Rules:
+- Return one result per term id, with an empty list if you have no confident suggestion
+- Only suggest codes you have high confidence in from training data
+- Confidence: 0.8-1.0 (very likely), 0.6-0.8 (likely), 0.4-0.6 (possible)
+- Be conservative - better to return fewer high-quality suggestions"""
+
+
+class _ResultCache:
+    """Thread-safe LRU cache of batch results keyed by normalized text."""
+
+    def __init__(self, max_size: int = BATCH_CACHE_SIZE):
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_size = max_size
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a copy of a cached result, or None if it is not cached."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(self._entries[key])
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """Cache a result, evicting the least recently used one when full."""
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_extraction_cache = _ResultCache()
+_classification_cache = _ResultCache()
+_suggestion_cache = _ResultCache()
+
+
+def _normalize_text(text: str) -> str:
+    """Normalize text for cache keys: lowercase with whitespace collapsed."""
+    return " ".join(str(text).lower().split())
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class _OutputTruncated(ValueError):
+    """The structured response was cut off at the output token limit."""
+
+
+def _call_bedrock_structured(
+    prompt: str, system_prompt: str, result_schema: Dict[str, Any], max_tokens: int
+) -> Dict[str, Any]:
+    """
+    Call Bedrock Converse API with a forced tool call for structured output.
+
+    Args:
+        prompt: User prompt
+        system_prompt: System prompt
+        result_schema: JSON schema of the response
+        max_tokens: Maximum response tokens
+
+    Returns:
+        Response object matching the schema
+
+    Raises:
+        _OutputTruncated: If the response hit max_tokens before the structured output was complete
+        ValueError: If the model did not return the structured response
+    """
+    client = _get_bedrock_client()
+
+    response = client.converse(
+        modelId="us.anthropic.claude-sonnet-4-5-20250929-v1:0",  # Claude Sonnet 4.5
+        messages=[{"role": "user", "content": [{"text": prompt}]}],
+        system=[{"text": system_prompt}],
+        inferenceConfig={"temperature": 0.0, "maxTokens": max_tokens},
+        toolConfig={
+            "tools": [
+                {
+                    "toolSpec": {
+                        "name": "record_results",
+                        "description": "Record the result for every input item.",
+                        "inputSchema": {"json": result_schema},
+                    }
+                }
+            ],
+            "toolChoice": {"tool": {"name": "record_results"}},
+        },
+    )
+    if response.get("stopReason") == "max_tokens":
+        raise _OutputTruncated(f"Structured output truncated at {max_tokens} tokens")
+    for block in response["output"]["message"]["content"]:
+        if "toolUse" in block:
+            return block["toolUse"]["input"]
+    raise ValueError(
+        f"No structured output in response (stopReason: {response.get('stopReason')})"
+    )
+
+
+def _chunk_items(
+    items: List[Tuple[Tuple, Dict[str, Any]]], output_tokens_per_item: int
+) -> List[List[Tuple[Tuple, Dict[str, Any]]]]:
+    """
+    Split items into chunks that fit the batch input and output token budgets.
+
+    Args:
+        items: (cache key, model payload) pairs
+        output_tokens_per_item: Expected response tokens per item
+
+    Returns:
+        Chunks of (cache key, model payload) pairs
+    """
+    chunks, chunk, input_tokens = [], [], 0
+    # Every chunk holds at least one item, even if it exceeds the budget
+    max_items = max(1, int(BATCH_OUTPUT_TOKEN_BUDGET * BATCH_OUTPUT_FILL_RATIO) // output_tokens_per_item)
+    for key, payload in items:
+        item_tokens = _estimate_tokens(json.dumps(payload))
+        if chunk and (
+            input_tokens + item_tokens > BATCH_INPUT_TOKEN_BUDGET
+            or len(chunk) >= max_items
+        ):
+            chunks.append(chunk)
+            chunk, input_tokens = [], 0
+        chunk.append((key, payload))
+        input_tokens += item_tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _run_batch(
+    items: Dict[Tuple, Dict[str, Any]],
+    cache: _ResultCache,
+    system_prompt: str,
+    item_schema: Dict[str, Any],
+    output_tokens_per_item: int,
+    parse_result: Callable[[Dict[str, Any]], Any],
+    instructions: str = "",
+) -> Dict[Tuple, Any]:
+    """
+    Resolve items from the cache, then in concurrent structured-output requests.
+
+    Args:
+        items: Model payload per cache key (one entry per distinct normalized item)
+        cache: Result cache for this kind of request
+        system_prompt: System prompt of the batch request
+        item_schema: JSON schema properties of one result (besides its id)
+        output_tokens_per_item: Expected response tokens per item
+        parse_result: Converts one result object into the cached value
+        instructions: Extra instructions prepended to the item list
+
+    Returns:
+        Result per cache key; keys whose chunk failed are missing
+    """
+    results: Dict[Tuple, Any] = {}
+    pending = []
+    for key, payload in items.items():
+        cached = cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append((key, payload))
+
+    result_schema = {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "integer"}, **item_schema},
+                    "required": ["id", *item_schema],
+                },
+            }
+        },
+        "required": ["results"],
+    }
+
+    def run_chunk(chunk: List[Tuple[Tuple, Dict[str, Any]]]) -> Dict[Tuple, Any]:
+        numbered = [{"id": i, **payload} for i, (_, payload) in enumerate(chunk)]
+        prompt = f"{instructions}Items:\n{json.dumps(numbered, ensure_ascii=False)}"
+        try:
+            response = _call_bedrock_structured(
+                prompt, system_prompt, result_schema, max_tokens=BATCH_OUTPUT_TOKEN_BUDGET
+            )
+        except _OutputTruncated:
+            if len(chunk) == 1:
+                raise
+            # Items needed more output than estimated: retry each half on its own and
+            # keep whatever either half answered; only an item that alone overflows fails
+            middle = len(chunk) // 2
+            answered = {}
+            for half in (chunk[:middle], chunk[middle:]):
+                try:
+                    answered.update(run_chunk(half))
+                except Exception as e:
+                    print(f"[TOOL ERROR] batch request for {len(half)} items failed: {e}")
+            return answered
+        answered = {}
+        for result in response.get("results", []):
+            i = result.get("id")
+            # Ignore results for ids the model made up
+            if isinstance(i, int) and 0 <= i < len(chunk):
+                answered[chunk[i][0]] = parse_result(result)
+        return answered
+
+    chunks = _chunk_items(pending, output_tokens_per_item)
+    if not chunks:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(chunks))) as executor:
+        futures = {executor.submit(run_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                answered = future.result()
+            except Exception as e:
+                print(
+                    f"[TOOL ERROR] batch request for {len(futures[future])} items failed: {e}"
+                )
+                continue
+            for key, value in answered.items():
+                cache.put(key, value)
+                results[key] = value
+    return results
+
+
+@tool
+def extract_entities_batch(queries: List[str]) -> List[List[Dict[str, Any]]]:
+    """
+    Extract medical and scientific entities from many queries at once.
+
+    Batch version of extract_entities for large inputs such as eligibility
+    criteria or adverse-event verbatims. Queries are sent in a few concurrent
+    structured-output requests instead of one request each, and results are
+    cached by normalized query text, so repeated queries cost nothing.
+
+    Args:
+        queries: Natural language queries containing medical/scientific terms
+
+    Returns:
+        One list of entities per query, in input order, with the same fields as
+        extract_entities (text, entity_type, start_pos, end_pos, confidence, context).
+        A query whose request failed gets an empty list.
+
+    Example:
+        >>> extract_entities_batch(["History of myocardial infarction", "Taking warfarin"])
+        [
+            [{"text": "myocardial infarction", "entity_type": "DISEASE", ...}],
+            [{"text": "warfarin", "entity_type": "DRUG", ...}]
+        ]
+    """
+    items = {}
+    for query in queries:
+        items.setdefault((_normalize_text(query),), {"query": query})
+
+    results = _run_batch(
+        items,
+        _extraction_cache,
+        _BATCH_EXTRACTION_PROMPT,
+        item_schema={
+            "entities": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "text": {"type": "string"},
+                        "entity_type": {
+                            "type": "string",
+                            "enum": [t.value for t in EntityType],
+                        },
+                        "confidence": {"type": "number"},
+                    },
+                    "required": ["text", "entity_type", "confidence"],
+                },
+            }
+        },
+        output_tokens_per_item=_OUTPUT_TOKENS_PER_ITEM["extract"],
+        parse_result=lambda result: result.get("entities", []),
+    )
+    return [
+        _locate_entities(query, results.get((_normalize_text(query),), []))
+        for query in queries
+    ]
+
+
+@tool
+def classify_entity_types_batch(entities: List[Dict[str, str]]) -> List[str]:
+    """
+    Classify many entities into medical/scientific types at once.
+
+    Batch version of classify_entity_type. Entities are sent in a few concurrent
+    structured-output requests and results are cached by normalized entity text
+    and context.
+
+    Args:
+        entities: Entities to classify, each with "entity_text" and "context"
+
+    Returns:
+        One entity type per input entity, in input order: DISEASE, DRUG, PROCEDURE,
+        LAB_TEST, ANATOMY, PHENOTYPE, GENE, PROTEIN, ORGANISM, CHEMICAL, or UNKNOWN
+        (also returned when the request for the entity failed)
+
+    Example:
+        >>> classify_entity_types_batch([
+        ...     {"entity_text": "aspirin", "context": "patient taking aspirin daily"},
+        ...     {"entity_text": "IL-23", "context": "expression of IL-23 in tissue"},
+        ... ])
+        ["DRUG", "GENE"]
+    """
+    keys = [
+        (_normalize_text(e["entity_text"]), _normalize_text(e.get("context", "")))
+        for e in entities
+    ]
+    items = {}
+    for key, entity in zip(keys, entities):
+        items.setdefault(
+            key, {"entity": entity["entity_text"], "context": entity.get("context", "")}
+        )
+
+    results = _run_batch(
+        items,
+        _classification_cache,
+        _BATCH_CLASSIFICATION_PROMPT,
+        item_schema={
+            "entity_type": {"type": "string", "enum": [t.value for t in EntityType]}
+        },
+        output_tokens_per_item=_OUTPUT_TOKENS_PER_ITEM["classify"],
+        parse_result=lambda result: _match_entity_type(str(result.get("entity_type", ""))),
+    )
+    return [results.get(key, EntityType.UNKNOWN.value) for key in keys]
+
+
+@tool
+def suggest_ontology_codes_batch(
+    terms: List[Dict[str, str]], ontologies: List[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Suggest ontology codes for many terms at once using LLM knowledge.
+
+    Batch version of suggest_ontology_codes, e.g. for mapping adverse-event
+    verbatims to MedDRA. Terms are sent in a few concurrent structured-output
+    requests and results are cached by normalized term, entity type and target
+    ontologies.
+
+    Args:
+        terms: Terms to map, each with "term" and "entity_type"
+        ontologies: Optional list of specific ontologies to search
+                   (e.g., ["MedDRA", "SNOMED CT", "ICD-10"])
+
+    Returns:
+        One result per input term, in input order, with the same fields as
+        suggest_ontology_codes (term, entity_type, suggested_codes, confidence, note)
+
+    Note:
+        These are suggestions based on Claude's training data, not authoritative
+        lookups from official ontology APIs. Always verify critical mappings using
+        OLS or other authoritative sources.
+    """
+    ontology_list = ontologies if ontologies else ["MedDRA", "SNOMED CT", "ICD-10"]
+    ontology_key = tuple(_normalize_text(o) for o in ontology_list)
+
+    keys = [
+        (_normalize_text(t["term"]), (t.get("entity_type") or "UNKNOWN").upper(), ontology_key)
+        for t in terms
+    ]
+    items = {}
+    for key, term in zip(keys, terms):
+        items.setdefault(
+            key,
+            {"term": term["term"], "entity_type": term.get("entity_type") or "UNKNOWN"},
+        )
+
+    results = _run_batch(
+        items,
+        _suggestion_cache,
+        _BATCH_SUGGESTION_PROMPT,
+        item_schema={
+            "suggested_codes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "ontology": {"type": "string"},
+                        "code": {"type": "string"},
+                        "preferred_term": {"type": "string"},
+                        "level": {"type": "string"},
+                        "confidence": {"type": "number"},
+                        "notes": {"type": "string"},
+                    },
+                    "required": ["ontology", "code", "preferred_term", "confidence"],
+                },
+            }
+        },
+        output_tokens_per_item=_OUTPUT_TOKENS_PER_ITEM["suggest"],
+        parse_result=lambda result: result.get("suggested_codes", []),
+        instructions=f"Target Ontologies: {', '.join(ontology_list)}\n\n",
+    )
+
+    suggestions = []
+    for key, term in zip(keys, terms):
+        entity_type = term.get("entity_type") or "UNKNOWN"
+        if key in results:
+            suggestions.append(_suggestion_result(term["term"], entity_type, results[key]))
+        else:
+            suggestions.append(
+                {
+                    "term": term["term"],
+                    "entity_type": entity_type,
+                    "suggested_codes": [],
+                    "confidence": 0.0,
+                    "note": "Error generating suggestions: batch request failed",
+                }
+            )
+    return suggestions